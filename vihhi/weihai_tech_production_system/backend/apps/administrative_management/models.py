@@ -3,6 +3,7 @@ from django.utils import timezone
 from django.db.models import Max, Sum, F, F
 from datetime import datetime
 from decimal import Decimal
+from backend.core.sequence import next_document_number
 from backend.apps.system_management.models import User, Department
 
 
@@ -140,17 +141,7 @@ class SupplyPurchase(models.Model):
     def save(self, *args, **kwargs):
         if not self.purchase_number:
             current_year = datetime.now().year
-            max_purchase = SupplyPurchase.objects.filter(
-                purchase_number__startswith=f'ADM-PUR-{current_year}-'
-            ).aggregate(max_num=Max('purchase_number'))['max_num']
-            if max_purchase:
-                try:
-                    seq = int(max_purchase.split('-')[-1]) + 1
-                except (ValueError, IndexError):
-                    seq = 1
-            else:
-                seq = 1
-            self.purchase_number = f'ADM-PUR-{current_year}-{seq:04d}'
+            self.purchase_number = next_document_number(SupplyPurchase.objects, 'purchase_number', 'ADM-PUR', period=str(current_year))
         super().save(*args, **kwargs)
 
 
@@ -297,17 +288,7 @@ class PurchaseContract(models.Model):
     def save(self, *args, **kwargs):
         if not self.contract_number:
             current_year = datetime.now().year
-            max_contract = PurchaseContract.objects.filter(
-                contract_number__startswith=f'PUR-CON-{current_year}-'
-            ).aggregate(max_num=Max('contract_number'))['max_num']
-            if max_contract:
-                try:
-                    seq = int(max_contract.split('-')[-1]) + 1
-                except (ValueError, IndexError):
-                    seq = 1
-            else:
-                seq = 1
-            self.contract_number = f'PUR-CON-{current_year}-{seq:04d}'
+            self.contract_number = next_document_number(PurchaseContract.objects, 'contract_number', 'PUR-CON', period=str(current_year))
         super().save(*args, **kwargs)
     
     @property
@@ -372,17 +353,7 @@ class PurchasePayment(models.Model):
         if not self.payment_number:
             current_date = datetime.now()
             date_str = current_date.strftime('%Y%m%d')
-            max_payment = PurchasePayment.objects.filter(
-                payment_number__startswith=f'PUR-PAY-{date_str}-'
-            ).aggregate(max_num=Max('payment_number'))['max_num']
-            if max_payment:
-                try:
-                    seq = int(max_payment.split('-')[-1]) + 1
-                except (ValueError, IndexError):
-                    seq = 1
-            else:
-                seq = 1
-            self.payment_number = f'PUR-PAY-{date_str}-{seq:04d}'
+            self.payment_number = next_document_number(PurchasePayment.objects, 'payment_number', 'PUR-PAY', period=date_str)
         super().save(*args, **kwargs)
 
 
@@ -420,17 +391,7 @@ class SupplyRequest(models.Model):
     def save(self, *args, **kwargs):
         if not self.request_number:
             current_year = datetime.now().year
-            max_request = SupplyRequest.objects.filter(
-                request_number__startswith=f'ADM-REQ-{current_year}-'
-            ).aggregate(max_num=Max('request_number'))['max_num']
-            if max_request:
-                try:
-                    seq = int(max_request.split('-')[-1]) + 1
-                except (ValueError, IndexError):
-                    seq = 1
-            else:
-                seq = 1
-            self.request_number = f'ADM-REQ-{current_year}-{seq:04d}'
+            self.request_number = next_document_number(SupplyRequest.objects, 'request_number', 'ADM-REQ', period=str(current_year))
         super().save(*args, **kwargs)
 
 
@@ -495,17 +456,7 @@ class InventoryCheck(models.Model):
         if not self.check_number:
             current_date = datetime.now()
             date_str = current_date.strftime('%Y%m%d')
-            max_check = InventoryCheck.objects.filter(
-                check_number__startswith=f'INV-CHK-{date_str}-'
-            ).aggregate(max_num=Max('check_number'))['max_num']
-            if max_check:
-                try:
-                    seq = int(max_check.split('-')[-1]) + 1
-                except (ValueError, IndexError):
-                    seq = 1
-            else:
-                seq = 1
-            self.check_number = f'INV-CHK-{date_str}-{seq:04d}'
+            self.check_number = next_document_number(InventoryCheck.objects, 'check_number', 'INV-CHK', period=date_str)
         super().save(*args, **kwargs)
     
     @property
@@ -616,17 +567,7 @@ class InventoryAdjust(models.Model):
         if not self.adjust_number:
             current_date = datetime.now()
             date_str = current_date.strftime('%Y%m%d')
-            max_adjust = InventoryAdjust.objects.filter(
-                adjust_number__startswith=f'INV-ADJ-{date_str}-'
-            ).aggregate(max_num=Max('adjust_number'))['max_num']
-            if max_adjust:
-                try:
-                    seq = int(max_adjust.split('-')[-1]) + 1
-                except (ValueError, IndexError):
-                    seq = 1
-            else:
-                seq = 1
-            self.adjust_number = f'INV-ADJ-{date_str}-{seq:04d}'
+            self.adjust_number = next_document_number(InventoryAdjust.objects, 'adjust_number', 'INV-ADJ', period=date_str)
         super().save(*args, **kwargs)
 
 
@@ -734,17 +675,7 @@ class MeetingRoomBooking(models.Model):
     def save(self, *args, **kwargs):
         if not self.booking_number:
             current_year = datetime.now().year
-            max_booking = MeetingRoomBooking.objects.filter(
-                booking_number__startswith=f'ADM-BOOK-{current_year}-'
-            ).aggregate(max_num=Max('booking_number'))['max_num']
-            if max_booking:
-                try:
-                    seq = int(max_booking.split('-')[-1]) + 1
-                except (ValueError, IndexError):
-                    seq = 1
-            else:
-                seq = 1
-            self.booking_number = f'ADM-BOOK-{current_year}-{seq:04d}'
+            self.booking_number = next_document_number(MeetingRoomBooking.objects, 'booking_number', 'ADM-BOOK', period=str(current_year))
         super().save(*args, **kwargs)
 
 
@@ -804,17 +735,7 @@ class Meeting(models.Model):
         if not self.meeting_number:
             current_date = datetime.now()
             date_str = current_date.strftime('%Y%m%d')
-            max_meeting = Meeting.objects.filter(
-                meeting_number__startswith=f'MEET-{date_str}-'
-            ).aggregate(max_num=Max('meeting_number'))['max_num']
-            if max_meeting:
-                try:
-                    seq = int(max_meeting.split('-')[-1]) + 1
-                except (ValueError, IndexError):
-                    seq = 1
-            else:
-                seq = 1
-            self.meeting_number = f'MEET-{date_str}-{seq:04d}'
+            self.meeting_number = next_document_number(Meeting.objects, 'meeting_number', 'MEET', period=date_str)
         super().save(*args, **kwargs)
     
     @property
@@ -1007,17 +928,7 @@ class VehicleBooking(models.Model):
     def save(self, *args, **kwargs):
         if not self.booking_number:
             current_year = datetime.now().year
-            max_booking = VehicleBooking.objects.filter(
-                booking_number__startswith=f'ADM-VEH-{current_year}-'
-            ).aggregate(max_num=Max('booking_number'))['max_num']
-            if max_booking:
-                try:
-                    seq = int(max_booking.split('-')[-1]) + 1
-                except (ValueError, IndexError):
-                    seq = 1
-            else:
-                seq = 1
-            self.booking_number = f'ADM-VEH-{current_year}-{seq:04d}'
+            self.booking_number = next_document_number(VehicleBooking.objects, 'booking_number', 'ADM-VEH', period=str(current_year))
         self.total_cost = self.fuel_cost + self.parking_fee + self.toll_fee + self.other_cost
         super().save(*args, **kwargs)
     
@@ -1155,17 +1066,7 @@ class ReceptionRecord(models.Model):
     def save(self, *args, **kwargs):
         if not self.record_number:
             current_year = datetime.now().year
-            max_record = ReceptionRecord.objects.filter(
-                record_number__startswith=f'ADM-REC-{current_year}-'
-            ).aggregate(max_num=Max('record_number'))['max_num']
-            if max_record:
-                try:
-                    seq = int(max_record.split('-')[-1]) + 1
-                except (ValueError, IndexError):
-                    seq = 1
-            else:
-                seq = 1
-            self.record_number = f'ADM-REC-{current_year}-{seq:04d}'
+            self.record_number = next_document_number(ReceptionRecord.objects, 'record_number', 'ADM-REC', period=str(current_year))
         super().save(*args, **kwargs)
     
     @property
@@ -1369,17 +1270,7 @@ class SealBorrowing(models.Model):
     def save(self, *args, **kwargs):
         if not self.borrowing_number:
             current_year = datetime.now().year
-            max_borrowing = SealBorrowing.objects.filter(
-                borrowing_number__startswith=f'ADM-SEA-{current_year}-'
-            ).aggregate(max_num=Max('borrowing_number'))['max_num']
-            if max_borrowing:
-                try:
-                    seq = int(max_borrowing.split('-')[-1]) + 1
-                except (ValueError, IndexError):
-                    seq = 1
-            else:
-                seq = 1
-            self.borrowing_number = f'ADM-SEA-{current_year}-{seq:04d}'
+            self.borrowing_number = next_document_number(SealBorrowing.objects, 'borrowing_number', 'ADM-SEA', period=str(current_year))
         super().save(*args, **kwargs)
     
     @property
@@ -1432,17 +1323,7 @@ class SealUsage(models.Model):
         if not self.usage_number:
             current_date = datetime.now()
             date_str = current_date.strftime('%Y%m%d')
-            max_usage = SealUsage.objects.filter(
-                usage_number__startswith=f'SEAL-USE-{date_str}-'
-            ).aggregate(max_num=Max('usage_number'))['max_num']
-            if max_usage:
-                try:
-                    seq = int(max_usage.split('-')[-1]) + 1
-                except (ValueError, IndexError):
-                    seq = 1
-            else:
-                seq = 1
-            self.usage_number = f'SEAL-USE-{date_str}-{seq:04d}'
+            self.usage_number = next_document_number(SealUsage.objects, 'usage_number', 'SEAL-USE', period=date_str)
         super().save(*args, **kwargs)
 
 
@@ -1508,17 +1389,7 @@ class FixedAsset(models.Model):
     def save(self, *args, **kwargs):
         if not self.asset_number:
             current_year = datetime.now().year
-            max_asset = FixedAsset.objects.filter(
-                asset_number__startswith=f'ADM-ASSET-{current_year}-'
-            ).aggregate(max_num=Max('asset_number'))['max_num']
-            if max_asset:
-                try:
-                    seq = int(max_asset.split('-')[-1]) + 1
-                except (ValueError, IndexError):
-                    seq = 1
-            else:
-                seq = 1
-            self.asset_number = f'ADM-ASSET-{current_year}-{seq:04d}'
+            self.asset_number = next_document_number(FixedAsset.objects, 'asset_number', 'ADM-ASSET', period=str(current_year))
         super().save(*args, **kwargs)
 
 
@@ -1559,17 +1430,7 @@ class AssetTransfer(models.Model):
     def save(self, *args, **kwargs):
         if not self.transfer_number:
             current_year = datetime.now().year
-            max_transfer = AssetTransfer.objects.filter(
-                transfer_number__startswith=f'ADM-TRF-{current_year}-'
-            ).aggregate(max_num=Max('transfer_number'))['max_num']
-            if max_transfer:
-                try:
-                    seq = int(max_transfer.split('-')[-1]) + 1
-                except (ValueError, IndexError):
-                    seq = 1
-            else:
-                seq = 1
-            self.transfer_number = f'ADM-TRF-{current_year}-{seq:04d}'
+            self.transfer_number = next_document_number(AssetTransfer.objects, 'transfer_number', 'ADM-TRF', period=str(current_year))
         super().save(*args, **kwargs)
 
 
@@ -1661,17 +1522,7 @@ class TravelApplication(models.Model):
         if not self.application_number:
             current_date = datetime.now()
             date_str = current_date.strftime('%Y%m%d')
-            max_app = TravelApplication.objects.filter(
-                application_number__startswith=f'TRAVEL-{date_str}-'
-            ).aggregate(max_num=Max('application_number'))['max_num']
-            if max_app:
-                try:
-                    seq = int(max_app.split('-')[-1]) + 1
-                except (ValueError, IndexError):
-                    seq = 1
-            else:
-                seq = 1
-            self.application_number = f'TRAVEL-{date_str}-{seq:04d}'
+            self.application_number = next_document_number(TravelApplication.objects, 'application_number', 'TRAVEL', period=date_str)
         
         # 自动计算差旅天数
         if self.start_date and self.end_date:
@@ -1740,17 +1591,7 @@ class ExpenseReimbursement(models.Model):
     def save(self, *args, **kwargs):
         if not self.reimbursement_number:
             current_year = datetime.now().year
-            max_expense = ExpenseReimbursement.objects.filter(
-                reimbursement_number__startswith=f'ADM-EXP-{current_year}-'
-            ).aggregate(max_num=Max('reimbursement_number'))['max_num']
-            if max_expense:
-                try:
-                    seq = int(max_expense.split('-')[-1]) + 1
-                except (ValueError, IndexError):
-                    seq = 1
-            else:
-                seq = 1
-            self.reimbursement_number = f'ADM-EXP-{current_year}-{seq:04d}'
+            self.reimbursement_number = next_document_number(ExpenseReimbursement.objects, 'reimbursement_number', 'ADM-EXP', period=str(current_year))
         super().save(*args, **kwargs)
 
 
@@ -1847,17 +1688,7 @@ class AdministrativeAffair(models.Model):
         if not self.affair_number:
             current_date = datetime.now()
             date_str = current_date.strftime('%Y%m%d')
-            max_affair = AdministrativeAffair.objects.filter(
-                affair_number__startswith=f'ADMIN-{date_str}-'
-            ).aggregate(max_num=Max('affair_number'))['max_num']
-            if max_affair:
-                try:
-                    seq = int(max_affair.split('-')[-1]) + 1
-                except (ValueError, IndexError):
-                    seq = 1
-            else:
-                seq = 1
-            self.affair_number = f'ADMIN-{date_str}-{seq:04d}'
+            self.affair_number = next_document_number(AdministrativeAffair.objects, 'affair_number', 'ADMIN', period=date_str)
         super().save(*args, **kwargs)
     
     @property
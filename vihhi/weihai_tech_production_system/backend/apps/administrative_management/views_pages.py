@@ -1,7 +1,7 @@
 from django.contrib.auth.decorators import login_required
 from django.shortcuts import render, get_object_or_404, redirect
 from django.contrib import messages
-from django.db.models import Count, Sum, Q, F, Max
+from django.db.models import Count, Sum, Q, F
 from django.core.paginator import Paginator
 from django.urls import reverse, NoReverseMatch
 from django.utils import timezone
@@ -14,6 +14,7 @@ import functools
 
 from backend.apps.system_management.services import get_user_permission_codes
 from backend.core.views import HOME_NAV_STRUCTURE, _permission_granted, _build_full_top_nav
+from backend.core.sequence import advance_document_sequence, next_document_number
 
 logger = logging.getLogger(__name__)
 
@@ -422,6 +423,13 @@ def _build_administrative_sidebar_nav(permission_set, request_path=None):
     return menu_groups
 
 
+def _advance_manual_number(queryset, field, prefix, number):
+    """手工填写的 {prefix}-{序号} 编号：推进编号计数器"""
+    suffix = number[len(prefix) + 1:] if number.startswith(f'{prefix}-') else ''
+    if suffix.isdigit():
+        advance_document_sequence(queryset, field, prefix, int(suffix))
+
+
 def _context(page_title, page_icon, description, summary_cards=None, sections=None, request=None, use_administrative_nav=False):
     """构建页面上下文
     
@@ -948,17 +956,7 @@ def supply_create(request):
             # 自动生成用品编码
             if not supply.code:
                 current_year = timezone.now().year
-                max_supply = OfficeSupply.objects.filter(
-                    code__startswith=f'SUPPLY-{current_year}-'
-                ).aggregate(max_num=Max('code'))['max_num']
-                if max_supply:
-                    try:
-                        seq = int(max_supply.split('-')[-1]) + 1
-                    except (ValueError, IndexError):
-                        seq = 1
-                else:
-                    seq = 1
-                supply.code = f'SUPPLY-{current_year}-{seq:04d}'
+                supply.code = next_document_number(OfficeSupply.objects, 'code', 'SUPPLY', period=str(current_year))
             supply.created_by = request.user
             supply.save()
             messages.success(request, f'办公用品 {supply.name} 创建成功！')
@@ -1999,19 +1997,11 @@ def meeting_room_create(request):
         form = MeetingRoomForm(request.POST)
         if form.is_valid():
             room = form.save(commit=False)
-            # 自动生成会议室编号
+            # 自动生成会议室编号；手工填写的编号推进计数器，避免之后自动取号撞号
             if not room.code:
-                max_room = MeetingRoom.objects.filter(
-                    code__startswith='ROOM-'
-                ).aggregate(max_code=Max('code'))['max_code']
-                if max_room:
-                    try:
-                        seq = int(max_room.split('-')[-1]) + 1
-                    except (ValueError, IndexError):
-                        seq = 1
-                else:
-                    seq = 1
-                room.code = f'ROOM-{seq:04d}'
+                room.code = next_document_number(MeetingRoom.objects, 'code', 'ROOM')
+            else:
+                _advance_manual_number(MeetingRoom.objects, 'code', 'ROOM', room.code)
             room.save()
             messages.success(request, f'会议室 {room.name} 创建成功！')
             return redirect('admin_pages:meeting_room_detail', room_id=room.id)
@@ -2288,19 +2278,11 @@ def seal_create(request):
         form = SealForm(request.POST)
         if form.is_valid():
             seal = form.save(commit=False)
-            # 自动生成印章编号
+            # 自动生成印章编号；手工填写的编号推进计数器，避免之后自动取号撞号
             if not seal.seal_number:
-                max_seal = Seal.objects.filter(
-                    seal_number__startswith='SEAL-'
-                ).aggregate(max_num=Max('seal_number'))['max_num']
-                if max_seal:
-                    try:
-                        seq = int(max_seal.split('-')[-1]) + 1
-                    except (ValueError, IndexError):
-                        seq = 1
-                else:
-                    seq = 1
-                seal.seal_number = f'SEAL-{seq:04d}'
+                seal.seal_number = next_document_number(Seal.objects, 'seal_number', 'SEAL')
+            else:
+                _advance_manual_number(Seal.objects, 'seal_number', 'SEAL', seal.seal_number)
             seal.save()
             messages.success(request, f'印章 {seal.seal_name} 创建成功！')
             return redirect('admin_pages:seal_detail', seal_id=seal.id)
@@ -2370,17 +2352,7 @@ def asset_create(request):
             # 自动生成资产编号
             if not asset.asset_number:
                 current_year = timezone.now().year
-                max_asset = FixedAsset.objects.filter(
-                    asset_number__startswith=f'ADM-ASSET-{current_year}-'
-                ).aggregate(max_num=Max('asset_number'))['max_num']
-                if max_asset:
-                    try:
-                        seq = int(max_asset.split('-')[-1]) + 1
-                    except (ValueError, IndexError):
-                        seq = 1
-                else:
-                    seq = 1
-                asset.asset_number = f'ADM-ASSET-{current_year}-{seq:04d}'
+                asset.asset_number = next_document_number(FixedAsset.objects, 'asset_number', 'ADM-ASSET', period=str(current_year))
             asset.save()
             messages.success(request, f'固定资产 {asset.asset_name} 创建成功！')
             return redirect('admin_pages:asset_detail', asset_id=asset.id)
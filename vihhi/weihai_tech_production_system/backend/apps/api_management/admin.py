@@ -84,7 +84,7 @@ class ApiInterfaceAdmin(StatusBadgeMixin, AuditAdminMixin, BaseModelAdmin):
             'fields': ('code', 'name', 'external_system', 'description', 'status', 'is_active', 'version')
         }),
         ('接口配置', {
-            'fields': ('url', 'full_url', 'method', 'timeout', 'retry_count')
+            'fields': ('url', 'full_url', 'method', 'timeout', 'retry_count', 'unit_cost')
         }),
         ('认证配置', {
             'fields': ('auth_type', 'auth_config'),
@@ -152,8 +152,8 @@ class ApiInterfaceAdmin(StatusBadgeMixin, AuditAdminMixin, BaseModelAdmin):
 @admin.register(ApiCallLog)
 class ApiCallLogAdmin(StatusBadgeMixin, ReadOnlyAdminMixin, BaseModelAdmin):
     """API调用日志管理（只读）"""
-    list_display = ('api_interface', 'request_method', 'request_url', 'response_status', 'status_badge', 'duration', 'called_by', 'called_time')
-    list_filter = ('status', 'request_method', 'response_status', 'called_time')
+    list_display = ('api_interface', 'request_method', 'request_url', 'response_status', 'status_badge', 'cache_status', 'cost', 'duration', 'called_by', 'called_time')
+    list_filter = ('status', 'cache_status', 'request_method', 'response_status', 'called_time')
     search_fields = ('api_interface__name', 'api_interface__code', 'request_url', 'error_message', 'called_by__username')
     ordering = ('-called_time',)
     raw_id_fields = ('api_interface', 'called_by')
@@ -161,7 +161,7 @@ class ApiCallLogAdmin(StatusBadgeMixin, ReadOnlyAdminMixin, BaseModelAdmin):
     date_hierarchy = 'called_time'
     fieldsets = (
         ('基本信息', {
-            'fields': ('api_interface', 'called_by', 'called_time', 'status', 'duration')
+            'fields': ('api_interface', 'called_by', 'called_time', 'status', 'cache_status', 'cost', 'duration')
         }),
         ('请求信息', {
             'fields': ('request_url', 'request_method', 'request_headers', 'request_params', 'request_body'),
@@ -0,0 +1,26 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api_management', '0002_rename_api_call_lo_api_int_pqr678_idx_api_call_lo_api_int_5f3522_idx_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='apiinterface',
+            name='unit_cost',
+            field=models.DecimalField(decimal_places=4, default=0, max_digits=10, verbose_name='单次调用成本（元）'),
+        ),
+        migrations.AddField(
+            model_name='apicalllog',
+            name='cache_status',
+            field=models.CharField(blank=True, choices=[('', '未缓存'), ('miss', '未命中'), ('hit', '命中'), ('coalesced', '合并查询'), ('bypass', '不缓存')], default='', max_length=20, verbose_name='缓存状态'),
+        ),
+        migrations.AddField(
+            model_name='apicalllog',
+            name='cost',
+            field=models.DecimalField(decimal_places=4, default=0, max_digits=10, verbose_name='调用成本（元）'),
+        ),
+    ]
@@ -101,6 +101,7 @@ class ApiInterface(models.Model):
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='active', verbose_name='状态')
     is_active = models.BooleanField(default=True, verbose_name='是否启用')
     version = models.CharField(max_length=20, default='1.0', verbose_name='版本号')
+    unit_cost = models.DecimalField(max_digits=10, decimal_places=4, default=0, verbose_name='单次调用成本（元）')
     created_by = models.ForeignKey(User, on_delete=models.PROTECT, related_name='created_api_interfaces', verbose_name='创建人')
     created_time = models.DateTimeField(default=timezone.now, verbose_name='创建时间')
     updated_time = models.DateTimeField(auto_now=True, verbose_name='更新时间')
@@ -151,6 +152,14 @@ class ApiCallLog(models.Model):
         ('timeout', '超时'),
     ]
     
+    CACHE_STATUS_CHOICES = [
+        ('', '未缓存'),
+        ('miss', '未命中'),
+        ('hit', '命中'),
+        ('coalesced', '合并查询'),
+        ('bypass', '不缓存'),
+    ]
+    
     api_interface = models.ForeignKey(ApiInterface, on_delete=models.CASCADE, related_name='call_logs', verbose_name='API接口')
     request_url = models.CharField(max_length=500, verbose_name='请求URL')
     request_method = models.CharField(max_length=10, verbose_name='请求方法')
@@ -163,6 +172,8 @@ class ApiCallLog(models.Model):
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, verbose_name='调用状态')
     error_message = models.TextField(blank=True, verbose_name='错误信息')
     duration = models.FloatField(null=True, blank=True, verbose_name='耗时（秒）')
+    cache_status = models.CharField(max_length=20, choices=CACHE_STATUS_CHOICES, blank=True, default='', verbose_name='缓存状态')
+    cost = models.DecimalField(max_digits=10, decimal_places=4, default=0, verbose_name='调用成本（元）')
     called_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='api_calls', verbose_name='调用人')
     called_time = models.DateTimeField(default=timezone.now, verbose_name='调用时间')
     
@@ -0,0 +1,193 @@
+"""
+外部 API 调用基础设施
+
+- get_http_session：按外部系统复用的连接池会话（keep-alive），避免每次调用重新建立 TCP/TLS 连接
+- fetch_with_cache：按（系统，接口，规范化参数）缓存响应，各接口单独设置有效期；
+  并发的相同查询合并为一次外部调用（进程内加锁，跨进程用缓存锁并等待结果）
+- log_api_call：把调用写入 ApiCallLog（含缓存命中情况和计费成本），并累计每日命中 / 未命中计数
+
+付费接口（启信宝等）的同一企业在表单自动填充时会被反复查询，命中缓存即可省去计费调用。
+"""
+import hashlib
+import json
+import logging
+import re
+import threading
+import time
+from decimal import Decimal
+from typing import Callable, Dict, Optional, Tuple
+
+import requests
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+from requests.adapters import HTTPAdapter
+
+from backend.apps.api_management.models import ApiCallLog, ApiInterface
+
+logger = logging.getLogger(__name__)
+
+# 每个外部系统的连接池大小
+HTTP_POOL_SIZE = getattr(settings, 'EXTERNAL_API_POOL_SIZE', 10)
+# 等待其它进程完成相同查询的最长时间（秒），超时后自行调用
+COALESCE_WAIT_SECONDS = 15
+COALESCE_POLL_INTERVAL = 0.1
+
+_sessions: Dict[str, requests.Session] = {}
+_sessions_lock = threading.Lock()
+# 进程内合并相同查询用的分段锁（按缓存键散列，数量固定）
+_inflight_locks = [threading.Lock() for _ in range(64)]
+
+_SPACES = re.compile(r'\s+')
+_FULLWIDTH = str.maketrans({'（': '(', '）': ')', '　': ' '})
+
+
+def get_http_session(system_code: str) -> requests.Session:
+    """外部系统共用的连接池会话（线程安全，进程内复用）"""
+    session = _sessions.get(system_code)
+    if session is None:
+        with _sessions_lock:
+            session = _sessions.get(system_code)
+            if session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=HTTP_POOL_SIZE, pool_maxsize=HTTP_POOL_SIZE)
+                session.mount('http://', adapter)
+                session.mount('https://', adapter)
+                _sessions[system_code] = session
+    return session
+
+
+# ==================== 响应缓存 ====================
+
+def normalize_params(params: Optional[Dict]) -> Dict[str, str]:
+    """
+    规范化查询参数用于缓存键：去掉空值和首尾空白、合并连续空白、全角括号转半角
+
+    如 "威海科技（集团） 有限公司" 与 "威海科技(集团) 有限公司 " 视为同一查询。
+    """
+    normalized = {}
+    for key, value in (params or {}).items():
+        if value is None or value == '':
+            continue
+        normalized[str(key)] = _SPACES.sub(' ', str(value).translate(_FULLWIDTH)).strip()
+    return normalized
+
+
+def response_cache_key(system_code: str, endpoint: str, params: Optional[Dict]) -> str:
+    digest = hashlib.md5(
+        json.dumps(normalize_params(params), sort_keys=True, ensure_ascii=False).encode('utf-8')
+    ).hexdigest()
+    return f'external_api:{system_code}:{endpoint}:{digest}'
+
+
+def _inflight_lock(key: str) -> threading.Lock:
+    return _inflight_locks[int(key.rsplit(':', 1)[-1][:8], 16) % len(_inflight_locks)]
+
+
+def _wait_for_other_process(key: str):
+    deadline = time.monotonic() + COALESCE_WAIT_SECONDS
+    while time.monotonic() < deadline:
+        time.sleep(COALESCE_POLL_INTERVAL)
+        cached = cache.get(key)
+        if cached is not None:
+            return cached
+        if cache.get(f'{key}:lock') is None:
+            # 对方调用失败（失败结果不缓存），不再等待
+            return None
+    return None
+
+
+def fetch_with_cache(system_code: str, endpoint: str, params: Optional[Dict], timeout: Optional[int],
+                     fetch: Callable[[], Tuple[object, bool]]) -> Tuple[object, str]:
+    """
+    读缓存，未命中时调用 fetch() 并缓存结果
+
+    fetch 返回 (结果, 是否可缓存)；只缓存成功的结果，错误和异常不缓存。
+    返回 (结果, 缓存状态)，缓存状态为 hit / miss / coalesced / bypass（timeout 为 0 时不缓存）。
+    """
+    if not timeout:
+        return fetch()[0], 'bypass'
+
+    key = response_cache_key(system_code, endpoint, params)
+    cached = cache.get(key)
+    if cached is not None:
+        return cached, 'hit'
+
+    # 同一进程内的相同查询排队，第一个完成后其余直接读缓存
+    with _inflight_lock(key):
+        cached = cache.get(key)
+        if cached is not None:
+            return cached, 'coalesced'
+
+        lock_key = f'{key}:lock'
+        if not cache.add(lock_key, 1, COALESCE_WAIT_SECONDS * 2):
+            cached = _wait_for_other_process(key)
+            if cached is not None:
+                return cached, 'coalesced'
+        try:
+            result, cacheable = fetch()
+            if cacheable:
+                cache.set(key, result, timeout)
+            return result, 'miss'
+        finally:
+            cache.delete(lock_key)
+
+
+def invalidate_cached_response(system_code: str, endpoint: str, params: Optional[Dict]) -> None:
+    cache.delete(response_cache_key(system_code, endpoint, params))
+
+
+# ==================== 调用日志与计数 ====================
+
+def _stats_key(system_code: str, day, cache_status: str) -> str:
+    return f'external_api:stats:{system_code}:{day:%Y%m%d}:{cache_status}'
+
+
+def _count(system_code: str, cache_status: str) -> None:
+    key = _stats_key(system_code, timezone.localdate(), cache_status)
+    try:
+        cache.incr(key)
+    except ValueError:
+        if not cache.add(key, 1, 3 * 24 * 3600):
+            cache.incr(key)
+
+
+def cache_stats(system_code: str, day=None) -> Dict[str, int]:
+    """某日（默认今天）的 hit / miss / coalesced / bypass 次数"""
+    day = day or timezone.localdate()
+    statuses = ('hit', 'miss', 'coalesced', 'bypass')
+    values = cache.get_many([_stats_key(system_code, day, status) for status in statuses])
+    return {status: values.get(_stats_key(system_code, day, status), 0) for status in statuses}
+
+
+def log_api_call(system_code: str, interface: Optional[ApiInterface], request_url: str, params: Optional[Dict],
+                 cache_status: str, response_status: Optional[int] = None, status: str = 'success',
+                 duration: Optional[float] = None, error_message: str = '', user=None) -> None:
+    """
+    记录一次外部 API 查询
+
+    命中缓存的查询也记录（cache_status=hit/coalesced，成本为 0），实际发出的计费调用成本取接口单价。
+    没有在后台登记接口时只累计计数。日志写入失败不影响业务。
+    """
+    _count(system_code, cache_status)
+    if interface is None:
+        return
+    billable = cache_status in ('miss', 'bypass') and response_status is not None
+    try:
+        with transaction.atomic():
+            ApiCallLog.objects.create(
+                api_interface=interface,
+                request_url=request_url[:500],
+                request_method=interface.method or 'GET',
+                request_params=params or {},
+                response_status=response_status,
+                status=status,
+                error_message=error_message,
+                duration=duration,
+                cache_status=cache_status,
+                cost=interface.unit_cost if billable else Decimal('0'),
+                called_by=user,
+            )
+    except Exception as exc:
+        logger.warning('写入API调用日志失败: %s', exc)
@@ -8,6 +8,7 @@ from backend.apps.archive_management.models import (
     ArchiveProjectArchive,
     ProjectArchiveDocument,
     ArchivePushRecord,
+    ArchiveTask,
     AdministrativeArchive,
     ArchiveBorrow,
     ArchiveDestroy,
@@ -58,6 +59,14 @@ class ArchivePushRecordAdmin(BaseModelAdmin):
     readonly_fields = ('created_time', 'updated_time')
 
 
+@admin.register(ArchiveTask)
+class ArchiveTaskAdmin(ReadOnlyAdminMixin, BaseModelAdmin):
+    """归档任务队列（只读，失败的任务在对象再次保存时重新入队）"""
+    list_display = ('task_type', 'object_id', 'status', 'result', 'attempts', 'available_time', 'created_time', 'finished_time')
+    list_filter = ('task_type', 'status', 'created_time')
+    search_fields = ('idempotency_key', 'last_error')
+
+
 @admin.register(AdministrativeArchive)
 class AdministrativeArchiveAdmin(AuditAdminMixin, BaseModelAdmin):
     """行政档案管理"""
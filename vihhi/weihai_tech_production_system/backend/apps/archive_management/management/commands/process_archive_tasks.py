@@ -0,0 +1,40 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from backend.apps.archive_management.services_tasks import process_archive_tasks
+
+
+class Command(BaseCommand):
+    help = '处理归档任务队列（交付推送、项目自动归档），失败的任务按退避时间重试'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=None,
+            help='每批领取的任务数（默认取 ARCHIVE_TASK_BATCH_SIZE）',
+        )
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            help='常驻运行，每隔 --interval 秒处理一次（无 Celery worker 时使用，可在多个节点同时运行）',
+        )
+        parser.add_argument(
+            '--interval',
+            type=int,
+            default=10,
+            help='常驻运行时的处理间隔（秒），默认10',
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            result = process_archive_tasks(batch_size=options.get('batch_size'))
+            if result['processed'] or not options.get('loop'):
+                self.stdout.write(
+                    f'处理 {result["processed"]} 条：完成 {result["succeeded"]}，跳过 {result["skipped"]}，'
+                    f'重试 {result["retried"]}，失败 {result["failed"]}（{result["batches"]} 批，{result["elapsed"]}s）'
+                )
+            if not options.get('loop'):
+                break
+            time.sleep(options['interval'])
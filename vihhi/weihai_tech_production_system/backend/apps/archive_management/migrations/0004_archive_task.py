@@ -0,0 +1,39 @@
+# Generated by Django 4.2.7 on 2026-10-17 10:05
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('archive_management', '0003_filecategory'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchiveTask',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('task_type', models.CharField(choices=[('delivery_push', '交付推送'), ('project_archive', '项目自动归档')], max_length=30, verbose_name='任务类型')),
+                ('object_id', models.BigIntegerField(help_text='交付记录ID或项目ID', verbose_name='对象ID')),
+                ('idempotency_key', models.CharField(help_text='同一键同时只保留一条待处理任务', max_length=100, verbose_name='幂等键')),
+                ('status', models.CharField(choices=[('pending', '待处理'), ('processing', '处理中'), ('succeeded', '已完成'), ('failed', '失败')], default='pending', max_length=20, verbose_name='状态')),
+                ('attempts', models.IntegerField(default=0, verbose_name='执行次数')),
+                ('available_time', models.DateTimeField(default=django.utils.timezone.now, help_text='失败重试时推迟到该时间', verbose_name='可执行时间')),
+                ('locked_time', models.DateTimeField(blank=True, null=True, verbose_name='领取时间')),
+                ('result', models.CharField(blank=True, max_length=20, verbose_name='处理结果')),
+                ('last_error', models.TextField(blank=True, verbose_name='最近错误')),
+                ('created_time', models.DateTimeField(default=django.utils.timezone.now, verbose_name='创建时间')),
+                ('finished_time', models.DateTimeField(blank=True, null=True, verbose_name='完成时间')),
+            ],
+            options={
+                'verbose_name': '归档任务',
+                'verbose_name_plural': '归档任务',
+                'db_table': 'archive_task',
+                'ordering': ['-created_time'],
+                'indexes': [models.Index(fields=['status', 'available_time'], name='archive_tas_status_e4bc4e_idx')],
+                'constraints': [models.UniqueConstraint(condition=models.Q(('status', 'pending')), fields=('idempotency_key',), name='archive_task_pending_key_uniq')],
+            },
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 4.2.7 on 2026-10-17 00:45
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('archive_management', '0004_archive_task'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='administrativearchive',
+            index=models.Index(fields=['created_time', 'id'], name='administrat_created_9677a8_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='archiveprojectarchive',
+            index=models.Index(fields=['created_time', 'id'], name='archive_pro_created_884874_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='projectdeliveryarchive',
+            index=models.Index(fields=['created_time', 'id'], name='archive_pro_created_a95e71_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='projectdrawingarchive',
+            index=models.Index(fields=['created_time', 'id'], name='archive_pro_created_f85377_idx'),
+        ),
+    ]
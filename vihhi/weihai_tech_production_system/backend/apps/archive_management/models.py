@@ -8,6 +8,7 @@ from django.core.validators import FileExtensionValidator, MinValueValidator, Ma
 from datetime import datetime
 import os
 
+from backend.core.sequence import next_document_number
 from backend.apps.system_management.models import User, Department
 from backend.apps.production_management.models import Project
 from backend.apps.customer_management.models import Client
@@ -363,6 +364,7 @@ class ArchiveProjectArchive(models.Model):
             models.Index(fields=['project', 'status']),
             models.Index(fields=['archive_number']),
             models.Index(fields=['status', '-created_time']),
+            models.Index(fields=['created_time', 'id']),
         ]
     
     def __str__(self):
@@ -371,20 +373,7 @@ class ArchiveProjectArchive(models.Model):
     def generate_archive_number(self):
         """生成归档编号：ARCH-PROJ-{YYYYMMDD}-{序列号}"""
         date_str = timezone.now().strftime('%Y%m%d')
-        prefix = f'ARCH-PROJ-{date_str}-'
-        last_record = ArchiveProjectArchive.objects.filter(
-            archive_number__startswith=prefix
-        ).order_by('-archive_number').first()
-        
-        if last_record:
-            try:
-                seq = int(last_record.archive_number.split('-')[-1]) + 1
-            except (ValueError, IndexError):
-                seq = 1
-        else:
-            seq = 1
-        
-        return f"{prefix}{seq:04d}"
+        return next_document_number(ArchiveProjectArchive.objects, 'archive_number', 'ARCH-PROJ', period=date_str)
     
     def save(self, *args, **kwargs):
         if not self.archive_number:
@@ -493,20 +482,7 @@ class ProjectArchiveDocument(models.Model):
     def generate_document_number(self):
         """生成文档编号：DOC-{YYYYMMDD}-{序列号}"""
         date_str = timezone.now().strftime('%Y%m%d')
-        prefix = f'DOC-{date_str}-'
-        last_record = ProjectArchiveDocument.objects.filter(
-            document_number__startswith=prefix
-        ).order_by('-document_number').first()
-        
-        if last_record:
-            try:
-                seq = int(last_record.document_number.split('-')[-1]) + 1
-            except (ValueError, IndexError):
-                seq = 1
-        else:
-            seq = 1
-        
-        return f"{prefix}{seq:04d}"
+        return next_document_number(ProjectArchiveDocument.objects, 'document_number', 'DOC', period=date_str)
     
     def save(self, *args, **kwargs):
         if not self.document_number:
@@ -567,6 +543,61 @@ class ArchivePushRecord(models.Model):
         return f"{self.delivery_record.delivery_number} - {self.get_push_status_display()}"
 
 
+# ==================== 归档任务队列 ====================
+
+class ArchiveTask(models.Model):
+    """
+    归档任务队列（事务性发件箱）
+
+    交付记录确认、项目保存时，信号只在同一事务中写入一条任务，不在 save() 中执行推送或归档；
+    同一幂等键（如 ``project_archive:12``）同时只保留一条待处理任务，重复写入直接合并。
+    任务由 Celery 任务或 process_archive_tasks 管理命令领取执行，失败按指数退避重试，
+    超过 ARCHIVE_TASK_MAX_ATTEMPTS 次后标记为失败（再次保存对象会重新入队）。
+    """
+    TASK_TYPE_CHOICES = [
+        ('delivery_push', '交付推送'),
+        ('project_archive', '项目自动归档'),
+    ]
+
+    STATUS_CHOICES = [
+        ('pending', '待处理'),
+        ('processing', '处理中'),
+        ('succeeded', '已完成'),
+        ('failed', '失败'),
+    ]
+
+    task_type = models.CharField('任务类型', max_length=30, choices=TASK_TYPE_CHOICES)
+    object_id = models.BigIntegerField('对象ID', help_text='交付记录ID或项目ID')
+    idempotency_key = models.CharField('幂等键', max_length=100, help_text='同一键同时只保留一条待处理任务')
+    status = models.CharField('状态', max_length=20, choices=STATUS_CHOICES, default='pending')
+    attempts = models.IntegerField('执行次数', default=0)
+    available_time = models.DateTimeField('可执行时间', default=timezone.now, help_text='失败重试时推迟到该时间')
+    locked_time = models.DateTimeField('领取时间', null=True, blank=True)
+    result = models.CharField('处理结果', max_length=20, blank=True)
+    last_error = models.TextField('最近错误', blank=True)
+    created_time = models.DateTimeField('创建时间', default=timezone.now)
+    finished_time = models.DateTimeField('完成时间', null=True, blank=True)
+
+    class Meta:
+        db_table = 'archive_task'
+        verbose_name = '归档任务'
+        verbose_name_plural = verbose_name
+        ordering = ['-created_time']
+        indexes = [
+            models.Index(fields=['status', 'available_time']),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=['idempotency_key'],
+                condition=models.Q(status='pending'),
+                name='archive_task_pending_key_uniq',
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.get_task_type_display()}#{self.object_id} {self.get_status_display()}"
+
+
 # ==================== 图纸归档 ====================
 
 class ProjectDrawingArchive(models.Model):
@@ -658,6 +689,7 @@ class ProjectDrawingArchive(models.Model):
             models.Index(fields=['project', 'status']),
             models.Index(fields=['archive_number']),
             models.Index(fields=['status', '-created_time']),
+            models.Index(fields=['created_time', 'id']),
         ]
     
     def __str__(self):
@@ -666,20 +698,7 @@ class ProjectDrawingArchive(models.Model):
     def generate_archive_number(self):
         """生成归档编号：ARCH-DRAW-{YYYYMMDD}-{序列号}"""
         date_str = timezone.now().strftime('%Y%m%d')
-        prefix = f'ARCH-DRAW-{date_str}-'
-        last_record = ProjectDrawingArchive.objects.filter(
-            archive_number__startswith=prefix
-        ).order_by('-archive_number').first()
-        
-        if last_record:
-            try:
-                seq = int(last_record.archive_number.split('-')[-1]) + 1
-            except (ValueError, IndexError):
-                seq = 1
-        else:
-            seq = 1
-        
-        return f"{prefix}{seq:04d}"
+        return next_document_number(ProjectDrawingArchive.objects, 'archive_number', 'ARCH-DRAW', period=date_str)
     
     def save(self, *args, **kwargs):
         if not self.archive_number:
@@ -804,6 +823,7 @@ class ProjectDeliveryArchive(models.Model):
             models.Index(fields=['project', 'status']),
             models.Index(fields=['archive_number']),
             models.Index(fields=['status', '-created_time']),
+            models.Index(fields=['created_time', 'id']),
         ]
     
     def __str__(self):
@@ -812,20 +832,7 @@ class ProjectDeliveryArchive(models.Model):
     def generate_archive_number(self):
         """生成归档编号：ARCH-DELIV-{YYYYMMDD}-{序列号}"""
         date_str = timezone.now().strftime('%Y%m%d')
-        prefix = f'ARCH-DELIV-{date_str}-'
-        last_record = ProjectDeliveryArchive.objects.filter(
-            archive_number__startswith=prefix
-        ).order_by('-archive_number').first()
-        
-        if last_record:
-            try:
-                seq = int(last_record.archive_number.split('-')[-1]) + 1
-            except (ValueError, IndexError):
-                seq = 1
-        else:
-            seq = 1
-        
-        return f"{prefix}{seq:04d}"
+        return next_document_number(ProjectDeliveryArchive.objects, 'archive_number', 'ARCH-DELIV', period=date_str)
     
     def save(self, *args, **kwargs):
         if not self.archive_number:
@@ -915,6 +922,7 @@ class AdministrativeArchive(models.Model):
             models.Index(fields=['category', 'status']),
             models.Index(fields=['archive_number']),
             models.Index(fields=['status', '-created_time']),
+            models.Index(fields=['created_time', 'id']),
         ]
     
     def __str__(self):
@@ -923,20 +931,7 @@ class AdministrativeArchive(models.Model):
     def generate_archive_number(self):
         """生成档案编号：ARCH-{YYYYMMDD}-{序列号}"""
         date_str = timezone.now().strftime('%Y%m%d')
-        prefix = f'ARCH-{date_str}-'
-        last_record = AdministrativeArchive.objects.filter(
-            archive_number__startswith=prefix
-        ).order_by('-archive_number').first()
-        
-        if last_record:
-            try:
-                seq = int(last_record.archive_number.split('-')[-1]) + 1
-            except (ValueError, IndexError):
-                seq = 1
-        else:
-            seq = 1
-        
-        return f"{prefix}{seq:04d}"
+        return next_document_number(AdministrativeArchive.objects, 'archive_number', 'ARCH', period=date_str)
     
     def save(self, *args, **kwargs):
         if not self.archive_number:
@@ -1068,20 +1063,7 @@ class ArchiveBorrow(models.Model):
     def generate_borrow_number(self):
         """生成借阅单号：BOR-{YYYYMMDD}-{序列号}"""
         date_str = timezone.now().strftime('%Y%m%d')
-        prefix = f'BOR-{date_str}-'
-        last_record = ArchiveBorrow.objects.filter(
-            borrow_number__startswith=prefix
-        ).order_by('-borrow_number').first()
-        
-        if last_record:
-            try:
-                seq = int(last_record.borrow_number.split('-')[-1]) + 1
-            except (ValueError, IndexError):
-                seq = 1
-        else:
-            seq = 1
-        
-        return f"{prefix}{seq:04d}"
+        return next_document_number(ArchiveBorrow.objects, 'borrow_number', 'BOR', period=date_str)
     
     def save(self, *args, **kwargs):
         if not self.borrow_number:
@@ -1190,20 +1172,7 @@ class ArchiveDestroy(models.Model):
     def generate_destroy_number(self):
         """生成销毁单号：DES-{YYYYMMDD}-{序列号}"""
         date_str = timezone.now().strftime('%Y%m%d')
-        prefix = f'DES-{date_str}-'
-        last_record = ArchiveDestroy.objects.filter(
-            destroy_number__startswith=prefix
-        ).order_by('-destroy_number').first()
-        
-        if last_record:
-            try:
-                seq = int(last_record.destroy_number.split('-')[-1]) + 1
-            except (ValueError, IndexError):
-                seq = 1
-        else:
-            seq = 1
-        
-        return f"{prefix}{seq:04d}"
+        return next_document_number(ArchiveDestroy.objects, 'destroy_number', 'DES', period=date_str)
     
     def save(self, *args, **kwargs):
         if not self.destroy_number:
@@ -1420,20 +1389,7 @@ class ArchiveInventory(models.Model):
     def generate_inventory_number(self):
         """生成盘点单号：INV-{YYYYMMDD}-{序列号}"""
         date_str = timezone.now().strftime('%Y%m%d')
-        prefix = f'INV-{date_str}-'
-        last_record = ArchiveInventory.objects.filter(
-            inventory_number__startswith=prefix
-        ).order_by('-inventory_number').first()
-        
-        if last_record:
-            try:
-                seq = int(last_record.inventory_number.split('-')[-1]) + 1
-            except (ValueError, IndexError):
-                seq = 1
-        else:
-            seq = 1
-        
-        return f"{prefix}{seq:04d}"
+        return next_document_number(ArchiveInventory.objects, 'inventory_number', 'INV', period=date_str)
     
     def save(self, *args, **kwargs):
         if not self.inventory_number:
@@ -1562,20 +1518,7 @@ class ArchiveDigitizationApply(models.Model):
     def generate_apply_number(self):
         """生成申请编号：DIG-APPLY-{YYYYMMDD}-{序列号}"""
         date_str = timezone.now().strftime('%Y%m%d')
-        prefix = f'DIG-APPLY-{date_str}-'
-        last_record = ArchiveDigitizationApply.objects.filter(
-            apply_number__startswith=prefix
-        ).order_by('-apply_number').first()
-        
-        if last_record:
-            try:
-                seq = int(last_record.apply_number.split('-')[-1]) + 1
-            except (ValueError, IndexError):
-                seq = 1
-        else:
-            seq = 1
-        
-        return f"{prefix}{seq:04d}"
+        return next_document_number(ArchiveDigitizationApply.objects, 'apply_number', 'DIG-APPLY', period=date_str)
     
     def save(self, *args, **kwargs):
         if not self.apply_number:
@@ -1665,20 +1608,7 @@ class ArchiveDigitizationProcess(models.Model):
     def generate_process_number(self):
         """生成处理编号：DIG-PROC-{YYYYMMDD}-{序列号}"""
         date_str = timezone.now().strftime('%Y%m%d')
-        prefix = f'DIG-PROC-{date_str}-'
-        last_record = ArchiveDigitizationProcess.objects.filter(
-            process_number__startswith=prefix
-        ).order_by('-process_number').first()
-        
-        if last_record:
-            try:
-                seq = int(last_record.process_number.split('-')[-1]) + 1
-            except (ValueError, IndexError):
-                seq = 1
-        else:
-            seq = 1
-        
-        return f"{prefix}{seq:04d}"
+        return next_document_number(ArchiveDigitizationProcess.objects, 'process_number', 'DIG-PROC', period=date_str)
     
     def save(self, *args, **kwargs):
         if not self.process_number:
@@ -1760,20 +1690,7 @@ class ArchiveDigitizationResult(models.Model):
     def generate_result_number(self):
         """生成成果编号：DIG-RESULT-{YYYYMMDD}-{序列号}"""
         date_str = timezone.now().strftime('%Y%m%d')
-        prefix = f'DIG-RESULT-{date_str}-'
-        last_record = ArchiveDigitizationResult.objects.filter(
-            result_number__startswith=prefix
-        ).order_by('-result_number').first()
-        
-        if last_record:
-            try:
-                seq = int(last_record.result_number.split('-')[-1]) + 1
-            except (ValueError, IndexError):
-                seq = 1
-        else:
-            seq = 1
-        
-        return f"{prefix}{seq:04d}"
+        return next_document_number(ArchiveDigitizationResult.objects, 'result_number', 'DIG-RESULT', period=date_str)
     
     def save(self, *args, **kwargs):
         if not self.result_number:
@@ -17,6 +17,7 @@ from backend.apps.archive_management.models import (
     ArchiveDestroy,
     ArchiveCategory,
 )
+from backend.apps.archive_management.services_tasks import collect_project_archive_files
 
 # 尝试导入扩展模型
 try:
@@ -203,106 +204,8 @@ class ProjectArchiveService:
         archive.executed_time = timezone.now()
         archive.save()
         
-        # 收集归档文件
-        file_list = []
-        
-        # 1. 项目基本信息
-        file_list.append({
-            'type': 'project_info',
-            'name': f'{project.project_number}_项目信息.json',
-            'data': {
-                'project_number': project.project_number,
-                'project_name': project.project_name,
-                'client': project.client.name if project.client else None,
-                'contract_amount': str(project.contract_amount) if project.contract_amount else None,
-            }
-        })
-        
-        # 2. 交付文件（已自动归档的交付文件）
-        delivery_documents = ProjectArchiveDocument.objects.filter(
-            project=project,
-            document_type='delivery_file',
-            status='archived'
-        )
-        for doc in delivery_documents:
-            file_list.append({
-                'type': 'delivery_file',
-                'document_id': doc.id,
-                'document_number': doc.document_number,
-                'name': doc.document_name,
-            })
-        
-        # 3. 图纸文件（从图纸管理模块获取）
-        try:
-            from backend.apps.production_management.models import ProjectDrawingFile, ProjectDrawingSubmission
-            drawing_submissions = ProjectDrawingSubmission.objects.filter(project=project)
-            for submission in drawing_submissions:
-                drawing_files = ProjectDrawingFile.objects.filter(submission=submission)
-                for drawing_file in drawing_files:
-                    file_list.append({
-                        'type': 'drawing',
-                        'submission_id': submission.id,
-                        'drawing_file_id': drawing_file.id,
-                        'name': drawing_file.name,
-                        'category': drawing_file.category,
-                    })
-        except ImportError:
-            # 如果图纸管理模块不存在，跳过
-            pass
-        
-        # 4. 结算文件（从结算管理模块获取）
-        try:
-            from backend.apps.settlement_center.models import ProjectSettlement
-            settlements = ProjectSettlement.objects.filter(project=project, status='confirmed')
-            for settlement in settlements:
-                if settlement.settlement_file:
-                    file_list.append({
-                        'type': 'settlement',
-                        'settlement_id': settlement.id,
-                        'settlement_number': settlement.settlement_number,
-                        'name': f'结算文件_{settlement.settlement_number}',
-                        'file_path': settlement.settlement_file.name if settlement.settlement_file else None,
-                    })
-        except ImportError:
-            # 如果结算模块不存在，跳过
-            pass
-        
-        # 5. 回款文件（从回款管理模块获取）
-        try:
-            from backend.apps.settlement_center.models import PaymentRecord
-            # 注意：PaymentRecord可能通过payment_plan关联项目，需要根据实际模型结构调整
-            # 这里假设可以直接通过project关联，如果不行需要调整
-            payment_records = PaymentRecord.objects.filter(
-                payment_plan_type='project',
-                status='confirmed'
-            )
-            # 需要通过payment_plan关联到project，这里简化处理
-            # 实际实现需要根据PaymentRecord的实际关联关系调整
-            for payment in payment_records:
-                if payment.receipt_voucher:
-                    file_list.append({
-                        'type': 'payment',
-                        'payment_id': payment.id,
-                        'payment_number': payment.payment_number,
-                        'name': f'回款凭证_{payment.payment_number}',
-                        'file_path': payment.receipt_voucher.name if payment.receipt_voucher else None,
-                    })
-        except ImportError:
-            # 如果回款模块不存在，跳过
-            pass
-        
-        # 6. 其他项目文档
-        project_documents = ProjectArchiveDocument.objects.filter(
-            project=project
-        ).exclude(document_type='delivery_file')
-        
-        for doc in project_documents:
-            file_list.append({
-                'type': doc.document_type,
-                'document_id': doc.id,
-                'document_number': doc.document_number,
-                'name': doc.document_name,
-            })
+        # 收集归档文件（项目信息、交付文件、图纸、结算文件及其他项目文档）
+        file_list = collect_project_archive_files(project, include_project_documents=True)
         
         # 更新归档记录
         archive.file_list = file_list
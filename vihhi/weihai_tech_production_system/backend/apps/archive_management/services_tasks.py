@@ -0,0 +1,310 @@
+"""
+归档任务队列
+记录并处理交付推送、项目自动归档等后台任务
+"""
+import logging
+import time
+from datetime import timedelta
+from typing import Optional
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import F, Prefetch, Q, prefetch_related_objects
+from django.utils import timezone
+
+from backend.apps.archive_management.models import (
+    ArchiveProjectArchive,
+    ArchivePushRecord,
+    ArchiveTask,
+    ProjectArchiveDocument,
+)
+from backend.apps.delivery_customer.models import DeliveryRecord
+from backend.apps.production_management.models import Project, ProjectDrawingFile, ProjectDrawingSubmission
+from backend.core.sequence import reserve_document_numbers
+from backend.core.task_dispatch import dispatch_task
+
+try:
+    from backend.apps.settlement_center.models import ProjectSettlement
+except ImportError:
+    # 结算模块不存在时跳过结算相关的检查和文件
+    ProjectSettlement = None
+
+logger = logging.getLogger(__name__)
+
+ARCHIVE_TASK_EAGER = getattr(settings, 'ARCHIVE_TASK_EAGER', False)
+ARCHIVE_TASK_BATCH_SIZE = getattr(settings, 'ARCHIVE_TASK_BATCH_SIZE', 50)
+ARCHIVE_TASK_MAX_ATTEMPTS = getattr(settings, 'ARCHIVE_TASK_MAX_ATTEMPTS', 5)
+ARCHIVE_TASK_LOCK_TIMEOUT = getattr(settings, 'ARCHIVE_TASK_LOCK_TIMEOUT', 600)
+# 第 n 次失败后推迟 RETRY_BASE_DELAY * 2^(n-1) 秒重试
+RETRY_BASE_DELAY = 60
+
+# 交付记录处于这些状态时推送到档案管理
+DELIVERY_PUSH_STATUSES = ('confirmed', 'feedback_received')
+# 交付记录处于这些状态时视为已完成（项目归档条件）
+DELIVERY_DONE_STATUSES = ('confirmed', 'feedback_received', 'archived', 'cancelled')
+
+
+# ==================== 入队与投递 ====================
+
+def enqueue_archive_task(task_type: str, object_id: int) -> None:
+    """在当前事务中写入归档任务（同一对象已有待处理任务时合并），事务提交后投递处理"""
+    ArchiveTask.objects.bulk_create(
+        [ArchiveTask(task_type=task_type, object_id=object_id, idempotency_key=f'{task_type}:{object_id}')],
+        ignore_conflicts=True,
+    )
+    transaction.on_commit(dispatch_archive_tasks)
+
+
+def dispatch_archive_tasks() -> None:
+    from backend.apps.archive_management.tasks import process_archive_tasks as task
+
+    dispatch_task(task, eager=ARCHIVE_TASK_EAGER)
+
+
+# ==================== 任务处理 ====================
+
+def check_project_archive_conditions(project: Project) -> bool:
+    """
+    检查项目是否满足自动归档条件
+    1. 项目有已确认的结算记录（结算模块存在时）
+    2. 所有交付记录已完成（已确认 / 已反馈 / 已归档 / 已取消）
+    """
+    if ProjectSettlement is not None:
+        if not ProjectSettlement.objects.filter(project=project, status='confirmed').exists():
+            return False
+    return not DeliveryRecord.objects.filter(project=project).exclude(status__in=DELIVERY_DONE_STATUSES).exists()
+
+
+def collect_project_archive_files(project: Project, include_project_documents: bool = False) -> list:
+    """
+    收集项目归档文件清单：项目信息、交付文件、图纸、结算文件（include_project_documents 时再加其他项目文档）
+
+    图纸提交与文件、档案文档、结算记录各一条预取查询，与图纸提交数无关。
+    """
+    lookups = [
+        Prefetch('drawing_submissions', queryset=ProjectDrawingSubmission.objects.only('id', 'project_id').order_by('id')),
+        Prefetch('drawing_submissions__files',
+                 queryset=ProjectDrawingFile.objects.only('id', 'submission_id', 'name', 'category').order_by('id')),
+        Prefetch('archive_documents', to_attr='archive_document_list',
+                 queryset=ProjectArchiveDocument.objects.only(
+                     'id', 'project_id', 'document_number', 'document_name', 'document_type', 'status',
+                 ).order_by('id')),
+    ]
+    if ProjectSettlement is not None:
+        lookups.append(Prefetch(
+            'settlements_center', to_attr='confirmed_settlement_list',
+            queryset=ProjectSettlement.objects.filter(status='confirmed').exclude(
+                Q(settlement_file='') | Q(settlement_file__isnull=True)
+            ).only('id', 'project_id', 'settlement_number', 'settlement_file').order_by('id'),
+        ))
+    prefetch_related_objects([project], *lookups)
+
+    file_list = [{
+        'type': 'project_info',
+        'name': f'{project.project_number}_项目信息.json',
+        'data': {
+            'project_number': project.project_number,
+            'project_name': project.name,
+            'client': project.client.name if project.client else None,
+            'contract_amount': str(project.contract_amount) if project.contract_amount else None,
+        }
+    }]
+    documents = project.archive_document_list
+    file_list.extend({
+        'type': 'delivery_file',
+        'document_id': doc.id,
+        'document_number': doc.document_number,
+        'name': doc.document_name,
+    } for doc in documents if doc.document_type == 'delivery_file' and doc.status == 'archived')
+    for submission in project.drawing_submissions.all():
+        file_list.extend({
+            'type': 'drawing',
+            'submission_id': submission.id,
+            'drawing_file_id': drawing_file.id,
+            'name': drawing_file.name,
+            'category': drawing_file.category,
+        } for drawing_file in submission.files.all())
+    file_list.extend({
+        'type': 'settlement',
+        'settlement_id': settlement.id,
+        'settlement_number': settlement.settlement_number,
+        'name': f'结算文件_{settlement.settlement_number}',
+        'file_path': settlement.settlement_file.name,
+    } for settlement in getattr(project, 'confirmed_settlement_list', []))
+    # 回款凭证：项目回款计划模型已删除，回款记录无法关联到具体项目，不再收集
+    # （原实现把全部项目的已确认回款凭证都计入每个项目的归档清单）
+    if include_project_documents:
+        file_list.extend({
+            'type': doc.document_type,
+            'document_id': doc.id,
+            'document_number': doc.document_number,
+            'name': doc.document_name,
+        } for doc in documents if doc.document_type != 'delivery_file')
+    return file_list
+
+
+def push_delivery_to_archive(task: ArchiveTask) -> str:
+    """交付记录已确认/已反馈时，把交付文件登记为项目档案文档（编号一次预留、批量写入）"""
+    delivery = (
+        DeliveryRecord.objects.select_related('project', 'created_by')
+        .prefetch_related('files').filter(pk=task.object_id).first()
+    )
+    if delivery is None or delivery.status not in DELIVERY_PUSH_STATUSES:
+        return 'skipped'
+    if ArchivePushRecord.objects.filter(delivery_record=delivery, push_status='success').exists():
+        return 'skipped'
+
+    files = list(delivery.files.all())
+    numbers = reserve_document_numbers(
+        ProjectArchiveDocument.objects, 'document_number', 'DOC', len(files),
+        period=timezone.now().strftime('%Y%m%d'),
+    ) if files else []
+    documents = ProjectArchiveDocument.objects.bulk_create([
+        ProjectArchiveDocument(
+            document_number=number,
+            document_name=delivery_file.file_name,
+            document_type='delivery_file',
+            project=delivery.project,
+            file=delivery_file.file,
+            file_name=delivery_file.file_name,
+            file_size=delivery_file.file_size,
+            file_extension=delivery_file.file_extension or '',
+            mime_type=delivery_file.mime_type or '',
+            description=f'交付文件：{delivery.delivery_number}',
+            status='archived',
+            uploaded_by=delivery.created_by,
+        )
+        for number, delivery_file in zip(numbers, files)
+    ])
+    ArchivePushRecord.objects.create(
+        delivery_record=delivery,
+        project=delivery.project,
+        push_status='success',
+        push_time=task.created_time,
+        receive_time=timezone.now(),
+        retry_count=task.attempts - 1,
+        pushed_files=[{
+            'document_id': document.id,
+            'document_number': document.document_number,
+            'file_name': document.file_name,
+        } for document in documents],
+    )
+    return 'pushed'
+
+
+def auto_archive_project(task: ArchiveTask) -> str:
+    """项目满足归档条件且尚未归档时，收集归档文件并直接生成已归档记录"""
+    project = Project.objects.select_related('client', 'project_manager', 'created_by').filter(pk=task.object_id).first()
+    if project is None:
+        return 'skipped'
+    if ArchiveProjectArchive.objects.filter(project=project, status='archived').exists():
+        return 'skipped'
+    if not check_project_archive_conditions(project):
+        return 'skipped'
+    applicant = project.project_manager or project.created_by
+    if not applicant:
+        return 'skipped'
+
+    now = timezone.now()
+    ArchiveProjectArchive.objects.create(
+        project=project,
+        archive_reason='项目结算完成，自动归档',
+        archive_description='项目已结算，满足归档条件，系统自动触发归档',
+        status='archived',
+        applicant=applicant,
+        executor=applicant,  # 自动归档以申请人作为执行人和确认人
+        executed_time=now,
+        confirmed_by=applicant,
+        confirmed_time=now,
+        file_list=collect_project_archive_files(project),
+    )
+    return 'archived'
+
+
+HANDLERS = {
+    'delivery_push': push_delivery_to_archive,
+    'project_archive': auto_archive_project,
+}
+
+
+# ==================== 队列处理 ====================
+
+def _claim_tasks(batch_size: int, now) -> list:
+    """领取一批到期任务并标记为处理中（短事务，SKIP LOCKED）"""
+    stale = now - timedelta(seconds=ARCHIVE_TASK_LOCK_TIMEOUT)
+    busy_keys = ArchiveTask.objects.filter(status='processing', locked_time__gt=stale).values('idempotency_key')
+    with transaction.atomic():
+        tasks = list(
+            ArchiveTask.objects.select_for_update(skip_locked=True)
+            .filter(Q(status='pending', available_time__lte=now) | Q(status='processing', locked_time__lte=stale))
+            .exclude(idempotency_key__in=busy_keys)
+            .order_by('available_time', 'id')[:batch_size]
+        )
+        if tasks:
+            ArchiveTask.objects.filter(pk__in=[task.pk for task in tasks]).update(
+                status='processing', locked_time=now, attempts=F('attempts') + 1,
+            )
+    for task in tasks:
+        task.attempts += 1
+    return tasks
+
+
+def _reschedule(task: ArchiveTask, exc: Exception, now) -> str:
+    """任务失败：未超过重试次数时推迟重试，否则标记为失败"""
+    error = f'{type(exc).__name__}: {exc}'
+    if task.attempts < ARCHIVE_TASK_MAX_ATTEMPTS:
+        try:
+            with transaction.atomic():
+                ArchiveTask.objects.filter(pk=task.pk).update(
+                    status='pending', locked_time=None, last_error=error,
+                    available_time=now + timedelta(seconds=RETRY_BASE_DELAY * 2 ** (task.attempts - 1)),
+                )
+            return 'retried'
+        except IntegrityError:
+            # 处理期间同一对象又入队了新任务，由新任务重新执行
+            ArchiveTask.objects.filter(pk=task.pk).update(
+                status='failed', last_error=f'{error}（已由新任务接替）', finished_time=now,
+            )
+            return 'retried'
+    ArchiveTask.objects.filter(pk=task.pk).update(status='failed', last_error=error, finished_time=now)
+    return 'failed'
+
+
+def process_archive_tasks(batch_size: Optional[int] = None, max_batches: Optional[int] = None) -> dict:
+    """
+    处理全部到期的归档任务
+
+    返回本次运行的统计：
+    {'processed': int, 'succeeded': int, 'skipped': int, 'retried': int, 'failed': int, 'batches': int, 'elapsed': 秒}
+    """
+    started = time.monotonic()
+    batch_size = batch_size or ARCHIVE_TASK_BATCH_SIZE
+    stats = {'processed': 0, 'succeeded': 0, 'skipped': 0, 'retried': 0, 'failed': 0, 'batches': 0}
+
+    while max_batches is None or stats['batches'] < max_batches:
+        tasks = _claim_tasks(batch_size, timezone.now())
+        if not tasks:
+            break
+        stats['batches'] += 1
+
+        for task in tasks:
+            stats['processed'] += 1
+            try:
+                with transaction.atomic():
+                    result = HANDLERS[task.task_type](task)
+                ArchiveTask.objects.filter(pk=task.pk).update(
+                    status='succeeded', result=result, last_error='', finished_time=timezone.now(),
+                )
+                stats['skipped' if result == 'skipped' else 'succeeded'] += 1
+            except Exception as exc:
+                logger.exception('归档任务处理失败: %s#%s（第 %s 次）', task.task_type, task.object_id, task.attempts)
+                stats[_reschedule(task, exc, timezone.now())] += 1
+
+    stats['elapsed'] = round(time.monotonic() - started, 3)
+    if stats['batches']:
+        logger.info(
+            '归档任务处理：%s 条（完成 %s，跳过 %s，重试 %s，失败 %s），%s 批，耗时 %.3fs',
+            stats['processed'], stats['succeeded'], stats['skipped'], stats['retried'], stats['failed'],
+            stats['batches'], stats['elapsed'],
+        )
+    return stats
@@ -0,0 +1,24 @@
+# ==================== 档案管理模块Celery任务 ====================
+
+from celery import shared_task
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task
+def process_archive_tasks():
+    """
+    后台任务：处理归档任务队列（交付推送、项目自动归档）
+
+    信号写入任务的事务提交后投递；Celery Beat 每分钟执行一次（settings.CELERY_BEAT_SCHEDULE），处理投递失败和等待重试的任务。
+    多个 worker 同时执行不会重复处理。
+    """
+    try:
+        from .services_tasks import process_archive_tasks as process
+
+        result = process()
+        return {'success': True, **result}
+    except Exception as e:
+        logger.error(f'归档任务队列处理失败: {str(e)}', exc_info=True)
+        return {'success': False, 'error': str(e)}
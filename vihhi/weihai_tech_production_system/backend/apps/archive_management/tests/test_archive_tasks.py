@@ -0,0 +1,134 @@
+from datetime import date, timedelta
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.db import connection
+from django.utils import timezone
+
+from backend.apps.archive_management import services_tasks
+from backend.apps.archive_management.models import (
+    ArchiveProjectArchive,
+    ArchivePushRecord,
+    ArchiveTask,
+    ProjectArchiveDocument,
+)
+from backend.apps.archive_management.services_tasks import process_archive_tasks
+from backend.apps.delivery_customer.models import DeliveryFile, DeliveryRecord
+from backend.apps.production_management.models import Project, ProjectDrawingFile, ProjectDrawingSubmission
+from backend.apps.settlement_center.models import ProjectSettlement
+
+
+class ArchiveTaskQueueTests(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(username='archivist', password='pwd123456')
+        self.project = Project.objects.create(
+            name='归档项目', project_number='PRJ-2025-001', project_manager=self.user, created_by=self.user,
+        )
+
+    def _delivery(self, status='confirmed', files=2):
+        delivery = DeliveryRecord.objects.create(
+            title='成果交付', recipient_name='甲方', project=self.project, status='draft', created_by=self.user,
+        )
+        # bulk_create 跳过 DeliveryFile.save() 中读取磁盘文件大小
+        DeliveryFile.objects.bulk_create([
+            DeliveryFile(delivery_record=delivery, file=f'delivery_files/{index}.pdf', file_name=f'成果{index}.pdf',
+                         file_size=1024, file_extension='pdf', mime_type='application/pdf')
+            for index in range(files)
+        ])
+        delivery.status = status
+        delivery.save()
+        return delivery
+
+    def test_delivery_push_is_queued_retried_and_idempotent(self):
+        delivery = self._delivery()
+        # 保存只写入任务，不在事务中推送
+        task = ArchiveTask.objects.get()
+        self.assertEqual((task.idempotency_key, task.status), (f'delivery_push:{delivery.pk}', 'pending'))
+        self.assertFalse(ProjectArchiveDocument.objects.exists())
+        delivery.save()
+        self.assertEqual(ArchiveTask.objects.count(), 1)
+
+        with mock.patch.object(services_tasks, 'reserve_document_numbers', side_effect=RuntimeError('编号服务不可用')):
+            stats = process_archive_tasks()
+        self.assertEqual((stats['processed'], stats['retried']), (1, 1))
+        task.refresh_from_db()
+        self.assertEqual((task.status, task.attempts), ('pending', 1))
+        self.assertIn('编号服务不可用', task.last_error)
+        self.assertGreater(task.available_time, timezone.now())
+        # 失败的尝试整体回滚
+        self.assertFalse(ArchivePushRecord.objects.exists())
+
+        ArchiveTask.objects.filter(pk=task.pk).update(available_time=timezone.now())
+        self.assertEqual(process_archive_tasks()['succeeded'], 1)
+        push = ArchivePushRecord.objects.get()
+        self.assertEqual((push.push_status, push.retry_count, len(push.pushed_files)), ('success', 1, 2))
+        self.assertEqual(
+            sorted(ProjectArchiveDocument.objects.values_list('file_name', flat=True)), ['成果0.pdf', '成果1.pdf'],
+        )
+
+        # 再次保存会重新入队，但已推送成功的交付记录直接跳过
+        delivery.save()
+        self.assertEqual(process_archive_tasks()['skipped'], 1)
+        self.assertEqual(ProjectArchiveDocument.objects.count(), 2)
+
+    def test_project_auto_archive_collects_files_with_constant_queries(self):
+        def add_submissions(count):
+            for index in range(count):
+                submission = ProjectDrawingSubmission.objects.create(project=self.project, title=f'第{index}次提交')
+                for category in ('general', 'general'):
+                    ProjectDrawingFile.objects.create(submission=submission, name=f'图纸{submission.pk}', category=category,
+                                                      file='project_drawings/a.pdf')
+
+        ProjectSettlement.objects.create(
+            project=self.project, settlement_date=date(2025, 6, 30), status='confirmed', created_by=self.user,
+            settlement_file='settlements/final.pdf',
+        )
+        add_submissions(1)
+        self.project.save()
+        with CaptureQueriesContext(connection) as small:
+            process_archive_tasks()
+        ArchiveProjectArchive.objects.all().delete()
+
+        add_submissions(4)
+        self.project.save()
+        with CaptureQueriesContext(connection) as large:
+            stats = process_archive_tasks()
+        self.assertEqual(stats['succeeded'], 1)
+        # 第一次还要创建归档编号序列，之后查询数不随图纸提交数增长
+        self.assertLessEqual(len(large), len(small))
+
+        archive = ArchiveProjectArchive.objects.get()
+        self.assertEqual((archive.status, archive.executor, archive.confirmed_by), ('archived', self.user, self.user))
+        types = [item['type'] for item in archive.file_list]
+        self.assertEqual(types, ['project_info'] + ['drawing'] * 10 + ['settlement'])
+        self.assertEqual(archive.file_list[0]['data']['project_name'], '归档项目')
+
+        # 已归档的项目再次保存时跳过
+        self.project.save()
+        self.assertEqual(process_archive_tasks()['skipped'], 1)
+        self.assertEqual(ArchiveProjectArchive.objects.count(), 1)
+
+    def test_project_with_open_delivery_is_not_archived(self):
+        ProjectSettlement.objects.create(
+            project=self.project, settlement_date=date(2025, 6, 30), status='confirmed', created_by=self.user,
+        )
+        self._delivery(status='sent', files=0)
+        self.project.save()
+
+        self.assertEqual(process_archive_tasks()['skipped'], 1)
+        self.assertFalse(ArchiveProjectArchive.objects.exists())
+        self.assertEqual(ArchiveTask.objects.get(task_type='project_archive').status, 'succeeded')
+
+    def test_stale_processing_task_is_reclaimed(self):
+        self.project.save()
+        stale = timezone.now() - timedelta(seconds=services_tasks.ARCHIVE_TASK_LOCK_TIMEOUT + 60)
+        ArchiveTask.objects.update(status='processing', locked_time=stale, attempts=1)
+        # 处理中的任务不阻止同一对象再次入队
+        self.project.save()
+        self.assertEqual(ArchiveTask.objects.count(), 2)
+
+        stats = process_archive_tasks()
+        self.assertEqual(stats['processed'], 2)
+        self.assertEqual(set(ArchiveTask.objects.values_list('status', flat=True)), {'succeeded'})
@@ -9,6 +9,7 @@ from django.db.models import Q, Count
 from django.utils import timezone
 
 from backend.apps.system_management.services import get_user_permission_codes
+from backend.core.pagination import paginate_queryset
 from backend.core.views import HOME_NAV_STRUCTURE, _permission_granted, _build_full_top_nav
 from django.urls import reverse, NoReverseMatch
 from backend.apps.archive_management.models import (
@@ -683,9 +684,7 @@ def project_archive_list(request):
             per_page = 10
     except (ValueError, TypeError):
         per_page = 10
-    paginator = Paginator(queryset, per_page)
-    page_num = request.GET.get('page', 1)
-    page = paginator.get_page(page_num)
+    page = paginate_queryset(request, queryset, per_page)
     
     # 统计数据（用于统计卡片）
     base_queryset = ArchiveProjectArchive.objects.all()
@@ -836,9 +835,7 @@ def administrative_archive_list(request):
             per_page = 10
     except (ValueError, TypeError):
         per_page = 10
-    paginator = Paginator(queryset, per_page)
-    page_num = request.GET.get('page', 1)
-    page = paginator.get_page(page_num)
+    page = paginate_queryset(request, queryset, per_page)
     
     # 统计数据（用于统计卡片）
     base_queryset = AdministrativeArchive.objects.all()
@@ -1919,9 +1916,7 @@ def project_drawing_archive_list(request):
             per_page = 10
     except (ValueError, TypeError):
         per_page = 10
-    paginator = Paginator(queryset, per_page)
-    page_num = request.GET.get('page', 1)
-    page = paginator.get_page(page_num)
+    page = paginate_queryset(request, queryset, per_page)
     
     # 统计数据
     base_queryset = ProjectDrawingArchive.objects.all()
@@ -2146,9 +2141,7 @@ def project_delivery_archive_list(request):
             per_page = 10
     except (ValueError, TypeError):
         per_page = 10
-    paginator = Paginator(queryset, per_page)
-    page_num = request.GET.get('page', 1)
-    page = paginator.get_page(page_num)
+    page = paginate_queryset(request, queryset, per_page)
     
     # 统计数据
     base_queryset = ProjectDeliveryArchive.objects.all()
@@ -6,3 +6,6 @@ class CustomerManagementConfig(AppConfig):
     name = 'backend.apps.customer_management'
     verbose_name = '客户管理'
 
+    def ready(self):
+        """应用启动时注册信号处理器"""
+        import backend.apps.customer_management.signals  # noqa
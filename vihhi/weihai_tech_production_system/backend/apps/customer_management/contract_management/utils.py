@@ -4,6 +4,7 @@
 
 from django.utils import timezone
 from datetime import datetime
+from backend.core.sequence import next_document_number
 from .constants import CONTRACT_NUMBER_PREFIX
 
 
@@ -19,28 +20,9 @@ def generate_contract_number():
     
     current_year = timezone.now().year
     
-    # 查找当前年度最大的合同编号
-    max_contract = BusinessContract.objects.filter(
-        contract_number__startswith=f'{CONTRACT_NUMBER_PREFIX}-{current_year}-'
-    ).order_by('-contract_number').first()
-    
-    if max_contract and max_contract.contract_number:
-        try:
-            # 提取序号部分
-            parts = max_contract.contract_number.split('-')
-            if len(parts) >= 4:
-                seq = int(parts[-1]) + 1
-            else:
-                seq = 1
-        except (ValueError, IndexError):
-            seq = 1
-    else:
-        seq = 1
-    
-    # 生成新编号
-    contract_number = f'{CONTRACT_NUMBER_PREFIX}-{current_year}-{seq:04d}'
-    
-    return contract_number
+    return next_document_number(
+        BusinessContract.objects, 'contract_number', CONTRACT_NUMBER_PREFIX, period=str(current_year),
+    )
 
 
 def calculate_contract_period(start_date, end_date):
@@ -1,6 +1,7 @@
 from django import forms
 from django.core.exceptions import ValidationError
 from django.db import models as django_models
+from django.utils import timezone
 from .models import (
     Client, 
     ClientContact,
@@ -27,6 +28,35 @@ try:
 except ImportError:
     ContactInfoChange = None
 from backend.apps.production_management.models import BusinessContract, Project
+from backend.core.sequence import advance_document_sequence, next_document_number, peek_document_sequence
+
+
+# 合同表单的项目编号（YYYYMMDD-NNNN）按天编号，业务委托书与合同共用编号空间
+
+def _project_number_sources():
+    from backend.apps.customer_management.models import AuthorizationLetter
+    return [(AuthorizationLetter.objects, 'project_number'), (BusinessContract.objects, 'project_number')]
+
+
+def _peek_daily_project_number():
+    """页面预览的下一个项目编号（不占用）"""
+    sources = _project_number_sources()
+    period = timezone.localdate().strftime('%Y%m%d')
+    return f"{period}-{peek_document_sequence(*sources[0], '', period=period, sources=sources):04d}"
+
+
+def _next_daily_project_number():
+    sources = _project_number_sources()
+    return next_document_number(*sources[0], '', period=timezone.localdate().strftime('%Y%m%d'), sources=sources)
+
+
+def _advance_daily_project_number(project_number):
+    """手工填写的当天项目编号：推进计数器"""
+    sources = _project_number_sources()
+    period = timezone.localdate().strftime('%Y%m%d')
+    suffix = project_number[len(period) + 1:] if project_number.startswith(f'{period}-') else ''
+    if suffix.isdigit():
+        advance_document_sequence(*sources[0], '', int(suffix), period=period, sources=sources)
 
 
 class ContractForm(forms.ModelForm):
@@ -240,44 +270,8 @@ class ContractForm(forms.ModelForm):
             self.fields['project_number'].required = False
             # 自动生成项目编号：YYYYMMDD-0000格式
             if not self.instance or not self.instance.pk or not self.instance.project_number:
-                # 新建模式：自动生成项目编号
-                from datetime import datetime
-                from django.db.models import Max
-                from backend.apps.customer_management.models import AuthorizationLetter
-                
-                current_date = datetime.now().strftime('%Y%m%d')
-                date_prefix = f'{current_date}-'
-                
-                # 查找当天最大项目编号（从业务委托书和合同中查找）
-                max_letter = AuthorizationLetter.objects.filter(
-                    project_number__startswith=date_prefix
-                ).aggregate(max_num=Max('project_number'))['max_num']
-                
-                max_contract = BusinessContract.objects.filter(
-                    project_number__startswith=date_prefix
-                ).exclude(id=self.instance.id if self.instance.id else None).aggregate(max_num=Max('project_number'))['max_num']
-                
-                # 取两者中的最大值
-                max_project_number = None
-                if max_letter and max_contract:
-                    max_project_number = max(max_letter, max_contract)
-                elif max_letter:
-                    max_project_number = max_letter
-                elif max_contract:
-                    max_project_number = max_contract
-                
-                if max_project_number:
-                    try:
-                        # 提取序列号，格式：YYYYMMDD-0000
-                        seq_str = max_project_number.split('-')[-1]
-                        seq = int(seq_str) + 1
-                    except (ValueError, IndexError):
-                        seq = 1
-                else:
-                    seq = 1
-                
-                # 设置初始值
-                project_number_initial = f'{date_prefix}{seq:04d}'
+                # 新建模式：预览下一个项目编号（不占用），保存时再正式取号
+                project_number_initial = _peek_daily_project_number()
                 self.fields['project_number'].initial = project_number_initial
                 
                 # 自动生成合同编号：HT-项目编号
@@ -299,6 +293,28 @@ class ContractForm(forms.ModelForm):
                     if not self.instance.contract_number and self.instance.project_number:
                         self.fields['contract_number'].initial = f'HT-{self.instance.project_number}'
     
+    def save(self, commit=True):
+        """
+        原来没有项目编号的合同在保存时正式分配项目编号
+
+        项目编号为空或仍是页面上预览的下一个编号时取号（并同步按预览值生成的合同编号），
+        手工填写的 YYYYMMDD-NNNN 编号推进计数器，避免之后自动取号撞号。
+        """
+        instance = super().save(commit=False)
+        if not self.initial.get('project_number'):
+            preview = _peek_daily_project_number()
+            if not instance.project_number or instance.project_number == preview:
+                allocated = _next_daily_project_number()
+                if not instance.contract_number or instance.contract_number == f'HT-{preview}':
+                    instance.contract_number = f'HT-{allocated}'
+                instance.project_number = allocated
+            else:
+                _advance_daily_project_number(instance.project_number)
+        if commit:
+            instance.save()
+            self._save_m2m()
+        return instance
+    
     def clean_project_number(self):
         """验证项目编号的唯一性"""
         project_number = self.cleaned_data.get('project_number')
@@ -0,0 +1,96 @@
+"""
+地理编码回填命令
+
+按块批量解析地址并写入地理编码缓存（GeocodeCache），签到、地址解析等请求随后直接命中缓存：
+- 客户的公司地址：预热缓存
+- 拜访签到、客户关系记录中只有地址、没有经纬度的：回填经纬度
+
+用法:
+    python manage.py backfill_geocodes
+    python manage.py backfill_geocodes --city 威海 --chunk-size 500
+    python manage.py backfill_geocodes --only clients
+"""
+import time
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+
+from backend.apps.customer_management.models import Client, CustomerRelationship, VisitCheckin
+from backend.apps.customer_management.services import AmapAPIService
+
+
+class Command(BaseCommand):
+    help = '批量解析客户、拜访签到地址的经纬度，预热地理编码缓存'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--city', default='', help='限定城市（名称或编码），默认不限定')
+        parser.add_argument('--chunk-size', type=int, default=500, help='每块处理的记录数（默认 500）')
+        parser.add_argument(
+            '--only',
+            choices=['clients', 'checkins', 'relationships'],
+            help='只处理某一类地址',
+        )
+
+    def handle(self, *args, **options):
+        service = AmapAPIService()
+        if not service.api_key:
+            self.stdout.write(self.style.ERROR('高德地图API Key未配置'))
+            return
+
+        self.service = service
+        self.city = options['city'] or None
+        self.chunk_size = max(1, options['chunk_size'])
+        only = options.get('only')
+        started = time.monotonic()
+
+        if only in (None, 'clients'):
+            self.warm_clients()
+        if only in (None, 'checkins'):
+            self.backfill(
+                '拜访签到',
+                VisitCheckin.objects.filter(latitude__isnull=True).exclude(checkin_location=''),
+                'checkin_location',
+            )
+        if only in (None, 'relationships'):
+            self.backfill(
+                '客户关系记录',
+                CustomerRelationship.objects.filter(latitude__isnull=True).exclude(location_address=''),
+                'location_address',
+            )
+        self.stdout.write(self.style.SUCCESS(f'✓ 完成，耗时 {time.monotonic() - started:.1f}s'))
+
+    def _chunks(self, queryset, *fields):
+        """按 ID 顺序分块读取"""
+        last_id = 0
+        while True:
+            chunk = list(queryset.filter(id__gt=last_id).order_by('id').only('id', *fields)[:self.chunk_size])
+            if not chunk:
+                return
+            yield chunk
+            last_id = chunk[-1].id
+
+    def warm_clients(self):
+        total = resolved = 0
+        for chunk in self._chunks(Client.objects.exclude(company_address=''), 'company_address'):
+            results = self.service.geocode_batch([client.company_address for client in chunk], self.city)
+            total += len(chunk)
+            resolved += sum(1 for result in results if result)
+            self.stdout.write(f'  客户地址：已处理 {total}，解析成功 {resolved}')
+        self.stdout.write(self.style.SUCCESS(f'客户地址预热完成：{resolved}/{total}'))
+
+    def backfill(self, label, queryset, address_field):
+        total = updated = 0
+        model = queryset.model
+        for chunk in self._chunks(queryset, address_field):
+            results = self.service.geocode_batch([getattr(obj, address_field) for obj in chunk], self.city)
+            changed = []
+            for obj, result in zip(chunk, results):
+                if result:
+                    obj.longitude = Decimal(str(result['longitude']))
+                    obj.latitude = Decimal(str(result['latitude']))
+                    changed.append(obj)
+            model.objects.bulk_update(changed, ['longitude', 'latitude'])
+            total += len(chunk)
+            updated += len(changed)
+            self.stdout.write(f'  {label}：已处理 {total}，回填 {updated}')
+        self.stdout.write(self.style.SUCCESS(f'{label}回填完成：{updated}/{total}'))
@@ -0,0 +1,150 @@
+"""
+联系人关系挖掘基准测试命令
+
+在一个事务内生成模拟联系人（含教育背景、职业信息、籍贯），重建关系索引，
+对比原 icontains 模糊匹配与索引等值查找的耗时，结束后回滚，不留下任何数据。
+
+用法:
+    python manage.py benchmark_contact_relations                 # 默认 50000 个联系人
+    python manage.py benchmark_contact_relations --contacts 10000 --samples 50
+"""
+import random
+import statistics
+import time
+from datetime import date
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.db.models import Q
+
+from backend.apps.customer_management.models import (
+    Client,
+    ClientContact,
+    ClientType,
+    ContactCareer,
+    ContactEducation,
+    ContactRelationToken,
+)
+from backend.apps.customer_management.services.contact_relations import rebuild_all, related_contacts
+
+PROVINCES = ['山东省', '江苏省', '河北省', '河南省', '辽宁省', '浙江省', '四川省', '湖北省']
+CITIES = ['威海市', '烟台市', '青岛市', '济南市', '南京市', '苏州市', '石家庄市', '郑州市', '沈阳市', '杭州市']
+DEPARTMENTS = ['技术部', '工程部', '设计部', '成本部', '采购部', '总经办']
+
+
+def _legacy_mine(contact):
+    """原 _mine_contact_relationships 的 icontains 查询（仅用于对比）"""
+    results = []
+    schools = {edu.school_name.strip() for edu in contact.educations.all() if edu.school_name}
+    if schools:
+        query = Q()
+        for name in schools:
+            query |= Q(educations__school_name__icontains=name)
+        results.append(list(ClientContact.objects.filter(query).exclude(id=contact.id).distinct()[:50]))
+    keywords = [keyword for keyword in contact.birthplace.split() if len(keyword) > 1]
+    if keywords:
+        query = Q()
+        for keyword in keywords:
+            query |= Q(birthplace__icontains=keyword)
+        results.append(list(
+            ClientContact.objects.filter(query).exclude(id=contact.id).exclude(birthplace='').distinct()[:50]
+        ))
+    query = Q()
+    for career in contact.careers.all():
+        for field in ('company', 'department', 'position'):
+            value = getattr(career, field).strip()
+            if len(value) > 1:
+                query |= Q(**{f'careers__{field}__icontains': value})
+    if query:
+        results.append(list(ClientContact.objects.filter(query).exclude(id=contact.id).distinct()[:50]))
+    return results
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = '生成模拟联系人，对比关系挖掘的 icontains 查询与关系索引查询耗时（结束后回滚）'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--contacts', type=int, default=50000, help='模拟联系人数（默认 50000）')
+        parser.add_argument('--samples', type=int, default=20, help='抽样挖掘的联系人数（默认 20）')
+        parser.add_argument('--seed', type=int, default=42, help='随机种子')
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                self.run(options['contacts'], options['samples'], random.Random(options['seed']))
+                raise _Rollback()
+        except _Rollback:
+            self.stdout.write('模拟数据已回滚')
+
+    def _timed(self, label, func):
+        started = time.monotonic()
+        result = func()
+        self.stdout.write(f'{label}：{time.monotonic() - started:.2f}s')
+        return result
+
+    def run(self, contact_count, sample_count, rng):
+        user = get_user_model().objects.filter(is_superuser=True).first() or get_user_model().objects.first()
+        client_type = ClientType.objects.filter(is_active=True).first() or ClientType.objects.create(
+            code='benchmark', name='基准测试'
+        )
+        clients = Client.objects.bulk_create([
+            Client(name=f'基准测试公司{i}', client_type=client_type, created_by=user)
+            for i in range(max(1, contact_count // 50))
+        ])
+        schools = [f'第{i}大学' for i in range(300)]
+        companies = [f'{rng.choice(CITIES)[:-1]}建设集团{i}有限公司' for i in range(2000)]
+
+        def generate():
+            contacts = ClientContact.objects.bulk_create([
+                ClientContact(
+                    client=rng.choice(clients),
+                    name=f'联系人{i}',
+                    birthplace=f'{rng.choice(PROVINCES)}{rng.choice(CITIES)}',
+                    role='contact_person',
+                    decision_influence='medium',
+                    relationship_score=rng.randint(0, 100),
+                )
+                for i in range(contact_count)
+            ], batch_size=2000)
+            ContactEducation.objects.bulk_create([
+                ContactEducation(
+                    contact=contact, degree='bachelor', school_name=rng.choice(schools),
+                    enrollment_date=date(2000, 9, 1), graduation_date=date(2004, 7, 1),
+                )
+                for contact in contacts
+            ], batch_size=2000)
+            ContactCareer.objects.bulk_create([
+                ContactCareer(
+                    contact=contact, company=rng.choice(companies), department=rng.choice(DEPARTMENTS),
+                    position='工程师', join_date=date(2015, 1, 1),
+                )
+                for contact in contacts
+            ], batch_size=2000)
+            return contacts
+
+        contacts = self._timed(f'生成 {contact_count} 个联系人', generate)
+        self._timed('重建关系索引', lambda: rebuild_all(chunk_size=2000))
+        with connection.cursor() as cursor:
+            # 刚写入的大量数据没有统计信息，先 ANALYZE 让查询计划与线上一致
+            for model in (ClientContact, ContactEducation, ContactCareer, ContactRelationToken):
+                cursor.execute(f'ANALYZE {connection.ops.quote_name(model._meta.db_table)}')
+
+        samples = rng.sample(contacts, min(sample_count, len(contacts)))
+        for label, mine in (
+            ('原 icontains 查询', _legacy_mine),
+            ('关系索引查询', lambda contact: related_contacts([contact.id], limit=50)),
+        ):
+            durations = []
+            for contact in samples:
+                started = time.monotonic()
+                mine(contact)
+                durations.append((time.monotonic() - started) * 1000)
+            self.stdout.write(self.style.SUCCESS(
+                f'{label}：平均 {statistics.mean(durations):.1f}ms，'
+                f'中位数 {statistics.median(durations):.1f}ms，最大 {max(durations):.1f}ms（{len(samples)} 个样本）'
+            ))
@@ -1,7 +1,7 @@
 # ==================== 客户公海检查管理命令（按《客户管理详细设计方案 v1.12》实现）====================
 
 from django.core.management.base import BaseCommand
-from backend.apps.customer_management.services import auto_move_to_public_sea
+from backend.apps.customer_management.services.public_sea import auto_move_to_public_sea, inactive_clients_queryset
 
 
 class Command(BaseCommand):
@@ -13,6 +13,18 @@ class Command(BaseCommand):
             action='store_true',
             help='仅显示将要移入公海的客户，不实际执行移入操作',
         )
+        parser.add_argument(
+            '--days',
+            type=int,
+            default=None,
+            help='无拜访天数阈值（默认取 PUBLIC_SEA_INACTIVITY_DAYS，90天）',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=None,
+            help='每批更新的客户数（默认取 PUBLIC_SEA_BATCH_SIZE）',
+        )
     
     def handle(self, *args, **options):
         dry_run = options.get('dry_run', False)
@@ -21,40 +33,35 @@ class Command(BaseCommand):
             self.stdout.write(self.style.WARNING('运行在模拟模式，不会实际移入客户到公海'))
         
         try:
+            result = auto_move_to_public_sea(
+                days=options.get('days'),
+                batch_size=options.get('batch_size'),
+                dry_run=dry_run,
+            )
+            timings = result['timings']
+            
             if dry_run:
-                # 模拟模式：只统计，不实际移入
-                from django.utils import timezone
-                from datetime import timedelta
-                from backend.apps.customer_management.models import Client, CustomerRelationship
-                
-                cutoff_date = timezone.now() - timedelta(days=90)
-                clients = Client.objects.filter(responsible_user__isnull=False)
-                
-                count = 0
-                for client in clients:
-                    has_recent_visit = CustomerRelationship.objects.filter(
-                        client=client,
-                        followup_time__gte=cutoff_date
-                    ).exists()
-                    
-                    if not has_recent_visit:
-                        count += 1
-                        self.stdout.write(
-                            self.style.WARNING(f'  - 客户 "{client.name}" 将被移入公海')
-                        )
-                
+                # 模拟模式：列出部分将被移入的客户
+                if options.get('verbosity', 1) >= 2:
+                    sample = inactive_clients_queryset(result['cutoff']).order_by('id').values_list('name', flat=True)[:50]
+                    for name in sample:
+                        self.stdout.write(self.style.WARNING(f'  - 客户 "{name}" 将被移入公海'))
                 self.stdout.write(
-                    self.style.SUCCESS(f'\n模拟模式：共 {count} 个客户将被移入公海')
+                    self.style.SUCCESS(
+                        f'\n模拟模式：无拜访超过 {result["days"]} 天，共 {result["candidates"]} 个客户将被移入公海'
+                        f'（查询耗时 {timings["select"]}s）'
+                    )
                 )
             else:
-                # 实际执行
-                count = auto_move_to_public_sea()
                 self.stdout.write(
-                    self.style.SUCCESS(f'\n成功将 {count} 个客户移入公海')
+                    self.style.SUCCESS(
+                        f'\n成功将 {result["moved"]} 个客户移入公海'
+                        f'（候选 {result["candidates"]} 个，跳过 {result["skipped"]} 个，'
+                        f'{result["batches"]} 批，查询 {timings["select"]}s，更新 {timings["update"]}s）'
+                    )
                 )
         except Exception as e:
             self.stdout.write(
                 self.style.ERROR(f'执行失败：{str(e)}')
             )
             raise
-
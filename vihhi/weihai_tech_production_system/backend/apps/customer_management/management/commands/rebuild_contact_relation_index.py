@@ -0,0 +1,33 @@
+"""
+重建联系人关系索引命令
+
+上线、批量导入联系人（bulk_create 不触发信号）或调整规范化规则后执行。
+
+用法:
+    python manage.py rebuild_contact_relation_index
+    python manage.py rebuild_contact_relation_index --chunk-size 2000
+"""
+import time
+
+from django.core.management.base import BaseCommand
+
+from backend.apps.customer_management.services.contact_relations import rebuild_all
+
+
+class Command(BaseCommand):
+    help = '按联系人的籍贯、教育背景、职业信息全量重建关系索引（ContactRelationToken）'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=1000, help='每块联系人数（默认 1000）')
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+
+        def progress(totals):
+            self.stdout.write(f"  已处理 {totals['contacts']} 个联系人，新增 {totals['created']}，删除 {totals['deleted']}")
+
+        totals = rebuild_all(chunk_size=max(1, options['chunk_size']), progress=progress)
+        self.stdout.write(self.style.SUCCESS(
+            f"✓ 重建完成：联系人 {totals['contacts']}，新增 {totals['created']} 行，删除 {totals['deleted']} 行，"
+            f"耗时 {time.monotonic() - started:.1f}s"
+        ))
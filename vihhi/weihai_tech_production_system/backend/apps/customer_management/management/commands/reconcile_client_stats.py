@@ -0,0 +1,35 @@
+"""
+客户统计快照校准命令
+
+用法：
+    python manage.py reconcile_client_stats            # 全量校准所有范围
+    python manage.py reconcile_client_stats --show     # 仅输出全局快照
+"""
+import time
+
+from django.core.management.base import BaseCommand
+
+from backend.apps.customer_management.models import ClientStatsSnapshot
+from backend.apps.customer_management.services.client_stats import get_snapshot, reconcile_client_stats
+
+
+class Command(BaseCommand):
+    help = '全量校准客户统计快照（全局 / 部门 / 个人），修正增量维护的偏差'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--show', action='store_true', help='仅输出全局快照，不校准')
+
+    def handle(self, *args, **options):
+        if not options['show']:
+            started = time.monotonic()
+            result = reconcile_client_stats()
+            elapsed = time.monotonic() - started
+            self.stdout.write(self.style.SUCCESS(
+                f"✓ 校准完成：更新 {result['updated']} 行，新增 {result['created']} 行，耗时 {elapsed:.2f}s"
+            ))
+
+        snapshot = get_snapshot(ClientStatsSnapshot.SCOPE_GLOBAL)
+        self.stdout.write(
+            f'全局：客户 {snapshot.total_count}，活跃 {snapshot.active_count}，VIP {snapshot.vip_count}，'
+            f'公海 {snapshot.public_sea_count}，累计合同金额 {snapshot.total_contract_amount}'
+        )
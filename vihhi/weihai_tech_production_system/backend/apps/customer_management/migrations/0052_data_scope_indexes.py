@@ -0,0 +1,25 @@
+# Generated by Django 4.2.7 on 2026-10-16 22:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('customer_management', '0051_remove_filter_collapse_feature'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='businessopportunity',
+            index=models.Index(fields=['business_manager', 'created_time'], name='business_op_busines_0001cb_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='client',
+            index=models.Index(fields=['responsible_user', 'created_time'], name='customer_cl_respons_5a00f1_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='client',
+            index=models.Index(fields=['created_by', 'created_time'], name='customer_cl_created_20485a_idx'),
+        ),
+    ]
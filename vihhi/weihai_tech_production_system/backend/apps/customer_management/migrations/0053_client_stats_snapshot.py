@@ -0,0 +1,34 @@
+# Generated by Django 4.2.7 on 2026-10-16 23:01
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('customer_management', '0052_data_scope_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ClientStatsSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('scope_type', models.CharField(choices=[('global', '全局'), ('department', '部门'), ('user', '个人')], max_length=20, verbose_name='范围类型')),
+                ('scope_id', models.BigIntegerField(default=0, help_text='部门ID或用户ID，全局为0', verbose_name='范围ID')),
+                ('total_count', models.IntegerField(default=0, verbose_name='客户总数')),
+                ('active_count', models.IntegerField(default=0, verbose_name='活跃客户数')),
+                ('vip_count', models.IntegerField(default=0, verbose_name='VIP客户数')),
+                ('public_sea_count', models.IntegerField(default=0, verbose_name='公海客户数')),
+                ('total_contract_amount', models.DecimalField(decimal_places=2, default=0, max_digits=18, verbose_name='累计合同金额')),
+                ('reconciled_time', models.DateTimeField(blank=True, null=True, verbose_name='最近校准时间')),
+                ('updated_time', models.DateTimeField(auto_now=True, verbose_name='更新时间')),
+            ],
+            options={
+                'verbose_name': '客户统计快照',
+                'verbose_name_plural': '客户统计快照',
+                'db_table': 'customer_client_stats_snapshot',
+                'unique_together': {('scope_type', 'scope_id')},
+            },
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 4.2.7 on 2026-10-16 23:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('customer_management', '0053_client_stats_snapshot'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='client',
+            index=models.Index(fields=['created_time', 'id'], name='customer_cl_created_114fce_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='businessopportunity',
+            index=models.Index(fields=['created_time', 'id'], name='business_op_created_f3aa6e_idx'),
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 4.2.7 on 2026-10-17 00:12
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('customer_management', '0054_keyset_pagination_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ClientPublicSeaLog',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('reason', models.CharField(choices=[('unassigned', '未分配'), ('released', '已释放'), ('auto_entry', '自动进入')], max_length=20, verbose_name='进入公海原因')),
+                ('inactivity_days', models.IntegerField(blank=True, null=True, verbose_name='无拜访天数阈值')),
+                ('created_time', models.DateTimeField(default=django.utils.timezone.now, verbose_name='进入公海时间')),
+                ('client', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='public_sea_logs', to='customer_management.client', verbose_name='客户')),
+                ('previous_responsible_user', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='released_client_logs', to=settings.AUTH_USER_MODEL, verbose_name='原负责人')),
+            ],
+            options={
+                'verbose_name': '客户移入公海日志',
+                'verbose_name_plural': '客户移入公海日志',
+                'db_table': 'customer_client_public_sea_log',
+                'ordering': ['-created_time'],
+                'indexes': [models.Index(fields=['client', 'created_time'], name='customer_cl_client__b278ad_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 4.2.7 on 2026-10-17 09:40
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('customer_management', '0055_client_public_sea_log'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GeocodeCache',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('address', models.CharField(max_length=500, verbose_name='规范化地址')),
+                ('city', models.CharField(blank=True, default='', max_length=100, verbose_name='限定城市')),
+                ('longitude', models.DecimalField(blank=True, decimal_places=7, max_digits=10, null=True, verbose_name='经度')),
+                ('latitude', models.DecimalField(blank=True, decimal_places=7, max_digits=10, null=True, verbose_name='纬度')),
+                ('result', models.JSONField(blank=True, null=True, verbose_name='解析结果')),
+                ('created_time', models.DateTimeField(default=django.utils.timezone.now, verbose_name='创建时间')),
+                ('updated_time', models.DateTimeField(auto_now=True, verbose_name='更新时间')),
+            ],
+            options={
+                'verbose_name': '地理编码缓存',
+                'verbose_name_plural': '地理编码缓存',
+                'db_table': 'customer_geocode_cache',
+                'unique_together': {('address', 'city')},
+            },
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 4.2.7 on 2026-10-16 11:05
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('customer_management', '0056_geocode_cache'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ContactRelationToken',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('token_type', models.CharField(choices=[('school', '学校'), ('company', '就职公司'), ('department', '公司部门'), ('birthplace', '籍贯')], max_length=20, verbose_name='类型')),
+                ('token', models.CharField(max_length=300, verbose_name='规范化词')),
+                ('contact', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='relation_tokens', to='customer_management.clientcontact', verbose_name='客户人员')),
+            ],
+            options={
+                'verbose_name': '联系人关系索引',
+                'verbose_name_plural': '联系人关系索引',
+                'db_table': 'customer_contact_relation_token',
+                'indexes': [models.Index(fields=['token_type', 'token'], name='customer_co_token_t_fcfc86_idx')],
+                'unique_together': {('contact', 'token_type', 'token')},
+            },
+        ),
+    ]
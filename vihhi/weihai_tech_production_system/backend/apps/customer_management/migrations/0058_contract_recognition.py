@@ -0,0 +1,62 @@
+# Generated by Django 4.2.7 on 2026-10-17 00:23
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('customer_management', '0057_contact_relation_token'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ContractRecognitionResult',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('file_hash', models.CharField(help_text='文件内容 SHA-256', max_length=64, verbose_name='文件哈希')),
+                ('prompt_version', models.CharField(max_length=20, verbose_name='提示词版本')),
+                ('file_name', models.CharField(blank=True, max_length=255, verbose_name='首次识别文件名')),
+                ('data', models.JSONField(default=dict, verbose_name='识别结果')),
+                ('raw_text', models.TextField(blank=True, verbose_name='接口原始返回')),
+                ('text_length', models.IntegerField(default=0, verbose_name='提取文本字数')),
+                ('sent_length', models.IntegerField(default=0, help_text='精简后发送给接口的字数', verbose_name='发送文本字数')),
+                ('hit_count', models.IntegerField(default=0, verbose_name='命中次数')),
+                ('created_time', models.DateTimeField(default=django.utils.timezone.now, verbose_name='创建时间')),
+            ],
+            options={
+                'verbose_name': '合同识别结果',
+                'verbose_name_plural': '合同识别结果',
+                'db_table': 'customer_contract_recognition_result',
+                'unique_together': {('file_hash', 'prompt_version')},
+            },
+        ),
+        migrations.CreateModel(
+            name='ContractRecognitionJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('source_file', models.FileField(blank=True, help_text='识别结束后删除', upload_to='contract_recognition/%Y/%m/', verbose_name='合同文件')),
+                ('source_name', models.CharField(blank=True, max_length=255, verbose_name='原文件名')),
+                ('file_type', models.CharField(help_text='pdf / image / docx', max_length=10, verbose_name='文件类型')),
+                ('file_hash', models.CharField(max_length=64, verbose_name='文件哈希')),
+                ('status', models.CharField(choices=[('pending', '排队中'), ('running', '识别中'), ('succeeded', '已完成'), ('failed', '失败')], default='pending', max_length=20, verbose_name='状态')),
+                ('error_message', models.TextField(blank=True, verbose_name='错误信息')),
+                ('created_time', models.DateTimeField(default=django.utils.timezone.now, verbose_name='创建时间')),
+                ('started_time', models.DateTimeField(blank=True, null=True, verbose_name='开始时间')),
+                ('finished_time', models.DateTimeField(blank=True, null=True, verbose_name='完成时间')),
+                ('created_by', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='contract_recognition_jobs', to=settings.AUTH_USER_MODEL, verbose_name='创建人')),
+                ('result', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='jobs', to='customer_management.contractrecognitionresult', verbose_name='识别结果')),
+            ],
+            options={
+                'verbose_name': '合同识别任务',
+                'verbose_name_plural': '合同识别任务',
+                'db_table': 'customer_contract_recognition_job',
+                'ordering': ['-created_time'],
+                'indexes': [models.Index(fields=['created_by', 'created_time'], name='customer_co_created_e16392_idx')],
+            },
+        ),
+    ]
@@ -6,6 +6,7 @@ from django.contrib.contenttypes.models import ContentType
 from django.core.validators import MinValueValidator, MaxValueValidator
 import logging
 from backend.apps.system_management.models import User
+from backend.core.sequence import next_document_number
 
 logger = logging.getLogger(__name__)
 
@@ -202,6 +203,10 @@ class Client(models.Model):
             models.Index(fields=['unified_credit_code']),
             models.Index(fields=['responsible_user', 'is_active']),
             models.Index(fields=['public_sea_entry_time']),
+            # 数据范围过滤 + 按创建时间倒序分页
+            models.Index(fields=['responsible_user', 'created_time']),
+            models.Index(fields=['created_by', 'created_time']),
+            models.Index(fields=['created_time', 'id']),
         ]
     
     def __str__(self):
@@ -328,6 +333,205 @@ class Client(models.Model):
         self.save(update_fields=['responsible_user', 'public_sea_entry_time', 'public_sea_reason'])
 
 
+class ClientStatsSnapshot(models.Model):
+    """
+    客户统计快照（物化计数器）
+
+    按数据范围（全局 / 部门 / 个人）保存客户列表顶部统计卡片所需的计数，
+    由客户保存/删除信号在同一事务内增量维护，并由夜间任务全量校准。
+    """
+    SCOPE_GLOBAL = 'global'
+    SCOPE_DEPARTMENT = 'department'
+    SCOPE_USER = 'user'
+    SCOPE_TYPE_CHOICES = [
+        (SCOPE_GLOBAL, '全局'),
+        (SCOPE_DEPARTMENT, '部门'),
+        (SCOPE_USER, '个人'),
+    ]
+
+    scope_type = models.CharField(max_length=20, choices=SCOPE_TYPE_CHOICES, verbose_name='范围类型')
+    scope_id = models.BigIntegerField(default=0, verbose_name='范围ID', help_text='部门ID或用户ID，全局为0')
+    total_count = models.IntegerField(default=0, verbose_name='客户总数')
+    active_count = models.IntegerField(default=0, verbose_name='活跃客户数')
+    vip_count = models.IntegerField(default=0, verbose_name='VIP客户数')
+    public_sea_count = models.IntegerField(default=0, verbose_name='公海客户数')
+    total_contract_amount = models.DecimalField(max_digits=18, decimal_places=2, default=0, verbose_name='累计合同金额')
+    reconciled_time = models.DateTimeField(null=True, blank=True, verbose_name='最近校准时间')
+    updated_time = models.DateTimeField(auto_now=True, verbose_name='更新时间')
+
+    class Meta:
+        db_table = 'customer_client_stats_snapshot'
+        verbose_name = '客户统计快照'
+        verbose_name_plural = verbose_name
+        unique_together = [('scope_type', 'scope_id')]
+
+    def __str__(self):
+        return f"{self.get_scope_type_display()}#{self.scope_id}: {self.total_count}"
+
+
+class ClientPublicSeaLog(models.Model):
+    """客户移入公海日志（自动移入公海任务批量写入）"""
+    client = models.ForeignKey(Client, on_delete=models.CASCADE, related_name='public_sea_logs', verbose_name='客户')
+    previous_responsible_user = models.ForeignKey(
+        User,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='released_client_logs',
+        verbose_name='原负责人'
+    )
+    reason = models.CharField(max_length=20, choices=Client.PUBLIC_SEA_REASON_CHOICES, verbose_name='进入公海原因')
+    inactivity_days = models.IntegerField(null=True, blank=True, verbose_name='无拜访天数阈值')
+    created_time = models.DateTimeField(default=timezone.now, verbose_name='进入公海时间')
+
+    class Meta:
+        db_table = 'customer_client_public_sea_log'
+        verbose_name = '客户移入公海日志'
+        verbose_name_plural = verbose_name
+        ordering = ['-created_time']
+        indexes = [
+            models.Index(fields=['client', 'created_time']),
+        ]
+
+    def __str__(self):
+        return f"{self.client_id} - {self.get_reason_display()} - {self.created_time:%Y-%m-%d}"
+
+
+class GeocodeCache(models.Model):
+    """
+    地理编码缓存（高德地图地址转坐标结果）
+
+    按规范化地址 + 城市保存，AmapAPIService.geocode 先查此表，未命中才调用高德接口。
+    result 为空表示高德没有解析出坐标，超过 GEOCODE_NEGATIVE_CACHE_DAYS 后重新查询。
+    """
+    address = models.CharField(max_length=500, verbose_name='规范化地址')
+    city = models.CharField(max_length=100, blank=True, default='', verbose_name='限定城市')
+    longitude = models.DecimalField(max_digits=10, decimal_places=7, null=True, blank=True, verbose_name='经度')
+    latitude = models.DecimalField(max_digits=10, decimal_places=7, null=True, blank=True, verbose_name='纬度')
+    result = models.JSONField(null=True, blank=True, verbose_name='解析结果')
+    created_time = models.DateTimeField(default=timezone.now, verbose_name='创建时间')
+    updated_time = models.DateTimeField(auto_now=True, verbose_name='更新时间')
+
+    class Meta:
+        db_table = 'customer_geocode_cache'
+        verbose_name = '地理编码缓存'
+        verbose_name_plural = verbose_name
+        unique_together = [('address', 'city')]
+
+    def __str__(self):
+        return f"{self.city or '-'} {self.address}"
+
+
+class ContractRecognitionResult(models.Model):
+    """
+    合同识别结果
+
+    按文件内容 SHA-256 + 提示词版本保存 DeepSeek 的识别结果，同一份合同再次上传或重新识别时直接返回，
+    不再调用接口。提示词或文本精简规则变化时升级 PROMPT_VERSION，旧结果自然失效。
+    """
+    file_hash = models.CharField(max_length=64, verbose_name='文件哈希', help_text='文件内容 SHA-256')
+    prompt_version = models.CharField(max_length=20, verbose_name='提示词版本')
+    file_name = models.CharField(max_length=255, blank=True, verbose_name='首次识别文件名')
+    data = models.JSONField(default=dict, verbose_name='识别结果')
+    raw_text = models.TextField(blank=True, verbose_name='接口原始返回')
+    text_length = models.IntegerField(default=0, verbose_name='提取文本字数')
+    sent_length = models.IntegerField(default=0, verbose_name='发送文本字数', help_text='精简后发送给接口的字数')
+    hit_count = models.IntegerField(default=0, verbose_name='命中次数')
+    created_time = models.DateTimeField(default=timezone.now, verbose_name='创建时间')
+
+    class Meta:
+        db_table = 'customer_contract_recognition_result'
+        verbose_name = '合同识别结果'
+        verbose_name_plural = verbose_name
+        unique_together = [('file_hash', 'prompt_version')]
+
+    def __str__(self):
+        return f"{self.file_name or self.file_hash[:12]} ({self.prompt_version})"
+
+
+class ContractRecognitionJob(models.Model):
+    """
+    合同识别任务
+
+    上传接口只保存文件并创建任务，识别（文本提取、OCR、DeepSeek 调用）在 Celery 任务中执行，
+    页面轮询任务状态；命中识别结果缓存时任务直接完成。
+    """
+    STATUS_CHOICES = [
+        ('pending', '排队中'),
+        ('running', '识别中'),
+        ('succeeded', '已完成'),
+        ('failed', '失败'),
+    ]
+
+    source_file = models.FileField(upload_to='contract_recognition/%Y/%m/', blank=True, verbose_name='合同文件',
+                                   help_text='识别结束后删除')
+    source_name = models.CharField(max_length=255, blank=True, verbose_name='原文件名')
+    file_type = models.CharField(max_length=10, verbose_name='文件类型', help_text='pdf / image / docx')
+    file_hash = models.CharField(max_length=64, verbose_name='文件哈希')
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending', verbose_name='状态')
+    result = models.ForeignKey(
+        ContractRecognitionResult, on_delete=models.SET_NULL, null=True, blank=True,
+        related_name='jobs', verbose_name='识别结果'
+    )
+    error_message = models.TextField(blank=True, verbose_name='错误信息')
+    created_by = models.ForeignKey(
+        User, on_delete=models.CASCADE, related_name='contract_recognition_jobs', verbose_name='创建人'
+    )
+    created_time = models.DateTimeField(default=timezone.now, verbose_name='创建时间')
+    started_time = models.DateTimeField(null=True, blank=True, verbose_name='开始时间')
+    finished_time = models.DateTimeField(null=True, blank=True, verbose_name='完成时间')
+
+    class Meta:
+        db_table = 'customer_contract_recognition_job'
+        verbose_name = '合同识别任务'
+        verbose_name_plural = verbose_name
+        ordering = ['-created_time']
+        indexes = [
+            models.Index(fields=['created_by', 'created_time']),
+        ]
+
+    def __str__(self):
+        return f"{self.source_name}#{self.pk} {self.get_status_display()}"
+
+
+class ContactRelationToken(models.Model):
+    """
+    联系人关系倒排索引
+
+    每个联系人的规范化学校、就职公司、公司+部门、籍贯各存一行，关系挖掘按（类型，词）等值查找，
+    不再对教育、职业、籍贯做 icontains 模糊匹配。由 ClientContact / ContactEducation / ContactCareer
+    保存信号维护，rebuild_contact_relation_index 命令全量重建。
+    """
+    TYPE_SCHOOL = 'school'
+    TYPE_COMPANY = 'company'
+    TYPE_DEPARTMENT = 'department'
+    TYPE_BIRTHPLACE = 'birthplace'
+    TOKEN_TYPE_CHOICES = [
+        (TYPE_SCHOOL, '学校'),
+        (TYPE_COMPANY, '就职公司'),
+        (TYPE_DEPARTMENT, '公司部门'),
+        (TYPE_BIRTHPLACE, '籍贯'),
+    ]
+
+    contact = models.ForeignKey(
+        'ClientContact', on_delete=models.CASCADE, related_name='relation_tokens', verbose_name='客户人员'
+    )
+    token_type = models.CharField(max_length=20, choices=TOKEN_TYPE_CHOICES, verbose_name='类型')
+    token = models.CharField(max_length=300, verbose_name='规范化词')
+
+    class Meta:
+        db_table = 'customer_contact_relation_token'
+        verbose_name = '联系人关系索引'
+        verbose_name_plural = verbose_name
+        unique_together = [('contact', 'token_type', 'token')]
+        indexes = [
+            models.Index(fields=['token_type', 'token']),
+        ]
+
+    def __str__(self):
+        return f"{self.contact_id} {self.token_type}:{self.token}"
+
+
 class ClientContact(models.Model):
     """客户联系人模型"""
     GENDER_CHOICES = [
@@ -1323,17 +1527,7 @@ class BusinessExpenseApplication(models.Model):
             # 自动生成申请单号：BEA-YYYYMMDD-XXXX
             from datetime import datetime
             date_str = datetime.now().strftime('%Y%m%d')
-            last_application = BusinessExpenseApplication.objects.filter(
-                application_number__startswith=f'BEA-{date_str}-'
-            ).order_by('-application_number').first()
-            
-            if last_application:
-                last_num = int(last_application.application_number.split('-')[-1])
-                new_num = last_num + 1
-            else:
-                new_num = 1
-            
-            self.application_number = f'BEA-{date_str}-{new_num:04d}'
+            self.application_number = next_document_number(BusinessExpenseApplication.objects, 'application_number', 'BEA', period=date_str)
         
         super().save(*args, **kwargs)
 
@@ -1435,21 +1629,8 @@ class ContractNegotiation(models.Model):
     def save(self, *args, **kwargs):
         # 自动生成洽谈编号
         if not self.negotiation_number:
-            from django.db.models import Max
             current_year = timezone.now().year
-            max_number = ContractNegotiation.objects.filter(
-                negotiation_number__startswith=f'NT-{current_year}-'
-            ).aggregate(max_num=Max('negotiation_number'))['max_num']
-            
-            if max_number:
-                try:
-                    seq = int(max_number.split('-')[-1]) + 1
-                except (ValueError, IndexError):
-                    seq = 1
-            else:
-                seq = 1
-            
-            self.negotiation_number = f'NT-{current_year}-{seq:04d}'
+            self.negotiation_number = next_document_number(ContractNegotiation.objects, 'negotiation_number', 'NT', period=str(current_year))
         
         super().save(*args, **kwargs)
         return f"{self.contract.contract_number} - {from_label} → {to_label}"
@@ -1548,6 +1729,8 @@ class BusinessOpportunity(models.Model):
             models.Index(fields=['status']),
             models.Index(fields=['business_manager', 'status']),
             models.Index(fields=['expected_sign_date']),
+            models.Index(fields=['business_manager', 'created_time']),
+            models.Index(fields=['created_time', 'id']),
         ]
     
     def __str__(self):
@@ -1556,37 +1739,25 @@ class BusinessOpportunity(models.Model):
     def save(self, *args, **kwargs):
         # 自动生成商机编号：SJ-YYYYMMDD-0000（连续编号）
         if not self.opportunity_number:
-            from django.db.models import Max
             from datetime import datetime
             current_date = datetime.now().strftime('%Y%m%d')
-            date_prefix = f'SJ-{current_date}-'
-            
-            # 查找当天最大编号
-            max_opp = BusinessOpportunity.objects.filter(
-                opportunity_number__startswith=date_prefix
-            ).aggregate(max_num=Max('opportunity_number'))['max_num']
-            
-            if max_opp:
-                try:
-                    # 提取最后4位数字作为序号
-                    seq = int(max_opp.split('-')[-1]) + 1
-                except (ValueError, IndexError):
-                    seq = 1
-            else:
-                seq = 1
-            
-            self.opportunity_number = f'{date_prefix}{seq:04d}'
+            self.opportunity_number = next_document_number(
+                BusinessOpportunity.objects, 'opportunity_number', 'SJ', period=current_date,
+            )
         
+        self.fill_computed_fields(update_health=kwargs.get('update_health', False))
+        super().save(*args, **kwargs)
+    
+    def fill_computed_fields(self, update_health=False):
+        """计算加权金额和健康度（save() 时调用；批量导入 bulk_create 前手动调用）"""
         # 自动计算加权金额
         if self.estimated_amount and self.success_probability:
             from decimal import Decimal
             self.weighted_amount = (self.estimated_amount * Decimal(self.success_probability)) / 100
         
         # 自动计算健康度（简化版，后续可以完善）
-        if not self.health_score or kwargs.get('update_health', False):
+        if not self.health_score or update_health:
             self.health_score = self._calculate_health_score()
-        
-        super().save(*args, **kwargs)
     
     def _calculate_health_score(self):
         """计算健康度评分"""
@@ -3025,26 +3196,11 @@ class CustomerRequirementCommunication(models.Model):
     def save(self, *args, **kwargs):
         # 自动生成沟通编号：XQ-YYYYMMDD-0000（连续编号）
         if not self.communication_number:
-            from django.db.models import Max
             from datetime import datetime
             current_date = datetime.now().strftime('%Y%m%d')
-            date_prefix = f'XQ-{current_date}-'
-            
-            # 查找当天最大编号
-            max_comm = CustomerRequirementCommunication.objects.filter(
-                communication_number__startswith=date_prefix
-            ).aggregate(max_num=Max('communication_number'))['max_num']
-            
-            if max_comm:
-                try:
-                    # 提取最后4位数字作为序号
-                    seq = int(max_comm.split('-')[-1]) + 1
-                except (ValueError, IndexError):
-                    seq = 1
-            else:
-                seq = 1
-            
-            self.communication_number = f'{date_prefix}{seq:04d}'
+            self.communication_number = next_document_number(
+                CustomerRequirementCommunication.objects, 'communication_number', 'XQ', period=current_date,
+            )
         
         super().save(*args, **kwargs)
 
@@ -3231,44 +3387,15 @@ class AuthorizationLetter(models.Model):
         
         # 自动生成项目编号：HT-YYYY-NNNN
         if not self.project_number:
-            from django.db.models import Max
             from datetime import datetime
-            current_year = datetime.now().strftime('%Y')
-            year_prefix = f'HT-{current_year}-'
-            
-            # 查找当年最大项目编号（从业务委托书和合同中查找）
             from backend.apps.production_management.models import BusinessContract
-            
-            # 查找业务委托书中的最大项目编号
-            max_letter = AuthorizationLetter.objects.filter(
-                project_number__startswith=year_prefix
-            ).exclude(id=self.id if self.id else None).aggregate(max_num=Max('project_number'))['max_num']
-            
-            # 查找合同中的最大项目编号
-            max_contract = BusinessContract.objects.filter(
-                project_number__startswith=year_prefix
-            ).aggregate(max_num=Max('project_number'))['max_num']
-            
-            # 取两者中的最大值
-            max_project_number = None
-            if max_letter and max_contract:
-                max_project_number = max(max_letter, max_contract)
-            elif max_letter:
-                max_project_number = max_letter
-            elif max_contract:
-                max_project_number = max_contract
-            
-            if max_project_number:
-                try:
-                    # 提取序列号，格式：HT-YYYY-NNNN
-                    seq_str = max_project_number.split('-')[-1]
-                    seq = int(seq_str) + 1
-                except (ValueError, IndexError):
-                    seq = 1
-            else:
-                seq = 1
-            
-            self.project_number = f'{year_prefix}{seq:04d}'
+            current_year = datetime.now().strftime('%Y')
+
+            # 业务委托书与合同共用 HT-YYYY-NNNN 编号空间
+            self.project_number = next_document_number(
+                AuthorizationLetter.objects, 'project_number', 'HT', period=current_year,
+                sources=[(AuthorizationLetter.objects, 'project_number'), (BusinessContract.objects, 'project_number')],
+            )
         
         # 自动计算委托期限（天）
         if self.start_date and self.end_date:
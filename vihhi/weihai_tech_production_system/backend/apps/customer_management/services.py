@@ -5,16 +5,39 @@ import requests
 import hashlib
 import time
 import logging
-from typing import Dict, Optional
+from datetime import timedelta
+from decimal import Decimal
+from typing import Dict, List, Optional
 from django.conf import settings
+from django.utils import timezone
 
 logger = logging.getLogger(__name__)
 
 
+class QixinbaoAPIError(Exception):
+    """启信宝接口调用失败（retryable 为 True 表示网络错误、超时等可重试的失败）"""
+
+    def __init__(self, message: str, retryable: bool = False):
+        super().__init__(message)
+        self.retryable = retryable
+
+
 class QixinbaoAPIService:
     """启信宝API服务类"""
     
+    SYSTEM_CODE = 'QIXINBAO'
+    # 各接口响应缓存有效期（秒）：工商照面、联系方式变化慢；搜索、诉讼、被执行信息按天刷新
+    CACHE_TIMEOUTS = {
+        '/APIService/v2/search/advSearch': 24 * 3600,
+        '/APIService/enterprise/getBasicInfo': 7 * 24 * 3600,
+        '/APIService/enterprise/getContactInfo': 7 * 24 * 3600,
+        '/APIService/sumLawsuit/sumLawsuit': 24 * 3600,
+        '/APIService/execution/getExecutedpersonListByName': 24 * 3600,
+    }
+    
     def __init__(self):
+        # 后台登记的接口（按接口路径），用于写调用日志
+        self._interfaces = {}
         # 优先从后台API管理系统读取配置
         self._load_config_from_api_management()
         
@@ -58,6 +81,10 @@ class QixinbaoAPIService:
                     self.app_secret = auth_config.get('app_secret', '')
                     self.api_base_url = qixinbao_system.base_url
                     self.timeout = api_interface.timeout or 10
+                    self._interfaces = {
+                        interface.url: interface
+                        for interface in ApiInterface.objects.filter(external_system=qixinbao_system, is_active=True)
+                    }
                     self._config_source = "api_management"
                     logger.info('从后台API管理系统加载启信宝配置成功')
                     return
@@ -86,19 +113,51 @@ class QixinbaoAPIService:
         sign = hashlib.md5(sign_str.encode('utf-8')).hexdigest().lower()
         return sign
     
+    def _cache_timeout(self, endpoint: str) -> int:
+        return self.CACHE_TIMEOUTS.get(endpoint, getattr(settings, 'QIXINBAO_CACHE_TIMEOUT', 24 * 3600))
+    
     def _make_request(self, endpoint: str, query_params: Dict) -> Optional[Dict]:
         """
-        发送API请求（GET方式）
+        发送API请求（GET方式），相同查询优先读缓存
         
         根据启信宝API文档：
         - 请求方式：HTTP/HTTPS GET
         - Headers需要：Auth-Version, appkey, timestamp, sign
         - Query参数：keyword等业务参数
+        
+        成功的返回数据按（接口，规范化参数）缓存，并发的相同查询只调用一次；
+        每次查询（含命中缓存）写入 ApiCallLog。
         """
         if not self.app_key or not self.app_secret:
             logger.warning('启信宝API配置未设置，请配置QIXINBAO_APP_KEY和QIXINBAO_APP_SECRET')
             return None
         
+        from backend.apps.api_management.services import fetch_with_cache, log_api_call
+        
+        started = time.monotonic()
+        outcome = {'response_status': None, 'status': 'success', 'error': ''}
+        
+        def fetch():
+            return self._send_request(endpoint, query_params, outcome)
+        
+        data, cache_status = fetch_with_cache(
+            self.SYSTEM_CODE, endpoint, query_params, self._cache_timeout(endpoint), fetch
+        )
+        log_api_call(
+            self.SYSTEM_CODE,
+            self._interfaces.get(endpoint),
+            f'{self.api_base_url}{endpoint}',
+            query_params,
+            cache_status,
+            response_status=outcome['response_status'] if cache_status in ('miss', 'bypass') else None,
+            status=outcome['status'],
+            duration=round(time.monotonic() - started, 3),
+            error_message=outcome['error'],
+        )
+        return data
+    
+    def _send_request(self, endpoint: str, query_params: Dict, outcome: Dict):
+        """实际调用启信宝API，返回 (结果, 是否可缓存)，调用结果写入 outcome"""
         try:
             # 生成时间戳（精确到毫秒）
             timestamp = str(int(time.time() * 1000))
@@ -114,14 +173,16 @@ class QixinbaoAPIService:
                 'sign': sign
             }
             
-            # 发送GET请求
+            # 发送GET请求（复用连接池）
+            from backend.apps.api_management.services import get_http_session
             url = f'{self.api_base_url}{endpoint}'
-            response = requests.get(
+            response = get_http_session(self.SYSTEM_CODE).get(
                 url,
                 params=query_params,
                 headers=headers,
                 timeout=self.timeout
             )
+            outcome['response_status'] = response.status_code
             
             response.raise_for_status()
             result = response.json()
@@ -134,7 +195,7 @@ class QixinbaoAPIService:
             if status == '200':
                 data = result.get('data')
                 logger.info(f'启信宝API返回数据: {data}')
-                return data
+                return data, data is not None
             else:
                 # 根据错误码提供更详细的错误信息
                 error_info = {
@@ -155,19 +216,25 @@ class QixinbaoAPIService:
                     error_info['detail'] = '接口调用鉴权失败，请检查签名算法'
                 
                 logger.warning(f'启信宝API返回错误: {error_info}')
-                # 返回错误信息，让调用方可以显示更详细的错误
-                return {'error': error_info}
+                outcome['status'] = 'failed'
+                outcome['error'] = f'{status} {message}'
+                # 返回错误信息，让调用方可以显示更详细的错误（错误结果不缓存）
+                return {'error': error_info}, False
                 
         except requests.exceptions.RequestException as e:
             error_msg = str(e)
             logger.error(f'启信宝API请求失败: {error_msg}')
+            outcome['status'] = 'timeout' if isinstance(e, requests.exceptions.Timeout) else 'failed'
+            outcome['error'] = error_msg
             # 如果是连接错误，可能是IP白名单未配置
             if '104' in error_msg or 'IP' in error_msg or '白名单' in error_msg:
                 logger.error('可能的原因：IP白名单未配置，请在启信宝开放平台配置API IP白名单')
-            return None
+            return None, False
         except Exception as e:
             logger.error(f'启信宝API处理异常: {str(e)}', exc_info=True)
-            return None
+            outcome['status'] = 'failed'
+            outcome['error'] = str(e)
+            return None, False
     
     def verify_credit_code(self, credit_code: str, company_name: str = None) -> Dict:
         """
@@ -661,7 +728,8 @@ class QixinbaoAPIService:
         else:
             return ('low', '低风险')
     
-    def get_execution_records(self, company_id: str = None, credit_code: str = None, company_name: str = None) -> list:
+    def get_execution_records(self, company_id: str = None, credit_code: str = None, company_name: str = None,
+                              raise_on_error: bool = False) -> list:
         """
         获取被执行详细记录列表
         
@@ -676,6 +744,7 @@ class QixinbaoAPIService:
             company_id: 企业ID（启信宝返回的企业编号）
             credit_code: 统一社会信用代码
             company_name: 企业全名
+            raise_on_error: 调用失败时抛出 QixinbaoAPIError（批量同步据此重试），默认返回空列表
         
         Returns:
             [
@@ -721,11 +790,15 @@ class QixinbaoAPIService:
             
             if result is None:
                 logger.warning(f'API调用失败: {query_name}（网络错误或请求异常）')
+                if raise_on_error:
+                    raise QixinbaoAPIError(f'API调用失败: {query_name}（网络错误或请求异常）', retryable=True)
                 return []
             
             if isinstance(result, dict) and 'error' in result:
                 error_info = result.get('error', {})
                 logger.warning(f'API返回错误: {error_info.get("message", "未知错误")}')
+                if raise_on_error:
+                    raise QixinbaoAPIError(f'API返回错误: {error_info.get("message", "未知错误")}')
                 return []
             
             # 解析返回数据
@@ -761,8 +834,12 @@ class QixinbaoAPIService:
             else:
                 logger.info(f'未获取到被执行记录: {query_name}（API返回数据为空）')
                     
+        except QixinbaoAPIError:
+            raise
         except Exception as e:
             logger.error(f'获取被执行记录异常: {str(e)}', exc_info=True)
+            if raise_on_error:
+                raise QixinbaoAPIError(f'获取被执行记录异常: {e}') from e
             return []
         
         return records
@@ -1036,72 +1113,49 @@ def get_service():
 
 # ==================== 客户管理服务函数（按《客户管理详细设计方案 v1.12》实现）====================
 
-def auto_move_to_public_sea():
-    """
-    自动将超过90天没有拜访信息的客户移入公海
-    
-    规则：
-    - 超过90天没有对客户人员有任何拜访信息的客户，自动进入客户公海
-    - 进入原因：auto_entry
-    - 清空负责人
-    """
-    from django.utils import timezone
-    from datetime import timedelta
-    from .models import Client, CustomerRelationship
-    
-    cutoff_date = timezone.now() - timedelta(days=90)
-    
-    # 查找所有有负责人的客户
-    clients = Client.objects.filter(responsible_user__isnull=False)
-    
-    moved_count = 0
-    for client in clients:
-        # 检查是否有90天内的拜访记录
-        has_recent_visit = CustomerRelationship.objects.filter(
-            client=client,
-            followup_time__gte=cutoff_date
-        ).exists()
-        
-        if not has_recent_visit:
-            # 移入公海
-            client.responsible_user = None
-            client.public_sea_entry_time = timezone.now()
-            client.public_sea_reason = 'auto_entry'
-            client.save(update_fields=['responsible_user', 'public_sea_entry_time', 'public_sea_reason'])
-            moved_count += 1
-    
-    return moved_count
-
-
 def find_related_contacts_by_education(contact):
     """
     根据教育背景查找关联的客户人员
     
     规则：
     - 同一时间段在同一学校、同一专业的其他客户人员
+    
+    候选人先按关系索引的学校词查出，再一次取出候选人的教育背景比对专业和在校时间。
     """
-    from .models import ClientContact, ContactEducation
+    from backend.apps.customer_management.models import ContactEducation, ContactRelationToken
+    from backend.apps.customer_management.services.contact_relations import (
+        contacts_sharing_token,
+        normalize_token,
+    )
     
-    related_contacts = []
+    educations = [
+        (normalize_token(edu.school.name if edu.school else edu.school_name), edu)
+        for edu in ContactEducation.objects.filter(contact=contact).select_related('school')
+    ]
+    educations = [(school, edu) for school, edu in educations if school]
+    if not educations:
+        return []
     
-    # 获取该联系人的所有教育背景
-    educations = ContactEducation.objects.filter(contact=contact)
+    candidates = ContactEducation.objects.filter(
+        contact_id__in=contacts_sharing_token(
+            ContactRelationToken.TYPE_SCHOOL, {school for school, _ in educations}, exclude_contact_id=contact.id
+        )
+    ).select_related('contact', 'school')
     
-    for edu in educations:
-        if not edu.school or not edu.start_date or not edu.end_date:
-            continue
-        
-        # 查找同一时间段、同一学校、同一专业的其他联系人
-        overlapping_educations = ContactEducation.objects.filter(
-            school=edu.school,
-            major=edu.major if edu.major else '',
-            start_date__lte=edu.end_date,
-            end_date__gte=edu.start_date
-        ).exclude(contact=contact).select_related('contact')
-        
-        for overlapping_edu in overlapping_educations:
-            if overlapping_edu.contact not in related_contacts:
-                related_contacts.append(overlapping_edu.contact)
+    related_contacts = []
+    for other in candidates:
+        other_school = normalize_token(other.school.name if other.school else other.school_name)
+        for school, edu in educations:
+            # 同一学校、同一专业、在校时间有重叠
+            if (
+                other_school == school
+                and (other.major or '') == (edu.major or '')
+                and other.enrollment_date <= edu.graduation_date
+                and other.graduation_date >= edu.enrollment_date
+            ):
+                if other.contact not in related_contacts:
+                    related_contacts.append(other.contact)
+                break
     
     return related_contacts
 
@@ -1114,7 +1168,7 @@ def find_related_contacts_by_work_experience(contact):
     - 同一时间段在同一公司、同一办公地址的其他客户人员
     """
     from django.utils import timezone
-    from .models import ClientContact, ContactWorkExperience
+    from backend.apps.customer_management.models import ContactWorkExperience
     from datetime import date
     
     related_contacts = []
@@ -1154,7 +1208,7 @@ def find_all_related_contacts(contact):
     - 关联联系人列表
     - 关联原因（教育背景、工作经历等）
     """
-    from .models import ContactJobChange, ContactCooperation, ContactTracking
+    from backend.apps.customer_management.models import ContactJobChange, ContactCooperation
     
     related_contacts = []
     relation_reasons = {}
@@ -1178,10 +1232,10 @@ def find_all_related_contacts(contact):
     # 根据工作变动查找（同一公司、同一时间段）
     job_changes = ContactJobChange.objects.filter(contact=contact)
     for change in job_changes:
-        if change.new_company:
+        if change.to_company:
             # 查找在同一公司工作的其他联系人
             related_changes = ContactJobChange.objects.filter(
-                new_company=change.new_company,
+                to_company=change.to_company,
                 change_date__year=change.change_date.year
             ).exclude(contact=contact).select_related('contact')
             
@@ -1193,10 +1247,10 @@ def find_all_related_contacts(contact):
     # 根据合作信息查找（同一时间段、同一合作类型）
     cooperations = ContactCooperation.objects.filter(contact=contact)
     for coop in cooperations:
-        if coop.cooperation_date:
+        if coop.cooperation_start_date:
             related_coops = ContactCooperation.objects.filter(
                 cooperation_type=coop.cooperation_type,
-                cooperation_date__year=coop.cooperation_date.year
+                cooperation_start_date__year=coop.cooperation_start_date.year
             ).exclude(contact=contact).select_related('contact')
             
             for related_coop in related_coops:
@@ -1207,18 +1261,30 @@ def find_all_related_contacts(contact):
     return related_contacts, relation_reasons
 
 
+_ADDRESS_FULLWIDTH = str.maketrans({'（': '(', '）': ')', '　': ' ', '，': ',', '－': '-'})
+
+
+def normalize_address(address: Optional[str]) -> str:
+    """规范化地址用于缓存键：全角符号转半角、去掉所有空白"""
+    return ''.join((address or '').translate(_ADDRESS_FULLWIDTH).split())[:500]
+
+
 class AmapAPIService:
     """高德地图API服务类
     
     提供地址、区域、定位等相关功能：
-    - 地理编码（地址转坐标）
-    - 逆地理编码（坐标转地址）
+    - 地理编码（地址转坐标，结果持久缓存在 GeocodeCache，支持批量）
+    - 逆地理编码（坐标转地址，结果缓存在共享缓存）
     - 行政区域查询
     - IP定位
     - 地址解析
     - 输入提示（搜索建议）
     """
     
+    SYSTEM_CODE = 'AMAP'
+    # 高德批量地理编码每次最多 10 个地址
+    GEOCODE_BATCH_SIZE = 10
+    
     def __init__(self):
         # 优先从后台API管理系统读取配置
         self._load_config_from_api_management()
@@ -1295,9 +1361,10 @@ class AmapAPIService:
             params['key'] = self.api_key
             params['output'] = 'json'  # 默认返回JSON格式
             
-            # 发送GET请求
+            # 发送GET请求（复用连接池）
+            from backend.apps.api_management.services import get_http_session
             url = f'{self.api_base_url}{endpoint}'
-            response = requests.get(
+            response = get_http_session(self.SYSTEM_CODE).get(
                 url,
                 params=params,
                 timeout=self.timeout
@@ -1324,9 +1391,19 @@ class AmapAPIService:
             logger.error(f'高德地图API处理异常: {endpoint}, error={str(e)}')
             return None
     
+    def _cached_request(self, endpoint: str, params: Dict, timeout: int) -> Optional[Dict]:
+        """带共享缓存的请求：相同参数在有效期内只调用一次，失败结果不缓存"""
+        from backend.apps.api_management.services import fetch_with_cache
+        
+        def fetch():
+            result = self._make_request(endpoint, dict(params))
+            return result, result is not None
+        
+        return fetch_with_cache(self.SYSTEM_CODE, endpoint, params, timeout, fetch)[0]
+    
     def geocode(self, address: str, city: Optional[str] = None) -> Optional[Dict]:
         """
-        地理编码：将地址转换为经纬度坐标
+        地理编码：将地址转换为经纬度坐标（优先读 GeocodeCache）
         
         Args:
             address: 地址字符串，如"北京市朝阳区阜通东大街6号"
@@ -1343,37 +1420,113 @@ class AmapAPIService:
                 'level': '门址'  # 地址级别
             }
         """
+        return self.geocode_batch([address], city)[0]
+    
+    def geocode_batch(self, addresses: List[str], city: Optional[str] = None) -> List[Optional[Dict]]:
+        """
+        批量地理编码，返回与 addresses 一一对应的结果（无法解析为 None）
+        
+        先按（规范化地址，城市）一次查询 GeocodeCache；未命中的地址用高德批量模式
+        （batch=true，每次最多 10 个）解析后写回缓存表。高德未解析出坐标的地址也记录，
+        GEOCODE_NEGATIVE_CACHE_DAYS 天内不再重复查询；接口调用失败的地址不记录。
+        """
+        from backend.apps.customer_management.models import GeocodeCache
+        
+        city_key = (city or '').strip()[:100]
+        keys = [normalize_address(address) for address in addresses]
+        wanted = {key for key in keys if key}
+        negative_cutoff = timezone.now() - timedelta(days=getattr(settings, 'GEOCODE_NEGATIVE_CACHE_DAYS', 7))
+        
+        resolved = {}
+        if wanted:
+            for entry in GeocodeCache.objects.filter(city=city_key, address__in=wanted):
+                if entry.result is not None or entry.updated_time >= negative_cutoff:
+                    resolved[entry.address] = entry.result
+        
+        missing = [key for key in dict.fromkeys(keys) if key and key not in resolved]
+        for offset in range(0, len(missing), self.GEOCODE_BATCH_SIZE):
+            chunk = missing[offset:offset + self.GEOCODE_BATCH_SIZE]
+            results = self._request_geocodes(chunk, city_key)
+            if results is None:
+                continue
+            resolved.update(results)
+            self._store_geocodes(results, city_key)
+        
+        return [resolved.get(key) for key in keys]
+    
+    def _request_geocodes(self, addresses: List[str], city: str) -> Optional[Dict[str, Optional[Dict]]]:
+        """调用高德批量地理编码，返回 {地址: 结果}；接口调用失败返回 None"""
         params = {
-            'address': address
+            'address': '|'.join(addresses),
+            'batch': 'true' if len(addresses) > 1 else 'false',
         }
         if city:
             params['city'] = city
         
         result = self._make_request('/geocode/geo', params)
-        if not result or not result.get('geocodes'):
+        if result is None:
             return None
-        
-        geocode = result['geocodes'][0]  # 取第一个结果
-        
-        location = geocode.get('location', '')
-        if not location:
+        geocodes = result.get('geocodes') or []
+        if len(addresses) > 1 and len(geocodes) != len(addresses):
+            logger.warning(f'高德批量地理编码返回数量不一致: 请求 {len(addresses)} 个，返回 {len(geocodes)} 个')
+            return None
+        return {
+            address: self._parse_geocode(geocodes[index], address) if index < len(geocodes) else None
+            for index, address in enumerate(addresses)
+        }
+    
+    @staticmethod
+    def _parse_geocode(geocode: Dict, address: str) -> Optional[Dict]:
+        location = geocode.get('location')
+        # 批量模式下无法解析的地址各字段为空列表
+        if not location or not isinstance(location, str):
             return None
         
         # 解析经纬度
         lon, lat = location.split(',')
         
+        def text(field, default=''):
+            value = geocode.get(field)
+            return value if isinstance(value, str) else default
+        
         return {
             'location': location,
             'longitude': float(lon),
             'latitude': float(lat),
-            'formatted_address': geocode.get('formatted_address', address),
-            'province': geocode.get('province', ''),
-            'city': geocode.get('city', ''),
-            'district': geocode.get('district', ''),
-            'adcode': geocode.get('adcode', ''),
-            'level': geocode.get('level', '')
+            'formatted_address': text('formatted_address', address),
+            'province': text('province'),
+            'city': text('city'),
+            'district': text('district'),
+            'adcode': text('adcode'),
+            'level': text('level')
         }
     
+    @staticmethod
+    def _store_geocodes(results: Dict[str, Optional[Dict]], city: str) -> None:
+        from backend.apps.customer_management.models import GeocodeCache
+        
+        now = timezone.now()
+        entries = [
+            GeocodeCache(
+                address=address,
+                city=city,
+                longitude=Decimal(str(result['longitude'])) if result else None,
+                latitude=Decimal(str(result['latitude'])) if result else None,
+                result=result,
+                updated_time=now,
+            )
+            for address, result in results.items()
+        ]
+        try:
+            GeocodeCache.objects.bulk_create(
+                entries,
+                update_conflicts=True,
+                unique_fields=['address', 'city'],
+                update_fields=['longitude', 'latitude', 'result', 'updated_time'],
+            )
+        except Exception as e:
+            logger.warning(f'写入地理编码缓存失败: {str(e)}')
+    
     def regeocode(self, longitude: float, latitude: float) -> Optional[Dict]:
         """
         逆地理编码：将经纬度坐标转换为地址
@@ -1402,12 +1555,15 @@ class AmapAPIService:
                 }
             }
         """
+        # 坐标保留 5 位小数（约 1 米）作为缓存键，同一地点反复签到直接命中共享缓存
         params = {
-            'location': f'{longitude},{latitude}',
+            'location': f'{round(float(longitude), 5)},{round(float(latitude), 5)}',
             'extensions': 'all'  # 返回详细信息
         }
         
-        result = self._make_request('/geocode/regeo', params)
+        result = self._cached_request(
+            '/geocode/regeo', params, getattr(settings, 'AMAP_REGEOCODE_CACHE_TIMEOUT', 30 * 24 * 3600)
+        )
         if not result or not result.get('regeocode'):
             return None
         
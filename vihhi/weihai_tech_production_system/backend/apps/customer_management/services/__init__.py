@@ -2,6 +2,7 @@
 客户管理服务模块
 """
 from .quotation_calculator import QuotationCalculator
+from .public_sea import auto_move_to_public_sea
 
 # 导入原有的服务（从父目录的services.py）
 # 注意：services.py在父目录（backend/apps/customer_management/services.py）
@@ -21,14 +22,18 @@ if os.path.exists(services_file):
     
     # 导出服务
     QixinbaoAPIService = customer_management_services.QixinbaoAPIService
+    QixinbaoAPIError = customer_management_services.QixinbaoAPIError
     get_service = customer_management_services.get_service
+    find_all_related_contacts = customer_management_services.find_all_related_contacts
     AmapAPIService = getattr(customer_management_services, 'AmapAPIService', None)
 else:
     # 如果文件不存在，提供默认实现
     QixinbaoAPIService = None
+    QixinbaoAPIError = None
     AmapAPIService = None
     def get_service():
         raise ImportError("Cannot import get_service: services.py not found")
+    find_all_related_contacts = None
 
-__all__ = ['QuotationCalculator', 'QixinbaoAPIService', 'get_service', 'AmapAPIService']
+__all__ = ['QuotationCalculator', 'QixinbaoAPIService', 'QixinbaoAPIError', 'get_service', 'find_all_related_contacts', 'AmapAPIService', 'auto_move_to_public_sea']
 
@@ -0,0 +1,283 @@
+"""
+客户统计快照服务
+
+客户列表顶部的统计卡片（客户总数、活跃、VIP、公海、累计合同金额）
+从 ClientStatsSnapshot 物化计数器读取，按数据范围（全局 / 部门 / 个人）各存一行：
+
+- 客户保存/删除时，由信号在同一事务内按差值增量更新受影响的快照行
+- 快照行不存在时，首次读取时按范围聚合一次并写入
+- 夜间任务 reconcile_client_stats 使用分组聚合全量校准，修正批量 update() 等绕过信号的变更
+
+个人范围：负责人或创建人为该用户的客户；
+部门范围：负责人或创建人为该部门激活成员的客户（与 data_scope 的部门范围一致）。
+"""
+import logging
+from collections import defaultdict
+from decimal import Decimal
+from typing import Dict, Iterable, Optional, Tuple
+
+from django.db import transaction
+from django.db.models import Count, F, Q, Sum
+from django.utils import timezone
+
+from backend.apps.customer_management.models import Client, ClientStatsSnapshot
+from backend.apps.system_management.data_scope import (
+    SCOPE_ALL,
+    SCOPE_DEPARTMENT,
+    SCOPE_NONE,
+    get_department_user_ids,
+    resolve_client_scope,
+)
+
+logger = logging.getLogger(__name__)
+
+COUNT_FIELDS = ('total_count', 'active_count', 'vip_count', 'public_sea_count')
+STAT_FIELDS = COUNT_FIELDS + ('total_contract_amount',)
+# 影响统计的客户字段（update_fields 与之无交集时跳过维护）
+TRACKED_CLIENT_FIELDS = ('responsible_user', 'created_by', 'is_active', 'client_level', 'total_contract_amount')
+STATE_VALUES = ('responsible_user_id', 'created_by_id', 'is_active', 'client_level', 'total_contract_amount')
+
+ScopeKey = Tuple[str, int]
+GLOBAL_KEY: ScopeKey = (ClientStatsSnapshot.SCOPE_GLOBAL, 0)
+
+
+def empty_stats() -> Dict[str, object]:
+    stats = {field: 0 for field in COUNT_FIELDS}
+    stats['total_contract_amount'] = Decimal('0')
+    return stats
+
+
+def _aggregates() -> Dict[str, object]:
+    """统计聚合表达式（一次扫描算出全部计数）"""
+    return {
+        'total_count': Count('id'),
+        'active_count': Count('id', filter=Q(is_active=True)),
+        'vip_count': Count('id', filter=Q(client_level='vip')),
+        'public_sea_count': Count('id', filter=Q(responsible_user__isnull=True)),
+        'total_contract_amount': Sum('total_contract_amount'),
+    }
+
+
+def compute_stats(queryset) -> Dict[str, object]:
+    """对任意客户查询集计算统计值"""
+    stats = queryset.order_by().aggregate(**_aggregates())
+    stats['total_contract_amount'] = stats['total_contract_amount'] or Decimal('0')
+    return stats
+
+
+def _scope_queryset(scope_type: str, scope_id: int):
+    clients = Client.objects.all()
+    if scope_type == ClientStatsSnapshot.SCOPE_GLOBAL:
+        return clients
+    if scope_type == ClientStatsSnapshot.SCOPE_USER:
+        return clients.filter(Q(responsible_user_id=scope_id) | Q(created_by_id=scope_id))
+    user_ids = get_department_user_ids(scope_id)
+    if not user_ids:
+        return clients.none()
+    return clients.filter(Q(responsible_user_id__in=sorted(user_ids)) | Q(created_by_id__in=sorted(user_ids)))
+
+
+def rebuild_snapshot(scope_type: str, scope_id: int = 0) -> ClientStatsSnapshot:
+    """按范围重新聚合并写入快照"""
+    stats = compute_stats(_scope_queryset(scope_type, scope_id))
+    snapshot, _ = ClientStatsSnapshot.objects.update_or_create(
+        scope_type=scope_type,
+        scope_id=scope_id,
+        defaults={**stats, 'reconciled_time': timezone.now()},
+    )
+    return snapshot
+
+
+def get_snapshot(scope_type: str, scope_id: int = 0) -> ClientStatsSnapshot:
+    """读取快照（单次主键查询），不存在时构建"""
+    snapshot = ClientStatsSnapshot.objects.filter(scope_type=scope_type, scope_id=scope_id).first()
+    if snapshot is None:
+        snapshot = rebuild_snapshot(scope_type, scope_id)
+    return snapshot
+
+
+def scope_key_for_user(user, permission_set) -> Optional[ScopeKey]:
+    """将用户的客户数据范围映射到快照行；无权限返回 None"""
+    scope = resolve_client_scope(user, permission_set)
+    if scope.level == SCOPE_NONE:
+        return None
+    if scope.level == SCOPE_ALL:
+        return GLOBAL_KEY
+    if scope.level == SCOPE_DEPARTMENT:
+        return (ClientStatsSnapshot.SCOPE_DEPARTMENT, user.department_id)
+    return (ClientStatsSnapshot.SCOPE_USER, user.pk)
+
+
+def get_client_stats_for_user(user, permission_set) -> Dict[str, object]:
+    """返回用户数据范围内的客户统计"""
+    key = scope_key_for_user(user, permission_set)
+    if key is None:
+        return empty_stats()
+    snapshot = get_snapshot(*key)
+    return {field: getattr(snapshot, field) for field in STAT_FIELDS}
+
+
+# ==================== 增量维护 ====================
+
+def capture_client_state(client) -> Dict[str, object]:
+    return {field: getattr(client, field) for field in STATE_VALUES}
+
+
+def load_client_state(client_id) -> Optional[Dict[str, object]]:
+    return Client.objects.filter(pk=client_id).values(*STATE_VALUES).first()
+
+
+def _contribution(state) -> Dict[str, object]:
+    return {
+        'total_count': 1,
+        'active_count': 1 if state['is_active'] else 0,
+        'vip_count': 1 if state['client_level'] == 'vip' else 0,
+        'public_sea_count': 1 if state['responsible_user_id'] is None else 0,
+        'total_contract_amount': Decimal(state['total_contract_amount'] or 0),
+    }
+
+
+def _scope_keys(state, user_departments: Dict[int, Optional[int]]) -> set:
+    keys = {GLOBAL_KEY}
+    for user_id in {state['responsible_user_id'], state['created_by_id']} - {None}:
+        keys.add((ClientStatsSnapshot.SCOPE_USER, user_id))
+        department_id = user_departments.get(user_id)
+        if department_id:
+            keys.add((ClientStatsSnapshot.SCOPE_DEPARTMENT, department_id))
+    return keys
+
+
+def _active_user_departments(user_ids: Iterable[int]) -> Dict[int, Optional[int]]:
+    from backend.apps.system_management.models import User
+
+    user_ids = [uid for uid in set(user_ids) if uid]
+    if not user_ids:
+        return {}
+    return dict(User.objects.filter(id__in=user_ids, is_active=True).values_list('id', 'department_id'))
+
+
+def apply_client_change(old_state: Optional[dict], new_state: Optional[dict]) -> None:
+    """
+    将一次客户变更（新增 / 修改 / 删除）的差值应用到受影响的快照行
+
+    只更新已存在的快照行；不存在的行会在首次读取时按最新数据构建。
+    """
+    apply_client_changes([(old_state, new_state)])
+
+
+def apply_client_changes(changes: Iterable[Tuple[Optional[dict], Optional[dict]]]) -> None:
+    """批量版本：先按范围汇总全部变更的差值，每个受影响的快照行只更新一次"""
+    changes = [(old_state, new_state) for old_state, new_state in changes if old_state or new_state]
+    if not changes:
+        return
+    user_departments = _active_user_departments(
+        uid
+        for pair in changes
+        for state in pair if state
+        for uid in (state['responsible_user_id'], state['created_by_id'])
+    )
+
+    deltas = defaultdict(lambda: {field: 0 for field in STAT_FIELDS})
+    for old_state, new_state in changes:
+        for state, sign in ((old_state, -1), (new_state, 1)):
+            if not state:
+                continue
+            contribution = _contribution(state)
+            for key in _scope_keys(state, user_departments):
+                for field in STAT_FIELDS:
+                    deltas[key][field] += sign * contribution[field]
+
+    now = timezone.now()
+    for (scope_type, scope_id), delta in deltas.items():
+        updates = {field: F(field) + value for field, value in delta.items() if value}
+        if updates:
+            ClientStatsSnapshot.objects.filter(scope_type=scope_type, scope_id=scope_id).update(
+                **updates, updated_time=now
+            )
+
+
+# ==================== 全量校准 ====================
+
+def _grouped(queryset, key: str) -> Dict[int, Dict[str, object]]:
+    rows = queryset.order_by().values(key).annotate(**_aggregates())
+    return {row.pop(key): row for row in rows if row[key] is not None}
+
+
+def _combine(*parts) -> Dict[int, Dict[str, object]]:
+    """按容斥原理合并：负责人分组 + 创建人分组 - 两者同属分组"""
+    combined = defaultdict(empty_stats)
+    for groups, sign in parts:
+        for group_id, stats in groups.items():
+            for field in STAT_FIELDS:
+                combined[group_id][field] += sign * (stats[field] or 0)
+    return combined
+
+
+def compute_all_scope_stats() -> Dict[ScopeKey, Dict[str, object]]:
+    """用少量分组聚合计算全部范围的统计值"""
+    clients = Client.objects.all()
+    result = {GLOBAL_KEY: compute_stats(clients)}
+
+    by_user = _combine(
+        (_grouped(clients, 'responsible_user_id'), 1),
+        (_grouped(clients, 'created_by_id'), 1),
+        (_grouped(clients.filter(responsible_user_id=F('created_by_id')), 'responsible_user_id'), -1),
+    )
+    for user_id, stats in by_user.items():
+        result[(ClientStatsSnapshot.SCOPE_USER, user_id)] = stats
+
+    active_responsible = clients.filter(responsible_user__is_active=True)
+    active_creator = clients.filter(created_by__is_active=True)
+    by_department = _combine(
+        (_grouped(active_responsible, 'responsible_user__department_id'), 1),
+        (_grouped(active_creator, 'created_by__department_id'), 1),
+        (
+            _grouped(
+                active_responsible.filter(
+                    created_by__is_active=True,
+                    responsible_user__department_id=F('created_by__department_id'),
+                ),
+                'responsible_user__department_id',
+            ),
+            -1,
+        ),
+    )
+    for department_id, stats in by_department.items():
+        result[(ClientStatsSnapshot.SCOPE_DEPARTMENT, department_id)] = stats
+    return result
+
+
+def reconcile_client_stats() -> Dict[str, int]:
+    """全量校准所有快照行，返回写入与清理的行数"""
+    now = timezone.now()
+    computed = compute_all_scope_stats()
+    with transaction.atomic():
+        existing = {
+            (row.scope_type, row.scope_id): row
+            for row in ClientStatsSnapshot.objects.select_for_update()
+        }
+        to_update, to_create = [], []
+        for key, stats in computed.items():
+            row = existing.pop(key, None)
+            if row is None:
+                row = ClientStatsSnapshot(scope_type=key[0], scope_id=key[1])
+                to_create.append(row)
+            else:
+                to_update.append(row)
+            for field in STAT_FIELDS:
+                setattr(row, field, stats[field] or 0)
+            row.reconciled_time = now
+            row.updated_time = now
+        # 已无客户的范围：清零而不是删除，避免下一次读取重新聚合
+        for row in existing.values():
+            for field in STAT_FIELDS:
+                setattr(row, field, 0)
+            row.reconciled_time = now
+            row.updated_time = now
+            to_update.append(row)
+        ClientStatsSnapshot.objects.bulk_create(to_create, batch_size=500)
+        ClientStatsSnapshot.objects.bulk_update(
+            to_update, list(STAT_FIELDS) + ['reconciled_time', 'updated_time'], batch_size=500
+        )
+    logger.info('客户统计快照校准完成：更新 %s 行，新增 %s 行', len(to_update), len(to_create))
+    return {'updated': len(to_update), 'created': len(to_create)}
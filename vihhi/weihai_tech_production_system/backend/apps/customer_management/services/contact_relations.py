@@ -0,0 +1,167 @@
+"""
+联系人关系索引
+维护联系人关系特征的倒排索引，供关系挖掘查询
+"""
+import re
+from collections import defaultdict
+from typing import Dict, Iterable, List, Set, Tuple
+
+from django.db import transaction
+from django.db.models import Q
+
+from backend.apps.customer_management.models import (
+    ClientContact,
+    ContactCareer,
+    ContactEducation,
+    ContactRelationToken,
+)
+
+Token = Tuple[str, str]
+
+# 关系分组：挖掘结果中每组对应的索引类型
+RELATION_GROUPS = {
+    'education': (ContactRelationToken.TYPE_SCHOOL,),
+    'birthplace': (ContactRelationToken.TYPE_BIRTHPLACE,),
+    'career': (ContactRelationToken.TYPE_COMPANY, ContactRelationToken.TYPE_DEPARTMENT),
+}
+
+_FULLWIDTH = str.maketrans({'（': '(', '）': ')', '　': ' ', '，': ',', '、': ',', '－': '-', '·': '.'})
+_PLACE_SEPARATORS = re.compile(r'[\s,/;|\-]+')
+_PLACE_PARTS = re.compile(r'.+?(?:特别行政区|自治区|自治州|自治县|省|市|县|区|州|盟|旗)|.+$')
+_PLACE_SUFFIXES = ('省', '市')
+
+
+def normalize_token(value) -> str:
+    return ''.join(str(value or '').translate(_FULLWIDTH).lower().split())[:300]
+
+
+def birthplace_tokens(birthplace: str) -> Set[str]:
+    tokens = set()
+    for segment in _PLACE_SEPARATORS.split((birthplace or '').translate(_FULLWIDTH)):
+        for part in _PLACE_PARTS.findall(segment):
+            if part.endswith(_PLACE_SUFFIXES) and len(part) > 2:
+                part = part[:-1]
+            part = normalize_token(part)
+            if len(part) > 1:
+                tokens.add(part)
+    return tokens
+
+
+def _school_tokens(school_name: str) -> Set[Token]:
+    name = normalize_token(school_name)
+    return {(ContactRelationToken.TYPE_SCHOOL, name)} if len(name) > 1 else set()
+
+
+def _career_tokens(company: str, department: str) -> Set[Token]:
+    company = normalize_token(company)
+    if len(company) < 2:
+        return set()
+    tokens = {(ContactRelationToken.TYPE_COMPANY, company)}
+    department = normalize_token(department)
+    if len(department) > 1:
+        tokens.add((ContactRelationToken.TYPE_DEPARTMENT, f'{company}/{department}'[:300]))
+    return tokens
+
+
+def rebuild_contact_tokens(contact_ids: Iterable[int]) -> Dict[str, int]:
+    """按当前的籍贯、教育、职业重算这些联系人的索引词，只增删有变化的行"""
+    contact_ids = list(set(contact_ids))
+    if not contact_ids:
+        return {'created': 0, 'deleted': 0}
+
+    desired: Dict[int, Set[Token]] = {}
+    for contact_id, birthplace in ClientContact.objects.filter(id__in=contact_ids).values_list('id', 'birthplace'):
+        desired[contact_id] = {(ContactRelationToken.TYPE_BIRTHPLACE, token) for token in birthplace_tokens(birthplace)}
+    for contact_id, school_name, fallback_name in ContactEducation.objects.filter(
+        contact_id__in=list(desired)
+    ).values_list('contact_id', 'school__name', 'school_name'):
+        desired[contact_id] |= _school_tokens(school_name or fallback_name)
+    for contact_id, company, department in ContactCareer.objects.filter(
+        contact_id__in=list(desired)
+    ).values_list('contact_id', 'company', 'department'):
+        desired[contact_id] |= _career_tokens(company, department)
+
+    stale_ids = []
+    current: Dict[int, Set[Token]] = defaultdict(set)
+    for row_id, contact_id, token_type, token in ContactRelationToken.objects.filter(
+        contact_id__in=contact_ids
+    ).values_list('id', 'contact_id', 'token_type', 'token'):
+        if (token_type, token) in desired.get(contact_id, ()):
+            current[contact_id].add((token_type, token))
+        else:
+            stale_ids.append(row_id)
+
+    new_rows = [
+        ContactRelationToken(contact_id=contact_id, token_type=token_type, token=token)
+        for contact_id, tokens in desired.items()
+        for token_type, token in tokens - current[contact_id]
+    ]
+    with transaction.atomic():
+        if stale_ids:
+            ContactRelationToken.objects.filter(id__in=stale_ids).delete()
+        ContactRelationToken.objects.bulk_create(new_rows, batch_size=1000, ignore_conflicts=True)
+    return {'created': len(new_rows), 'deleted': len(stale_ids)}
+
+
+def rebuild_all(chunk_size: int = 1000, progress=None) -> Dict[str, int]:
+    """按联系人 ID 顺序分块重建全部索引"""
+    totals = {'contacts': 0, 'created': 0, 'deleted': 0}
+    last_id = 0
+    while True:
+        ids = list(
+            ClientContact.objects.filter(id__gt=last_id).order_by('id').values_list('id', flat=True)[:chunk_size]
+        )
+        if not ids:
+            break
+        result = rebuild_contact_tokens(ids)
+        totals['contacts'] += len(ids)
+        totals['created'] += result['created']
+        totals['deleted'] += result['deleted']
+        last_id = ids[-1]
+        if progress:
+            progress(totals)
+    return totals
+
+
+def contact_tokens(contact_ids: Iterable[int]) -> Dict[str, Set[str]]:
+    """联系人（可多个）的索引词，按类型分组"""
+    tokens: Dict[str, Set[str]] = defaultdict(set)
+    for token_type, token in ContactRelationToken.objects.filter(
+        contact_id__in=list(contact_ids)
+    ).values_list('token_type', 'token'):
+        tokens[token_type].add(token)
+    return tokens
+
+
+def related_contacts(contact_ids: Iterable[int], limit: int = 50) -> Dict[str, List[ClientContact]]:
+    """
+    查找与这些联系人有教育 / 籍贯 / 职业关系的其他联系人
+
+    返回 {'education': [...], 'birthplace': [...], 'career': [...]}，每组按关系评分降序，最多 limit 个。
+    """
+    contact_ids = list(contact_ids)
+    tokens = contact_tokens(contact_ids)
+    result = {group: [] for group in RELATION_GROUPS}
+    for group, token_types in RELATION_GROUPS.items():
+        condition = Q()
+        for token_type in token_types:
+            if tokens.get(token_type):
+                condition |= Q(token_type=token_type, token__in=tokens[token_type])
+        if not condition:
+            continue
+        matched = ContactRelationToken.objects.filter(condition).values('contact_id')
+        result[group] = list(
+            ClientContact.objects.filter(id__in=matched)
+            .exclude(id__in=contact_ids)
+            .select_related('client', 'created_by')
+            .order_by('-relationship_score', 'id')[:limit]
+        )
+    return result
+
+
+def contacts_sharing_token(token_type: str, tokens: Iterable[str], exclude_contact_id=None):
+    """具有任一指定词的联系人 ID 查询集（用于进一步按时间等条件筛选）"""
+    queryset = ContactRelationToken.objects.filter(token_type=token_type, token__in=list(tokens))
+    if exclude_contact_id:
+        queryset = queryset.exclude(contact_id=exclude_contact_id)
+    return queryset.values('contact_id')
@@ -4,15 +4,116 @@
 """
 import os
 import base64
+import hashlib
 import json
 import logging
+import re
 import requests
-from typing import Dict, Optional, Any
+from typing import Dict, List, Optional, Any
 from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
 from pathlib import Path
 
+from backend.apps.api_management.services import get_http_session
+from backend.core.task_dispatch import dispatch_task
+from backend.utils.ocr_pool import file_digest, get_ocr_pool
+
 logger = logging.getLogger(__name__)
 
+# 提示词或文本精简规则变化时升级，旧的识别结果不再命中
+PROMPT_VERSION = 'v2'
+CONTRACT_RECOGNITION_MAX_CHARS = getattr(settings, 'CONTRACT_RECOGNITION_MAX_CHARS', 8000)
+CONTRACT_RECOGNITION_TIMEOUT = getattr(settings, 'CONTRACT_RECOGNITION_TIMEOUT', 120)
+CONTRACT_RECOGNITION_EAGER = getattr(settings, 'CONTRACT_RECOGNITION_EAGER', False)
+
+FILE_TYPES = {
+    '.pdf': 'pdf',
+    '.jpg': 'image',
+    '.jpeg': 'image',
+    '.png': 'image',
+    '.doc': 'docx',
+    '.docx': 'docx',
+}
+
+
+# ==================== 文本精简 ====================
+
+# 合同字段常见的标签词，命中越多的段落越优先保留
+_FIELD_PATTERN = re.compile(
+    r'合同编号|合同号|合同名称|项目名称|甲方|乙方|委托方|受托方|委托人|受托人|发包人|承包人|买方|卖方|'
+    r'金额|价款|总价|合同价|费用|人民币|大写|签订|签署|生效|有效期|期限|工期|服务期|'
+    r'联系人|联系电话|电话|手机|邮箱|E-?mail|地址|住所|统一社会信用代码|信用代码|法定代表人|负责人',
+    re.IGNORECASE,
+)
+_DATE_PATTERN = re.compile(r'\d{4}\s*[年./-]\s*\d{1,2}\s*[月./-]')
+_AMOUNT_PATTERN = re.compile(r'[¥￥]\s*[\d,]+|[\d,]+(?:\.\d+)?\s*(?:万元|元)')
+# 单个条款段落最多保留的字数，避免一段长条款占满篇幅
+_PARAGRAPH_MAX_CHARS = 300
+_GAP_MARKER = '……'
+
+
+def _paragraph_score(paragraph: str) -> int:
+    return (2 * len(_FIELD_PATTERN.findall(paragraph))
+            + len(_DATE_PATTERN.findall(paragraph))
+            + len(_AMOUNT_PATTERN.findall(paragraph)))
+
+
+def reduce_contract_text(text: str, limit: Optional[int] = None) -> str:
+    """
+    精简合同文本到 limit 字以内
+
+    合同名称、编号、甲乙方一般在开头，签章页（单位名称、地址、电话、信用代码、签订日期）在结尾，
+    金额、期限散落在中间条款里：保留开头约 1/5、结尾约 1/4，其余篇幅按字段标签、日期、金额的命中数
+    挑选中间段落，按原文顺序拼接，省略处用“……”标出。
+    """
+    limit = limit or CONTRACT_RECOGNITION_MAX_CHARS
+    text = re.sub(r'[ \t\u3000]+', ' ', text or '').strip()
+    if len(text) <= limit:
+        return text
+
+    paragraphs = [line.strip() for line in re.split(r'\n+', text) if line.strip()]
+    selected = {}
+    used = 0
+
+    def take(index, budget):
+        nonlocal used
+        piece = paragraphs[index][:_PARAGRAPH_MAX_CHARS]
+        if index in selected or used + len(piece) > budget:
+            return False
+        selected[index] = piece
+        used += len(piece) + 1
+        return True
+
+    for index in range(len(paragraphs)):
+        if not take(index, limit // 5):
+            break
+    tail_budget = used + limit // 4
+    for index in range(len(paragraphs) - 1, -1, -1):
+        if index not in selected and not take(index, tail_budget):
+            break
+
+    middle = sorted(
+        (index for index in range(len(paragraphs)) if index not in selected),
+        key=lambda index: (-_paragraph_score(paragraphs[index]), index),
+    )
+    for index in middle:
+        if _paragraph_score(paragraphs[index]) == 0:
+            break
+        take(index, limit - len(_GAP_MARKER) * 8)
+
+    parts: List[str] = []
+    previous = -1
+    for index in sorted(selected):
+        if index != previous + 1:
+            parts.append(_GAP_MARKER)
+        parts.append(selected[index])
+        previous = index
+    if previous != len(paragraphs) - 1:
+        parts.append(_GAP_MARKER)
+    return '\n'.join(parts)[:limit]
+
 
 class ContractRecognitionService:
     """合同识别服务类"""
@@ -98,17 +199,28 @@ class ContractRecognitionService:
                 getattr(settings, 'DEEPSEEK_MODEL', 'deepseek-chat')
             )
     
-    def recognize_contract(self, file_path: str, file_type: str = 'pdf') -> Dict[str, Any]:
+    def recognize_contract(self, file_path: str, file_type: str = 'pdf', file_hash: Optional[str] = None,
+                           file_name: str = '', refresh: bool = False) -> Dict[str, Any]:
         """
         识别合同文件并提取信息
         
         Args:
             file_path: 文件路径
             file_type: 文件类型 ('pdf', 'image', 'docx')
+            file_hash: 文件内容 SHA-256（调用方已计算时传入）
+            file_name: 原文件名（记录在识别结果上）
+            refresh: 忽略已保存的识别结果，重新调用接口
         
         Returns:
             包含识别结果的字典
         """
+        file_hash = file_hash or file_digest(file_path)
+        if not refresh:
+            stored = find_recognition_result(file_hash)
+            if stored is not None:
+                return {'success': True, 'data': stored.data, 'raw_text': stored.raw_text,
+                        'result_id': stored.pk, 'cached': True}
+        
         if not self.api_key:
             return {
                 'success': False,
@@ -128,16 +240,26 @@ class ContractRecognitionService:
                     'error': '无法提取文件文本内容。请确保文件包含可提取的文本，或使用OCR功能处理扫描件。'
                 }
             
+            # 只发送可能包含合同字段的部分
+            reduced_text = reduce_contract_text(text)
+            if len(reduced_text) < len(text):
+                logger.info(f"合同文本已精简: {len(text)} -> {len(reduced_text)} 字")
+            
             # 调用Chat API分析文本
-            result = self._call_chat_api(text, prompt)
+            result = self._call_chat_api(reduced_text, prompt)
             
             # 解析结果
             if result.get('success'):
                 contract_data = self._parse_recognition_result(result.get('content', ''))
+                stored = save_recognition_result(
+                    file_hash, file_name, contract_data, result.get('content', ''), len(text), len(reduced_text),
+                )
                 return {
                     'success': True,
                     'data': contract_data,
-                    'raw_text': result.get('content', '')
+                    'raw_text': result.get('content', ''),
+                    'result_id': stored.pk,
+                    'cached': False,
                 }
             else:
                 return result
@@ -211,11 +333,6 @@ class ContractRecognitionService:
                 'Content-Type': 'application/json'
             }
             
-            # 如果文本太长，截取前8000字符（保留一些空间给prompt）
-            if len(text) > 8000:
-                text = text[:8000] + "\n\n[文本已截断，仅显示前8000字符]"
-                logger.warning("合同文本过长，已截断")
-            
             messages = [
                 {
                     "role": "user",
@@ -230,7 +347,9 @@ class ContractRecognitionService:
                 "max_tokens": 4000  # 增加token数量以支持更长的响应
             }
             
-            response = requests.post(url, headers=headers, json=payload, timeout=120)
+            response = get_http_session('DEEPSEEK').post(
+                url, headers=headers, json=payload, timeout=CONTRACT_RECOGNITION_TIMEOUT
+            )
             
             # 检查响应状态
             if response.status_code != 200:
@@ -339,41 +458,12 @@ class ContractRecognitionService:
             return None
     
     def _extract_text_with_ocr(self, file_path: str) -> Optional[str]:
-        """使用OCR提取文本（用于扫描PDF或图片）"""
+        """使用OCR提取文本（用于扫描PDF或图片）：共享进程池中模型常驻，PDF 各页并行识别，结果按文件哈希缓存"""
         try:
-            # 尝试使用PaddleOCR
-            try:
-                from paddleocr import PaddleOCR
-                ocr = PaddleOCR(use_angle_cls=True, lang='ch')
-                
-                # 如果是PDF，先转换为图片
-                if file_path.lower().endswith('.pdf'):
-                    try:
-                        from pdf2image import convert_from_path
-                        images = convert_from_path(file_path)
-                        text_parts = []
-                        for img in images:
-                            result = ocr.ocr(img, cls=True)
-                            if result and result[0]:
-                                page_text = '\n'.join([line[1][0] for line in result[0]])
-                                text_parts.append(page_text)
-                        return '\n\n'.join(text_parts) if text_parts else None
-                    except ImportError:
-                        logger.warning("pdf2image未安装，无法转换PDF为图片")
-                        return None
-                else:
-                    # 图片文件
-                    result = ocr.ocr(file_path, cls=True)
-                    if result and result[0]:
-                        return '\n'.join([line[1][0] for line in result[0]])
-                    return None
-            except ImportError:
-                logger.warning("PaddleOCR未安装，无法使用OCR功能")
-                return None
-            except Exception as e:
-                logger.error(f"OCR提取失败: {str(e)}")
-                return None
-                
+            return get_ocr_pool().recognize_text(file_path)
+        except ImportError as e:
+            logger.warning(f"OCR依赖未安装（PDF需要pdf2image）: {str(e)}")
+            return None
         except Exception as e:
             logger.exception(f"OCR处理失败: {str(e)}")
             return None
@@ -449,3 +539,122 @@ class ContractRecognitionService:
                 'description': '',
                 'notes': ''
             }
+
+
+# ==================== 识别结果存储 ====================
+
+def find_recognition_result(file_hash: str):
+    """按文件哈希查找当前提示词版本的识别结果，命中时累加命中次数"""
+    from backend.apps.customer_management.models import ContractRecognitionResult
+
+    stored = ContractRecognitionResult.objects.filter(file_hash=file_hash, prompt_version=PROMPT_VERSION).first()
+    if stored is not None:
+        ContractRecognitionResult.objects.filter(pk=stored.pk).update(hit_count=F('hit_count') + 1)
+    return stored
+
+
+def save_recognition_result(file_hash: str, file_name: str, data: Dict[str, Any], raw_text: str,
+                            text_length: int, sent_length: int):
+    """保存（或覆盖重新识别的）识别结果"""
+    from backend.apps.customer_management.models import ContractRecognitionResult
+
+    stored, _ = ContractRecognitionResult.objects.update_or_create(
+        file_hash=file_hash, prompt_version=PROMPT_VERSION,
+        defaults={
+            'file_name': (file_name or '')[:255],
+            'data': data,
+            'raw_text': raw_text,
+            'text_length': text_length,
+            'sent_length': sent_length,
+        },
+    )
+    return stored
+
+
+# ==================== 识别任务 ====================
+
+def upload_digest(upload) -> str:
+    digest = hashlib.sha256()
+    for chunk in upload.chunks():
+        digest.update(chunk)
+    return digest.hexdigest()
+
+
+def start_recognition_job(user, upload, refresh: bool = False):
+    """
+    创建合同识别任务
+
+    文件内容已识别过（且未要求重新识别）时任务直接完成，不保存文件；否则保存文件，
+    事务提交后投递 Celery 任务（未配置消息队列时在后台线程执行，CONTRACT_RECOGNITION_EAGER 时在当前请求内执行）。
+    """
+    from backend.apps.customer_management.models import ContractRecognitionJob
+
+    file_hash = upload_digest(upload)
+    job = ContractRecognitionJob(
+        source_name=os.path.basename(upload.name)[:255],
+        file_type=FILE_TYPES.get(os.path.splitext(upload.name)[1].lower(), 'pdf'),
+        file_hash=file_hash,
+        created_by=user,
+    )
+    stored = None if refresh else find_recognition_result(file_hash)
+    if stored is not None:
+        job.status, job.result, job.finished_time = 'succeeded', stored, timezone.now()
+        job.save()
+        return job
+
+    job.source_file = upload
+    job.save()
+    if CONTRACT_RECOGNITION_EAGER:
+        execute_recognition_job(job, refresh=refresh)
+    else:
+        transaction.on_commit(lambda: dispatch_recognition_job(job.pk, refresh))
+    return job
+
+
+def dispatch_recognition_job(job_id: int, refresh: bool = False) -> None:
+    from backend.apps.customer_management.tasks import run_contract_recognition_job
+
+    dispatch_task(run_contract_recognition_job, job_id, refresh)
+
+
+def execute_recognition_job(job, refresh: bool = False):
+    """执行识别任务并记录结果；识别结束后删除上传的合同文件"""
+    from backend.apps.customer_management.models import ContractRecognitionJob
+
+    started = timezone.now()
+    ContractRecognitionJob.objects.filter(pk=job.pk).update(status='running', started_time=started)
+    job.status, job.started_time = 'running', started
+    try:
+        result = ContractRecognitionService().recognize_contract(
+            job.source_file.path, job.file_type, file_hash=job.file_hash, file_name=job.source_name,
+            refresh=refresh,
+        )
+        if result.get('success'):
+            job.status, job.result_id = 'succeeded', result['result_id']
+        else:
+            job.status, job.error_message = 'failed', result.get('error', '识别失败')
+    except Exception as exc:
+        logger.exception('合同识别任务 %s 执行失败', job.pk)
+        job.status, job.error_message = 'failed', f'识别失败: {exc}'
+    finally:
+        if job.source_file:
+            job.source_file.delete(save=False)
+    job.finished_time = timezone.now()
+    job.save(update_fields=['status', 'result', 'error_message', 'source_file', 'finished_time'])
+    return job
+
+
+def job_payload(job) -> Dict[str, Any]:
+    """识别任务的轮询响应：完成时附带识别结果，失败时附带错误信息"""
+    payload = {
+        'success': job.status != 'failed',
+        'job_id': job.pk,
+        'status': job.status,
+        'status_display': job.get_status_display(),
+    }
+    if job.status == 'succeeded' and job.result is not None:
+        payload['data'] = job.result.data
+        payload['raw_text'] = job.result.raw_text
+    elif job.status == 'failed':
+        payload['error'] = job.error_message or '识别失败'
+    return payload
@@ -0,0 +1,91 @@
+"""
+客户导出
+
+在导出任务（system_management.ExportJob）中执行：
+- 按导出人的数据范围过滤（与客户列表相同的 filter_clients_by_scope），再应用页面筛选条件
+- ``values_list`` + ``iterator(chunk_size=...)`` 逐块读取，不实例化模型、不逐行加载负责人和客户类型，
+  等级等选项显示值在内存中查表
+"""
+import logging
+from typing import Iterator, List
+
+from django.db.models import Q
+from django.utils import timezone
+
+from backend.apps.customer_management.models import Client
+from backend.apps.system_management.data_scope import filter_clients_by_scope
+from backend.apps.system_management.services import get_user_permission_codes
+from backend.apps.system_management.services_export_jobs import EXPORT_CHUNK_SIZE, write_export_file
+
+logger = logging.getLogger(__name__)
+
+EXPORT_TYPE = 'customer'
+HEADERS = ['客户名称', '统一信用代码', '客户等级', '客户类型', '信用等级', '负责人', '创建时间']
+COLUMN_WIDTHS = [20, 20, 15, 15, 15, 15, 20]
+# 导出任务保存的筛选参数（与客户列表的查询参数同名）
+FILTER_PARAMS = ('ids', 'search', 'client_level', 'client_type', 'credit_level', 'responsible_user_id', 'is_active')
+
+_FIELDS = (
+    'name', 'unified_credit_code', 'client_level', 'client_type__name', 'credit_level',
+    'responsible_user_id', 'responsible_user__first_name', 'responsible_user__last_name', 'created_time',
+)
+
+
+def export_params_from_request(params) -> dict:
+    """从请求参数中取出导出用的筛选条件"""
+    return {name: params.get(name, '').strip() for name in FILTER_PARAMS if params.get(name, '').strip()}
+
+
+def customer_export_queryset(user, params: dict):
+    """导出人可见且符合筛选条件的客户"""
+    clients = filter_clients_by_scope(Client.objects.all(), user, get_user_permission_codes(user))
+
+    ids = [int(value) for value in params.get('ids', '').split(',') if value.strip().isdigit()]
+    if ids:
+        return clients.filter(id__in=ids)
+
+    search = params.get('search')
+    if search:
+        clients = clients.filter(Q(name__icontains=search) | Q(unified_credit_code__icontains=search))
+    for name in ('client_level', 'client_type', 'credit_level', 'responsible_user_id'):
+        if params.get(name):
+            clients = clients.filter(**{name: params[name]})
+    if params.get('is_active'):
+        clients = clients.filter(is_active=params['is_active'] == '1')
+    return clients
+
+
+def iter_customer_rows(clients, chunk_size: int = EXPORT_CHUNK_SIZE) -> Iterator[List]:
+    client_levels = dict(Client._meta.get_field('client_level').choices)
+    credit_levels = dict(Client._meta.get_field('credit_level').choices)
+    rows = clients.order_by('-created_time', '-id').values_list(*_FIELDS).iterator(chunk_size=chunk_size)
+    for (name, credit_code, client_level, client_type, credit_level,
+         responsible_user_id, first_name, last_name, created_time) in rows:
+        if responsible_user_id:
+            # 与 User.get_full_name() 一致
+            responsible = f'{first_name} {last_name}'.strip()
+        else:
+            responsible = '公海'
+        yield [
+            name,
+            credit_code or '',
+            client_levels.get(client_level, client_level),
+            client_type or '',
+            credit_levels.get(credit_level, credit_level),
+            responsible,
+            timezone.localtime(created_time).strftime('%Y-%m-%d %H:%M:%S') if created_time else '',
+        ]
+
+
+def export_customers(job):
+    """执行客户导出任务"""
+    clients = customer_export_queryset(job.created_by, job.params)
+    return write_export_file(
+        job,
+        HEADERS,
+        iter_customer_rows(clients),
+        total=clients.count(),
+        file_stem='customers',
+        sheet_title='客户列表',
+        column_widths=COLUMN_WIDTHS,
+    )
@@ -0,0 +1,166 @@
+"""
+商机批量导入（基于 backend.utils.import_utils 导入引擎）
+
+- 服务类型、图纸阶段、选项值在导入开始时一次载入内存
+- 客户名称、负责商务手机号、商机编号每块各一条 IN 查询；不存在的客户按名称自动创建（每个名称一次）
+- 未填写商机编号的行按块一次预留编号（SJ-YYYYMMDD-0000），bulk_create 写入，
+  加权金额与健康度在写入前按 BusinessOpportunity.fill_computed_fields 计算
+"""
+from datetime import datetime
+
+from backend.apps.customer_management.models import BusinessOpportunity, Client, ClientType
+from backend.apps.production_management.models import DesignStage, ServiceType
+from backend.apps.system_management.models import User
+from backend.core.sequence import reserve_document_numbers
+from backend.utils.import_utils import BaseImporter, RowError
+
+SUCCESS_PROBABILITIES = (10, 30, 50, 70, 90)
+
+
+def _choice_lookup(choices):
+    """选项编码和显示名称都映射到编码"""
+    lookup = {code: code for code, _ in choices}
+    lookup.update({(label or '').strip(): code for code, label in choices})
+    return lookup
+
+
+class OpportunityImporter(BaseImporter):
+    import_type = 'opportunity'
+    label = '商机'
+    model = BusinessOpportunity
+    fields = {
+        'opportunity_number': ('商机编号（可留空自动生成）', '商机编号', 'opportunity_number'),
+        'name': ('商机名称', 'name'),
+        'client_name': ('客户名称（必填）', '客户名称', 'client_name'),
+        'business_manager_phone': ('负责商务手机号（必填）', '负责商务手机号', '商务经理手机号', 'business_manager_phone'),
+        'opportunity_type': ('商机类型', 'opportunity_type'),
+        'service_type': ('服务类型（可填编码或名称）', '服务类型', 'service_type'),
+        'project_name': ('项目名称', 'project_name'),
+        'project_address': ('项目地址', 'project_address'),
+        'project_type': ('项目业态', 'project_type'),
+        'building_area': ('建筑面积（平方米）', '建筑面积', 'building_area'),
+        'drawing_stage': ('图纸阶段（可填编码或名称）', '图纸阶段', 'drawing_stage'),
+        'estimated_amount': ('预计金额（万元）', '预计金额', 'estimated_amount'),
+        'success_probability': ('成功概率（%）', '成功概率', 'success_probability'),
+        'status': ('商机状态', 'status'),
+        'urgency': ('紧急程度', 'urgency'),
+        'expected_sign_date': ('预计签约时间（YYYY-MM-DD）', '预计签约时间', 'expected_sign_date'),
+        'description': ('商机描述', 'description'),
+        'notes': ('备注', 'notes'),
+    }
+    required_fields = ('name', 'client_name', 'business_manager_phone')
+
+    def prepare(self):
+        # 编码优先于名称
+        service_types = list(ServiceType.objects.all())
+        self.service_types = {(service_type.name or '').strip(): service_type for service_type in service_types}
+        self.service_types.update((service_type.code, service_type) for service_type in service_types)
+        # ID 优先于编码，编码优先于名称
+        self.design_stages = {}
+        for stage in DesignStage.objects.filter(is_active=True):
+            self.design_stages.setdefault(stage.name, stage)
+            if stage.code:
+                self.design_stages[stage.code] = stage
+            self.design_stages[str(stage.id)] = stage
+        self.statuses = _choice_lookup(BusinessOpportunity.STATUS_CHOICES)
+        self.urgencies = _choice_lookup(BusinessOpportunity.URGENCY_CHOICES)
+        self.opportunity_types = _choice_lookup(BusinessOpportunity.OPPORTUNITY_TYPE_CHOICES)
+        self.clients = {}
+        self.managers = {}
+        self.client_type = None
+        self.file_numbers = set()
+        self.existing_numbers = set()
+
+    def _lookup(self, row, field, table, label):
+        value = row.get(field)
+        if not value:
+            return None
+        if value not in table:
+            raise RowError(f'{label}取值无效：{value}')
+        return table[value]
+
+    def parse(self, row):
+        name = row.require('name', '商机名称')
+        client_name = row.require('client_name', '客户名称')
+        phone = row.require('business_manager_phone', '负责商务手机号')
+        number = row.get('opportunity_number')
+        if number:
+            if number in self.file_numbers:
+                raise RowError(f'商机编号重复：{number}')
+            self.file_numbers.add(number)
+
+        probability = row.get('success_probability')
+        if probability:
+            try:
+                probability = int(probability)
+            except ValueError:
+                raise RowError(f'成功概率格式无效：{probability}')
+            if probability not in SUCCESS_PROBABILITIES:
+                raise RowError(f'成功概率必须是 10、30、50、70 或 90，当前值：{probability}')
+
+        return {
+            'opportunity_number': number or None,
+            'name': name,
+            'client_name': client_name,
+            'business_manager_phone': phone,
+            'opportunity_type': self._lookup(row, 'opportunity_type', self.opportunity_types, '商机类型') or '',
+            'service_type': self._lookup(row, 'service_type', self.service_types, '服务类型'),
+            'project_name': row.get('project_name'),
+            'project_address': row.get('project_address'),
+            'project_type': row.get('project_type'),
+            'building_area': row.decimal('building_area', '建筑面积'),
+            'drawing_stage': self._lookup(row, 'drawing_stage', self.design_stages, '图纸阶段'),
+            'estimated_amount': row.decimal('estimated_amount', '预计金额') or 0,
+            'success_probability': probability or 10,
+            'status': self._lookup(row, 'status', self.statuses, '商机状态') or 'potential',
+            'urgency': self._lookup(row, 'urgency', self.urgencies, '紧急程度') or 'normal',
+            'expected_sign_date': row.date('expected_sign_date', '预计签约时间'),
+            'description': row.get('description'),
+            'notes': row.get('notes'),
+        }
+
+    def resolve(self, parsed):
+        names = {data['client_name'] for _, data in parsed} - set(self.clients)
+        for client in Client.objects.filter(name__in=names).order_by('id'):
+            self.clients.setdefault(client.name, client)
+        phones = {data['business_manager_phone'] for _, data in parsed} - set(self.managers)
+        self.managers.update((user.username, user) for user in User.objects.filter(username__in=phones))
+        numbers = {data['opportunity_number'] for _, data in parsed if data['opportunity_number']}
+        self.existing_numbers = set(
+            BusinessOpportunity.objects.filter(opportunity_number__in=numbers).values_list('opportunity_number', flat=True)
+        )
+
+    def _client(self, name):
+        client = self.clients.get(name)
+        if client is None:
+            # 客户不存在时自动创建（需要客户类型）
+            if self.client_type is None:
+                self.client_type = ClientType.objects.first()
+            if self.client_type is None:
+                raise RowError(f'客户"{name}"不存在，且系统未配置客户类型，无法自动创建')
+            client = self.clients[name] = Client.objects.create(
+                name=name, client_type=self.client_type, created_by=self.user,
+            )
+        return client
+
+    def build(self, row, data):
+        phone = data.pop('business_manager_phone')
+        manager = self.managers.get(phone)
+        if manager is None:
+            raise RowError(f'未找到对应的商务经理手机号：{phone}')
+        if data['opportunity_number'] in self.existing_numbers:
+            raise RowError(f"商机编号重复：{data['opportunity_number']}")
+        client = self._client(data.pop('client_name'))
+        return BusinessOpportunity(client=client, business_manager=manager, created_by=self.user, **data)
+
+    def assign_numbers(self, instances):
+        unnumbered = [opportunity for opportunity in instances if not opportunity.opportunity_number]
+        if unnumbered:
+            numbers = reserve_document_numbers(
+                BusinessOpportunity.objects, 'opportunity_number', 'SJ', len(unnumbered),
+                period=datetime.now().strftime('%Y%m%d'),
+            )
+            for opportunity, number in zip(unnumbered, numbers):
+                opportunity.opportunity_number = number
+        for opportunity in instances:
+            opportunity.fill_computed_fields()
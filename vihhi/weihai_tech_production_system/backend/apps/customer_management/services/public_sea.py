@@ -0,0 +1,154 @@
+"""
+客户自动移入公海
+将长期没有跟进记录的客户移入客户公海
+"""
+import logging
+import time
+from datetime import timedelta
+from typing import Dict, List, Optional, Tuple
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Exists, OuterRef
+from django.utils import timezone
+
+from backend.apps.customer_management.models import Client, ClientPublicSeaLog, CustomerRelationship
+from backend.apps.customer_management.services.client_stats import apply_client_changes
+
+logger = logging.getLogger(__name__)
+
+AUTO_ENTRY_REASON = 'auto_entry'
+
+_MOVE_SQL = """
+WITH moved AS (
+    SELECT c.id, c.responsible_user_id
+    FROM {client} c
+    WHERE c.id = ANY(%s)
+      AND c.responsible_user_id IS NOT NULL
+      AND NOT EXISTS (
+          SELECT 1 FROM {relationship} r
+          WHERE r.client_id = c.id AND r.followup_time >= %s
+      )
+    FOR UPDATE OF c SKIP LOCKED
+)
+UPDATE {client} AS t
+SET responsible_user_id = NULL,
+    public_sea_entry_time = %s,
+    public_sea_reason = %s,
+    updated_time = %s
+FROM moved
+WHERE t.id = moved.id
+RETURNING t.id, moved.responsible_user_id, t.created_by_id, t.is_active, t.client_level, t.total_contract_amount
+"""
+
+
+def inactive_clients_queryset(cutoff):
+    """有负责人、且 cutoff 之后没有任何跟进/拜访记录的客户"""
+    recent_followups = CustomerRelationship.objects.filter(client=OuterRef('pk'), followup_time__gte=cutoff)
+    return Client.objects.filter(responsible_user__isnull=False).filter(~Exists(recent_followups))
+
+
+def _move_batch(client_ids: List[int], cutoff, now, days: int) -> List[Tuple]:
+    """在一个短事务内移入一批客户，返回实际移入的行"""
+    sql = _MOVE_SQL.format(
+        client=connection.ops.quote_name(Client._meta.db_table),
+        relationship=connection.ops.quote_name(CustomerRelationship._meta.db_table),
+    )
+    with transaction.atomic():
+        with connection.cursor() as cursor:
+            cursor.execute(sql, [client_ids, cutoff, now, AUTO_ENTRY_REASON, now])
+            rows = cursor.fetchall()
+        if not rows:
+            return rows
+
+        ClientPublicSeaLog.objects.bulk_create([
+            ClientPublicSeaLog(
+                client_id=client_id,
+                previous_responsible_user_id=previous_user_id,
+                reason=AUTO_ENTRY_REASON,
+                inactivity_days=days,
+                created_time=now,
+            )
+            for client_id, previous_user_id, *_ in rows
+        ])
+
+        # 批量 UPDATE 不触发客户信号，这里按差值维护统计快照；失败时由夜间校准兜底
+        changes = []
+        for _, previous_user_id, created_by_id, is_active, client_level, total_contract_amount in rows:
+            state = {
+                'responsible_user_id': previous_user_id,
+                'created_by_id': created_by_id,
+                'is_active': is_active,
+                'client_level': client_level,
+                'total_contract_amount': total_contract_amount,
+            }
+            changes.append((state, {**state, 'responsible_user_id': None}))
+        try:
+            with transaction.atomic():
+                apply_client_changes(changes)
+        except Exception as exc:
+            logger.warning('移入公海后更新客户统计快照失败: %s', exc)
+    return rows
+
+
+def auto_move_to_public_sea(
+    days: Optional[int] = None,
+    batch_size: Optional[int] = None,
+    dry_run: bool = False,
+) -> Dict[str, object]:
+    """
+    自动将超过 days 天没有拜访信息的客户移入公海
+
+    参数：
+    - days: 无拜访天数阈值，默认 settings.PUBLIC_SEA_INACTIVITY_DAYS
+    - batch_size: 每批更新的客户数，默认 settings.PUBLIC_SEA_BATCH_SIZE
+    - dry_run: 只统计候选客户数量，不做任何修改
+
+    返回：
+    {
+        'dry_run': bool,
+        'days': int,
+        'cutoff': datetime,
+        'candidates': int,  # 候选客户数
+        'moved': int,       # 实际移入公海的客户数
+        'skipped': int,     # 被跳过的客户数（执行期间被锁定或新增了拜访）
+        'batches': int,
+        'timings': {'select': 秒, 'update': 秒, 'total': 秒},
+    }
+    """
+    days = days if days is not None else getattr(settings, 'PUBLIC_SEA_INACTIVITY_DAYS', 90)
+    batch_size = batch_size or getattr(settings, 'PUBLIC_SEA_BATCH_SIZE', 2000)
+    started = time.monotonic()
+    now = timezone.now()
+    cutoff = now - timedelta(days=days)
+
+    candidate_ids = list(inactive_clients_queryset(cutoff).order_by('id').values_list('id', flat=True))
+    selected = time.monotonic()
+
+    moved = 0
+    batches = 0
+    if not dry_run:
+        for start in range(0, len(candidate_ids), batch_size):
+            moved += len(_move_batch(candidate_ids[start:start + batch_size], cutoff, now, days))
+            batches += 1
+    finished = time.monotonic()
+
+    result = {
+        'dry_run': dry_run,
+        'days': days,
+        'cutoff': cutoff,
+        'candidates': len(candidate_ids),
+        'moved': moved,
+        'skipped': 0 if dry_run else len(candidate_ids) - moved,
+        'batches': batches,
+        'timings': {
+            'select': round(selected - started, 3),
+            'update': round(finished - selected, 3),
+            'total': round(finished - started, 3),
+        },
+    }
+    logger.info(
+        '自动移入公海%s：候选 %s 个，移入 %s 个，共 %s 批，耗时 %.3fs',
+        '（模拟）' if dry_run else '', result['candidates'], moved, batches, result['timings']['total'],
+    )
+    return result
@@ -0,0 +1,324 @@
+"""
+被执行记录批量同步
+从启信宝批量同步客户的被执行记录、失信记录
+"""
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime
+from decimal import Decimal, InvalidOperation
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from django.conf import settings
+from django.db import connections, transaction
+from django.db.models import Sum
+from django.utils import timezone
+
+from backend.apps.customer_management.models import Client, ExecutionRecord
+from backend.apps.customer_management.services import QixinbaoAPIError
+
+logger = logging.getLogger(__name__)
+
+# 并发调用启信宝的线程数、每秒最多调用次数、每批客户数（每批一个事务、一个检查点）
+SYNC_WORKERS = getattr(settings, 'RECORD_SYNC_WORKERS', 8)
+SYNC_RATE_LIMIT = getattr(settings, 'RECORD_SYNC_RATE_LIMIT', 10)
+SYNC_BATCH_SIZE = getattr(settings, 'RECORD_SYNC_BATCH_SIZE', 200)
+# 可重试错误的最多重试次数和首次退避时间（秒），之后每次翻倍
+SYNC_MAX_RETRIES = 3
+SYNC_RETRY_BACKOFF = 1.0
+
+# 比对时检查的字段（有变化才更新）
+RECORD_FIELDS = ('filing_date', 'execution_status', 'execution_court', 'execution_amount', 'source')
+
+
+class RateLimiter:
+    """线程安全的令牌桶：平均每秒 rate 次，最多 burst 次突发；rate 不大于 0 时不限速"""
+
+    def __init__(self, rate: float, burst: Optional[int] = None):
+        self.rate = rate
+        self.capacity = burst or max(1, int(rate))
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> None:
+        if self.rate <= 0:
+            return
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+class SyncCheckpoint:
+    """检查点文件（JSON），记录最后一个已提交批次的客户 ID"""
+
+    def __init__(self, path: str):
+        self.path = path
+
+    @classmethod
+    def for_command(cls, name: str, path: Optional[str] = None) -> 'SyncCheckpoint':
+        directory = getattr(settings, 'RECORD_SYNC_CHECKPOINT_DIR', '') or tempfile.gettempdir()
+        return cls(path or os.path.join(directory, f'{name}.checkpoint.json'))
+
+    def load(self) -> int:
+        try:
+            with open(self.path, encoding='utf-8') as f:
+                return int(json.load(f).get('last_client_id', 0))
+        except (OSError, ValueError, TypeError):
+            return 0
+
+    def save(self, last_client_id: int) -> None:
+        tmp_path = f'{self.path}.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'last_client_id': last_client_id, 'saved_at': timezone.now().isoformat()}, f)
+        os.replace(tmp_path, self.path)
+
+    def clear(self) -> None:
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+
+
+class SyncReport:
+    """一次同步的统计"""
+
+    def __init__(self):
+        self.clients = 0
+        self.synced = 0
+        self.failed = 0
+        self.skipped = 0
+        self.api_calls = 0
+        self.retries = 0
+        self.created = 0
+        self.updated = 0
+        self.unchanged = 0
+        self.failures: List[Tuple[int, str]] = []
+        self.elapsed = 0.0
+
+    @property
+    def throughput(self) -> float:
+        return self.clients / self.elapsed if self.elapsed else 0.0
+
+    def summary(self) -> str:
+        return (
+            f'客户 {self.clients}（成功 {self.synced}，失败 {self.failed}，跳过 {self.skipped}），'
+            f'API 调用 {self.api_calls} 次（重试 {self.retries} 次），'
+            f'记录新增 {self.created} / 更新 {self.updated} / 未变 {self.unchanged}，'
+            f'耗时 {self.elapsed:.1f}s，吞吐 {self.throughput:.2f} 客户/秒'
+        )
+
+
+# ==================== 记录比对 ====================
+
+def record_values(data: Dict) -> Dict:
+    """把接口返回的记录转换为 ExecutionRecord 字段值"""
+    filing_date = None
+    if data.get('filing_date'):
+        try:
+            filing_date = datetime.strptime(str(data['filing_date'])[:10], '%Y-%m-%d').date()
+        except ValueError:
+            pass
+    try:
+        amount = Decimal(str(data.get('execution_amount', 0) or 0)).quantize(Decimal('0.01'))
+    except (InvalidOperation, ValueError, TypeError):
+        amount = Decimal('0')
+    return {
+        'case_number': (data.get('case_number') or '').strip()[:200],
+        'filing_date': filing_date,
+        'execution_status': data.get('execution_status') or 'unknown',
+        'execution_court': (data.get('execution_court') or '')[:200],
+        'execution_amount': amount,
+        'source': 'qixinbao',
+    }
+
+
+def _record_key(case_number, filing_date, execution_court, execution_amount):
+    # 有案号按案号比对；没有案号时按（立案日期，法院，金额）比对，避免每次同步重复新增
+    if case_number:
+        return case_number
+    return ('', filing_date, execution_court, execution_amount)
+
+
+def diff_records(client_id: int, incoming: Iterable[Dict],
+                 existing: Iterable[ExecutionRecord]) -> Tuple[List[ExecutionRecord], List[ExecutionRecord], int]:
+    """
+    比对接口返回的记录和已有记录，返回 (待新增, 待更新, 未变化数)
+
+    接口不再返回的已有记录保留不动（与原先逐条同步一致）。
+    """
+    by_key = {}
+    for row in existing:
+        by_key.setdefault(
+            _record_key(row.case_number, row.filing_date, row.execution_court, row.execution_amount), row
+        )
+
+    to_create, to_update, unchanged = [], [], 0
+    seen = set()
+    now = timezone.now()
+    for data in incoming:
+        values = record_values(data)
+        key = _record_key(values['case_number'], values['filing_date'],
+                          values['execution_court'], values['execution_amount'])
+        if key in seen:
+            continue
+        seen.add(key)
+
+        row = by_key.get(key)
+        if row is None:
+            to_create.append(ExecutionRecord(client_id=client_id, **values))
+            continue
+        if values['filing_date'] is None:
+            # 接口没有返回立案日期时保留原值
+            values['filing_date'] = row.filing_date
+        if all(getattr(row, field) == values[field] for field in RECORD_FIELDS):
+            unchanged += 1
+            continue
+        for field in RECORD_FIELDS:
+            setattr(row, field, values[field])
+        row.updated_time = now
+        to_update.append(row)
+    return to_create, to_update, unchanged
+
+
+def _apply_batch(results: Dict[int, List[Dict]], dry_run: bool) -> Tuple[int, int, int]:
+    """比对并写入一批客户的记录，回写执行总金额；返回 (新增, 更新, 未变)"""
+    with transaction.atomic():
+        existing = defaultdict(list)
+        for row in ExecutionRecord.objects.filter(client_id__in=list(results)):
+            existing[row.client_id].append(row)
+
+        to_create, to_update, unchanged = [], [], 0
+        for client_id, records in results.items():
+            created, updated, same = diff_records(client_id, records, existing[client_id])
+            to_create.extend(created)
+            to_update.extend(updated)
+            unchanged += same
+
+        if dry_run:
+            return len(to_create), len(to_update), unchanged
+
+        ExecutionRecord.objects.bulk_create(to_create, batch_size=500)
+        ExecutionRecord.objects.bulk_update(to_update, RECORD_FIELDS + ('updated_time',), batch_size=500)
+        if to_create or to_update:
+            _refresh_execution_totals({row.client_id for row in to_create + to_update})
+    return len(to_create), len(to_update), unchanged
+
+
+def _refresh_execution_totals(client_ids) -> None:
+    totals = dict(
+        ExecutionRecord.objects.filter(client_id__in=client_ids)
+        .values('client_id').annotate(total=Sum('execution_amount')).values_list('client_id', 'total')
+    )
+    changed = []
+    for client in Client.objects.filter(id__in=client_ids).only('id', 'total_execution_amount'):
+        total = totals.get(client.id) or Decimal('0')
+        if client.total_execution_amount != total:
+            client.total_execution_amount = total
+            changed.append(client)
+    # 执行总金额不参与客户统计快照，直接批量更新
+    Client.objects.bulk_update(changed, ['total_execution_amount'], batch_size=500)
+
+
+# ==================== 并发拉取 ====================
+
+def _fetch_client(service, limiter: RateLimiter, client: Client, max_retries: int) -> Dict:
+    """在工作线程中拉取一个客户的记录（含重试）"""
+    attempts = 0
+    try:
+        while True:
+            limiter.acquire()
+            attempts += 1
+            try:
+                records = service.get_execution_records(
+                    credit_code=client.unified_credit_code,
+                    company_name=client.name,
+                    raise_on_error=True,
+                )
+                return {'client_id': client.id, 'records': records or [], 'attempts': attempts}
+            except QixinbaoAPIError as exc:
+                if not exc.retryable or attempts > max_retries:
+                    return {'client_id': client.id, 'error': str(exc), 'attempts': attempts}
+                time.sleep(SYNC_RETRY_BACKOFF * 2 ** (attempts - 1))
+    finally:
+        # 调用日志在工作线程中写库，线程内的数据库连接用完即关
+        connections.close_all()
+
+
+def sync_execution_records(service, clients, *, workers: int = SYNC_WORKERS, rate_limit: float = SYNC_RATE_LIMIT,
+                           batch_size: int = SYNC_BATCH_SIZE, max_retries: int = SYNC_MAX_RETRIES,
+                           checkpoint: Optional[SyncCheckpoint] = None, resume: bool = False,
+                           dry_run: bool = False,
+                           on_client: Optional[Callable[[Client, Dict], None]] = None) -> SyncReport:
+    """
+    批量同步客户的被执行记录
+
+    Args:
+        service: QixinbaoAPIService 实例（线程安全，共用连接池和响应缓存）
+        clients: 待同步客户的查询集
+        checkpoint: 每批提交后记录进度；resume 为 True 时从检查点之后的客户开始，全部完成后清除
+        dry_run: 只拉取和比对，不写库、不记录检查点
+        on_client: 每个客户处理完成后的回调 (client, result)，用于输出进度
+    """
+    report = SyncReport()
+    started = time.monotonic()
+    last_id = checkpoint.load() if checkpoint and resume else 0
+    if last_id:
+        logger.info('从检查点继续同步被执行记录: 客户ID > %s', last_id)
+    clients = clients.order_by('id').only('id', 'name', 'unified_credit_code')
+    limiter = RateLimiter(rate_limit)
+
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        while True:
+            batch = list(clients.filter(id__gt=last_id)[:batch_size])
+            if not batch:
+                break
+            by_id = {client.id: client for client in batch}
+            futures = []
+            for client in batch:
+                report.clients += 1
+                if not client.name and not client.unified_credit_code:
+                    report.skipped += 1
+                    continue
+                futures.append(executor.submit(_fetch_client, service, limiter, client, max_retries))
+
+            results = {}
+            for future in as_completed(futures):
+                result = future.result()
+                report.api_calls += result['attempts']
+                report.retries += result['attempts'] - 1
+                if 'error' in result:
+                    report.failed += 1
+                    report.failures.append((result['client_id'], result['error']))
+                else:
+                    report.synced += 1
+                    results[result['client_id']] = result['records']
+                if on_client:
+                    on_client(by_id[result['client_id']], result)
+
+            if results:
+                created, updated, unchanged = _apply_batch(results, dry_run)
+                report.created += created
+                report.updated += updated
+                report.unchanged += unchanged
+            last_id = batch[-1].id
+            if checkpoint and not dry_run:
+                checkpoint.save(last_id)
+
+    if checkpoint and not dry_run:
+        checkpoint.clear()
+    report.elapsed = time.monotonic() - started
+    logger.info('被执行记录同步完成: %s', report.summary())
+    return report
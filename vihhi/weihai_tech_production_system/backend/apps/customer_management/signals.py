@@ -0,0 +1,106 @@
+"""
+客户管理信号处理器
+
+- 客户保存/删除时增量维护客户统计快照（ClientStatsSnapshot）
+- 联系人籍贯、教育背景、职业信息变化时重算该联系人的关系索引（ContactRelationToken）
+"""
+import logging
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from backend.apps.customer_management.models import Client, ClientContact, ContactCareer, ContactEducation, School
+from backend.apps.customer_management.services.client_stats import (
+    TRACKED_CLIENT_FIELDS,
+    apply_client_change,
+    capture_client_state,
+    load_client_state,
+)
+from backend.apps.customer_management.services.contact_relations import rebuild_contact_tokens
+
+logger = logging.getLogger(__name__)
+
+
+def _affects_stats(update_fields) -> bool:
+    return not update_fields or bool(set(update_fields) & set(TRACKED_CLIENT_FIELDS))
+
+
+def _apply_stats_change(old_state, new_state):
+    # 使用保存点：快照维护失败时不影响客户本身的保存，由夜间校准修正
+    try:
+        with transaction.atomic():
+            apply_client_change(old_state, new_state)
+    except Exception as e:
+        logger.warning('客户统计快照增量更新失败: %s', e, exc_info=True)
+
+
+@receiver(pre_save, sender=Client)
+def capture_client_stats_state(sender, instance, raw=False, update_fields=None, **kwargs):
+    """记录保存前的统计相关字段"""
+    if raw or not instance.pk or not _affects_stats(update_fields):
+        instance._stats_old_state = None
+        return
+    instance._stats_old_state = load_client_state(instance.pk)
+
+
+@receiver(post_save, sender=Client)
+def update_client_stats_on_save(sender, instance, created, raw=False, update_fields=None, **kwargs):
+    if raw or not _affects_stats(update_fields):
+        return
+    old_state = None if created else getattr(instance, '_stats_old_state', None)
+    _apply_stats_change(old_state, capture_client_state(instance))
+
+
+@receiver(post_delete, sender=Client)
+def update_client_stats_on_delete(sender, instance, **kwargs):
+    _apply_stats_change(capture_client_state(instance), None)
+
+
+def _refresh_relation_tokens(contact_ids):
+    # 使用保存点：索引维护失败时不影响业务数据的保存，可用 rebuild_contact_relation_index 重建
+    try:
+        with transaction.atomic():
+            rebuild_contact_tokens(contact_ids)
+    except Exception as e:
+        logger.warning('联系人关系索引更新失败: %s', e, exc_info=True)
+
+
+@receiver(post_save, sender=ClientContact)
+def update_contact_relation_tokens(sender, instance, raw=False, update_fields=None, **kwargs):
+    if raw or (update_fields and 'birthplace' not in update_fields):
+        return
+    _refresh_relation_tokens([instance.pk])
+
+
+@receiver(post_save, sender=ContactEducation)
+@receiver(post_save, sender=ContactCareer)
+def update_relation_tokens_on_profile_save(sender, instance, raw=False, **kwargs):
+    if not raw:
+        _refresh_relation_tokens([instance.contact_id])
+
+
+@receiver(post_delete, sender=ContactEducation)
+@receiver(post_delete, sender=ContactCareer)
+def update_relation_tokens_on_profile_delete(sender, instance, origin=None, **kwargs):
+    # 随联系人（或客户）级联删除时，联系人的索引行也会被删除，不再重算
+    if origin is not None and getattr(origin, 'model', type(origin)) is not sender:
+        return
+    _refresh_relation_tokens([instance.contact_id])
+
+
+@receiver(pre_save, sender=School)
+def capture_school_name(sender, instance, raw=False, **kwargs):
+    instance._old_name = None
+    if not raw and instance.pk:
+        instance._old_name = School.objects.filter(pk=instance.pk).values_list('name', flat=True).first()
+
+
+@receiver(post_save, sender=School)
+def update_relation_tokens_on_school_rename(sender, instance, created, raw=False, **kwargs):
+    """学校改名时重算其校友的学校词"""
+    if created or raw or getattr(instance, '_old_name', None) in (None, instance.name):
+        return
+    contact_ids = set(ContactEducation.objects.filter(school=instance).values_list('contact_id', flat=True))
+    if contact_ids:
+        _refresh_relation_tokens(contact_ids)
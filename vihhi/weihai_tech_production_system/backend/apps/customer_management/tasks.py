@@ -8,29 +8,35 @@ logger = logging.getLogger(__name__)
 
 
 @shared_task
-def auto_move_clients_to_public_sea():
+def auto_move_clients_to_public_sea(days=None):
     """
     定时任务：每天自动将超过90天没有拜访信息的客户移入公海
     
     执行时间：每天凌晨2点（需要在Celery Beat中配置）
+    无拜访天数阈值默认取 settings.PUBLIC_SEA_INACTIVITY_DAYS，可通过 days 参数覆盖
     
     返回：
     {
         'success': bool,
         'count': int,  # 移入公海的客户数量
+        'candidates': int,
+        'timings': dict,
         'message': str
     }
     """
     try:
-        from .services import auto_move_to_public_sea
+        from .services.public_sea import auto_move_to_public_sea
         
-        count = auto_move_to_public_sea()
+        result = auto_move_to_public_sea(days=days)
+        count = result['moved']
         
-        logger.info(f'自动移入公海任务执行成功，共移入 {count} 个客户')
+        logger.info(f'自动移入公海任务执行成功，共移入 {count} 个客户，耗时 {result["timings"]["total"]}s')
         
         return {
             'success': True,
             'count': count,
+            'candidates': result['candidates'],
+            'timings': result['timings'],
             'message': f'成功将 {count} 个客户移入公海'
         }
     except Exception as e:
@@ -42,3 +48,62 @@ def auto_move_clients_to_public_sea():
             'message': f'自动移入公海任务执行失败: {str(e)}'
         }
 
+
+
+@shared_task
+def reconcile_client_stats_snapshots():
+    """
+    定时任务：每天夜间全量校准客户统计快照（ClientStatsSnapshot）
+    
+    修正批量 update() 等绕过信号的变更造成的计数偏差。
+    执行时间：每天凌晨3点（需要在Celery Beat中配置）
+    """
+    try:
+        from .services.client_stats import reconcile_client_stats
+        
+        result = reconcile_client_stats()
+        logger.info(f'客户统计快照校准成功：{result}')
+        return {'success': True, **result}
+    except Exception as e:
+        logger.error(f'客户统计快照校准失败: {str(e)}', exc_info=True)
+        return {'success': False, 'error': str(e)}
+
+
+@shared_task
+def run_customer_export(job_id):
+    """
+    后台任务：导出客户数据到文件（ExportJob），页面轮询进度后下载
+
+    由 customer_export 视图创建任务后投递，EXPORT_JOB_EAGER 时在当前进程同步执行。
+    """
+    from backend.apps.system_management.models import ExportJob
+    from backend.apps.system_management.services_export_jobs import mark_job_failed
+    from .services.customer_export import export_customers
+    
+    try:
+        job = ExportJob.objects.select_related('created_by').get(pk=job_id)
+        export_customers(job)
+        return {'success': True, 'job_id': job_id, 'count': job.processed_count}
+    except Exception as e:
+        logger.error(f'客户导出任务 {job_id} 失败: {str(e)}', exc_info=True)
+        mark_job_failed(job_id, str(e))
+        return {'success': False, 'job_id': job_id, 'error': str(e)}
+
+
+@shared_task
+def run_contract_recognition_job(job_id, refresh=False):
+    """
+    后台任务：识别上传的合同文件（ContractRecognitionJob），页面轮询任务状态后填充表单
+
+    由 recognize_contract 视图创建任务后投递，CONTRACT_RECOGNITION_EAGER 时在当前进程同步执行。
+    """
+    from .models import ContractRecognitionJob
+    from .services.contract_recognition import execute_recognition_job
+    
+    try:
+        job = ContractRecognitionJob.objects.get(pk=job_id)
+    except ContractRecognitionJob.DoesNotExist:
+        logger.error(f'合同识别任务 {job_id} 不存在')
+        return {'success': False, 'job_id': job_id, 'error': 'not found'}
+    job = execute_recognition_job(job, refresh=refresh)
+    return {'success': job.status == 'succeeded', 'job_id': job_id, 'error': job.error_message}
@@ -0,0 +1,84 @@
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+
+from backend.apps.customer_management.models import Client, ClientStatsSnapshot, ClientType
+from backend.apps.customer_management.services.client_stats import (
+    compute_stats,
+    get_client_stats_for_user,
+    get_snapshot,
+    reconcile_client_stats,
+)
+from backend.apps.system_management.models import Department
+
+
+class ClientStatsSnapshotTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.User = get_user_model()
+        self.department = Department.objects.create(name="商务部", code="business")
+        self.alice = self.User.objects.create_user(username="alice", password="pwd123456", department=self.department)
+        self.bob = self.User.objects.create_user(username="bob", password="pwd123456", department=self.department)
+        self.client_type = ClientType.objects.create(code="developer", name="开发商")
+
+    def _create(self, **kwargs):
+        kwargs.setdefault("client_type", self.client_type)
+        kwargs.setdefault("created_by", self.alice)
+        return Client.objects.create(**kwargs)
+
+    def _snapshot_values(self, scope_type, scope_id=0):
+        snapshot = get_snapshot(scope_type, scope_id)
+        return (
+            snapshot.total_count,
+            snapshot.active_count,
+            snapshot.vip_count,
+            snapshot.public_sea_count,
+            snapshot.total_contract_amount,
+        )
+
+    def test_incremental_updates_match_full_aggregate(self):
+        # 先构建快照行，后续变更走增量维护
+        get_snapshot(ClientStatsSnapshot.SCOPE_GLOBAL)
+        get_snapshot(ClientStatsSnapshot.SCOPE_USER, self.bob.pk)
+        get_snapshot(ClientStatsSnapshot.SCOPE_DEPARTMENT, self.department.pk)
+
+        vip = self._create(name="VIP客户", client_level="vip", total_contract_amount=Decimal("100.00"))
+        self._create(name="Bob客户", responsible_user=self.bob, total_contract_amount=Decimal("50.00"))
+        vip.responsible_user = self.bob
+        vip.is_active = False
+        vip.save()
+        self._create(name="待删除").delete()
+
+        self.assertEqual(self._snapshot_values(ClientStatsSnapshot.SCOPE_GLOBAL), (2, 1, 1, 0, Decimal("150.00")))
+        expected_bob = compute_stats(Client.objects.filter(responsible_user=self.bob))
+        self.assertEqual(
+            self._snapshot_values(ClientStatsSnapshot.SCOPE_USER, self.bob.pk),
+            tuple(expected_bob[f] for f in ("total_count", "active_count", "vip_count", "public_sea_count", "total_contract_amount")),
+        )
+        self.assertEqual(self._snapshot_values(ClientStatsSnapshot.SCOPE_DEPARTMENT, self.department.pk)[0], 2)
+
+    def test_reconcile_fixes_bulk_updates(self):
+        client = self._create(name="公海客户", responsible_user=self.bob)
+        get_snapshot(ClientStatsSnapshot.SCOPE_GLOBAL)
+        # queryset.update() 绕过信号
+        Client.objects.filter(pk=client.pk).update(responsible_user=None)
+        self.assertEqual(self._snapshot_values(ClientStatsSnapshot.SCOPE_GLOBAL)[3], 0)
+
+        reconcile_client_stats()
+        self.assertEqual(self._snapshot_values(ClientStatsSnapshot.SCOPE_GLOBAL)[3], 1)
+        self.assertEqual(self._snapshot_values(ClientStatsSnapshot.SCOPE_USER, self.bob.pk)[0], 0)
+        self.assertEqual(self._snapshot_values(ClientStatsSnapshot.SCOPE_USER, self.alice.pk)[0], 1)
+
+    def test_stats_follow_user_scope(self):
+        self._create(name="Alice客户", responsible_user=self.alice)
+        self._create(name="Bob客户", responsible_user=self.bob, created_by=self.bob)
+
+        self.assertEqual(get_client_stats_for_user(self.bob, {"customer_management.client.view_assigned"})["total_count"], 1)
+        manager = self.User.objects.get(pk=self.alice.pk)
+        self.assertEqual(
+            get_client_stats_for_user(manager, {"customer_management.client.view_department"})["total_count"], 2
+        )
+        no_permission_user = self.User.objects.get(pk=self.bob.pk)
+        self.assertEqual(get_client_stats_for_user(no_permission_user, set())["total_count"], 0)
@@ -0,0 +1,97 @@
+from datetime import date
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+
+from backend.apps.customer_management.models import (
+    Client,
+    ClientContact,
+    ClientType,
+    ContactCareer,
+    ContactEducation,
+    ContactRelationToken,
+    School,
+)
+from backend.apps.customer_management.services import find_all_related_contacts
+from backend.apps.customer_management.services.contact_relations import birthplace_tokens, related_contacts
+
+
+class ContactRelationIndexTests(TestCase):
+    def setUp(self):
+        user = get_user_model().objects.create_user(username='relation_user', password='test123456')
+        client = Client.objects.create(
+            name='威海测试客户', client_type=ClientType.objects.create(code='relation_type', name='开发商'),
+            created_by=user,
+        )
+
+        def contact(name, birthplace, score):
+            return ClientContact.objects.create(
+                client=client, name=name, birthplace=birthplace, role='contact_person',
+                decision_influence='medium', relationship_score=score,
+            )
+
+        self.alice = contact('张三', '山东省威海市', 50)
+        self.bob = contact('李四', '山东 威海', 80)
+        self.carol = contact('王五', '江苏省南京市', 60)
+        self.dave = contact('赵六', '河北省石家庄市', 10)
+
+        school = School.objects.create(name='山东大学(威海)', region='shandong')
+        ContactEducation.objects.create(
+            contact=self.alice, degree='bachelor', school_name='山东大学（威海）', major='土木工程',
+            enrollment_date=date(2005, 9, 1), graduation_date=date(2009, 7, 1),
+        )
+        ContactEducation.objects.create(
+            contact=self.bob, degree='bachelor', school=school, major='土木工程',
+            enrollment_date=date(2007, 9, 1), graduation_date=date(2011, 7, 1),
+        )
+        ContactCareer.objects.create(
+            contact=self.alice, company='威海建设集团', department='技术部', position='工程师',
+            join_date=date(2015, 1, 1),
+        )
+        ContactCareer.objects.create(
+            contact=self.carol, company='威海建设 集团', department='工程部', position='经理',
+            join_date=date(2016, 1, 1),
+        )
+        ContactCareer.objects.create(
+            contact=self.dave, company='其他公司', department='技术部', position='工程师',
+            join_date=date(2016, 1, 1),
+        )
+
+    def _related_names(self, contact):
+        return {group: [c.name for c in contacts] for group, contacts in related_contacts([contact.id]).items()}
+
+    def test_mining_uses_normalized_tokens(self):
+        self.assertEqual(birthplace_tokens('山东省威海市'), {'山东', '威海'})
+        with self.assertNumQueries(4):
+            related = self._related_names(self.alice)
+        self.assertEqual(related, {'education': ['李四'], 'birthplace': ['李四'], 'career': ['王五']})
+
+        related, reasons = find_all_related_contacts(self.alice)
+        self.assertEqual([c.name for c in related], ['李四'])
+        self.assertEqual(reasons[self.bob.id], ['教育背景'])
+
+    def test_index_maintained_by_signals(self):
+        self.bob.birthplace = '江苏 南京'
+        self.bob.save()
+        ContactEducation.objects.filter(contact=self.alice).delete()
+        self.assertEqual(self._related_names(self.alice), {'education': [], 'birthplace': [], 'career': ['王五']})
+        self.assertEqual(self._related_names(self.carol)['birthplace'], ['李四'])
+
+        # 学校改名后校友的学校词同步更新
+        school = School.objects.get(name='山东大学(威海)')
+        school.name = '哈尔滨工业大学(威海)'
+        school.save()
+        self.assertTrue(ContactRelationToken.objects.filter(
+            contact=self.bob, token_type=ContactRelationToken.TYPE_SCHOOL, token='哈尔滨工业大学(威海)',
+        ).exists())
+
+        dave_id = self.dave.id
+        self.dave.delete()
+        self.assertFalse(ContactRelationToken.objects.filter(contact_id=dave_id).exists())
+
+    def test_rebuild_command_restores_index(self):
+        ContactRelationToken.objects.all().delete()
+        call_command('rebuild_contact_relation_index', stdout=StringIO())
+        self.assertEqual(self._related_names(self.alice)['career'], ['王五'])
@@ -0,0 +1,130 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from backend.apps.customer_management.models import ContractRecognitionJob, ContractRecognitionResult
+from backend.apps.customer_management.services.contract_recognition import (
+    ContractRecognitionService,
+    execute_recognition_job,
+    reduce_contract_text,
+)
+from backend.core.tests.mixins import TempMediaRootMixin
+
+FILLER = '双方应本着诚实信用原则履行本合同约定的各项义务，不得擅自变更。'
+
+CONTRACT_TEXT = '\n'.join(
+    ['技术服务合同', '合同编号：WH-2025-001', '甲方：威海测试建设有限公司', '乙方：威海科技有限公司']
+    + [f'第{index}条 {FILLER}' for index in range(400)]
+    + ['第四百零一条 合同总价款为人民币 1,200,000 元（大写：壹佰贰拾万元整）。']
+    + [f'补充第{index}条 {FILLER}' for index in range(400)]
+    + ['甲方（盖章）：威海测试建设有限公司', '联系电话：0631-1234567', '签订日期：2025年3月15日']
+)
+
+
+class _FakeDeepSeekHandler(BaseHTTPRequestHandler):
+    """模拟 DeepSeek Chat 接口：记录收到的请求，返回固定的合同 JSON"""
+    requests = []
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+        type(self).requests.append(body)
+        content = json.dumps({
+            'contract_name': '技术服务合同', 'contract_number': 'WH-2025-001', 'contract_amount': '1200000',
+            'party_a': {'name': '威海测试建设有限公司'},
+        }, ensure_ascii=False)
+        data = json.dumps({'choices': [{'message': {'content': f'```json\n{content}\n```'}}]}).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+
+class ContractRecognitionTests(TempMediaRootMixin, TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.server = ThreadingHTTPServer(('127.0.0.1', 0), _FakeDeepSeekHandler)
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+        cls.settings_override = override_settings(
+            DEEPSEEK_API_KEY='test-key', DEEPSEEK_API_BASE_URL=f'http://127.0.0.1:{cls.server.server_address[1]}',
+        )
+        cls.settings_override.enable()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.settings_override.disable()
+        cls.server.shutdown()
+        cls.server.server_close()
+        super().tearDownClass()
+
+    def setUp(self):
+        super().setUp()
+        _FakeDeepSeekHandler.requests.clear()
+        self.user = get_user_model().objects.create_user(username='contract_user', password='test123456')
+        self.client.force_login(self.user)
+        # 测试环境没有 pdfplumber / python-docx，文本提取直接返回合同文本
+        patcher = mock.patch.object(ContractRecognitionService, '_extract_text', return_value=CONTRACT_TEXT)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _upload(self, name='合同.pdf', **extra):
+        upload = SimpleUploadedFile(name, b'%PDF-1.4 contract', content_type='application/pdf')
+        return self.client.post(reverse('customer:recognize_contract'), {'file': upload, **extra})
+
+    def test_upload_queues_job_and_same_file_is_served_from_store(self):
+        response = self._upload()
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response.json()['status'], 'pending')
+        self.assertFalse(_FakeDeepSeekHandler.requests)
+
+        # 模拟 worker 执行任务
+        job = execute_recognition_job(ContractRecognitionJob.objects.get(pk=response.json()['job_id']))
+        self.assertFalse(job.source_file)
+        status_response = self.client.get(response.json()['status_url'])
+        self.assertEqual(status_response.json()['status'], 'succeeded')
+        self.assertEqual(status_response.json()['data']['contract_number'], 'WH-2025-001')
+
+        # 发送的是精简后的文本：保留编号、价款和落款，不超过上限
+        sent = _FakeDeepSeekHandler.requests[0]['messages'][0]['content']
+        for expected in ('WH-2025-001', '1,200,000', '0631-1234567', '2025年3月15日'):
+            self.assertIn(expected, sent)
+        stored = ContractRecognitionResult.objects.get()
+        self.assertLessEqual(stored.sent_length, 8000)
+        self.assertGreater(stored.text_length, stored.sent_length)
+
+        # 同一份合同换个文件名再次上传：直接完成，不再调用接口
+        again = self._upload(name='合同副本.pdf')
+        self.assertEqual(again.status_code, 200)
+        self.assertEqual(again.json()['data']['contract_amount'], '1200000')
+        self.assertEqual(len(_FakeDeepSeekHandler.requests), 1)
+        stored.refresh_from_db()
+        self.assertEqual(stored.hit_count, 1)
+
+        # 要求重新识别时重新排队
+        self.assertEqual(self._upload(refresh='1').status_code, 202)
+
+    def test_other_users_cannot_poll_job(self):
+        job_id = self._upload().json()['job_id']
+        other = get_user_model().objects.create_user(username='other_user', password='test123456')
+        self.client.force_login(other)
+        self.assertEqual(self.client.get(reverse('customer:recognize_contract_status', args=[job_id])).status_code, 404)
+
+    def test_reduce_contract_text(self):
+        self.assertEqual(reduce_contract_text('合同编号：A-1\n甲方：某公司'), '合同编号：A-1\n甲方：某公司')
+
+        reduced = reduce_contract_text(CONTRACT_TEXT, limit=2000)
+        self.assertLessEqual(len(reduced), 2000)
+        self.assertTrue(reduced.startswith('技术服务合同\n合同编号：WH-2025-001'))
+        self.assertTrue(reduced.endswith('签订日期：2025年3月15日'))
+        self.assertIn('合同总价款为人民币 1,200,000 元', reduced)
+        self.assertIn('……', reduced)
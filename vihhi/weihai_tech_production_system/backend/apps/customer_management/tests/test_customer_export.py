@@ -0,0 +1,90 @@
+import csv
+import io
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+from openpyxl import load_workbook
+
+from backend.apps.customer_management.models import Client, ClientType
+from backend.apps.customer_management.services.customer_export import EXPORT_TYPE
+from backend.apps.customer_management.tasks import run_customer_export
+from backend.apps.system_management import services_export_jobs
+from backend.apps.system_management.models import ExportJob
+from backend.core.tests.mixins import TempMediaRootMixin
+
+
+class CustomerExportJobTests(TempMediaRootMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        User = get_user_model()
+        self.admin = User.objects.create_superuser(username="admin", password="pwd123456")
+        self.owner = User.objects.create_user(username="zhang", password="pwd123456", first_name="三", last_name="张")
+        client_type = ClientType.objects.create(code="developer", name="开发商")
+        self.owned = Client.objects.create(name="甲公司", client_type=client_type, client_level="vip",
+                                           responsible_user=self.owner, created_by=self.owner)
+        Client.objects.create(name="乙公司", client_type=client_type, created_by=self.admin)
+
+    def _job(self, user, file_format="csv", params=None):
+        return ExportJob.objects.create(export_type=EXPORT_TYPE, file_format=file_format,
+                                        params=params or {}, created_by=user)
+
+    def test_csv_export_streams_rows_with_display_values(self):
+        job = self._job(self.admin)
+
+        result = run_customer_export(job.id)
+
+        self.assertTrue(result["success"])
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.total_count, job.processed_count, job.progress), ("succeeded", 2, 2, 100))
+        with job.file.open("rb") as handle:
+            rows = list(csv.reader(io.StringIO(handle.read().decode("utf-8-sig"))))
+        self.assertEqual(rows[0][0], "客户名称")
+        by_name = {row[0]: row for row in rows[1:]}
+        self.assertEqual(by_name["甲公司"][2:6], ["VIP客户", "开发商", "一般", "三 张"])
+        self.assertEqual(by_name["乙公司"][5], "公海")
+
+    def test_export_applies_data_scope_and_filters(self):
+        # 没有客户查看权限的用户数据范围为空
+        job = self._job(self.owner, file_format="xlsx")
+        run_customer_export(job.id)
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.total_count), ("succeeded", 0))
+
+        job = self._job(self.admin, file_format="xlsx", params={"search": "甲"})
+        run_customer_export(job.id)
+        job.refresh_from_db()
+        with job.file.open("rb") as handle:
+            sheet = load_workbook(handle, read_only=True).active
+            values = [row for row in sheet.iter_rows(values_only=True)]
+        self.assertEqual([row[0] for row in values], ["客户名称", "甲公司"])
+
+    def test_view_creates_job_and_eager_mode_redirects_to_download(self):
+        self.client.force_login(self.admin)
+        with mock.patch.object(services_export_jobs, "EXPORT_JOB_EAGER", True), \
+                self.captureOnCommitCallbacks(execute=True):
+            response = self.client.get(reverse("business_pages:customer_export"), {"format": "csv"},
+                                       HTTP_X_REQUESTED_WITH="XMLHttpRequest")
+
+        job_id = response.json()["job_id"]
+        status_url = response.json()["status_url"]
+        self.assertEqual(status_url, reverse("system_pages:export_job_status", args=[job_id]))
+        status = self.client.get(status_url).json()["job"]
+        self.assertEqual((status["status"], status["processed"]), ("succeeded", 2))
+        download = self.client.get(reverse("system_pages:export_job_download", args=[job_id]))
+        self.assertEqual(download.status_code, 200)
+        self.assertIn("customers_", download["Content-Disposition"])
+
+        # 其他用户不能查看或下载
+        self.client.force_login(self.owner)
+        self.assertEqual(self.client.get(status_url).status_code, 404)
+
+    def test_non_ajax_request_returns_to_list_and_polls_job(self):
+        self.client.force_login(self.admin)
+        response = self.client.get(reverse("business_pages:customer_export"), {"format": "xlsx"})
+
+        job = ExportJob.objects.get()
+        self.assertEqual(job.status, "pending")
+        self.assertRedirects(response, f"{reverse('business_pages:customer_list')}?export_job={job.pk}",
+                             fetch_redirect_response=False)
@@ -0,0 +1,121 @@
+import json
+import threading
+from datetime import timedelta
+from decimal import Decimal
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from io import StringIO
+from urllib.parse import parse_qs, urlparse
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+
+from backend.apps.api_management.models import ApiInterface, ExternalSystem
+from backend.apps.customer_management.models import Client, ClientType, GeocodeCache, VisitCheckin
+from backend.apps.customer_management.services import AmapAPIService
+
+
+class _AmapStubHandler(BaseHTTPRequestHandler):
+    """模拟高德地理编码 / 逆地理编码接口，记录请求"""
+    requests = []
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        query = {key: values[0] for key, values in parse_qs(url.query).items()}
+        type(self).requests.append((url.path, query))
+        if url.path.endswith('/geocode/geo'):
+            geocodes = []
+            for index, address in enumerate(query['address'].split('|')):
+                if '未知' in address:
+                    geocodes.append({'formatted_address': [], 'province': [], 'location': []})
+                else:
+                    geocodes.append({
+                        'formatted_address': address, 'province': '山东省', 'city': '威海市',
+                        'district': '环翠区', 'adcode': '371002', 'level': '门址',
+                        'location': f'122.{index:06d},37.500000',
+                    })
+            payload = {'status': '1', 'info': 'OK', 'geocodes': geocodes}
+        else:
+            payload = {'status': '1', 'info': 'OK', 'regeocode': {
+                'formatted_address': '山东省威海市环翠区新威路', 'addressComponent': {'city': '威海市'},
+            }}
+        body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class GeocodeCacheTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.server = ThreadingHTTPServer(('127.0.0.1', 0), _AmapStubHandler)
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+        cls.base_url = f'http://127.0.0.1:{cls.server.server_address[1]}/v3'
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+        super().tearDownClass()
+
+    def setUp(self):
+        cache.clear()
+        _AmapStubHandler.requests = []
+        self.user = get_user_model().objects.create_user(username='geo_user', password='test123456')
+        system = ExternalSystem.objects.create(code='AMAP', name='高德地图', base_url=self.base_url, created_by=self.user)
+        ApiInterface.objects.create(
+            code='AMAP-GEO', name='地理编码', external_system=system, url='/geocode/geo',
+            auth_config={'api_key': 'test-key'}, created_by=self.user,
+        )
+        self.service = AmapAPIService()
+
+    def test_batch_geocode_cached_by_normalized_address(self):
+        addresses = [f'威海市环翠区新威路{i}号' for i in range(11)] + ['未知地址', '威海市环翠区 新威路0号']
+        results = self.service.geocode_batch(addresses, city='威海')
+
+        self.assertEqual(len(_AmapStubHandler.requests), 2)
+        self.assertEqual(len(_AmapStubHandler.requests[0][1]['address'].split('|')), 10)
+        self.assertEqual(_AmapStubHandler.requests[0][1]['batch'], 'true')
+        self.assertIsNone(results[11])
+        self.assertEqual(results[12], results[0])
+        self.assertEqual(GeocodeCache.objects.count(), 12)
+
+        # 再次查询（含解析失败的地址）全部命中缓存表
+        self.assertEqual(self.service.geocode('威海市环翠区　新威路3号 ', '威海'), results[3])
+        self.assertIsNone(self.service.geocode('未知地址', '威海'))
+        self.assertEqual(len(_AmapStubHandler.requests), 2)
+
+        # 解析失败的记录过期后重新查询
+        GeocodeCache.objects.filter(result__isnull=True).update(updated_time=timezone.now() - timedelta(days=30))
+        self.service.geocode('未知地址', '威海')
+        self.assertEqual(len(_AmapStubHandler.requests), 3)
+
+    def test_regeocode_cached_by_rounded_location(self):
+        first = self.service.regeocode(122.1234561, 37.5123461)
+        second = self.service.regeocode(122.1234559, 37.5123459)
+        self.assertEqual(first, second)
+        self.assertEqual(len(_AmapStubHandler.requests), 1)
+        self.assertEqual(_AmapStubHandler.requests[0][1]['location'], '122.12346,37.51235')
+
+    def test_backfill_checkin_coordinates(self):
+        client = Client.objects.create(
+            name='威海客户', company_address='威海市环翠区新威路1号',
+            client_type=ClientType.objects.create(code='geo_type', name='开发商'), created_by=self.user,
+        )
+        checkin = VisitCheckin.objects.create(
+            client=client, checkin_time=timezone.now(), checkin_location='威海市环翠区新威路1号', created_by=self.user,
+        )
+        call_command('backfill_geocodes', stdout=StringIO())
+
+        checkin.refresh_from_db()
+        self.assertEqual(checkin.latitude, Decimal('37.5000000'))
+        # 客户地址与签到地址相同，只请求一次
+        self.assertEqual(len(_AmapStubHandler.requests), 1)
@@ -0,0 +1,66 @@
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import RequestFactory, TestCase
+from django.utils import timezone
+
+from backend.apps.customer_management.models import Client, ClientType
+from backend.core.pagination import KeysetPage, KeysetPaginator, estimate_count, paginate_queryset
+
+
+class KeysetPaginationTests(TestCase):
+    def setUp(self):
+        user = get_user_model().objects.create_user(username="alice", password="pwd123456")
+        client_type = ClientType.objects.create(code="developer", name="开发商")
+        now = timezone.now()
+        # 同一创建时间的多条记录，用于验证 id 作为次级排序键
+        times = [now, now, now - timedelta(hours=1), now - timedelta(hours=2), now - timedelta(hours=2),
+                 now - timedelta(hours=2), now - timedelta(days=1)]
+        for index, created_time in enumerate(times):
+            Client.objects.create(
+                name=f"客户{index}", client_type=client_type, created_by=user, created_time=created_time
+            )
+        self.expected = list(Client.objects.order_by("-created_time", "-id").values_list("id", flat=True))
+
+    def test_forward_and_backward_pages_cover_rows_in_order(self):
+        paginator = KeysetPaginator(Client.objects.all(), 3)
+
+        pages = [paginator.page()]
+        while pages[-1].has_next():
+            pages.append(paginator.page(pages[-1].next_cursor))
+        self.assertEqual([page.number for page in pages], [1, 2, 3])
+        self.assertEqual([obj.id for page in pages for obj in page], self.expected)
+        self.assertFalse(pages[0].has_previous())
+
+        previous = paginator.page(pages[-1].previous_cursor)
+        self.assertEqual([obj.id for obj in previous], self.expected[3:6])
+        self.assertTrue(previous.has_previous())
+        self.assertTrue(previous.has_next())
+
+    def test_deep_page_uses_constant_queries(self):
+        paginator = KeysetPaginator(Client.objects.all(), 2)
+        cursor = paginator.page(paginator.page().next_cursor).next_cursor
+        with self.assertNumQueries(1):
+            page = paginator.page(cursor)
+        self.assertEqual([obj.id for obj in page], self.expected[4:6])
+
+    def test_approximate_count_reads_table_statistics(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f"ANALYZE {Client._meta.db_table}")
+        self.assertEqual(estimate_count(Client.objects.all()), len(self.expected))
+        self.assertGreater(estimate_count(Client.objects.filter(name__startswith="客户")), 0)
+
+    def test_paginate_queryset_switches_on_query_parameter(self):
+        factory = RequestFactory()
+        page = paginate_queryset(factory.get("/", {"page": "2"}), Client.objects.order_by("-created_time"), 3)
+        self.assertNotIsInstance(page, KeysetPage)
+        self.assertEqual(page.number, 2)
+
+        request = factory.get("/", {"pagination": "keyset", "cursor": "not-a-cursor", "search": "客户"})
+        page = paginate_queryset(request, Client.objects.all(), 3)
+        self.assertIsInstance(page, KeysetPage)
+        self.assertEqual(page.number, 1)
+        self.assertIn("search=", page.next_query)
+        self.assertIn("pagination=keyset", page.next_query)
+        self.assertIn("cursor=", page.next_query)
@@ -0,0 +1,73 @@
+from datetime import date, datetime
+from decimal import Decimal
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase
+from django.urls import reverse
+
+from backend.apps.customer_management.models import BusinessOpportunity, Client, ClientType
+from backend.apps.customer_management.services.opportunity_import import OpportunityImporter
+from backend.apps.system_management import tasks
+from backend.core import task_dispatch
+from backend.core.tests.mixins import TempMediaRootMixin
+from backend.utils import import_utils
+
+CSV_ROWS = [
+    '商机名称,客户名称（必填）,负责商务手机号（必填）,预计金额（万元）,成功概率（%）,商机状态,预计签约时间（YYYY-MM-DD）',
+    '一期商机,威海测试客户,13800000005,500,30,初步接触,2025-12-31',
+    '二期商机,新客户,13800000005,100,,,',
+    '三期商机,威海测试客户,13900000000,100,,,',
+    '四期商机,威海测试客户,13800000005,100,40,,',
+]
+
+
+class OpportunityImportTests(TempMediaRootMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        User = get_user_model()
+        self.user = User.objects.create_superuser(username='import_admin', password='pwd123456')
+        self.manager = User.objects.create_user(username='13800000005', password='pwd123456')
+        client_type = ClientType.objects.create(code='developer', name='开发商')
+        self.existing = Client.objects.create(name='威海测试客户', client_type=client_type, created_by=self.user)
+
+    def _upload(self):
+        # GBK 编码的 CSV（Excel 另存为 CSV 的默认编码）
+        return SimpleUploadedFile('商机.csv', '\n'.join(CSV_ROWS).encode('gbk'))
+
+    def test_import_numbers_opportunities_in_bulk_and_creates_missing_clients(self):
+        job = import_utils.start_import(self.user, OpportunityImporter, self._upload())
+
+        self.assertEqual((job.status, job.success_count, job.failed_count), ('succeeded', 2, 2))
+        self.assertEqual(job.errors, [
+            {'row': 4, 'message': '未找到对应的商务经理手机号：13900000000'},
+            {'row': 5, 'message': '成功概率必须是 10、30、50、70 或 90，当前值：40'},
+        ])
+        prefix = f"SJ-{datetime.now():%Y%m%d}-"
+        first, second = BusinessOpportunity.objects.order_by('opportunity_number')
+        self.assertEqual((first.opportunity_number, second.opportunity_number), (f'{prefix}0001', f'{prefix}0002'))
+        self.assertEqual(
+            (first.client, first.status, first.expected_sign_date), (self.existing, 'initial_contact', date(2025, 12, 31))
+        )
+        self.assertEqual(first.weighted_amount, Decimal('150.00'))
+        self.assertGreater(first.health_score, 0)
+        self.assertEqual((second.client.name, second.success_probability), ('新客户', 10))
+
+    def test_large_file_runs_as_background_job(self):
+        with mock.patch.object(import_utils, 'IMPORT_SYNC_MAX_BYTES', 0), \
+                mock.patch.object(task_dispatch, 'run_in_background',
+                                  side_effect=lambda task, *args: task.apply(args=args)) as background, \
+                self.captureOnCommitCallbacks(execute=True) as callbacks:
+            job = import_utils.start_import(self.user, OpportunityImporter, self._upload())
+            # 提交前只创建了任务，导入在事务提交后由后台任务执行
+            self.assertEqual(job.status, 'pending')
+
+        self.assertEqual(len(callbacks), 1)
+        background.assert_called_once_with(tasks.run_import_job, job.pk)
+        self.client.force_login(self.user)
+        status = self.client.get(reverse('system_pages:import_job_status', args=[job.pk])).json()['job']
+        self.assertEqual((status['status'], status['success'], status['failed']), ('succeeded', 2, 2))
+        report = self.client.get(status['error_report_url'])
+        self.assertEqual(report.status_code, 200)
+        self.assertEqual(BusinessOpportunity.objects.count(), 2)
@@ -0,0 +1,77 @@
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+from django.utils import timezone
+
+from backend.apps.customer_management.models import (
+    Client,
+    ClientPublicSeaLog,
+    ClientStatsSnapshot,
+    ClientType,
+    CustomerRelationship,
+)
+from backend.apps.customer_management.services import auto_move_to_public_sea
+from backend.apps.customer_management.services.client_stats import compute_stats, get_snapshot
+
+
+class AutoMoveToPublicSeaTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        User = get_user_model()
+        self.alice = User.objects.create_user(username="alice", password="pwd123456")
+        self.bob = User.objects.create_user(username="bob", password="pwd123456")
+        client_type = ClientType.objects.create(code="developer", name="开发商")
+
+        def create(name, **kwargs):
+            return Client.objects.create(name=name, client_type=client_type, created_by=self.alice, **kwargs)
+
+        self.stale = create("久未拜访", responsible_user=self.bob, total_contract_amount=Decimal("80.00"))
+        self.old_visit = create("拜访已过期", responsible_user=self.bob)
+        self.recent = create("近期拜访", responsible_user=self.bob)
+        self.public = create("已在公海")
+        self._followup(self.old_visit, timezone.now() - timedelta(days=120))
+        self._followup(self.recent, timezone.now() - timedelta(days=10))
+
+    def _followup(self, client, followup_time):
+        CustomerRelationship.objects.create(
+            client=client, content="电话沟通", followup_person=self.bob, created_by=self.bob, followup_time=followup_time
+        )
+
+    def test_dry_run_reports_candidates_without_changes(self):
+        result = auto_move_to_public_sea(dry_run=True)
+
+        self.assertEqual(result["candidates"], 2)
+        self.assertEqual(result["moved"], 0)
+        self.assertIn("select", result["timings"])
+        self.assertEqual(Client.objects.filter(responsible_user__isnull=True).count(), 1)
+        self.assertFalse(ClientPublicSeaLog.objects.exists())
+
+    def test_moves_inactive_clients_in_batches_with_audit_and_stats(self):
+        get_snapshot(ClientStatsSnapshot.SCOPE_GLOBAL)
+        get_snapshot(ClientStatsSnapshot.SCOPE_USER, self.bob.pk)
+
+        result = auto_move_to_public_sea(batch_size=1)
+
+        self.assertEqual((result["candidates"], result["moved"], result["batches"]), (2, 2, 2))
+        moved = set(Client.objects.filter(public_sea_reason="auto_entry").values_list("id", flat=True))
+        self.assertEqual(moved, {self.stale.id, self.old_visit.id})
+        self.recent.refresh_from_db()
+        self.assertEqual(self.recent.responsible_user_id, self.bob.id)
+
+        logs = ClientPublicSeaLog.objects.all()
+        self.assertEqual({log.client_id for log in logs}, moved)
+        self.assertTrue(all(log.previous_responsible_user_id == self.bob.id and log.inactivity_days == 90 for log in logs))
+
+        global_snapshot = get_snapshot(ClientStatsSnapshot.SCOPE_GLOBAL)
+        self.assertEqual(global_snapshot.public_sea_count, 3)
+        bob_snapshot = get_snapshot(ClientStatsSnapshot.SCOPE_USER, self.bob.pk)
+        expected = compute_stats(Client.objects.filter(responsible_user=self.bob))
+        self.assertEqual(bob_snapshot.total_count, expected["total_count"])
+
+    def test_inactivity_window_is_configurable(self):
+        result = auto_move_to_public_sea(days=5)
+        self.assertEqual(result["moved"], 3)
+        self.assertEqual(Client.objects.filter(responsible_user__isnull=False).count(), 0)
@@ -0,0 +1,103 @@
+import json
+import threading
+import time
+from collections import Counter
+from decimal import Decimal
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+
+from backend.apps.api_management.models import ApiCallLog, ApiInterface, ExternalSystem
+from backend.apps.api_management.services import cache_stats
+from backend.apps.customer_management.services import QixinbaoAPIService
+
+
+class _StubHandler(BaseHTTPRequestHandler):
+    """模拟启信宝接口：记录每个路径的请求次数，按需延迟响应"""
+    hits = Counter()
+    delay = 0
+
+    def do_GET(self):
+        path = urlparse(self.path).path
+        type(self).hits[path] += 1
+        time.sleep(type(self).delay)
+        if path.endswith('getContactInfo'):
+            data = {'telephone': '0631-1234567', 'email': 'info@example.com'}
+        else:
+            data = {'id': 'QX1', 'name': '威海测试(集团)有限公司', 'creditNo': '91371000MA3C000000'}
+        body = json.dumps({'status': '200', 'message': '操作成功', 'data': data}).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class QixinbaoCacheTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.server = ThreadingHTTPServer(('127.0.0.1', 0), _StubHandler)
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+        cls.base_url = f'http://127.0.0.1:{cls.server.server_address[1]}'
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+        super().tearDownClass()
+
+    def setUp(self):
+        cache.clear()
+        _StubHandler.hits.clear()
+        _StubHandler.delay = 0
+        user = get_user_model().objects.create_user(username='api_admin', password='test123456')
+        system = ExternalSystem.objects.create(code='QIXINBAO', name='启信宝', base_url=self.base_url, created_by=user)
+        for code, url in [('QIXINBAO-00002', '/APIService/enterprise/getBasicInfo'),
+                          ('QIXINBAO-00003', '/APIService/enterprise/getContactInfo')]:
+            ApiInterface.objects.create(
+                code=code, name=url, external_system=system, url=url, created_by=user,
+                auth_config={'app_key': 'key', 'app_secret': 'secret'}, unit_cost=Decimal('0.5'),
+            )
+        self.service = QixinbaoAPIService()
+
+    def test_repeated_lookup_served_from_cache(self):
+        first = self.service.get_company_detail(company_name='威海测试（集团）有限公司')
+        second = self.service.get_company_detail(company_name=' 威海测试(集团)有限公司')
+        self.assertEqual(first, second)
+        self.assertEqual(first['phone'], '0631-1234567')
+        self.assertEqual(_StubHandler.hits['/APIService/enterprise/getBasicInfo'], 1)
+        self.assertEqual(_StubHandler.hits['/APIService/enterprise/getContactInfo'], 1)
+
+        logs = ApiCallLog.objects.order_by('id')
+        self.assertEqual([log.cache_status for log in logs], ['miss', 'miss', 'hit', 'hit'])
+        self.assertEqual(sum(log.cost for log in logs), Decimal('1.0'))
+        self.assertEqual(cache_stats('QIXINBAO')['hit'], 2)
+
+    def test_concurrent_identical_lookups_coalesced(self):
+        # 并发线程不写调用日志（测试事务对其它连接不可见），只验证合并
+        self.service._interfaces = {}
+        _StubHandler.delay = 0.3
+        results = []
+        threads = [
+            threading.Thread(target=lambda: results.append(
+                self.service._make_request('/APIService/enterprise/getBasicInfo', {'keyword': '威海测试有限公司'})
+            ))
+            for _ in range(5)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(_StubHandler.hits['/APIService/enterprise/getBasicInfo'], 1)
+        self.assertEqual(len(results), 5)
+        self.assertTrue(all(result == results[0] for result in results))
+        stats = cache_stats('QIXINBAO')
+        self.assertEqual((stats['miss'], stats['coalesced'] + stats['hit']), (1, 4))
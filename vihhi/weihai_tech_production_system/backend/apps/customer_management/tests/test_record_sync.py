@@ -0,0 +1,106 @@
+import os
+import tempfile
+import threading
+from collections import Counter
+from datetime import date
+from decimal import Decimal
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+
+from backend.apps.customer_management.models import Client, ClientType, ExecutionRecord
+from backend.apps.customer_management.services import QixinbaoAPIError
+from backend.apps.customer_management.services import record_sync
+from backend.apps.customer_management.services.record_sync import SyncCheckpoint, sync_execution_records
+
+
+class FakeQixinbaoService:
+    """按企业名称返回固定记录；可指定先失败若干次的企业"""
+
+    def __init__(self, records, flaky=None, broken=()):
+        self.records = records
+        self.flaky = Counter(flaky or {})
+        self.broken = set(broken)
+        self.calls = Counter()
+        self._lock = threading.Lock()
+
+    def get_execution_records(self, credit_code=None, company_name=None, raise_on_error=False):
+        with self._lock:
+            self.calls[company_name] += 1
+            if company_name in self.broken:
+                raise QixinbaoAPIError('账户余额不足')
+            if self.flaky[company_name] > 0:
+                self.flaky[company_name] -= 1
+                raise QixinbaoAPIError('网络错误', retryable=True)
+        return self.records.get(company_name, [])
+
+
+class RecordSyncTests(TestCase):
+    def setUp(self):
+        user = get_user_model().objects.create_user(username='sync_admin', password='test123456')
+        client_type = ClientType.objects.create(code='sync_developer', name='开发商')
+
+        def create(name):
+            return Client.objects.create(name=name, client_type=client_type, created_by=user)
+
+        self.alpha = create('甲公司')
+        self.beta = create('乙公司')
+        self.gamma = create('丙公司')
+        ExecutionRecord.objects.create(
+            client=self.alpha, case_number='(2024)鲁10执1号', execution_status='executing',
+            execution_amount=Decimal('100.00'),
+        )
+        ExecutionRecord.objects.create(
+            client=self.alpha, case_number='(2023)鲁10执9号', execution_status='completed',
+            execution_amount=Decimal('50.00'),
+        )
+        self.records = {
+            '甲公司': [
+                {'case_number': '(2024)鲁10执1号', 'execution_status': 'completed', 'execution_amount': '100'},
+                {'case_number': '(2023)鲁10执9号', 'execution_status': 'completed', 'execution_amount': '50'},
+                {'case_number': '(2025)鲁10执3号', 'execution_status': 'pending', 'filing_date': '2025-03-01',
+                 'execution_amount': '30.5'},
+            ],
+            '乙公司': [{'case_number': '(2025)鲁10执7号', 'execution_amount': '8'}],
+        }
+        backoff = mock.patch.object(record_sync, 'SYNC_RETRY_BACKOFF', 0)
+        backoff.start()
+        self.addCleanup(backoff.stop)
+
+    def test_diff_and_bulk_write(self):
+        service = FakeQixinbaoService(self.records, flaky={'乙公司': 2}, broken=['丙公司'])
+        report = sync_execution_records(service, Client.objects.all(), workers=3, rate_limit=0, batch_size=2)
+
+        self.assertEqual((report.clients, report.synced, report.failed), (3, 2, 1))
+        self.assertEqual((report.created, report.updated, report.unchanged), (2, 1, 1))
+        self.assertEqual(report.retries, 2)
+        self.assertEqual(service.calls['丙公司'], 1)
+
+        updated = ExecutionRecord.objects.get(case_number='(2024)鲁10执1号')
+        self.assertEqual(updated.execution_status, 'completed')
+        created = ExecutionRecord.objects.get(case_number='(2025)鲁10执3号')
+        self.assertEqual(created.filing_date, date(2025, 3, 1))
+
+        self.alpha.refresh_from_db()
+        self.beta.refresh_from_db()
+        self.assertEqual(self.alpha.total_execution_amount, Decimal('180.50'))
+        self.assertEqual(self.beta.total_execution_amount, Decimal('8.00'))
+
+        # 再次同步没有变化，不重复新增
+        again = sync_execution_records(FakeQixinbaoService(self.records), Client.objects.all(), rate_limit=0)
+        self.assertEqual((again.created, again.updated, again.unchanged), (0, 0, 4))
+        self.assertEqual(ExecutionRecord.objects.count(), 4)
+
+    def test_resume_from_checkpoint(self):
+        path = os.path.join(tempfile.mkdtemp(), 'sync.checkpoint.json')
+        checkpoint = SyncCheckpoint(path)
+        checkpoint.save(self.alpha.id)
+
+        service = FakeQixinbaoService(self.records)
+        report = sync_execution_records(
+            service, Client.objects.all(), rate_limit=0, checkpoint=checkpoint, resume=True,
+        )
+        self.assertEqual(report.clients, 2)
+        self.assertNotIn('甲公司', service.calls)
+        self.assertFalse(os.path.exists(path))
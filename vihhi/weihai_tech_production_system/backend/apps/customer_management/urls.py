@@ -56,4 +56,5 @@ urlpatterns = [
     path('schools/search/', views.search_schools, name='search_schools'),
     # 合同识别API
     path('contracts/recognize/', views.recognize_contract, name='recognize_contract'),
+    path('contracts/recognize/<int:job_id>/', views.recognize_contract_status, name='recognize_contract_status'),
 ]
@@ -3281,14 +3281,18 @@ def search_schools(request):
 def recognize_contract(request):
     """
     合同识别API
-    上传合同文件，使用DeepSeek API识别并提取合同信息
+    上传合同文件，创建识别任务（使用DeepSeek API识别并提取合同信息），页面轮询任务状态
     
     请求参数:
     - file: 合同文件（PDF、图片等）
+    - refresh: 为 1 时忽略已保存的识别结果，重新识别
     
-    返回:
+    返回（同一份合同已识别过时直接返回结果，HTTP 200；否则 HTTP 202，轮询 status_url）:
     {
         "success": bool,
+        "job_id": 1,
+        "status": "pending / running / succeeded / failed",
+        "status_url": "/api/customer/contracts/recognize/1/",
         "data": {
             "contract_name": "合同名称",
             "contract_number": "合同编号",
@@ -3307,9 +3311,9 @@ def recognize_contract(request):
     }
     """
     import logging
-    import tempfile
     from django.core.files.uploadedfile import UploadedFile
-    from .services.contract_recognition import ContractRecognitionService
+    from django.urls import reverse
+    from .services.contract_recognition import FILE_TYPES, job_payload, start_recognition_job
     
     logger = logging.getLogger(__name__)
     
@@ -3324,7 +3328,7 @@ def recognize_contract(request):
         uploaded_file: UploadedFile = request.FILES['file']
         
         # 检查文件类型
-        allowed_extensions = ['.pdf', '.jpg', '.jpeg', '.png', '.doc', '.docx']
+        allowed_extensions = list(FILE_TYPES)
         file_ext = os.path.splitext(uploaded_file.name)[1].lower()
         
         if file_ext not in allowed_extensions:
@@ -3340,40 +3344,13 @@ def recognize_contract(request):
                 'error': '文件大小不能超过10MB'
             }, status=status.HTTP_400_BAD_REQUEST)
         
-        # 保存临时文件
-        with tempfile.NamedTemporaryFile(delete=False, suffix=file_ext) as tmp_file:
-            for chunk in uploaded_file.chunks():
-                tmp_file.write(chunk)
-            tmp_file_path = tmp_file.name
-        
-        try:
-            # 确定文件类型
-            file_type = 'pdf' if file_ext == '.pdf' else 'image' if file_ext in ['.jpg', '.jpeg', '.png'] else 'docx'
-            
-            # 调用识别服务
-            recognition_service = ContractRecognitionService()
-            result = recognition_service.recognize_contract(tmp_file_path, file_type)
-            
-            # 清理临时文件
-            os.unlink(tmp_file_path)
-            
-            if result.get('success'):
-                return Response({
-                    'success': True,
-                    'data': result.get('data', {}),
-                    'raw_text': result.get('raw_text', '')
-                })
-            else:
-                return Response({
-                    'success': False,
-                    'error': result.get('error', '识别失败')
-                }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
-                
-        except Exception as e:
-            # 确保临时文件被删除
-            if os.path.exists(tmp_file_path):
-                os.unlink(tmp_file_path)
-            raise e
+        refresh = str(request.data.get('refresh', '')).lower() in ('1', 'true')
+        job = start_recognition_job(request.user, uploaded_file, refresh=refresh)
+        payload = job_payload(job)
+        payload['status_url'] = reverse('customer:recognize_contract_status', args=[job.pk])
+        if job.status == 'failed':
+            return Response(payload, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+        return Response(payload, status=status.HTTP_200_OK if job.status == 'succeeded' else status.HTTP_202_ACCEPTED)
             
     except Exception as e:
         logger.exception(f"合同识别API错误: {str(e)}")
@@ -3381,3 +3358,15 @@ def recognize_contract(request):
             'success': False,
             'error': f'处理失败: {str(e)}'
         }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+@api_view(['GET'])
+@permission_classes([permissions.IsAuthenticated])
+def recognize_contract_status(request, job_id):
+    """合同识别任务状态（只能查看自己创建的任务）"""
+    from django.shortcuts import get_object_or_404
+    from .models import ContractRecognitionJob
+    from .services.contract_recognition import job_payload
+    
+    job = get_object_or_404(ContractRecognitionJob.objects.select_related('result'), pk=job_id, created_by=request.user)
+    return Response(job_payload(job))
@@ -1,7 +1,6 @@
 from decimal import Decimal, InvalidOperation
 import json
 import csv
-import io
 import logging
 
 from django.contrib import messages
@@ -32,7 +31,6 @@ from backend.apps.customer_management.models import (
     BiddingQuotation,
     AuthorizationLetter,
     AuthorizationLetterTemplate,
-    ContactEducation,
     ContactCareer,
     ContactColleague,
 )
@@ -50,6 +48,9 @@ except ImportError:
 # BusinessContract和BusinessPaymentPlan已迁移到production_management
 from backend.apps.production_management.models import BusinessContract, BusinessPaymentPlan, DesignStage, ServiceType
 from backend.apps.system_management.services import get_user_permission_codes
+from backend.apps.system_management.data_scope import filter_clients_by_scope, filter_opportunities_by_scope
+from backend.apps.customer_management.services.client_stats import get_client_stats_for_user
+from backend.core.pagination import paginate_queryset
 from backend.core.views import HOME_NAV_STRUCTURE, _permission_granted, _build_full_top_nav
 from backend.apps.permission_management.utils import normalize_permission_code
 
@@ -595,6 +596,9 @@ def _filter_clients_by_permission(clients, user, permission_set):
     3. view_assigned: 查看本人负责的客户（商务经理）
     4. view: 自动根据权限级别选择
     
+    数据范围的解析与应用见 system_management.data_scope：
+    每个请求只解析一次，以单个 IN 条件过滤（负责人或创建人在范围内）。
+    
     Args:
         clients: 客户查询集
         user: 用户对象
@@ -603,73 +607,7 @@ def _filter_clients_by_permission(clients, user, permission_set):
     Returns:
         过滤后的客户查询集
     """
-    if not user or not getattr(user, 'is_authenticated', False):
-        return clients.none()
-    
-    # 超级用户拥有全部权限
-    if getattr(user, 'is_superuser', False):
-        return clients
-    
-    # 检查是否有查看全部权限（最高级别）
-    if _check_customer_permission('customer_management.client.view_all', permission_set):
-        return clients
-    
-    # 检查是否有查看本部门权限
-    if _check_customer_permission('customer_management.client.view_department', permission_set):
-        # 获取用户所在部门
-        if user.department:
-            # 获取部门的所有成员
-            from backend.apps.system_management.models import User
-            department_users = User.objects.filter(
-                department=user.department,
-                is_active=True
-            )
-            # 过滤：负责人是本部门成员的客户 或 创建人是本部门成员的客户
-            from django.db.models import Q
-            return clients.filter(
-                Q(responsible_user__in=department_users) | Q(created_by__in=department_users)
-            )
-        else:
-            # 如果没有部门，降级为查看本人负责的或本人创建的
-            from django.db.models import Q
-            return clients.filter(
-                Q(responsible_user=user) | Q(created_by=user)
-            )
-    
-    # 检查是否有查看本人负责的权限（最低级别）
-    # 包括：负责人是自己 或 创建人是自己
-    if _check_customer_permission('customer_management.client.view_assigned', permission_set):
-        from django.db.models import Q
-        return clients.filter(
-            Q(responsible_user=user) | Q(created_by=user)
-        )
-    
-    # 检查通用view权限（向后兼容，自动选择最高可用级别）
-    if _check_customer_permission('customer_management.client.view', permission_set):
-        # 检查用户角色，自动判断权限级别
-        # 总经理：查看全部
-        if user.roles.filter(code='general_manager').exists():
-            return clients
-        # 部门经理：查看本部门
-        if user.department and user.department.leader == user:
-            from backend.apps.system_management.models import User
-            from django.db.models import Q
-            department_users = User.objects.filter(
-                department=user.department,
-                is_active=True
-            )
-            # 部门经理可以看到：本部门成员负责的客户 或 本部门成员创建的客户
-            return clients.filter(
-                Q(responsible_user__in=department_users) | Q(created_by__in=department_users)
-            )
-        # 商务经理或其他：查看本人负责的 或 本人创建的
-        from django.db.models import Q
-        return clients.filter(
-            Q(responsible_user=user) | Q(created_by=user)
-        )
-    
-    # 没有权限，返回空查询集
-    return clients.none()
+    return filter_clients_by_scope(clients, user, permission_set)
 
 
 def _build_customer_management_menu(permission_set, active_id=None):
@@ -1254,7 +1192,6 @@ def _get_opportunities_safely(queryset, permission_set, user):
 @login_required
 def customer_list(request):
     """客户列表"""
-    from django.core.paginator import Paginator
     from backend.apps.customer_management.models import Client
     
     # 获取标签页参数
@@ -1464,22 +1401,19 @@ def customer_list(request):
         except (ValueError, TypeError):
             per_page = 10
         
-        paginator = Paginator(clients, per_page)
-        page_number = request.GET.get('page', 1)
-        page_obj = paginator.get_page(page_number)
+        page_obj = paginate_queryset(request, clients, per_page)
         
-        # 统计信息
-        total_clients = Client.objects.count()
-        active_clients = Client.objects.filter(is_active=True).count()
-        vip_clients = Client.objects.filter(client_level='vip').count()
-        public_sea_clients = Client.objects.filter(responsible_user__isnull=True).count()
-        total_contract_amount = Client.objects.aggregate(
-            total=Sum('total_contract_amount')
-        )['total'] or Decimal('0')
+        # 统计信息（按数据范围读取客户统计快照，单次主键查询）
+        client_stats = get_client_stats_for_user(request.user, permission_set)
+        total_clients = client_stats['total_count']
+        active_clients = client_stats['active_count']
+        vip_clients = client_stats['vip_count']
+        public_sea_clients = client_stats['public_sea_count']
+        total_contract_amount = client_stats['total_contract_amount']
         
         # 重点客户（按合同金额排序，取前5个）
-        key_clients = Client.objects.filter(
-            total_contract_amount__gt=0
+        key_clients = _filter_clients_by_permission(
+            Client.objects.filter(total_contract_amount__gt=0), request.user, permission_set
         ).order_by('-total_contract_amount')[:5]
         
     except Exception as e:
@@ -2357,116 +2291,54 @@ def customer_batch_delete(request):
 
 @login_required
 def customer_export(request):
-    """导出客户数据"""
-    from backend.apps.customer_management.models import Client
-    from django.http import HttpResponse
-    import csv
-    import json
+    """
+    导出客户数据
+    
+    创建后台导出任务（Celery），按当前用户的数据范围和筛选条件流式写入文件：
+    - AJAX 请求返回任务ID和进度查询地址，客户列表页轮询进度后下载
+    - 普通请求：任务已同步完成（EXPORT_JOB_EAGER）时直接跳转下载，否则回到客户列表页（带 export_job 参数）轮询进度
+    """
+    from django.http import JsonResponse
+    from backend.apps.customer_management.services.customer_export import EXPORT_TYPE, export_params_from_request
+    from backend.apps.customer_management.tasks import run_customer_export
+    from backend.apps.system_management.services_export_jobs import create_export_job
     
     permission_set = get_user_permission_codes(request.user)
     if not _check_customer_permission('customer_management.client.view', permission_set):
         messages.error(request, '您没有权限导出客户数据')
         return redirect('business_pages:customer_list')
     
+    export_format = request.GET.get('format', 'xlsx')
+    if export_format not in ('xlsx', 'csv'):
+        messages.error(request, '不支持的导出格式')
+        return redirect('business_pages:customer_list')
+    
+    is_ajax = request.headers.get('x-requested-with') == 'XMLHttpRequest'
     try:
-        # 获取筛选参数
-        client_ids_str = request.GET.get('ids', '')
-        export_format = request.GET.get('format', 'xlsx')
-        
-        # 获取客户列表
-        if client_ids_str:
-            client_ids = [int(id.strip()) for id in client_ids_str.split(',') if id.strip()]
-            clients = Client.objects.filter(id__in=client_ids).select_related('responsible_user', 'created_by')
-        else:
-            # 如果没有指定ID，使用当前筛选条件
-            clients = Client.objects.select_related('responsible_user', 'created_by').all()
-            
-            # 应用筛选条件（简化版，可以根据需要扩展）
-            search = request.GET.get('search', '').strip()
-            if search:
-                clients = clients.filter(name__icontains=search)
-        
-        # 导出为CSV
-        if export_format == 'csv':
-            response = HttpResponse(content_type='text/csv; charset=utf-8-sig')
-            response['Content-Disposition'] = 'attachment; filename="customers.csv"'
-            
-            writer = csv.writer(response)
-            # 写入表头
-            writer.writerow(['客户名称', '统一信用代码', '客户等级', '客户类型', '信用等级', '负责人', '创建时间'])
-            
-            # 写入数据
-            for client in clients:
-                writer.writerow([
-                    client.name,
-                    client.unified_credit_code or '',
-                    client.get_client_level_display(),
-                    client.get_client_type_display() if client.client_type else '',
-                    client.get_credit_level_display(),
-                    client.responsible_user.get_full_name() if client.responsible_user else '公海',
-                    client.created_time.strftime('%Y-%m-%d %H:%M:%S') if client.created_time else ''
-                ])
-            
-            return response
-        
-        # 导出为Excel（需要openpyxl库）
-        elif export_format == 'xlsx':
-            try:
-                from openpyxl import Workbook
-                from openpyxl.styles import Font, Alignment
-                
-                wb = Workbook()
-                ws = wb.active
-                ws.title = '客户列表'
-                
-                # 设置表头
-                headers = ['客户名称', '统一信用代码', '客户等级', '客户类型', '信用等级', '负责人', '创建时间']
-                ws.append(headers)
-                
-                # 设置表头样式
-                for cell in ws[1]:
-                    cell.font = Font(bold=True)
-                    cell.alignment = Alignment(horizontal='center')
-                
-                # 写入数据
-                for client in clients:
-                    ws.append([
-                        client.name,
-                        client.unified_credit_code or '',
-                        client.get_client_level_display(),
-                        client.get_client_type_display() if client.client_type else '',
-                        client.get_credit_level_display(),
-                        client.responsible_user.get_full_name() if client.responsible_user else '公海',
-                        client.created_time.strftime('%Y-%m-%d %H:%M:%S') if client.created_time else ''
-                    ])
-                
-                # 调整列宽
-                column_widths = [20, 20, 15, 15, 15, 15, 20]
-                for i, width in enumerate(column_widths, 1):
-                    ws.column_dimensions[chr(64 + i)].width = width
-                
-                response = HttpResponse(
-                    content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
-                )
-                response['Content-Disposition'] = 'attachment; filename="customers.xlsx"'
-                wb.save(response)
-                return response
-                
-            except ImportError:
-                # 如果没有openpyxl，返回CSV格式
-                messages.warning(request, 'Excel导出功能需要安装openpyxl库，已改为CSV格式导出')
-                return customer_export(request)
-        
-        else:
-            messages.error(request, '不支持的导出格式')
-            return redirect('business_pages:customer_list')
-            
+        job = create_export_job(
+            request.user, EXPORT_TYPE, export_format,
+            export_params_from_request(request.GET), run_customer_export,
+        )
     except Exception as e:
-        import logging
         logger = logging.getLogger(__name__)
-        logger.exception('导出客户数据失败: %s', str(e))
+        logger.exception('创建客户导出任务失败: %s', str(e))
+        if is_ajax:
+            return JsonResponse({'success': False, 'message': f'导出失败：{str(e)}'}, status=500)
         messages.error(request, f'导出失败：{str(e)}')
         return redirect('business_pages:customer_list')
+    
+    status_url = reverse('system_pages:export_job_status', args=[job.pk])
+    if is_ajax:
+        return JsonResponse({'success': True, 'job_id': job.pk, 'status_url': status_url})
+    
+    job.refresh_from_db()
+    if job.status == 'succeeded':
+        return redirect('system_pages:export_job_download', job_id=job.pk)
+    if job.status == 'failed':
+        messages.error(request, f'导出失败：{job.error_message}')
+        return redirect('business_pages:customer_list')
+    messages.info(request, f'导出任务已提交（编号 {job.pk}），完成后将自动下载')
+    return redirect(f"{reverse('business_pages:customer_list')}?export_job={job.pk}")
 
 
 @login_required
@@ -3384,194 +3256,41 @@ def contact_relationship_mining(request):
 
 
 def _mine_contact_relationships(target_contact):
-    """挖掘单个联系人的关系网络"""
-    from django.db.models import Q
+    """挖掘单个联系人的关系网络（按关系索引等值查找）"""
+    from backend.apps.customer_management.services.contact_relations import related_contacts
     
-    same_education_contacts = []
-    same_birthplace_contacts = []
-    same_career_contacts = []
-    
-    # 1. 查找相同教育背景的人员
-    target_schools = set()
-    target_school_names = set()
-    
-    for education in target_contact.educations.all():
-        if education.school:
-            target_schools.add(education.school.id)
-        if education.school_name:
-            target_school_names.add(education.school_name.strip())
-    
-    if target_schools or target_school_names:
-        same_education_query = Q()
-        if target_schools:
-            same_education_query |= Q(educations__school_id__in=target_schools)
-        if target_school_names:
-            for school_name in target_school_names:
-                same_education_query |= Q(educations__school_name__icontains=school_name)
-        
-        same_education_contacts = ClientContact.objects.filter(
-            same_education_query
-        ).exclude(id=target_contact.id).distinct().select_related('client', 'created_by')[:50]
-    
-    # 2. 查找相同籍贯的人员
-    if target_contact.birthplace:
-        birthplace_keywords = target_contact.birthplace.split()
-        if birthplace_keywords:
-            birthplace_query = Q()
-            for keyword in birthplace_keywords:
-                if len(keyword) > 1:
-                    birthplace_query |= Q(birthplace__icontains=keyword)
-            
-            same_birthplace_contacts = ClientContact.objects.filter(
-                birthplace_query
-            ).exclude(id=target_contact.id).exclude(birthplace='').distinct().select_related('client', 'created_by')[:50]
-    
-    # 3. 查找相同职业信息的人员
-    target_companies = set()
-    target_departments = set()
-    target_positions = set()
-    
-    for career in target_contact.careers.all():
-        if career.company:
-            target_companies.add(career.company.strip())
-        if career.department:
-            target_departments.add(career.department.strip())
-        if career.position:
-            target_positions.add(career.position.strip())
-    
-    if target_companies or target_departments or target_positions:
-        career_query = Q()
-        if target_companies:
-            for company in target_companies:
-                if len(company) > 1:
-                    career_query |= Q(careers__company__icontains=company)
-        if target_departments:
-            for dept in target_departments:
-                if len(dept) > 1:
-                    career_query |= Q(careers__department__icontains=dept)
-        if target_positions:
-            for pos in target_positions:
-                if len(pos) > 1:
-                    career_query |= Q(careers__position__icontains=pos)
-        
-        same_career_contacts = ClientContact.objects.filter(
-            career_query
-        ).exclude(id=target_contact.id).distinct().select_related('client', 'created_by')[:50]
-    
-    return same_education_contacts, same_birthplace_contacts, same_career_contacts
+    related = related_contacts([target_contact.id], limit=50)
+    return related['education'], related['birthplace'], related['career']
 
 
 def _mine_client_company_relationships(target_client, client_contacts):
     """挖掘客户公司内所有联系人的关系网络"""
     from django.db.models import Q
-    from collections import defaultdict
-    
-    # 收集所有联系人的关系数据
-    all_schools = set()
-    all_school_names = set()
-    all_birthplaces = set()
-    all_companies = set()
-    all_departments = set()
-    all_positions = set()
+    from backend.apps.customer_management.services.contact_relations import related_contacts as find_related
     
     contact_ids = [c.id for c in client_contacts]
     
-    # 收集教育背景
-    educations = ContactEducation.objects.filter(contact_id__in=contact_ids)
-    for edu in educations:
-        if edu.school:
-            all_schools.add(edu.school.id)
-        if edu.school_name:
-            all_school_names.add(edu.school_name.strip())
-    
-    # 收集籍贯
-    for contact in client_contacts:
-        if contact.birthplace:
-            all_birthplaces.add(contact.birthplace.strip())
-    
-    # 收集职业信息
-    careers = ContactCareer.objects.filter(contact_id__in=contact_ids)
-    for career in careers:
-        if career.company:
-            all_companies.add(career.company.strip())
-        if career.department:
-            all_departments.add(career.department.strip())
-        if career.position:
-            all_positions.add(career.position.strip())
-    
-    # 查找与客户公司内人员有关系的其他联系人
+    # 1～3. 相同教育背景、籍贯、职业信息（公司或同公司部门），按关系索引查找
     related_contacts = []
-    
-    # 1. 相同教育背景
-    if all_schools or all_school_names:
-        education_query = Q()
-        if all_schools:
-            education_query |= Q(educations__school_id__in=all_schools)
-        if all_school_names:
-            for school_name in all_school_names:
-                if len(school_name) > 1:
-                    education_query |= Q(educations__school_name__icontains=school_name)
-        
-        education_contacts = ClientContact.objects.filter(
-            education_query
-        ).exclude(id__in=contact_ids).distinct().select_related('client', 'created_by')[:100]
-        
-        for contact in education_contacts:
+    seen_ids = set()
+    relation_descs = (
+        ('education', '相同教育背景'),
+        ('birthplace', '相同籍贯'),
+        ('career', '相同职业信息'),
+    )
+    related = find_related(contact_ids, limit=100)
+    for relation_type, relation_desc in relation_descs:
+        for contact in related[relation_type]:
+            # 避免重复
+            if contact.id in seen_ids:
+                continue
+            seen_ids.add(contact.id)
             related_contacts.append({
                 'contact': contact,
-                'relation_type': 'education',
-                'relation_desc': '相同教育背景'
+                'relation_type': relation_type,
+                'relation_desc': relation_desc
             })
     
-    # 2. 相同籍贯
-    if all_birthplaces:
-        birthplace_query = Q()
-        for birthplace in all_birthplaces:
-            if len(birthplace) > 1:
-                birthplace_query |= Q(birthplace__icontains=birthplace)
-        
-        birthplace_contacts = ClientContact.objects.filter(
-            birthplace_query
-        ).exclude(id__in=contact_ids).exclude(birthplace='').distinct().select_related('client', 'created_by')[:100]
-        
-        for contact in birthplace_contacts:
-            # 检查是否已添加（避免重复）
-            if not any(c['contact'].id == contact.id for c in related_contacts):
-                related_contacts.append({
-                    'contact': contact,
-                    'relation_type': 'birthplace',
-                    'relation_desc': '相同籍贯'
-                })
-    
-    # 3. 相同职业信息（同一公司、部门或职位）
-    if all_companies or all_departments or all_positions:
-        career_query = Q()
-        if all_companies:
-            for company in all_companies:
-                if len(company) > 1:
-                    career_query |= Q(careers__company__icontains=company)
-        if all_departments:
-            for dept in all_departments:
-                if len(dept) > 1:
-                    career_query |= Q(careers__department__icontains=dept)
-        if all_positions:
-            for pos in all_positions:
-                if len(pos) > 1:
-                    career_query |= Q(careers__position__icontains=pos)
-        
-        career_contacts = ClientContact.objects.filter(
-            career_query
-        ).exclude(id__in=contact_ids).distinct().select_related('client', 'created_by')[:100]
-        
-        for contact in career_contacts:
-            # 检查是否已添加（避免重复）
-            if not any(c['contact'].id == contact.id for c in related_contacts):
-                related_contacts.append({
-                    'contact': contact,
-                    'relation_type': 'career',
-                    'relation_desc': '相同职业信息'
-                })
-    
     # 4. 同事关系（通过ContactColleague）
     colleague_careers = ContactCareer.objects.filter(contact_id__in=contact_ids)
     colleague_contact_ids = set()
@@ -3593,7 +3312,8 @@ def _mine_client_company_relationships(target_client, client_contacts):
         ).select_related('client', 'created_by')[:50]
         
         for contact in colleague_contacts:
-            if not any(c['contact'].id == contact.id for c in related_contacts):
+            if contact.id not in seen_ids:
+                seen_ids.add(contact.id)
                 related_contacts.append({
                     'contact': contact,
                     'relation_type': 'colleague',
@@ -4671,7 +4391,6 @@ def contract_management_list(request):
     - 支持分页显示
     """
     import logging
-    from django.core.paginator import Paginator
     
     logger = logging.getLogger(__name__)
     
@@ -4702,9 +4421,7 @@ def contract_management_list(request):
         contracts = _apply_contract_filters(contracts, filters)
         
         # 分页
-        paginator = Paginator(contracts, 20)
-        page_number = request.GET.get('page', 1)
-        page_obj = paginator.get_page(page_number)
+        page_obj = paginate_queryset(request, contracts, 20)
     except Exception as e:
         logger.exception('获取合同列表失败: %s', str(e))
         messages.error(request, f'获取合同列表失败：{str(e)}')
@@ -6754,7 +6471,6 @@ def _calc_ratio(value, base):
 @login_required
 def opportunity_management(request):
     """商机管理列表页面（根据商机管理专项设计方案）"""
-    from django.core.paginator import Paginator
     from datetime import datetime
     
     # 获取筛选参数
@@ -6777,8 +6493,7 @@ def opportunity_management(request):
         ).prefetch_related('followups').order_by('-created_time')
         
         # 权限过滤：普通商务经理只能看自己负责的商机
-        if not _permission_granted('customer_management.opportunity.view_all', permission_set):
-            opportunities = opportunities.filter(business_manager=request.user)
+        opportunities = filter_opportunities_by_scope(opportunities, request.user, permission_set)
         
         # 标签页过滤
         if tab == 'my':
@@ -6816,9 +6531,7 @@ def opportunity_management(request):
                 per_page = 10
         except (ValueError, TypeError):
             per_page = 10
-        paginator = Paginator(opportunities, per_page)
-        page_number = request.GET.get('page', 1)
-        page_obj = paginator.get_page(page_number)
+        page_obj = paginate_queryset(request, opportunities, per_page)
     except Exception as e:
         import logging
         logger = logging.getLogger(__name__)
@@ -6830,8 +6543,7 @@ def opportunity_management(request):
     try:
         # 基础查询集（考虑权限）
         base_queryset = BusinessOpportunity.objects.all()
-        if not _permission_granted('customer_management.opportunity.view_all', permission_set):
-            base_queryset = base_queryset.filter(business_manager=request.user)
+        base_queryset = filter_opportunities_by_scope(base_queryset, request.user, permission_set)
         
         total_opportunities = base_queryset.count()
         
@@ -7073,7 +6785,7 @@ def opportunity_create(request):
     # GET请求，显示表单
     try:
         from backend.apps.production_management.models import ServiceType, Project
-        from django.db.models import Max
+        from backend.core.sequence import number_prefix, peek_document_sequence
         from datetime import datetime
         
         clients = Client.objects.filter(is_active=True).order_by('name')
@@ -7082,20 +6794,8 @@ def opportunity_create(request):
         
         # 生成商机编号预览
         current_date = datetime.now().strftime('%Y%m%d')
-        date_prefix = f'SJ-{current_date}-'
-        max_opp = BusinessOpportunity.objects.filter(
-            opportunity_number__startswith=date_prefix
-        ).aggregate(max_num=Max('opportunity_number'))['max_num']
-        
-        if max_opp:
-            try:
-                seq = int(max_opp.split('-')[-1]) + 1
-            except (ValueError, IndexError):
-                seq = 1
-        else:
-            seq = 1
-        
-        preview_opportunity_number = f'{date_prefix}{seq:04d}'
+        seq = peek_document_sequence(BusinessOpportunity.objects, 'opportunity_number', 'SJ', period=current_date)
+        preview_opportunity_number = f"{number_prefix('SJ', current_date)}{seq:04d}"
         
         context = _context(
             "创建商机",
@@ -7528,8 +7228,7 @@ def opportunity_evaluation_application(request):
     
     # 获取商机列表（用于表单下拉框）
     opportunities = BusinessOpportunity.objects.select_related('client', 'business_manager').order_by('-created_time')
-    if not _permission_granted('customer_management.opportunity.view_all', permission_set):
-        opportunities = opportunities.filter(business_manager=request.user)
+    opportunities = filter_opportunities_by_scope(opportunities, request.user, permission_set)
     
     if request.method == 'POST':
         # TODO: 处理表单提交
@@ -7562,8 +7261,7 @@ def opportunity_warehouse_application(request):
     
     # 获取商机列表（用于表单下拉框）
     opportunities = BusinessOpportunity.objects.select_related('client', 'business_manager').order_by('-created_time')
-    if not _permission_granted('customer_management.opportunity.view_all', permission_set):
-        opportunities = opportunities.filter(business_manager=request.user)
+    opportunities = filter_opportunities_by_scope(opportunities, request.user, permission_set)
     opportunities = _get_opportunities_safely(opportunities, permission_set, request.user)
     
     if request.method == 'POST':
@@ -7638,8 +7336,7 @@ def opportunity_warehouse_list(request):
     
     # 获取商机列表（用于筛选）
     opportunities = BusinessOpportunity.objects.select_related('client', 'business_manager').order_by('-created_time')
-    if not _permission_granted('customer_management.opportunity.view_all', permission_set):
-        opportunities = opportunities.filter(business_manager=request.user)
+    opportunities = filter_opportunities_by_scope(opportunities, request.user, permission_set)
     opportunities = _get_opportunities_safely(opportunities, permission_set, request.user)
     
     # 检查创建权限
@@ -7681,8 +7378,7 @@ def opportunity_bid_bond_payment(request):
     
     # 获取商机列表（用于表单下拉框）
     opportunities = BusinessOpportunity.objects.select_related('client', 'business_manager').order_by('-created_time')
-    if not _permission_granted('customer_management.opportunity.view_all', permission_set):
-        opportunities = opportunities.filter(business_manager=request.user)
+    opportunities = filter_opportunities_by_scope(opportunities, request.user, permission_set)
     opportunities = _get_opportunities_safely(opportunities, permission_set, request.user)
     
     if request.method == 'POST':
@@ -7716,8 +7412,7 @@ def opportunity_tender_fee_payment(request):
     
     # 获取商机列表（用于表单下拉框）
     opportunities = BusinessOpportunity.objects.select_related('client', 'business_manager').order_by('-created_time')
-    if not _permission_granted('customer_management.opportunity.view_all', permission_set):
-        opportunities = opportunities.filter(business_manager=request.user)
+    opportunities = filter_opportunities_by_scope(opportunities, request.user, permission_set)
     opportunities = _get_opportunities_safely(opportunities, permission_set, request.user)
     
     if request.method == 'POST':
@@ -7751,8 +7446,7 @@ def opportunity_agency_fee_payment(request):
     
     # 获取商机列表（用于表单下拉框）
     opportunities = BusinessOpportunity.objects.select_related('client', 'business_manager').order_by('-created_time')
-    if not _permission_granted('customer_management.opportunity.view_all', permission_set):
-        opportunities = opportunities.filter(business_manager=request.user)
+    opportunities = filter_opportunities_by_scope(opportunities, request.user, permission_set)
     opportunities = _get_opportunities_safely(opportunities, permission_set, request.user)
     
     if request.method == 'POST':
@@ -7788,8 +7482,7 @@ def opportunity_drawing_evaluation(request):
     
     # 获取商机列表（用于表单下拉框）
     opportunities = BusinessOpportunity.objects.select_related('client', 'business_manager').order_by('-created_time')
-    if not _permission_granted('customer_management.opportunity.view_all', permission_set):
-        opportunities = opportunities.filter(business_manager=request.user)
+    opportunities = filter_opportunities_by_scope(opportunities, request.user, permission_set)
     
     # 获取所有服务专业（用于成本节省评估）
     service_professions = ServiceProfession.objects.select_related('service_type').order_by('service_type__order', 'order', 'name')
@@ -7911,8 +7604,7 @@ def opportunity_bidding_quotation(request):
     # 获取商机列表（用于筛选下拉框）
     try:
         opportunities = BusinessOpportunity.objects.select_related('client', 'business_manager').order_by('-created_time')
-        if not _permission_granted('customer_management.opportunity.view_all', permission_set):
-            opportunities = opportunities.filter(business_manager=request.user)
+        opportunities = filter_opportunities_by_scope(opportunities, request.user, permission_set)
         opportunities = opportunities[:100]  # 限制显示数量
     except Exception as e:
         opportunities = []
@@ -7950,8 +7642,7 @@ def opportunity_bidding_quotation_application(request):
     
     # 获取商机列表（用于表单下拉框）
     opportunities = BusinessOpportunity.objects.select_related('client', 'business_manager').order_by('-created_time')
-    if not _permission_granted('customer_management.opportunity.view_all', permission_set):
-        opportunities = opportunities.filter(business_manager=request.user)
+    opportunities = filter_opportunities_by_scope(opportunities, request.user, permission_set)
     opportunities = _get_opportunities_safely(opportunities, permission_set, request.user)
     
     if request.method == 'POST':
@@ -7985,8 +7676,7 @@ def opportunity_bidding_document_preparation(request):
     
     # 获取商机列表（用于表单下拉框）
     opportunities = BusinessOpportunity.objects.select_related('client', 'business_manager').order_by('-created_time')
-    if not _permission_granted('customer_management.opportunity.view_all', permission_set):
-        opportunities = opportunities.filter(business_manager=request.user)
+    opportunities = filter_opportunities_by_scope(opportunities, request.user, permission_set)
     opportunities = _get_opportunities_safely(opportunities, permission_set, request.user)
     
     if request.method == 'POST':
@@ -8020,8 +7710,7 @@ def opportunity_bidding_document_submission(request):
     
     # 获取商机列表（用于表单下拉框）
     opportunities = BusinessOpportunity.objects.select_related('client', 'business_manager').order_by('-created_time')
-    if not _permission_granted('customer_management.opportunity.view_all', permission_set):
-        opportunities = opportunities.filter(business_manager=request.user)
+    opportunities = filter_opportunities_by_scope(opportunities, request.user, permission_set)
     opportunities = _get_opportunities_safely(opportunities, permission_set, request.user)
     
     if request.method == 'POST':
@@ -8093,8 +7782,7 @@ def bidding_quotation_create(request):
     opportunities = BusinessOpportunity.objects.select_related('client', 'business_manager').order_by('-created_time')
     
     # 权限过滤
-    if not _permission_granted('customer_management.opportunity.view_all', permission_set):
-        opportunities = opportunities.filter(business_manager=request.user)
+    opportunities = filter_opportunities_by_scope(opportunities, request.user, permission_set)
     
     context = _context(
         "创建投标报价",
@@ -8246,8 +7934,7 @@ def bidding_quotation_edit(request, bidding_id):
         # GET请求，显示编辑表单
         # 获取可用的商机列表
         opportunities = BusinessOpportunity.objects.select_related('client', 'business_manager').order_by('-created_time')
-        if not _permission_granted('customer_management.opportunity.view_all', permission_set):
-            opportunities = opportunities.filter(business_manager=request.user)
+        opportunities = filter_opportunities_by_scope(opportunities, request.user, permission_set)
         
         # 获取已完成项目（类似业绩）
         from backend.apps.production_management.models import Project
@@ -8297,8 +7984,7 @@ def opportunity_tech_meeting(request):
     
     # 获取商机列表（用于表单下拉框）
     opportunities = BusinessOpportunity.objects.select_related('client', 'business_manager').order_by('-created_time')
-    if not _permission_granted('customer_management.opportunity.view_all', permission_set):
-        opportunities = opportunities.filter(business_manager=request.user)
+    opportunities = filter_opportunities_by_scope(opportunities, request.user, permission_set)
     
     if request.method == 'POST':
         # TODO: 处理表单提交
@@ -8424,8 +8110,7 @@ def opportunity_sales_forecast(request):
     )
     
     # 权限过滤
-    if not _permission_granted('customer_management.opportunity.view_all', permission_set):
-        active_opportunities = active_opportunities.filter(business_manager=request.user)
+    active_opportunities = filter_opportunities_by_scope(active_opportunities, request.user, permission_set)
     
     # 计算本月预计签约的商机
     month_opportunities = active_opportunities.filter(
@@ -8446,8 +8131,7 @@ def opportunity_sales_forecast(request):
     historical_queryset = BusinessOpportunity.objects.filter(
         status__in=['initial_contact', 'requirement_confirmed', 'quotation', 'negotiation', 'won']
     )
-    if not _permission_granted('customer_management.opportunity.view_all', permission_set):
-        historical_queryset = historical_queryset.filter(business_manager=request.user)
+    historical_queryset = filter_opportunities_by_scope(historical_queryset, request.user, permission_set)
     
     historical_initial = historical_queryset.count()
     historical_won = historical_queryset.filter(status='won').count()
@@ -8535,8 +8219,7 @@ def opportunity_win_loss(request):
         ).filter(status__in=['won', 'lost']).order_by('-updated_time')
         
         # 权限过滤：普通商务经理只能看自己负责的商机
-        if not _permission_granted('customer_management.opportunity.view_all', permission_set):
-            opportunities = opportunities.filter(business_manager=request.user)
+        opportunities = filter_opportunities_by_scope(opportunities, request.user, permission_set)
         
         # 应用筛选条件
         if search:
@@ -8579,8 +8262,7 @@ def opportunity_win_loss(request):
     try:
         # 基础查询集（考虑权限）
         base_queryset = BusinessOpportunity.objects.filter(status__in=['won', 'lost'])
-        if not _permission_granted('customer_management.opportunity.view_all', permission_set):
-            base_queryset = base_queryset.filter(business_manager=request.user)
+        base_queryset = filter_opportunities_by_scope(base_queryset, request.user, permission_set)
         
         total_count = base_queryset.count()
         won_count = base_queryset.filter(status='won').count()
@@ -8688,8 +8370,7 @@ def opportunity_win_loss_select(request):
         ).order_by('-updated_time')
         
         # 权限过滤：普通商务经理只能看自己负责的商机
-        if not _permission_granted('customer_management.opportunity.view_all', permission_set):
-            opportunities = opportunities.filter(business_manager=request.user)
+        opportunities = filter_opportunities_by_scope(opportunities, request.user, permission_set)
         
         # 应用筛选条件
         if search:
@@ -8926,8 +8607,7 @@ def opportunity_business_negotiation(request):
         ).order_by('-created_time')
         
         # 权限过滤
-        if not _permission_granted('customer_management.opportunity.view_all', permission_set):
-            opportunities_for_filter = opportunities_for_filter.filter(business_manager=request.user)
+        opportunities_for_filter = filter_opportunities_by_scope(opportunities_for_filter, request.user, permission_set)
         
         opportunities_for_filter = opportunities_for_filter[:100]  # 限制数量
     except Exception as e:
@@ -10407,10 +10087,8 @@ def authorization_letter_template_file_download(request, template_id):
 
 @login_required
 def opportunity_import(request):
-    """商机批量导入功能"""
+    """商机批量导入功能（分块批量写入，大文件转入后台任务）"""
     from django.http import HttpResponse
-    from django.db import transaction
-    from backend.apps.system_management.models import User
     
     permission_set = get_user_permission_codes(request.user)
     
@@ -10489,292 +10167,38 @@ def opportunity_import(request):
     }
     
     if request.method == 'POST':
+        from backend.apps.customer_management.services.opportunity_import import OpportunityImporter
+        from backend.utils.import_utils import ImportFileError, add_import_messages, error_report_url, start_import
+        
         upload = request.FILES.get('import_file')
         if not upload:
             messages.error(request, '请上传 CSV 或 Excel 文件。')
+        elif upload.size > 10 * 1024 * 1024:  # 10MB
+            messages.error(request, '文件过大，请控制在 10MB 以内。')
         else:
-            filename = upload.name.lower()
-            is_excel = filename.endswith(('.xlsx', '.xls'))
-            is_csv = filename.endswith('.csv')
-            
-            if not (is_csv or is_excel):
-                messages.error(request, '仅支持 CSV 或 Excel 文件（.csv, .xlsx, .xls）。')
-            elif upload.size > 10 * 1024 * 1024:  # 10MB
-                messages.error(request, '文件过大，请控制在 10MB 以内。')
+            try:
+                job = start_import(request.user, OpportunityImporter, upload)
+            except ImportFileError as e:
+                messages.error(request, str(e))
             else:
-                try:
-                    upload.seek(0)
-                except Exception:
-                    pass
-                
-                # 处理Excel文件
-                if is_excel:
-                    try:
-                        import pandas as pd
-                        # 尝试读取Excel文件
-                        df = pd.read_excel(upload, engine='openpyxl' if filename.endswith('.xlsx') else None)
-                        # 转换为CSV格式的字符串
-                        csv_buffer = io.StringIO()
-                        df.to_csv(csv_buffer, index=False, encoding='utf-8')
-                        decoded_text = csv_buffer.getvalue()
-                    except ImportError:
-                        messages.error(request, '系统未安装 pandas 库，无法处理 Excel 文件。请使用 CSV 格式。')
-                        decoded_text = None
-                    except Exception as e:
-                        messages.error(request, f'Excel 文件解析失败：{str(e)}')
-                        decoded_text = None
-                else:
-                    # 处理CSV文件
-                    raw_bytes = upload.read()
-                    decoded_text = None
-                    for enc in ('utf-8-sig', 'utf-8', 'gbk', 'gb2312'):
-                        try:
-                            decoded_text = raw_bytes.decode(enc)
-                            break
-                        except UnicodeDecodeError:
-                            continue
-                
-                if decoded_text is None:
-                    messages.error(request, '文件解析失败，请确认编码为 UTF-8 或 GBK（CSV），或使用标准 Excel 格式。')
-                else:
-                    text_io = io.StringIO(decoded_text)
-                    reader = csv.DictReader(text_io)
-                    
-                    field_aliases = {
-                        'opportunity_number': {'商机编号（可留空自动生成）', '商机编号', 'opportunity_number'},
-                        'name': {'商机名称', 'name'},
-                        'client_name': {'客户名称（必填）', '客户名称', 'client_name'},
-                        'business_manager_phone': {'负责商务手机号（必填）', '负责商务手机号', '商务经理手机号', 'business_manager_phone'},
-                        'opportunity_type': {'商机类型', 'opportunity_type'},
-                        'service_type': {'服务类型（可填编码或名称）', '服务类型', 'service_type'},
-                        'project_name': {'项目名称', 'project_name'},
-                        'project_address': {'项目地址', 'project_address'},
-                        'project_type': {'项目业态', 'project_type'},
-                        'building_area': {'建筑面积（平方米）', '建筑面积', 'building_area'},
-                        'drawing_stage': {'图纸阶段（可填编码或名称）', '图纸阶段', 'drawing_stage'},
-                        'estimated_amount': {'预计金额（万元）', '预计金额', 'estimated_amount'},
-                        'success_probability': {'成功概率（%）', '成功概率', 'success_probability'},
-                        'status': {'商机状态', 'status'},
-                        'urgency': {'紧急程度', 'urgency'},
-                        'expected_sign_date': {'预计签约时间（YYYY-MM-DD）', '预计签约时间', 'expected_sign_date'},
-                        'description': {'商机描述', 'description'},
-                        'notes': {'备注', 'notes'},
-                    }
-                    
-                    required_fields = {
-                        'name',
-                        'client_name',
-                        'business_manager_phone',
+                if job.status == 'succeeded':
+                    # 结果列表只列出失败的行（前 100 行），完整错误见错误报告
+                    context['import_results'] = {
+                        'total': job.total_count,
+                        'success': job.success_count,
+                        'failed': job.failed_count,
+                        'rows': [
+                            {'row': error['row'], 'status': 'failed', 'message': error['message']}
+                            for error in job.errors
+                        ],
+                        'error_report_url': error_report_url(job),
                     }
-                    
-                    missing_labels = []
-                    headers = set(reader.fieldnames or [])
-                    for field in required_fields:
-                        if not any(alias in headers for alias in field_aliases[field]):
-                            missing_labels.append(next(iter(field_aliases[field])))
-                    
-                    if missing_labels:
-                        messages.error(request, f'CSV 缺少必要字段：{", ".join(missing_labels)}。')
-                    else:
-                        def get_value(row, field):
-                            for alias in field_aliases[field]:
-                                if alias in row and row[alias] is not None:
-                                    value = str(row.get(alias, '')).strip()
-                                    if value:
-                                        return value
-                            return ''
-                        
-                        # 构建查找映射
-                        service_type_lookup = {st.code: st for st in ServiceType.objects.all()}
-                        service_type_name_lookup = {(st.name or '').strip(): st for st in ServiceType.objects.all()}
-                        
-                        design_stage_objects = DesignStage.objects.filter(is_active=True)
-                        design_stage_id_map = {str(ds.id): ds for ds in design_stage_objects}
-                        design_stage_code_map = {ds.code: ds for ds in design_stage_objects if ds.code}
-                        design_stage_name_map = {ds.name: ds for ds in design_stage_objects}
-                        
-                        status_codes = {code for code, _ in BusinessOpportunity.STATUS_CHOICES}
-                        status_label_map = {(label or '').strip(): code for code, label in BusinessOpportunity.STATUS_CHOICES}
-                        
-                        urgency_codes = {code for code, _ in BusinessOpportunity.URGENCY_CHOICES}
-                        urgency_label_map = {(label or '').strip(): code for code, label in BusinessOpportunity.URGENCY_CHOICES}
-                        
-                        opportunity_type_codes = {code for code, _ in BusinessOpportunity.OPPORTUNITY_TYPE_CHOICES}
-                        opportunity_type_label_map = {(label or '').strip(): code for code, label in BusinessOpportunity.OPPORTUNITY_TYPE_CHOICES}
-                        
-                        results = []
-                        success_count = 0
-                        failure_count = 0
-                        
-                        for row_index, row in enumerate(reader, start=2):
-                            row_result = {'row': row_index, 'status': 'success', 'message': ''}
-                            try:
-                                with transaction.atomic():
-                                    # 必填字段验证
-                                    opportunity_name = get_value(row, 'name')
-                                    if not opportunity_name:
-                                        raise ValueError('商机名称不能为空')
-                                    
-                                    client_name = get_value(row, 'client_name')
-                                    if not client_name:
-                                        raise ValueError('客户名称不能为空')
-                                    
-                                    # 查找或创建客户
-                                    client = Client.objects.filter(name=client_name).first()
-                                    if not client:
-                                        # 如果客户不存在，尝试创建（需要客户类型）
-                                        client_type = ClientType.objects.first()
-                                        if not client_type:
-                                            raise ValueError(f'客户"{client_name}"不存在，且系统未配置客户类型，无法自动创建')
-                                        client = Client.objects.create(
-                                            name=client_name,
-                                            client_type=client_type,
-                                            created_by=request.user,
-                                        )
-                                    
-                                    business_manager_phone = get_value(row, 'business_manager_phone')
-                                    if not business_manager_phone:
-                                        raise ValueError('负责商务手机号不能为空')
-                                    business_manager = User.objects.filter(username=business_manager_phone).first()
-                                    if not business_manager:
-                                        raise ValueError(f'未找到对应的商务经理手机号：{business_manager_phone}')
-                                    
-                                    # 可选字段处理
-                                    opportunity_number = get_value(row, 'opportunity_number')
-                                    if opportunity_number and BusinessOpportunity.objects.filter(opportunity_number=opportunity_number).exists():
-                                        raise ValueError(f'商机编号重复：{opportunity_number}')
-                                    
-                                    opportunity_type_raw = get_value(row, 'opportunity_type')
-                                    opportunity_type = None
-                                    if opportunity_type_raw:
-                                        if opportunity_type_raw in opportunity_type_codes:
-                                            opportunity_type = opportunity_type_raw
-                                        else:
-                                            opportunity_type = opportunity_type_label_map.get(opportunity_type_raw)
-                                        if not opportunity_type:
-                                            raise ValueError(f'商机类型取值无效：{opportunity_type_raw}')
-                                    
-                                    service_type_key = get_value(row, 'service_type')
-                                    service_type = None
-                                    if service_type_key:
-                                        service_type = service_type_lookup.get(service_type_key)
-                                        if not service_type:
-                                            service_type = service_type_name_lookup.get(service_type_key)
-                                        if not service_type:
-                                            raise ValueError(f'服务类型取值无效：{service_type_key}')
-                                    
-                                    project_name = get_value(row, 'project_name') or None
-                                    project_address = get_value(row, 'project_address') or None
-                                    project_type = get_value(row, 'project_type') or None
-                                    
-                                    building_area_str = get_value(row, 'building_area')
-                                    building_area = None
-                                    if building_area_str:
-                                        try:
-                                            building_area = Decimal(building_area_str)
-                                        except (ValueError, InvalidOperation):
-                                            raise ValueError(f'建筑面积格式无效：{building_area_str}')
-                                    
-                                    drawing_stage_raw = get_value(row, 'drawing_stage')
-                                    drawing_stage = None
-                                    if drawing_stage_raw:
-                                        if drawing_stage_raw in design_stage_id_map:
-                                            drawing_stage = design_stage_id_map[drawing_stage_raw]
-                                        elif drawing_stage_raw in design_stage_code_map:
-                                            drawing_stage = design_stage_code_map[drawing_stage_raw]
-                                        elif drawing_stage_raw in design_stage_name_map:
-                                            drawing_stage = design_stage_name_map[drawing_stage_raw]
-                                        if not drawing_stage:
-                                            raise ValueError(f'图纸阶段取值无效：{drawing_stage_raw}')
-                                    
-                                    estimated_amount_str = get_value(row, 'estimated_amount')
-                                    estimated_amount = Decimal('0')
-                                    if estimated_amount_str:
-                                        try:
-                                            estimated_amount = Decimal(estimated_amount_str)
-                                        except (ValueError, InvalidOperation):
-                                            raise ValueError(f'预计金额格式无效：{estimated_amount_str}')
-                                    
-                                    success_probability_str = get_value(row, 'success_probability')
-                                    success_probability = 10  # 默认值
-                                    if success_probability_str:
-                                        try:
-                                            success_probability = int(success_probability_str)
-                                            if success_probability not in [10, 30, 50, 70, 90]:
-                                                raise ValueError(f'成功概率必须是 10、30、50、70 或 90，当前值：{success_probability}')
-                                        except ValueError as e:
-                                            if '必须是' in str(e):
-                                                raise
-                                            raise ValueError(f'成功概率格式无效：{success_probability_str}')
-                                    
-                                    status_raw = get_value(row, 'status') or 'potential'
-                                    status = status_raw
-                                    if status not in status_codes:
-                                        status = status_label_map.get(status_raw)
-                                    if not status or status not in status_codes:
-                                        raise ValueError(f'商机状态取值无效：{status_raw}')
-                                    
-                                    urgency_raw = get_value(row, 'urgency') or 'normal'
-                                    urgency = urgency_raw
-                                    if urgency not in urgency_codes:
-                                        urgency = urgency_label_map.get(urgency_raw)
-                                    if not urgency or urgency not in urgency_codes:
-                                        raise ValueError(f'紧急程度取值无效：{urgency_raw}')
-                                    
-                                    expected_sign_date_str = get_value(row, 'expected_sign_date')
-                                    expected_sign_date = None
-                                    if expected_sign_date_str:
-                                        try:
-                                            from datetime import datetime
-                                            expected_sign_date = datetime.strptime(expected_sign_date_str, '%Y-%m-%d').date()
-                                        except ValueError:
-                                            raise ValueError(f'预计签约时间格式无效，应为 YYYY-MM-DD：{expected_sign_date_str}')
-                                    
-                                    description = get_value(row, 'description') or ''
-                                    notes = get_value(row, 'notes') or ''
-                                    
-                                    # 创建商机
-                                    opportunity = BusinessOpportunity(
-                                        opportunity_number=opportunity_number or None,
-                                        name=opportunity_name,
-                                        client=client,
-                                        business_manager=business_manager,
-                                        opportunity_type=opportunity_type or '',
-                                        service_type=service_type,
-                                        project_name=project_name or '',
-                                        project_address=project_address or '',
-                                        project_type=project_type or '',
-                                        building_area=building_area,
-                                        drawing_stage=drawing_stage,
-                                        estimated_amount=estimated_amount,
-                                        success_probability=success_probability,
-                                        status=status,
-                                        urgency=urgency,
-                                        expected_sign_date=expected_sign_date,
-                                        description=description,
-                                        notes=notes,
-                                        created_by=request.user,
-                                    )
-                                    opportunity.save()
-                                    
-                                    success_count += 1
-                                    row_result['message'] = f'导入成功，商机编号：{opportunity.opportunity_number}'
-                            except Exception as exc:
-                                failure_count += 1
-                                row_result['status'] = 'failed'
-                                row_result['message'] = str(exc)
-                            results.append(row_result)
-                        
-                        context['import_results'] = {
-                            'total': success_count + failure_count,
-                            'success': success_count,
-                            'failed': failure_count,
-                            'rows': results,
-                        }
-                        if success_count:
-                            messages.success(request, f'成功导入 {success_count} 条商机。')
-                        if failure_count:
-                            messages.warning(request, f'{failure_count} 条记录导入失败，请查看结果列表。')
+                    if job.success_count:
+                        messages.success(request, f'成功导入 {job.success_count} 条商机。')
+                    if job.failed_count:
+                        messages.warning(request, f'{job.failed_count} 条记录导入失败，请查看结果列表。')
+                else:
+                    add_import_messages(request, job, '条商机')
     
     # 生成左侧菜单
     menu = _build_opportunity_management_menu(permission_set, 'opportunity_import')
@@ -219,30 +219,9 @@ class DeliveryRecord(models.Model):
     
     def generate_delivery_number(self):
         """生成交付单号：VIH-JF-{YYYYMMDD}-{序列号}"""
-        from django.db import transaction
-        from django.db.models import Max
-        
-        prefix = 'VIH-JF'
+        from backend.core.sequence import next_document_number
         date_str = timezone.now().strftime('%Y%m%d')
-        pattern = f"{prefix}-{date_str}-"
-        
-        # 使用事务和锁确保线程安全
-        with transaction.atomic():
-            # 获取当天最大序列号
-            max_number = DeliveryRecord.objects.filter(
-                delivery_number__startswith=pattern
-            ).aggregate(max_num=Max('delivery_number'))['max_num']
-            
-            if max_number:
-                # 提取序列号并加1
-                try:
-                    seq = int(max_number.split('-')[-1]) + 1
-                except (ValueError, IndexError):
-                    seq = 1
-            else:
-                seq = 1
-            
-            return f"{pattern}{seq:04d}"
+        return next_document_number(DeliveryRecord.objects, 'delivery_number', 'VIH-JF', period=date_str)
     
     def save(self, *args, **kwargs):
         if not self.delivery_number:
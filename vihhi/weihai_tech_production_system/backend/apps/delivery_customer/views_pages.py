@@ -5,6 +5,7 @@ import logging
 
 from backend.apps.system_management.services import get_user_permission_codes
 from backend.core.views import HOME_NAV_STRUCTURE, _permission_granted, _build_full_top_nav
+from backend.core.sequence import next_document_number
 
 logger = logging.getLogger(__name__)
 
@@ -3715,10 +3716,11 @@ def delivery_weekly_report_create(request):
         
         report_content = "\n".join(report_content_parts)
         
-        # 生成交付单号
-        from datetime import datetime
+        # 生成交付单号（WB-YYYYMMDD-NNNN，按天取号）
         now = timezone.now()
-        delivery_number = f"WB-{now.strftime('%Y%m%d')}-{DeliveryRecord.objects.filter(created_at__date=now.date()).count() + 1:04d}"
+        delivery_number = next_document_number(
+            DeliveryRecord.objects, 'delivery_number', 'WB', period=now.strftime('%Y%m%d'),
+        )
         
         # 创建交付记录
         delivery = DeliveryRecord.objects.create(
@@ -3983,18 +3985,10 @@ def incoming_document_create(request):
     if request.method == 'POST':
         try:
             # 生成收文编号
-            today = timezone.now().date()
-            year = today.strftime('%Y')
-            count = IncomingDocument.objects.filter(
-                document_number__startswith=f'SW{year}'
-            ).count() + 1
-            document_number = f'SW{year}{count:04d}'
-            
-            # 确保编号唯一
-            while IncomingDocument.objects.filter(document_number=document_number).exists():
-                count += 1
-                document_number = f'SW{year}{count:04d}'
-            
+            year = timezone.now().date().strftime('%Y')
+            document_number = next_document_number(
+                IncomingDocument.objects, 'document_number', 'SW', period=year, separator='',
+            )
             # 处理阶段和文件分类
             stage = request.POST.get('stage', '').strip() or None
             file_category_id = request.POST.get('file_category', '').strip() or None
@@ -4277,18 +4271,10 @@ def outgoing_document_create(request):
     if request.method == 'POST':
         try:
             # 生成发文编号
-            today = timezone.now().date()
-            year = today.strftime('%Y')
-            count = OutgoingDocument.objects.filter(
-                document_number__startswith=f'FW{year}'
-            ).count() + 1
-            document_number = f'FW{year}{count:04d}'
-            
-            # 确保编号唯一
-            while OutgoingDocument.objects.filter(document_number=document_number).exists():
-                count += 1
-                document_number = f'FW{year}{count:04d}'
-            
+            year = timezone.now().date().strftime('%Y')
+            document_number = next_document_number(
+                OutgoingDocument.objects, 'document_number', 'FW', period=year, separator='',
+            )
             # 处理阶段和文件分类
             stage = request.POST.get('stage', '').strip() or None
             file_category_id = request.POST.get('file_category', '').strip() or None
@@ -4,7 +4,7 @@ from django.urls import reverse
 from django.db.models import Count, Sum
 from backend.apps.financial_management.models import (
     AccountSubject, Voucher, VoucherEntry,
-    Ledger, Budget, Invoice, FundFlow,
+    Ledger, LedgerPeriodClosing, Budget, Invoice, FundFlow,
 )
 from backend.core.admin_base import BaseModelAdmin, LinkAdminMixin, AuditAdminMixin
 
@@ -123,6 +123,15 @@ class LedgerAdmin(BaseModelAdmin):
     )
 
 
+
+@admin.register(LedgerPeriodClosing)
+class LedgerPeriodClosingAdmin(BaseModelAdmin):
+    """期末结账记录"""
+    list_display = ('period_year', 'period_month', 'status', 'subject_count', 'closed_by', 'closed_time', 'reopened_time')
+    list_filter = ('status', 'period_year')
+    ordering = ('-period_year', '-period_month')
+    readonly_fields = ('carried_balances', 'last_run', 'closed_by', 'closed_time', 'reopened_by', 'reopened_time')
+
 # ==================== 预算管理 ====================
 
 @admin.register(Budget)
@@ -5,3 +5,7 @@ class FinancialManagementConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'backend.apps.financial_management'
     verbose_name = '财务管理'
+
+    def ready(self):
+        """应用启动时注册信号处理器"""
+        import backend.apps.financial_management.signals  # noqa
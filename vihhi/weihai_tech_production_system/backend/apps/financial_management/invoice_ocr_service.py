@@ -1,13 +1,14 @@
 """
 发票OCR识别服务
-支持多种OCR方案：PaddleOCR、Tesseract OCR、第三方API等
+支持多种OCR方案：PaddleOCR、Tesseract OCR、第三方API等（通过共享 OCR 进程池 backend.utils.ocr_pool）
 """
 import re
 import logging
 from datetime import datetime
 from typing import Dict, Optional, Any
 from decimal import Decimal, InvalidOperation
-import os
+
+from backend.utils.ocr_pool import OCRBusyError, get_ocr_pool
 
 logger = logging.getLogger(__name__)
 
@@ -16,27 +17,11 @@ class InvoiceOCRService:
     """发票OCR识别服务基类"""
     
     def __init__(self):
-        self.ocr_engine = None
-        self._init_ocr_engine()
-    
-    def _init_ocr_engine(self):
-        """初始化OCR引擎"""
-        # 优先尝试使用PaddleOCR（中文识别效果好）
-        try:
-            from paddleocr import PaddleOCR
-            # 新版本PaddleOCR不再支持use_gpu参数，使用默认参数
-            self.ocr_engine = PaddleOCR(lang='ch')
-            logger.info("已初始化PaddleOCR引擎")
-        except ImportError:
-            logger.warning("PaddleOCR未安装，尝试使用Tesseract OCR")
-            try:
-                import pytesseract
-                from PIL import Image
-                self.ocr_engine = 'tesseract'
-                logger.info("已初始化Tesseract OCR引擎")
-            except ImportError:
-                logger.warning("OCR引擎未安装，请安装PaddleOCR或Tesseract OCR")
-                self.ocr_engine = None
+        # 模型由共享 OCR 进程池加载（每个工作进程一次），这里只记录可用的引擎
+        self.ocr_pool = get_ocr_pool()
+        self.ocr_engine = self.ocr_pool.engine
+        if not self.ocr_engine:
+            logger.warning("OCR引擎未安装，请安装PaddleOCR或Tesseract OCR")
     
     def recognize_invoice(self, file_path: str) -> Dict[str, Any]:
         """
@@ -55,29 +40,11 @@ class InvoiceOCRService:
             }
         
         try:
-            # 如果是PDF，先转换为图片
-            if file_path.lower().endswith('.pdf'):
-                images = self._pdf_to_images(file_path)
-                if not images:
-                    return {'success': False, 'message': 'PDF文件无法转换为图片'}
-                # 使用第一页进行识别
-                # 将PIL Image保存为临时文件
-                import tempfile
-                from PIL import Image
-                with tempfile.NamedTemporaryFile(suffix='.png', delete=False) as tmp_img:
-                    images[0].save(tmp_img.name, 'PNG')
-                    tmp_img_path = tmp_img.name
-                try:
-                    text = self._ocr_image(tmp_img_path)
-                finally:
-                    # 清理临时图片文件
-                    try:
-                        os.remove(tmp_img_path)
-                    except:
-                        pass
-            else:
-                # 直接识别图片
-                text = self._ocr_image(file_path)
+            # PDF 只识别第一页；同一文件再次上传时直接取缓存的识别结果
+            pages = self.ocr_pool.recognize_file(file_path, max_pages=1)
+            if not pages:
+                return {'success': False, 'message': 'PDF文件无法转换为图片'}
+            text = '\n'.join(pages)
             
             # 记录识别的原始文本（用于调试）
             logger.debug(f"OCR识别文本长度: {len(text)} 字符")
@@ -87,6 +54,8 @@ class InvoiceOCRService:
             invoice_data['success'] = True
             return invoice_data
             
+        except OCRBusyError as e:
+            return {'success': False, 'message': str(e)}
         except Exception as e:
             logger.exception(f"发票识别失败: {str(e)}")
             return {
@@ -94,39 +63,6 @@ class InvoiceOCRService:
                 'message': f'发票识别失败: {str(e)}'
             }
     
-    def _ocr_image(self, image_path: str) -> str:
-        """OCR识别图片文字"""
-        if isinstance(self.ocr_engine, str) and self.ocr_engine == 'tesseract':
-            # 使用Tesseract OCR
-            import pytesseract
-            from PIL import Image
-            image = Image.open(image_path)
-            text = pytesseract.image_to_string(image, lang='chi_sim+eng')
-            return text
-        else:
-            # 使用PaddleOCR
-            result = self.ocr_engine.ocr(image_path, cls=True)
-            # 提取所有文字
-            text_lines = []
-            if result and result[0]:
-                for line in result[0]:
-                    if line and len(line) > 1:
-                        text_lines.append(line[1][0])  # line[1][0]是识别的文字
-            return '\n'.join(text_lines)
-    
-    def _pdf_to_images(self, pdf_path: str) -> list:
-        """将PDF转换为图片列表"""
-        try:
-            from pdf2image import convert_from_path
-            images = convert_from_path(pdf_path, dpi=300)
-            return images
-        except ImportError:
-            logger.warning("pdf2image未安装，无法转换PDF")
-            return []
-        except Exception as e:
-            logger.error(f"PDF转图片失败: {str(e)}，请确保已安装poppler-utils")
-            return []
-    
     def _parse_invoice_text(self, text: str) -> Dict[str, Any]:
         """
         解析发票文本，提取关键信息
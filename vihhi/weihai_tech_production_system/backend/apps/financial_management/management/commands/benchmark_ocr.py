@@ -0,0 +1,82 @@
+"""
+OCR 进程池基准测试命令
+
+分别统计模型加载耗时和每秒识别页数（CPU）。不指定文件时生成模拟发票页（内存中的 PIL 图片）；
+指定 PDF 时按页分发给工作进程渲染并识别。测试期间不读写识别结果缓存。
+
+用法:
+    python manage.py benchmark_ocr                                   # 8 页模拟发票，进程数 0（进程内）/ 2 / 4
+    python manage.py benchmark_ocr --pages 16 --workers 0,4
+    python manage.py benchmark_ocr --file /path/to/scan.pdf --workers 2,4
+"""
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from backend.utils.ocr_pool import OCRPool, available_engine
+
+
+def _invoice_pages(count, dpi):
+    """生成模拟发票页：A4 白底，若干行发票字段"""
+    from PIL import Image, ImageDraw, ImageFont
+
+    width, height = int(8.27 * dpi), int(11.69 * dpi)
+    font = ImageFont.load_default(size=max(12, dpi // 6))
+    pages = []
+    for index in range(count):
+        image = Image.new('RGB', (width, height), 'white')
+        draw = ImageDraw.Draw(image)
+        lines = [
+            f'Invoice Code: 37000{index:07d}',
+            f'Invoice No: {20250000 + index:08d}',
+            f'Date: 2025-{index % 12 + 1:02d}-15',
+            f'Amount: {1000 + index * 37.5:.2f}',
+            f'Tax: {(1000 + index * 37.5) * 0.06:.2f}',
+            'Buyer: Weihai Technology Co., Ltd.',
+            'Seller: Shandong Construction Design Institute',
+        ]
+        for row, line in enumerate(lines * 3):
+            draw.text((dpi // 2, dpi // 2 + row * dpi // 4), line, fill='black', font=font)
+        pages.append(image)
+    return pages
+
+
+class Command(BaseCommand):
+    help = '测试 OCR 进程池在不同工作进程数下的模型加载耗时和识别速度（页/秒）'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--file', help='用于测试的 PDF 或图片（默认生成模拟发票页）')
+        parser.add_argument('--pages', type=int, default=8, help='模拟发票页数（默认 8）')
+        parser.add_argument('--workers', default='0,2,4', help='逗号分隔的工作进程数，0 表示在当前进程内识别')
+        parser.add_argument('--dpi', type=int, default=200, help='PDF 渲染 / 模拟页分辨率（默认 200）')
+
+    def handle(self, *args, **options):
+        engine = available_engine()
+        if not engine:
+            raise CommandError('OCR引擎未安装，请安装PaddleOCR或Tesseract OCR')
+        try:
+            worker_counts = [int(value) for value in options['workers'].split(',') if value.strip()]
+        except ValueError:
+            raise CommandError('--workers 应为逗号分隔的整数')
+
+        file_path = options['file']
+        images = None if file_path else _invoice_pages(options['pages'], options['dpi'])
+        self.stdout.write(f'OCR引擎: {engine}，测试数据: {file_path or f"{len(images)} 页模拟发票"}')
+
+        for workers in worker_counts:
+            pool = OCRPool(workers=workers, dpi=options['dpi'], engine=engine, use_cache=False)
+            try:
+                started = time.monotonic()
+                pool.warm_up()
+                loaded = time.monotonic() - started
+
+                started = time.monotonic()
+                pages = pool.recognize_file(file_path) if file_path else pool.recognize_images(images)
+                elapsed = time.monotonic() - started
+            finally:
+                pool.shutdown()
+            characters = sum(len(page) for page in pages)
+            self.stdout.write(
+                f'工作进程 {pool.workers}：模型加载 {loaded:.2f}s，识别 {len(pages)} 页 {elapsed:.2f}s，'
+                f'{len(pages) / elapsed if elapsed else 0:.2f} 页/秒，共 {characters} 字符'
+            )
@@ -0,0 +1,37 @@
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('financial_management', '0002_alter_fundflow_project_receivableaccount_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LedgerPeriodClosing',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('period_year', models.IntegerField(verbose_name='会计年度')),
+                ('period_month', models.IntegerField(verbose_name='会计期间')),
+                ('status', models.CharField(choices=[('closed', '已结账'), ('reopened', '已反结账')], default='closed', max_length=20, verbose_name='状态')),
+                ('carried_balances', models.JSONField(default=dict, help_text='上次结账时各科目结转到下期的期末余额：{科目ID: 金额}', verbose_name='结转余额')),
+                ('subject_count', models.IntegerField(default=0, verbose_name='科目数')),
+                ('last_run', models.JSONField(default=dict, verbose_name='最近一次结账报告')),
+                ('closed_time', models.DateTimeField(blank=True, null=True, verbose_name='结账时间')),
+                ('reopened_time', models.DateTimeField(blank=True, null=True, verbose_name='反结账时间')),
+                ('closed_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='closed_ledger_periods', to=settings.AUTH_USER_MODEL, verbose_name='结账人')),
+                ('reopened_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='reopened_ledger_periods', to=settings.AUTH_USER_MODEL, verbose_name='反结账人')),
+            ],
+            options={
+                'verbose_name': '期末结账记录',
+                'verbose_name_plural': '期末结账记录',
+                'db_table': 'financial_ledger_period_closing',
+                'ordering': ['-period_year', '-period_month'],
+                'unique_together': {('period_year', 'period_month')},
+            },
+        ),
+    ]
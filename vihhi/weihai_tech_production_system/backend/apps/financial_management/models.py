@@ -135,6 +135,35 @@ class Ledger(models.Model):
         return f"{self.account_subject} - {self.period_date}"
 
 
+class LedgerPeriodClosing(models.Model):
+    """期末结账记录（结账检查点）"""
+    STATUS_CHOICES = [
+        ('closed', '已结账'),
+        ('reopened', '已反结账'),
+    ]
+    
+    period_year = models.IntegerField(verbose_name='会计年度')
+    period_month = models.IntegerField(verbose_name='会计期间')
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='closed', verbose_name='状态')
+    carried_balances = models.JSONField(default=dict, verbose_name='结转余额', help_text='上次结账时各科目结转到下期的期末余额：{科目ID: 金额}')
+    subject_count = models.IntegerField(default=0, verbose_name='科目数')
+    last_run = models.JSONField(default=dict, verbose_name='最近一次结账报告')
+    closed_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='closed_ledger_periods', verbose_name='结账人')
+    closed_time = models.DateTimeField(null=True, blank=True, verbose_name='结账时间')
+    reopened_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='reopened_ledger_periods', verbose_name='反结账人')
+    reopened_time = models.DateTimeField(null=True, blank=True, verbose_name='反结账时间')
+    
+    class Meta:
+        db_table = 'financial_ledger_period_closing'
+        verbose_name = '期末结账记录'
+        verbose_name_plural = verbose_name
+        ordering = ['-period_year', '-period_month']
+        unique_together = [['period_year', 'period_month']]
+    
+    def __str__(self):
+        return f"{self.period_year}年{self.period_month}月 - {self.get_status_display()}"
+
+
 class Budget(models.Model):
     """预算管理"""
     STATUS_CHOICES = [
@@ -0,0 +1,199 @@
+"""
+期末结账引擎
+将某期间各科目的期末余额结转为下一期间的期初余额
+"""
+import logging
+import time
+from datetime import date
+from decimal import Decimal
+from typing import Dict, Iterable, Optional, Tuple
+
+from django.db import connection, transaction
+from django.utils import timezone
+
+from backend.apps.financial_management.models import AccountSubject, Ledger, LedgerPeriodClosing, Voucher
+from backend.apps.financial_management.services_reports import bump_ledger_version, latest_ledger_rows
+
+logger = logging.getLogger(__name__)
+
+ZERO = Decimal('0.00')
+# 咨询锁命名空间（pg_advisory_xact_lock 的第一个参数），第二个参数为 年*100+月
+LEDGER_PERIOD_LOCK_NAMESPACE = 7301
+
+_CARRY_FORWARD_SQL = """
+INSERT INTO {ledger} AS l
+    (account_subject_id, period_year, period_month, period_date,
+     opening_balance, period_debit, period_credit, closing_balance, created_time)
+SELECT v.subject_id, %s, %s, %s, v.balance, 0, 0, v.balance, %s
+FROM (VALUES {values}) AS v (subject_id, balance)
+ON CONFLICT (account_subject_id, period_year, period_month, period_date) DO UPDATE SET
+    opening_balance = EXCLUDED.opening_balance,
+    closing_balance = EXCLUDED.opening_balance + (
+        CASE WHEN (SELECT direction FROM {subject} WHERE id = EXCLUDED.account_subject_id) = 'debit'
+             THEN l.period_debit - l.period_credit
+             ELSE l.period_credit - l.period_debit
+        END
+    )
+"""
+
+
+class PeriodClosingError(ValueError):
+    """期间不满足结账条件"""
+
+
+def next_period(period_year: int, period_month: int) -> Tuple[int, int]:
+    if period_month == 12:
+        return period_year + 1, 1
+    return period_year, period_month + 1
+
+
+def lock_ledger_periods(periods: Iterable[Tuple[int, int]], shared: bool = False) -> None:
+    """
+    对会计期间加事务级咨询锁（需在事务中调用，事务结束自动释放）
+
+    过账使用共享锁，结账使用排他锁：结账期间内过账等待，多个过账之间互不阻塞。
+    """
+    if connection.vendor != 'postgresql':
+        return
+    function = 'pg_advisory_xact_lock_shared' if shared else 'pg_advisory_xact_lock'
+    with connection.cursor() as cursor:
+        # 固定顺序加锁，避免死锁
+        for period_year, period_month in sorted(set(periods)):
+            cursor.execute(
+                f'SELECT {function}(%s, %s)', [LEDGER_PERIOD_LOCK_NAMESPACE, period_year * 100 + period_month]
+            )
+
+
+def unposted_voucher_count(period_year: int, period_month: int) -> int:
+    return Voucher.objects.filter(
+        voucher_date__year=period_year,
+        voucher_date__month=period_month,
+        status__in=['draft', 'submitted', 'approved'],
+    ).count()
+
+
+def _carry_forward(balances: Dict[int, Decimal], period_year: int, period_month: int, now) -> None:
+    """把 {科目ID: 余额} 一次性写入该期间首日的期初余额"""
+    if not balances:
+        return
+    params = []
+    for subject_id, balance in balances.items():
+        params.extend([subject_id, balance])
+    sql = _CARRY_FORWARD_SQL.format(
+        ledger=connection.ops.quote_name(Ledger._meta.db_table),
+        subject=connection.ops.quote_name(AccountSubject._meta.db_table),
+        values=', '.join(['(%s::bigint, %s::numeric)'] * len(balances)),
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [period_year, period_month, date(period_year, period_month, 1), now] + params)
+
+
+def close_period(period_year: int, period_month: int, user=None, full: bool = False) -> dict:
+    """
+    期末结账：结转 period_year 年 period_month 月各科目余额到下一期间
+
+    已有结账检查点时只结转余额变化的科目（增量），full=True 时全部重新结转。
+    当期还有未过账凭证时抛出 PeriodClosingError。
+
+    返回：
+    {
+        'period': 'YYYY-MM', 'next_period': 'YYYY-MM', 'mode': 'full' | 'incremental',
+        'subjects': 当期科目数, 'carried': 本次结转的科目数,
+        'timings': {'lock': 秒, 'diff': 秒, 'carry_forward': 秒, 'total': 秒},
+    }
+    """
+    started = time.monotonic()
+    now = timezone.now()
+    next_year, next_month = next_period(period_year, period_month)
+
+    with transaction.atomic():
+        lock_ledger_periods([(period_year, period_month), (next_year, next_month)])
+        locked = time.monotonic()
+
+        unposted = unposted_voucher_count(period_year, period_month)
+        if unposted:
+            raise PeriodClosingError(f'当前期间还有 {unposted} 张凭证未过账，不能结账')
+
+        checkpoint = (
+            LedgerPeriodClosing.objects.select_for_update()
+            .filter(period_year=period_year, period_month=period_month)
+            .first()
+        )
+        current = {
+            subject_id: row['closing_balance']
+            for subject_id, row in latest_ledger_rows(period_year, period_month).items()
+        }
+        incremental = checkpoint is not None and not full
+        if incremental:
+            previous = {int(subject_id): Decimal(balance) for subject_id, balance in checkpoint.carried_balances.items()}
+            changed = {
+                subject_id: balance for subject_id, balance in current.items()
+                if previous.get(subject_id) != balance
+            }
+            # 反结账后凭证被反过账、科目在当期已无记录的，下期期初清零
+            changed.update({subject_id: ZERO for subject_id in previous if subject_id not in current})
+        else:
+            changed = current
+        diffed = time.monotonic()
+
+        _carry_forward(changed, next_year, next_month, now)
+        carried = time.monotonic()
+
+        report = {
+            'period': f'{period_year}-{period_month:02d}',
+            'next_period': f'{next_year}-{next_month:02d}',
+            'mode': 'incremental' if incremental else 'full',
+            'subjects': len(current),
+            'carried': len(changed),
+            'timings': {
+                'lock': round(locked - started, 3),
+                'diff': round(diffed - locked, 3),
+                'carry_forward': round(carried - diffed, 3),
+                'total': round(time.monotonic() - started, 3),
+            },
+        }
+        LedgerPeriodClosing.objects.update_or_create(
+            period_year=period_year,
+            period_month=period_month,
+            defaults={
+                'status': 'closed',
+                'carried_balances': {str(subject_id): str(balance) for subject_id, balance in current.items()},
+                'subject_count': len(current),
+                'last_run': report,
+                'closed_by': user,
+                'closed_time': now,
+            },
+        )
+        if changed:
+            transaction.on_commit(lambda: bump_ledger_version(next_year, next_month))
+
+    logger.info(
+        '期末结账 %s → %s（%s）：科目 %s 个，结转 %s 个，耗时 %.3fs',
+        report['period'], report['next_period'], report['mode'],
+        report['subjects'], report['carried'], report['timings']['total'],
+    )
+    return report
+
+
+def reopen_period(period_year: int, period_month: int, user=None) -> Optional[LedgerPeriodClosing]:
+    """反结账：保留检查点，补记凭证后再次结账时只结转变化的科目"""
+    updated = LedgerPeriodClosing.objects.filter(
+        period_year=period_year, period_month=period_month, status='closed'
+    ).update(status='reopened', reopened_by=user, reopened_time=timezone.now())
+    if not updated:
+        return None
+    return LedgerPeriodClosing.objects.get(period_year=period_year, period_month=period_month)
+
+
+def pending_subject_count(period_year: int, period_month: int) -> Optional[int]:
+    """已结账期间中，余额与上次结转不一致（需重新结账）的科目数；未结账返回 None"""
+    checkpoint = LedgerPeriodClosing.objects.filter(period_year=period_year, period_month=period_month).first()
+    if checkpoint is None:
+        return None
+    previous = checkpoint.carried_balances
+    current = latest_ledger_rows(period_year, period_month)
+    changed = sum(
+        1 for subject_id, row in current.items()
+        if previous.get(str(subject_id)) is None or Decimal(previous[str(subject_id)]) != row['closing_balance']
+    )
+    return changed + sum(1 for subject_id in previous if int(subject_id) not in current)
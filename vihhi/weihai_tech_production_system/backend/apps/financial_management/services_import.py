@@ -0,0 +1,194 @@
+"""
+资金流水、会计科目批量导入（基于 backend.utils.import_utils 导入引擎）
+
+- 资金流水：每块一条 IN 查询解析关联项目编号，流水号按块一次预留，bulk_create 写入
+- 会计科目：每块一条 IN 查询检查重复编码、解析上级科目；上级科目在同一文件中时按层级分批写入，
+  写入后统一升级科目版本号（bulk_create 不触发信号）
+"""
+from django.utils import timezone
+
+from backend.apps.financial_management.models import AccountSubject, FundFlow
+from backend.apps.financial_management.services_reports import bump_subject_version
+from backend.core.sequence import reserve_document_numbers
+from backend.utils.import_utils import BaseImporter, RowError
+
+TRUE_VALUES = {'是', 'yes', 'true', '1', 'y'}
+
+
+def _choice(value: str, aliases: dict, choices, label: str) -> str:
+    code = aliases.get(value.lower(), value)
+    if code not in dict(choices):
+        raise RowError(f'{label}无效')
+    return code
+
+
+class FundFlowImporter(BaseImporter):
+    import_type = 'fund_flow'
+    label = '资金流水'
+    model = FundFlow
+    fields = {
+        'flow_date': ('发生日期',),
+        'flow_type': ('流水类型',),
+        'amount': ('金额',),
+        'account_name': ('账户名称',),
+        'counterparty': ('对方单位',),
+        'summary': ('摘要',),
+        'project_number': ('关联项目编号',),
+    }
+    required_fields = ('flow_date', 'flow_type', 'amount', 'account_name', 'summary')
+    type_aliases = {
+        'income': 'income', '收入': 'income',
+        'expense': 'expense', '支出': 'expense',
+        'transfer': 'transfer', '转账': 'transfer',
+    }
+
+    def prepare(self):
+        self.projects = {}
+
+    def parse(self, row):
+        flow_date = row.date('flow_date', '发生日期')
+        if flow_date is None:
+            raise RowError('发生日期不能为空')
+        flow_type = _choice(row.require('flow_type', '流水类型'), self.type_aliases, FundFlow.TYPE_CHOICES, '流水类型')
+        amount = row.decimal('amount', '金额')
+        if amount is None:
+            raise RowError('金额不能为空')
+        if amount <= 0:
+            raise RowError('金额必须大于0')
+
+        return {
+            'flow_date': flow_date,
+            'flow_type': flow_type,
+            'amount': amount,
+            'account_name': row.require('account_name', '账户名称'),
+            'counterparty': row.get('counterparty'),
+            'summary': row.require('summary', '摘要'),
+            'project_number': row.get('project_number'),
+        }
+
+    def resolve(self, parsed):
+        from backend.apps.production_management.models import Project
+
+        numbers = {data['project_number'] for _, data in parsed if data['project_number']} - set(self.projects)
+        if numbers:
+            self.projects.update(
+                (project.project_number, project) for project in Project.objects.filter(project_number__in=numbers)
+            )
+
+    def build(self, row, data):
+        project_number = data.pop('project_number')
+        project = None
+        if project_number:
+            project = self.projects.get(project_number)
+            if project is None:
+                raise RowError(f'项目编号 {project_number} 不存在')
+        return FundFlow(project=project, created_by=self.user, **data)
+
+    def assign_numbers(self, instances):
+        numbers = reserve_document_numbers(
+            FundFlow.objects, 'flow_number', 'FLOW', len(instances), period=str(timezone.now().year),
+        )
+        for flow, number in zip(instances, numbers):
+            flow.flow_number = number
+
+
+class AccountSubjectImporter(BaseImporter):
+    import_type = 'account_subject'
+    label = '会计科目'
+    model = AccountSubject
+    fields = {
+        'code': ('科目编码',),
+        'name': ('科目名称',),
+        'parent_code': ('上级科目编码',),
+        'subject_type': ('科目类型',),
+        'direction': ('余额方向',),
+        'is_active': ('是否启用',),
+        'description': ('备注说明',),
+    }
+    required_fields = ('code', 'name', 'subject_type', 'direction')
+    type_aliases = {
+        'asset': 'asset', '资产': 'asset',
+        'liability': 'liability', '负债': 'liability',
+        'equity': 'equity', '所有者权益': 'equity',
+        'revenue': 'revenue', '收入': 'revenue',
+        'expense': 'expense', '费用': 'expense',
+        'cost': 'cost', '成本': 'cost',
+    }
+    direction_aliases = {
+        'debit': 'debit', '借方': 'debit',
+        'credit': 'credit', '贷方': 'credit',
+    }
+
+    def prepare(self):
+        # 科目编码 -> (id, level)：已解析的上级科目和本次已导入的科目
+        self.known = {}
+        self.file_codes = set()
+        self.existing_codes = set()
+        self.parent_codes = {}
+
+    def parse(self, row):
+        code = row.get('code')
+        name = row.get('name')
+        if not code or not name:
+            raise RowError('科目编码和科目名称不能为空')
+        if code in self.file_codes:
+            raise RowError(f'科目编码 {code} 在文件中重复')
+        self.file_codes.add(code)
+        return {
+            'code': code,
+            'name': name,
+            'parent_code': row.get('parent_code'),
+            'subject_type': _choice(row.get('subject_type'), self.type_aliases, AccountSubject.TYPE_CHOICES, '科目类型'),
+            'direction': _choice(row.get('direction'), self.direction_aliases, AccountSubject.DIRECTION_CHOICES, '余额方向'),
+            'is_active': (row.get('is_active') or '是').lower() in TRUE_VALUES,
+            'description': row.get('description'),
+        }
+
+    def resolve(self, parsed):
+        codes = {data['code'] for _, data in parsed}
+        parent_codes = {data['parent_code'] for _, data in parsed if data['parent_code']} - set(self.known)
+        lookup = codes | parent_codes
+        self.existing_codes = set()
+        for subject_id, code, level in AccountSubject.objects.filter(code__in=lookup).values_list('id', 'code', 'level'):
+            if code in codes:
+                self.existing_codes.add(code)
+            if code in parent_codes:
+                self.known[code] = (subject_id, level)
+
+    def build(self, row, data):
+        if data['code'] in self.existing_codes:
+            raise RowError(f"科目编码 {data['code']} 已存在")
+        self.parent_codes[row.number] = data.pop('parent_code')
+        return AccountSubject(created_by=self.user, **data)
+
+    def save_chunk(self, items):
+        """上级科目已知的先写入，再写入以它们为上级的科目，直到本块没有可写入的行"""
+        failures = []
+        pending = items
+        while pending:
+            ready, waiting = [], []
+            for row, subject in pending:
+                parent_code = self.parent_codes.get(row.number)
+                if parent_code and parent_code not in self.known:
+                    waiting.append((row, subject))
+                    continue
+                self.parent_codes.pop(row.number, None)
+                if parent_code:
+                    subject.parent_id, parent_level = self.known[parent_code]
+                    subject.level = parent_level + 1
+                ready.append((row, subject))
+            if not ready:
+                failures.extend((row, f'上级科目编码 {self.parent_codes.pop(row.number)} 不存在') for row, _ in waiting)
+                break
+            wave_failures = super().save_chunk(ready)
+            failed_rows = {row.number for row, _ in wave_failures}
+            for row, subject in ready:
+                if row.number not in failed_rows:
+                    self.known[subject.code] = (subject.pk, subject.level)
+            failures.extend(wave_failures)
+            pending = waiting
+        return failures
+
+    def finish(self, success_count):
+        if success_count:
+            bump_subject_version()
@@ -0,0 +1,234 @@
+"""
+凭证过账引擎
+批量过账 / 反过账凭证并更新总账
+"""
+import logging
+import operator
+import time
+from decimal import Decimal
+from functools import reduce
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Q, Sum
+from django.utils import timezone
+
+from backend.apps.financial_management.models import AccountSubject, Ledger, Voucher, VoucherEntry
+from backend.apps.financial_management.services_closing import lock_ledger_periods
+from backend.apps.financial_management.services_reports import bump_ledger_version
+
+logger = logging.getLogger(__name__)
+
+ZERO = Decimal('0.00')
+POSTING_CHUNK_SIZE = getattr(settings, 'VOUCHER_POSTING_CHUNK_SIZE', 500)
+
+# 总账键：（科目ID，总账日期）；年度、期间由日期推出
+LedgerKey = Tuple[int, object]
+
+_UPSERT_SQL = """
+INSERT INTO {ledger} AS l
+    (account_subject_id, period_year, period_month, period_date,
+     opening_balance, period_debit, period_credit, closing_balance, created_time)
+SELECT v.subject_id, v.period_year, v.period_month, v.period_date,
+       0, v.debit, v.credit,
+       CASE WHEN s.direction = 'debit' THEN v.debit - v.credit ELSE v.credit - v.debit END,
+       %s
+FROM (VALUES {values}) AS v (subject_id, period_year, period_month, period_date, debit, credit)
+JOIN {subject} s ON s.id = v.subject_id
+ON CONFLICT (account_subject_id, period_year, period_month, period_date) DO UPDATE SET
+    period_debit = l.period_debit + EXCLUDED.period_debit,
+    period_credit = l.period_credit + EXCLUDED.period_credit,
+    closing_balance = l.opening_balance + (
+        CASE WHEN (SELECT direction FROM {subject} WHERE id = EXCLUDED.account_subject_id) = 'debit'
+             THEN (l.period_debit + EXCLUDED.period_debit) - (l.period_credit + EXCLUDED.period_credit)
+             ELSE (l.period_credit + EXCLUDED.period_credit) - (l.period_debit + EXCLUDED.period_debit)
+        END
+    )
+"""
+
+# 反过账只回滚已存在的总账记录
+_UPDATE_SQL = """
+UPDATE {ledger} AS l SET
+    period_debit = l.period_debit + v.debit,
+    period_credit = l.period_credit + v.credit,
+    closing_balance = l.opening_balance + (
+        CASE WHEN s.direction = 'debit'
+             THEN (l.period_debit + v.debit) - (l.period_credit + v.credit)
+             ELSE (l.period_credit + v.credit) - (l.period_debit + v.debit)
+        END
+    )
+FROM (VALUES {values}) AS v (subject_id, period_year, period_month, period_date, debit, credit)
+JOIN {subject} s ON s.id = v.subject_id
+WHERE l.account_subject_id = v.subject_id
+  AND l.period_year = v.period_year
+  AND l.period_month = v.period_month
+  AND l.period_date = v.period_date
+"""
+
+
+def _result(voucher, status: str, message: str = '') -> dict:
+    return {
+        'voucher_id': voucher.id,
+        'voucher_number': voucher.voucher_number,
+        'status': status,
+        'message': message,
+    }
+
+
+def aggregate_entries(vouchers: Iterable[Voucher]) -> Dict[LedgerKey, List[Decimal]]:
+    """一次查询汇总凭证分录：{(科目ID, 凭证日期): [借方合计, 贷方合计]}"""
+    dates = {voucher.id: voucher.voucher_date for voucher in vouchers}
+    totals: Dict[LedgerKey, List[Decimal]] = {}
+    if not dates:
+        return totals
+    rows = (
+        VoucherEntry.objects.filter(voucher_id__in=list(dates))
+        .order_by()
+        .values('voucher_id', 'account_subject_id')
+        .annotate(debit=Sum('debit_amount'), credit=Sum('credit_amount'))
+    )
+    for row in rows:
+        key = (row['account_subject_id'], dates[row['voucher_id']])
+        amounts = totals.setdefault(key, [ZERO, ZERO])
+        amounts[0] += row['debit'] or ZERO
+        amounts[1] += row['credit'] or ZERO
+    return totals
+
+
+def _bump_periods(periods) -> None:
+    for period_year, period_month in periods:
+        bump_ledger_version(period_year, period_month)
+
+
+def apply_ledger_deltas(deltas: Dict[LedgerKey, List[Decimal]], now=None, insert_missing: bool = True) -> None:
+    """
+    把借贷发生额增量一次性写入总账，期末余额按科目余额方向重算
+
+    insert_missing=False 时只更新已存在的总账记录（反过账时传入负数增量）。
+    """
+    if not deltas:
+        return
+    params = []
+    for (subject_id, period_date), (debit, credit) in deltas.items():
+        params.extend([subject_id, period_date.year, period_date.month, period_date, debit, credit])
+    values = ', '.join(['(%s::bigint, %s::integer, %s::integer, %s::date, %s::numeric, %s::numeric)'] * len(deltas))
+    sql = (_UPSERT_SQL if insert_missing else _UPDATE_SQL).format(
+        ledger=connection.ops.quote_name(Ledger._meta.db_table),
+        subject=connection.ops.quote_name(AccountSubject._meta.db_table),
+        values=values,
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(sql, ([now or timezone.now()] + params) if insert_missing else params)
+
+    # 批量写入不触发总账信号，事务提交后统一使报表缓存失效
+    periods = {(period_date.year, period_date.month) for _, period_date in deltas}
+    transaction.on_commit(lambda: _bump_periods(periods))
+
+
+def _validate_for_post(voucher: Voucher) -> Optional[str]:
+    if voucher.status != 'approved':
+        return f'只有已审核的凭证才能过账，当前状态：{voucher.get_status_display()}'
+    if voucher.total_debit != voucher.total_credit:
+        return f'凭证借贷不平衡（借方：{voucher.total_debit}，贷方：{voucher.total_credit}），不能过账'
+    return None
+
+
+def _validate_for_unpost(voucher: Voucher) -> Optional[str]:
+    if voucher.status != 'posted':
+        return f'只有已过账的凭证才能反过账，当前状态：{voucher.get_status_display()}'
+    return None
+
+
+def _process_chunk(voucher_ids: List[int], user, unpost: bool) -> List[dict]:
+    validate = _validate_for_unpost if unpost else _validate_for_post
+    now = timezone.now()
+    results = []
+    with transaction.atomic():
+        vouchers = list(Voucher.objects.select_for_update().filter(id__in=voucher_ids).order_by('id'))
+        valid = []
+        for voucher in vouchers:
+            error = validate(voucher)
+            if error:
+                results.append(_result(voucher, 'skipped', error))
+            else:
+                valid.append(voucher)
+        if not valid:
+            return results
+
+        deltas = aggregate_entries(valid)
+        # 与期末结账互斥：结账持有期间排他锁时等待
+        lock_ledger_periods({(period_date.year, period_date.month) for _, period_date in deltas}, shared=True)
+        valid_ids = [voucher.id for voucher in valid]
+        if unpost:
+            apply_ledger_deltas({key: [-debit, -credit] for key, (debit, credit) in deltas.items()}, insert_missing=False)
+            # 与原逻辑一致：回滚后本期借贷均为 0 的总账记录直接删除
+            if deltas:
+                touched = reduce(operator.or_, (
+                    Q(account_subject_id=subject_id, period_date=period_date) for subject_id, period_date in deltas
+                ))
+                Ledger.objects.filter(touched, period_debit=ZERO, period_credit=ZERO).delete()
+            Voucher.objects.filter(id__in=valid_ids).update(
+                status='approved', posted_by=None, posted_time=None, updated_time=now,
+            )
+        else:
+            apply_ledger_deltas(deltas, now)
+            Voucher.objects.filter(id__in=valid_ids).update(
+                status='posted', posted_by=user, posted_time=now, updated_time=now,
+            )
+        results.extend(_result(voucher, 'unposted' if unpost else 'posted') for voucher in valid)
+    return results
+
+
+def _run(voucher_ids, user, unpost: bool, chunk_size: Optional[int]) -> dict:
+    started = time.monotonic()
+    ids = sorted({int(voucher_id) for voucher_id in voucher_ids})
+    chunk_size = chunk_size or POSTING_CHUNK_SIZE
+    results = []
+    for start in range(0, len(ids), chunk_size):
+        chunk = ids[start:start + chunk_size]
+        try:
+            results.extend(_process_chunk(chunk, user, unpost))
+        except Exception as exc:
+            logger.exception('%s凭证失败: %s', '反过账' if unpost else '过账', exc)
+            for voucher in Voucher.objects.filter(id__in=chunk).only('id', 'voucher_number'):
+                results.append(_result(voucher, 'failed', str(exc)))
+
+    found = {result['voucher_id'] for result in results}
+    for voucher_id in ids:
+        if voucher_id not in found:
+            results.append({'voucher_id': voucher_id, 'voucher_number': '', 'status': 'failed', 'message': '凭证不存在'})
+
+    done_status = 'unposted' if unpost else 'posted'
+    summary = {
+        'total': len(ids),
+        'succeeded': sum(1 for result in results if result['status'] == done_status),
+        'skipped': sum(1 for result in results if result['status'] == 'skipped'),
+        'failed': sum(1 for result in results if result['status'] == 'failed'),
+        'results': results,
+        'elapsed': round(time.monotonic() - started, 3),
+    }
+    logger.info(
+        '%s凭证 %s 张：成功 %s，跳过 %s，失败 %s，耗时 %.3fs', '反过账' if unpost else '过账',
+        summary['total'], summary['succeeded'], summary['skipped'], summary['failed'], summary['elapsed'],
+    )
+    return summary
+
+
+def post_vouchers(voucher_ids, user, chunk_size: Optional[int] = None) -> dict:
+    """
+    批量过账凭证
+
+    返回：
+    {
+        'total': int, 'succeeded': int, 'skipped': int, 'failed': int, 'elapsed': 秒,
+        'results': [{'voucher_id', 'voucher_number', 'status': posted/skipped/failed, 'message'}],
+    }
+    每块凭证在一个事务内完成；某块失败只影响该块，不影响其它块。
+    """
+    return _run(voucher_ids, user, unpost=False, chunk_size=chunk_size)
+
+
+def unpost_vouchers(voucher_ids, user=None, chunk_size: Optional[int] = None) -> dict:
+    """批量反过账凭证（已过账 -> 已审核），返回结构同 post_vouchers，成功状态为 unposted"""
+    return _run(voucher_ids, user, unpost=True, chunk_size=chunk_size)
@@ -0,0 +1,277 @@
+"""
+总账报表引擎
+为科目余额表、试算平衡表、资产负债表、利润表提供数据
+"""
+import logging
+from decimal import Decimal
+from typing import Callable, Dict, List, Optional
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+from django.db.models import Sum
+
+from backend.apps.financial_management.models import AccountSubject, Ledger
+from backend.core.cache_versions import bump_version, cache_timeout, versioned_cache_key
+
+logger = logging.getLogger(__name__)
+
+ZERO = Decimal('0.00')
+LEDGER_REPORT_TIMEOUT = getattr(settings, 'LEDGER_REPORT_CACHE_TIMEOUT', 60 * 60)
+# 进程内缓存（未配置 REDIS_URL）下的有效期：其他 worker 看不到版本号升级，只能等缓存过期
+LEDGER_REPORT_LOCAL_TIMEOUT = getattr(settings, 'LEDGER_REPORT_LOCAL_CACHE_TIMEOUT', 5)
+SUBJECT_VERSION_KEY = 'ledger_report:version:subjects'
+BALANCE_FIELDS = ('opening_balance', 'period_debit', 'period_credit', 'closing_balance')
+
+
+# ==================== 缓存版本 ====================
+
+def _period_version_key(period_year, period_month) -> str:
+    return f'ledger_report:version:{period_year}-{period_month}'
+
+
+def bump_ledger_version(period_year, period_month) -> int:
+    """某期间的总账记录变化时调用，使该期间的报表缓存失效"""
+    return bump_version(_period_version_key(period_year, period_month))
+
+
+def bump_subject_version() -> int:
+    """会计科目变化时调用，使全部报表缓存失效"""
+    return bump_version(SUBJECT_VERSION_KEY)
+
+
+def _cached(kind: str, period_year, period_month, builder: Callable[[], dict]) -> dict:
+    timeout = cache_timeout(LEDGER_REPORT_TIMEOUT, LEDGER_REPORT_LOCAL_TIMEOUT)
+    if timeout <= 0:
+        return builder()
+    key = versioned_cache_key(
+        f'ledger_report:{kind}:{period_year}-{period_month}',
+        _period_version_key(period_year, period_month), SUBJECT_VERSION_KEY,
+    )
+    data = cache.get(key)
+    if data is None:
+        data = builder()
+        cache.set(key, data, timeout)
+    return data
+
+
+# ==================== 取数 ====================
+
+def latest_ledger_rows(period_year, period_month) -> Dict[int, dict]:
+    """当期每个科目最新一条总账记录，{科目ID: {opening_balance, period_debit, ...}}"""
+    queryset = Ledger.objects.filter(period_year=period_year, period_month=period_month)
+    fields = ('account_subject_id',) + BALANCE_FIELDS
+    if connection.features.can_distinct_on_fields:
+        rows = (
+            queryset.order_by('account_subject_id', '-period_date')
+            .distinct('account_subject_id')
+            .values(*fields)
+        )
+        return {row['account_subject_id']: row for row in rows}
+
+    # 不支持 DISTINCT ON 的数据库：按科目、日期倒序取每个科目的第一条
+    latest = {}
+    for row in queryset.order_by('account_subject_id', '-period_date').values(*fields):
+        latest.setdefault(row['account_subject_id'], row)
+    return latest
+
+
+def period_activity_rows(period_year, period_month) -> Dict[int, dict]:
+    """当期每个科目的借贷发生额合计，{科目ID: {period_debit, period_credit}}"""
+    rows = (
+        Ledger.objects.filter(period_year=period_year, period_month=period_month)
+        .order_by()
+        .values('account_subject_id')
+        .annotate(period_debit=Sum('period_debit'), period_credit=Sum('period_credit'))
+    )
+    return {row['account_subject_id']: row for row in rows}
+
+
+def _active_subjects(subject_types=None) -> List[dict]:
+    queryset = AccountSubject.objects.filter(is_active=True)
+    if subject_types:
+        queryset = queryset.filter(subject_type__in=subject_types)
+    return list(
+        queryset.order_by('code').values('id', 'code', 'name', 'parent_id', 'subject_type', 'direction', 'level')
+    )
+
+
+# ==================== 科目树汇总 ====================
+
+def _sign(subject: dict) -> int:
+    """余额统一折算为借方为正，汇总后再按上级科目的余额方向还原"""
+    return 1 if subject['direction'] == 'debit' else -1
+
+
+def rollup_subjects(subjects: List[dict], own_rows: Dict[int, dict], include_empty: bool = False) -> List[dict]:
+    """
+    按科目树自下而上汇总金额
+
+    subjects 为按编码排序的科目列表，own_rows 为各科目自身的金额（键为科目ID）。
+    上级科目金额 = 自身金额 + 全部下级科目金额；上级科目不在 subjects 中的科目视为顶级科目。
+    返回按编码先序排列的行：{'subject', 'depth', 'is_root', 'has_data', 各金额字段}
+    """
+    by_id = {subject['id']: subject for subject in subjects}
+    children: Dict[Optional[int], List[dict]] = {}
+    roots = []
+    for subject in subjects:
+        if subject['parent_id'] in by_id:
+            children.setdefault(subject['parent_id'], []).append(subject)
+        else:
+            roots.append(subject)
+
+    # 借方为正的汇总值：{科目ID: (has_data, {字段: 金额})}
+    totals: Dict[int, tuple] = {}
+
+    def collect(subject):
+        own = own_rows.get(subject['id'])
+        has_data = own is not None
+        signed = {}
+        for field in BALANCE_FIELDS:
+            value = (own.get(field) if own else None) or ZERO
+            signed[field] = value * _sign(subject) if field in ('opening_balance', 'closing_balance') else value
+        for child in children.get(subject['id'], []):
+            child_has_data, child_signed = collect(child)
+            if child_has_data:
+                has_data = True
+                for field in BALANCE_FIELDS:
+                    signed[field] += child_signed[field]
+        totals[subject['id']] = (has_data, signed)
+        return has_data, signed
+
+    rows = []
+
+    def emit(subject, depth):
+        has_data, signed = totals[subject['id']]
+        if has_data or include_empty:
+            row = {'subject': subject, 'depth': depth, 'is_root': depth == 0, 'has_data': has_data}
+            for field in BALANCE_FIELDS:
+                value = signed[field]
+                row[field] = value * _sign(subject) if field in ('opening_balance', 'closing_balance') else value
+            rows.append(row)
+        for child in children.get(subject['id'], []):
+            emit(child, depth + 1)
+
+    for root in roots:
+        collect(root)
+        emit(root, 0)
+    return rows
+
+
+def _split(balance: Decimal, direction: str):
+    """按余额方向拆分为（借方余额，贷方余额）"""
+    if direction == 'debit':
+        return (balance, ZERO) if balance >= 0 else (ZERO, -balance)
+    return (-balance, ZERO) if balance < 0 else (ZERO, balance)
+
+
+# ==================== 报表 ====================
+
+def _build_trial_balance(period_year, period_month) -> dict:
+    rows = rollup_subjects(_active_subjects(), latest_ledger_rows(period_year, period_month))
+    totals = {
+        'total_opening_debit': ZERO,
+        'total_opening_credit': ZERO,
+        'total_period_debit': ZERO,
+        'total_period_credit': ZERO,
+        'total_closing_debit': ZERO,
+        'total_closing_credit': ZERO,
+    }
+    for row in rows:
+        direction = row['subject']['direction']
+        row['opening_debit'], row['opening_credit'] = _split(row['opening_balance'], direction)
+        row['closing_debit'], row['closing_credit'] = _split(row['closing_balance'], direction)
+        if row['is_root']:
+            for column in ('opening_debit', 'opening_credit', 'period_debit',
+                           'period_credit', 'closing_debit', 'closing_credit'):
+                totals[f'total_{column}'] += row[column]
+
+    opening_balanced = abs(totals['total_opening_debit'] - totals['total_opening_credit']) < Decimal('0.01')
+    period_balanced = abs(totals['total_period_debit'] - totals['total_period_credit']) < Decimal('0.01')
+    closing_balanced = abs(totals['total_closing_debit'] - totals['total_closing_credit']) < Decimal('0.01')
+    return {
+        'rows': rows,
+        **totals,
+        'opening_balanced': opening_balanced,
+        'period_balanced': period_balanced,
+        'closing_balanced': closing_balanced,
+        'is_balanced': opening_balanced and period_balanced and closing_balanced,
+    }
+
+
+def trial_balance_data(period_year, period_month) -> dict:
+    """
+    科目余额表 / 试算平衡表数据
+
+    返回：{'rows': [...], 'total_opening_debit': ..., ..., 'is_balanced': bool}
+    每行含 subject（id/code/name/direction/level）、depth、is_root 以及期初/本期/期末借贷金额，
+    合计按顶级科目计算。
+    """
+    return _cached('trial_balance', period_year, period_month,
+                   lambda: _build_trial_balance(period_year, period_month))
+
+
+def _build_balance_sheet(period_year, period_month) -> dict:
+    latest = latest_ledger_rows(period_year, period_month)
+    report_data = {}
+    for key, subject_type, normal_direction in (
+        ('assets', 'asset', 'debit'),
+        ('liabilities', 'liability', 'credit'),
+        ('equity', 'equity', 'credit'),
+    ):
+        items = {}
+        total = ZERO
+        for row in rollup_subjects(_active_subjects([subject_type]), latest):
+            balance = row['closing_balance']
+            if row['subject']['direction'] != normal_direction:
+                balance = -balance
+            items[row['subject']['code']] = {
+                'name': row['subject']['name'],
+                'balance': balance,
+                'depth': row['depth'],
+            }
+            if row['is_root']:
+                total += balance
+        report_data[key] = items
+        report_data[f'total_{key}'] = total
+
+    report_data['total_liabilities_equity'] = report_data['total_liabilities'] + report_data['total_equity']
+    return report_data
+
+
+def balance_sheet_data(period_year, period_month) -> dict:
+    """资产负债表数据（结构与 FinancialReport.report_data 一致）"""
+    return _cached('balance_sheet', period_year, period_month,
+                   lambda: _build_balance_sheet(period_year, period_month))
+
+
+def _build_income_statement(period_year, period_month) -> dict:
+    activity = period_activity_rows(period_year, period_month)
+    report_data = {}
+    for key, subject_type, amount_field in (
+        ('revenue', 'revenue', 'period_credit'),
+        ('expenses', 'expense', 'period_debit'),
+        ('costs', 'cost', 'period_debit'),
+    ):
+        items = {}
+        total = ZERO
+        for row in rollup_subjects(_active_subjects([subject_type]), activity, include_empty=True):
+            items[row['subject']['code']] = {
+                'name': row['subject']['name'],
+                'amount': row[amount_field],
+                'depth': row['depth'],
+            }
+            if row['is_root']:
+                total += row[amount_field]
+        report_data[key] = items
+        report_data[f'total_{key}'] = total
+
+    report_data['gross_profit'] = report_data['total_revenue'] - report_data['total_costs']
+    report_data['net_profit'] = report_data['gross_profit'] - report_data['total_expenses']
+    return report_data
+
+
+def income_statement_data(period_year, period_month) -> dict:
+    """利润表数据（结构与 FinancialReport.report_data 一致）"""
+    return _cached('income_statement', period_year, period_month,
+                   lambda: _build_income_statement(period_year, period_month))
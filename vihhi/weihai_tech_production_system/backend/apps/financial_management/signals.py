@@ -0,0 +1,23 @@
+"""
+财务管理信号处理器
+
+- 总账记录变化时，升级该期间的报表版本号，使科目余额表/试算平衡表/资产负债表/利润表缓存失效
+- 会计科目变化时，升级科目版本号，使全部报表缓存失效
+"""
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from backend.apps.financial_management.models import AccountSubject, Ledger
+from backend.apps.financial_management.services_reports import bump_ledger_version, bump_subject_version
+
+
+@receiver(post_save, sender=Ledger)
+@receiver(post_delete, sender=Ledger)
+def handle_ledger_change(sender, instance, **kwargs):
+    bump_ledger_version(instance.period_year, instance.period_month)
+
+
+@receiver(post_save, sender=AccountSubject)
+@receiver(post_delete, sender=AccountSubject)
+def handle_account_subject_change(sender, **kwargs):
+    bump_subject_version()
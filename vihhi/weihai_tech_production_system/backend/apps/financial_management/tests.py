@@ -1,3 +1,389 @@
+import shutil
+import tempfile
+import time
+from datetime import date
+from decimal import Decimal
+from io import BytesIO
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.contrib.messages import get_messages
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from openpyxl import Workbook, load_workbook
+
+from backend.apps.financial_management import invoice_ocr_service, services_reports
+from backend.apps.financial_management.models import (
+    AccountSubject,
+    FundFlow,
+    Ledger,
+    LedgerPeriodClosing,
+    Voucher,
+    VoucherEntry,
+)
+from backend.apps.financial_management.services_import import FundFlowImporter
+from backend.apps.financial_management.services_closing import PeriodClosingError, close_period, reopen_period
+from backend.apps.financial_management.services_posting import post_vouchers, unpost_vouchers
+from backend.apps.financial_management.services_reports import (
+    balance_sheet_data,
+    income_statement_data,
+    trial_balance_data,
+)
+from backend.apps.production_management.models import Project
+from backend.core.tests.mixins import TempMediaRootMixin
+from backend.utils import import_utils, ocr_pool
+
+
+class LedgerReportEngineTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+        def subject(code, name, subject_type, direction, parent=None):
+            return AccountSubject.objects.create(
+                code=code, name=name, subject_type=subject_type, direction=direction,
+                parent=parent, level=2 if parent else 1,
+            )
+
+        self.bank = subject("1002", "银行存款", "asset", "debit")
+        self.bank_icbc = subject("100201", "工商银行", "asset", "debit", self.bank)
+        self.bank_ccb = subject("100202", "建设银行", "asset", "debit", self.bank)
+        self.capital = subject("4001", "实收资本", "equity", "credit")
+        self.revenue = subject("6001", "主营业务收入", "revenue", "credit")
+        self.unused = subject("1122", "应收账款", "asset", "debit")
+
+        self._ledger(self.bank_icbc, date(2025, 3, 5), "100.00", "50.00", "0.00", "150.00")
+        # 同一科目当月多条记录时取最新一条
+        self._ledger(self.bank_icbc, date(2025, 3, 20), "150.00", "30.00", "0.00", "180.00")
+        self._ledger(self.bank_ccb, date(2025, 3, 10), "0.00", "20.00", "0.00", "20.00")
+        self._ledger(self.capital, date(2025, 3, 31), "100.00", "0.00", "100.00", "200.00")
+        self._ledger(self.revenue, date(2025, 3, 5), "0.00", "0.00", "40.00", "40.00")
+        self._ledger(self.revenue, date(2025, 3, 25), "0.00", "0.00", "60.00", "60.00")
+
+    def _ledger(self, subject, period_date, opening, debit, credit, closing):
+        return Ledger.objects.create(
+            account_subject=subject, period_year=period_date.year, period_month=period_date.month,
+            period_date=period_date, opening_balance=Decimal(opening), period_debit=Decimal(debit),
+            period_credit=Decimal(credit), closing_balance=Decimal(closing),
+        )
+
+    def test_trial_balance_rolls_up_parent_subjects(self):
+        report = trial_balance_data(2025, 3)
+        rows = {row["subject"]["code"]: row for row in report["rows"]}
+
+        self.assertNotIn("1122", rows)
+        self.assertEqual(rows["100201"]["closing_balance"], Decimal("180.00"))
+        self.assertEqual(rows["1002"]["closing_debit"], Decimal("200.00"))
+        self.assertEqual(rows["1002"]["period_debit"], Decimal("50.00"))
+        self.assertEqual(rows["100202"]["depth"], 1)
+        # 合计只按顶级科目计算，不重复累加下级科目
+        self.assertEqual(report["total_closing_debit"], Decimal("200.00"))
+        self.assertEqual(report["total_closing_credit"], Decimal("260.00"))
+
+    def test_reports_use_constant_queries_and_cache(self):
+        with self.assertNumQueries(2):
+            trial_balance_data(2025, 3)
+        with self.assertNumQueries(0):
+            trial_balance_data(2025, 3)
+
+        balance_sheet = balance_sheet_data(2025, 3)
+        self.assertEqual(balance_sheet["total_assets"], Decimal("200.00"))
+        self.assertEqual(balance_sheet["assets"]["1002"]["balance"], Decimal("200.00"))
+        self.assertEqual(balance_sheet["total_liabilities_equity"], Decimal("200.00"))
+
+        income = income_statement_data(2025, 3)
+        self.assertEqual(income["revenue"]["6001"]["amount"], Decimal("100.00"))
+        self.assertEqual(income["net_profit"], Decimal("100.00"))
+
+    def test_ledger_change_invalidates_cached_period(self):
+        self.assertEqual(balance_sheet_data(2025, 3)["total_assets"], Decimal("200.00"))
+        self._ledger(self.unused, date(2025, 3, 31), "0.00", "30.00", "0.00", "30.00")
+        self.assertEqual(balance_sheet_data(2025, 3)["total_assets"], Decimal("230.00"))
+
+    def test_process_local_cache_uses_short_timeout(self):
+        # 测试环境为 locmem：其他 worker 看不到版本号升级，报表只缓存 LEDGER_REPORT_LOCAL_TIMEOUT 秒
+        with mock.patch.object(services_reports, "LEDGER_REPORT_LOCAL_TIMEOUT", 0):
+            trial_balance_data(2025, 3)
+            with self.assertNumQueries(2):
+                trial_balance_data(2025, 3)
+
+
+class VoucherFixtureMixin:
+    """过账与结账测试共用的科目、期初总账和凭证构造（不含测试用例）"""
+
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        self.user = get_user_model().objects.create_user(username="accountant", password="pwd123456")
+        self.bank = AccountSubject.objects.create(code="1002", name="银行存款", subject_type="asset", direction="debit")
+        self.revenue = AccountSubject.objects.create(code="6001", name="主营业务收入", subject_type="revenue", direction="credit")
+        # 已有期初余额的总账记录
+        Ledger.objects.create(
+            account_subject=self.bank, period_year=2025, period_month=3, period_date=date(2025, 3, 10),
+            opening_balance=Decimal("500.00"), closing_balance=Decimal("500.00"),
+        )
+
+    def _voucher(self, number, amount, status="approved", voucher_date=date(2025, 3, 10), credit=None):
+        voucher = Voucher.objects.create(
+            voucher_number=number, voucher_date=voucher_date, status=status, preparer=self.user,
+            total_debit=Decimal(amount), total_credit=Decimal(credit or amount),
+        )
+        VoucherEntry.objects.create(voucher=voucher, line_number=1, account_subject=self.bank,
+                                    summary="收款", debit_amount=Decimal(amount))
+        VoucherEntry.objects.create(voucher=voucher, line_number=2, account_subject=self.revenue,
+                                    summary="收入", credit_amount=Decimal(amount))
+        return voucher
+
+    def _ledger(self, subject, period_date=date(2025, 3, 10)):
+        return Ledger.objects.get(account_subject=subject, period_date=period_date)
+
+
+class VoucherPostingTests(VoucherFixtureMixin, TestCase):
+    def test_batch_post_aggregates_entries_and_reports_per_voucher(self):
+        first = self._voucher("V-1", "100.00")
+        second = self._voucher("V-2", "50.00")
+        unbalanced = self._voucher("V-3", "10.00", credit="9.00")
+        draft = self._voucher("V-4", "10.00", status="draft")
+
+        self.assertEqual(trial_balance_data(2025, 3)["total_period_debit"], Decimal("0.00"))
+        with self.captureOnCommitCallbacks(execute=True):
+            report = post_vouchers([first.id, second.id, unbalanced.id, draft.id, 999999], self.user, chunk_size=2)
+
+        self.assertEqual((report["succeeded"], report["skipped"], report["failed"]), (2, 2, 1))
+        statuses = {result["voucher_id"]: result["status"] for result in report["results"]}
+        self.assertEqual(statuses[first.id], "posted")
+        self.assertEqual(statuses[unbalanced.id], "skipped")
+        self.assertEqual(statuses[999999], "failed")
+
+        bank = self._ledger(self.bank)
+        self.assertEqual((bank.period_debit, bank.closing_balance), (Decimal("150.00"), Decimal("650.00")))
+        revenue = self._ledger(self.revenue)
+        self.assertEqual((revenue.period_credit, revenue.closing_balance), (Decimal("150.00"), Decimal("150.00")))
+        first.refresh_from_db()
+        self.assertEqual((first.status, first.posted_by_id), ("posted", self.user.id))
+        # 提交后报表缓存失效
+        self.assertEqual(trial_balance_data(2025, 3)["total_period_debit"], Decimal("150.00"))
+
+    def test_unpost_rolls_back_and_removes_empty_ledger_rows(self):
+        voucher = self._voucher("V-1", "100.00")
+        post_vouchers([voucher.id], self.user)
+        self.assertEqual(trial_balance_data(2025, 3)["total_period_debit"], Decimal("100.00"))
+
+        report = unpost_vouchers([voucher.id], self.user)
+
+        self.assertEqual(report["results"][0]["status"], "unposted")
+        self.assertFalse(Ledger.objects.filter(account_subject=self.revenue).exists())
+        self.assertFalse(Ledger.objects.filter(account_subject=self.bank).exists())
+        voucher.refresh_from_db()
+        self.assertEqual((voucher.status, voucher.posted_by_id), ("approved", None))
+        # 批量写入总账后报表缓存随之失效
+        self.assertEqual(trial_balance_data(2025, 3)["total_period_debit"], Decimal("0.00"))
+
+
+class PeriodClosingTests(VoucherFixtureMixin, TestCase):
+    """期末结账：复用过账测试的科目与凭证构造"""
+
+    def test_close_carries_balances_to_next_period(self):
+        post_vouchers([self._voucher("V-1", "100.00").id], self.user)
+
+        report = close_period(2025, 3, self.user)
+
+        self.assertEqual((report["mode"], report["subjects"], report["carried"]), ("full", 2, 2))
+        self.assertEqual(report["next_period"], "2025-04")
+        bank = self._ledger(self.bank, date(2025, 4, 1))
+        self.assertEqual((bank.opening_balance, bank.closing_balance), (Decimal("600.00"), Decimal("600.00")))
+        self.assertEqual(self._ledger(self.revenue, date(2025, 4, 1)).opening_balance, Decimal("100.00"))
+        self.assertEqual(LedgerPeriodClosing.objects.get(period_year=2025, period_month=3).status, "closed")
+
+    def test_reclose_after_reopen_only_carries_changed_subjects(self):
+        capital = AccountSubject.objects.create(code="4001", name="实收资本", subject_type="equity", direction="credit")
+        Ledger.objects.create(
+            account_subject=capital, period_year=2025, period_month=3, period_date=date(2025, 3, 1),
+            opening_balance=Decimal("500.00"), closing_balance=Decimal("500.00"),
+        )
+        post_vouchers([self._voucher("V-1", "100.00").id], self.user)
+        close_period(2025, 3, self.user)
+        # 下期已有发生额，重新结转期初时期末余额随之重算
+        post_vouchers([self._voucher("V-2", "30.00", voucher_date=date(2025, 4, 1)).id], self.user)
+
+        reopen_period(2025, 3, self.user)
+        post_vouchers([self._voucher("V-3", "20.00").id], self.user)
+        report = close_period(2025, 3, self.user)
+
+        self.assertEqual((report["mode"], report["subjects"], report["carried"]), ("incremental", 3, 2))
+        bank = self._ledger(self.bank, date(2025, 4, 1))
+        self.assertEqual((bank.opening_balance, bank.closing_balance), (Decimal("620.00"), Decimal("650.00")))
+        self.assertEqual(self._ledger(capital, date(2025, 4, 1)).opening_balance, Decimal("500.00"))
+
+    def test_unposted_vouchers_block_closing(self):
+        self._voucher("V-1", "100.00")
+        with self.assertRaises(PeriodClosingError):
+            close_period(2025, 3, self.user)
+        self.assertFalse(LedgerPeriodClosing.objects.exists())
+
+
+def _xlsx_upload(name, rows):
+    workbook = Workbook()
+    for row in rows:
+        workbook.active.append(row)
+    buffer = BytesIO()
+    workbook.save(buffer)
+    return SimpleUploadedFile(name, buffer.getvalue())
+
+
+class BulkImportTests(TempMediaRootMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = get_user_model().objects.create_superuser(username="importer", password="pwd123456")
+
+    def test_fund_flow_import_batches_lookups_and_writes_error_report(self):
+        project = Project.objects.create(name="测试项目", project_number="PJT-2025-001", created_by=self.user)
+        upload = _xlsx_upload("流水.xlsx", [
+            ["发生日期", "流水类型", "金额", "账户名称", "对方单位", "摘要", "关联项目编号"],
+            [date(2025, 1, 15), "收入", 10000, "工商银行", "客户A", "项目回款", "PJT-2025-001"],
+            ["2025-01-16", "expense", "5000.50", "工商银行", None, "材料采购", None],
+            [None, None, None, None, None, None, None],
+            ["2025-01-17", "income", "200", "工商银行", "", "回款", "PJT-404"],
+            ["2025-01-18", "income", "-1", "工商银行", "", "回款", "PJT-2025-001"],
+            ["2025-01-19", "transfer", "300", "建设银行", "", "调拨", "PJT-2025-001"],
+        ])
+
+        # 每块 2 行：每块的项目编号各一条 IN 查询，流水号按块预留
+        with mock.patch.object(import_utils, "IMPORT_CHUNK_SIZE", 2):
+            job = import_utils.start_import(self.user, FundFlowImporter, upload)
+
+        self.assertEqual((job.status, job.success_count, job.failed_count), ("succeeded", 3, 2))
+        self.assertEqual([error["row"] for error in job.errors], [5, 6])
+        year = timezone.now().year
+        flows = list(FundFlow.objects.order_by("flow_number").values_list("flow_number", "amount", "project_id"))
+        self.assertEqual(flows, [
+            (f"FLOW-{year}-0001", Decimal("10000.00"), project.id),
+            (f"FLOW-{year}-0002", Decimal("5000.50"), None),
+            (f"FLOW-{year}-0003", Decimal("300.00"), project.id),
+        ])
+
+        with job.error_file.open("rb") as handle:
+            rows = list(load_workbook(handle, read_only=True).active.iter_rows(values_only=True))
+        self.assertEqual(rows[0][0], "行号")
+        self.assertEqual([(row[0], row[-1]) for row in rows[1:]], [(5, "项目编号 PJT-404 不存在"), (6, "金额必须大于0")])
+
+    def test_account_subject_import_view_links_parents_within_file(self):
+        AccountSubject.objects.create(code="1001", name="库存现金", subject_type="asset", direction="debit")
+        upload = _xlsx_upload("科目.xlsx", [
+            ["科目编码", "科目名称", "上级科目编码", "科目类型", "余额方向", "是否启用", "备注说明"],
+            ["100201", "工商银行", "1002", "asset", "debit", "是", ""],
+            ["1002", "银行存款", "", "资产", "借方", "是", ""],
+            ["10020101", "工行基本户", "100201", "asset", "debit", "否", ""],
+            ["1001", "库存现金", "", "asset", "debit", "是", ""],
+            ["2001", "短期借款", "9999", "liability", "credit", "是", ""],
+        ])
+
+        self.client.force_login(self.user)
+        # bulk_create 不触发信号，导入结束后统一升级一次科目版本号
+        with mock.patch("backend.apps.financial_management.services_import.bump_subject_version") as bump:
+            response = self.client.post(reverse("finance_pages:account_subject_import"), {"file": upload})
+        bump.assert_called_once_with()
+
+        subjects = {subject.code: subject for subject in AccountSubject.objects.select_related("parent")}
+        self.assertEqual(subjects["100201"].parent.code, "1002")
+        self.assertEqual((subjects["10020101"].level, subjects["10020101"].is_active), (3, False))
+        self.assertNotIn("2001", subjects)
+        texts = [str(message) for message in get_messages(response.wsgi_request)]
+        self.assertIn("成功导入 3 个会计科目", texts)
+        self.assertTrue(any("科目编码 1001 已存在" in text and "上级科目编码 9999 不存在" in text for text in texts))
+
+
+class VoucherExportTests(TestCase):
+    def setUp(self):
+        User = get_user_model()
+        self.user = User.objects.create_superuser(username="exporter", password="pwd123456")
+        self.preparers = [
+            User.objects.create_user(username=f"preparer{index}", first_name="会计", last_name=str(index))
+            for index in range(6)
+        ]
+        self.client.force_login(self.user)
+
+    def _vouchers(self, start, count):
+        for index in range(start, start + count):
+            Voucher.objects.create(
+                voucher_number=f"JZ-{index:03d}", voucher_date=date(2025, 3, index + 1), status="approved",
+                preparer=self.preparers[index], reviewer=self.user, total_debit=Decimal("100.50"),
+                total_credit=Decimal("100.50"), notes=f"备注{index}",
+            )
+
+    def _export(self, **params):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse("finance_pages:voucher_export"), params)
+            content = b"".join(response.streaming_content)
+        return response, content, len(queries)
+
+    def test_xlsx_export_query_count_does_not_grow_with_rows(self):
+        self._vouchers(0, 2)
+        _, _, baseline = self._export()
+        self._vouchers(2, 4)
+        response, content, query_count = self._export()
+
+        self.assertEqual(query_count, baseline)
+        self.assertTrue(response.filename.startswith("凭证列表_"))
+        rows = list(load_workbook(BytesIO(content), read_only=True).active.iter_rows(values_only=True))
+        self.assertEqual(rows[0][:6], ("凭证字号", "凭证日期", "借方合计", "贷方合计", "状态", "制单人"))
+        self.assertEqual(len(rows), 7)
+        self.assertEqual(rows[1][:6], ("JZ-005", "2025-03-06", 100.5, 100.5, "已审核", "会计 5"))
+        self.assertEqual(rows[1][11], "备注5")
+
+    def test_csv_export_streams_rows_with_bom(self):
+        self._vouchers(0, 2)
+        response, content, _ = self._export(format="csv", status="approved")
+
+        self.assertTrue(response.streaming)
+        text = content.decode("utf-8")
+        self.assertTrue(text.startswith("\ufeff凭证字号,凭证日期"))
+        lines = text.strip().splitlines()
+        self.assertEqual(len(lines), 3)
+        self.assertTrue(lines[1].startswith("JZ-001,2025-03-02,100.5,100.5,已审核,会计 1"))
+
+
+class OCRPoolTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.tmpdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmpdir)
+
+    def _image_file(self, name, color):
+        from PIL import Image
+
+        path = f"{self.tmpdir}/{name}"
+        Image.new("RGB", (40, 20), color).save(path)
+        return path
+
+    def test_invoice_recognition_is_cached_by_file_hash(self):
+        pool = ocr_pool.OCRPool(engine="tesseract")
+        first = self._image_file("a.png", "white")
+        copy = shutil.copy(first, f"{self.tmpdir}/copy.png")
+        other = self._image_file("b.png", "gray")
+        text = "发票代码：370001234567\n发票号码：12345678\n价税合计：￥1,060.00"
+        with mock.patch.object(invoice_ocr_service, "get_ocr_pool", return_value=pool), \
+                mock.patch.object(ocr_pool, "_image_text", return_value=text) as image_text:
+            service = invoice_ocr_service.InvoiceOCRService()
+            result = service.recognize_invoice(first)
+            # 内容相同的文件（换了文件名）直接取缓存
+            service.recognize_invoice(copy)
+            pool.recognize_file(other)
+
+        self.assertTrue(result["success"])
+        self.assertEqual((result["invoice_code"], result["total_amount"]), ("370001234567", Decimal("1060.00")))
+        self.assertEqual(image_text.call_count, 2)
+
+    def test_full_queue_raises_busy(self):
+        pool = ocr_pool.OCRPool(workers=1, max_pending=1, queue_timeout=0.05, engine="tesseract", use_cache=False)
+        self.addCleanup(pool.shutdown)
 
-# Create your tests here.
+        with self.assertRaises(ocr_pool.OCRBusyError):
+            pool._run([(time.sleep, 0.5), (time.sleep, 0.5)])
+        # 正在识别的一页完成、空出位置后可以继续提交
+        pool.queue_timeout = 5
+        self.assertEqual(pool._run([(abs, -3)]), [3])
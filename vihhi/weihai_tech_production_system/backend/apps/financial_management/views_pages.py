@@ -9,7 +9,7 @@ from django.forms import inlineformset_factory
 from django.http import HttpResponse, JsonResponse
 from datetime import timedelta
 from decimal import Decimal, InvalidOperation
-from openpyxl import Workbook, load_workbook
+from openpyxl import Workbook
 from openpyxl.styles import Font, Alignment, PatternFill
 from openpyxl.utils import get_column_letter
 
@@ -26,9 +26,25 @@ except ImportError:
 
 from backend.apps.system_management.services import get_user_permission_codes
 from backend.core.views import HOME_NAV_STRUCTURE, _permission_granted as core_permission_granted, _build_full_top_nav
+from backend.core.sequence import next_document_number
+from backend.utils.export_utils import Column, ExportTable, export_response, user_column
+from backend.apps.financial_management.services_closing import (
+    PeriodClosingError,
+    close_period,
+    next_period,
+    pending_subject_count,
+    reopen_period,
+    unposted_voucher_count,
+)
+from backend.apps.financial_management.services_posting import post_vouchers, unpost_vouchers
+from backend.apps.financial_management.services_reports import (
+    balance_sheet_data,
+    income_statement_data,
+    trial_balance_data,
+)
 from backend.apps.financial_management.models import (
     AccountSubject, Voucher, VoucherEntry,
-    Ledger, Budget, Invoice, FundFlow,
+    Ledger, LedgerPeriodClosing, Budget, Invoice, FundFlow,
     FinancialReport, ReceivableAccount, PayableAccount,
 )
 from .forms import (
@@ -60,21 +76,7 @@ def _generate_voucher_number(voucher_date=None):
     else:
         current_year = timezone.now().year
     
-    # 查找当前年度最大的凭证号
-    max_voucher = Voucher.objects.filter(
-        voucher_number__startswith=f'VOUCHER-{current_year}-'
-    ).aggregate(max_num=Max('voucher_number'))['max_num']
-    
-    if max_voucher:
-        try:
-            # 提取序号部分
-            seq = int(max_voucher.split('-')[-1]) + 1
-        except (ValueError, IndexError):
-            seq = 1
-    else:
-        seq = 1
-    
-    return f'VOUCHER-{current_year}-{seq:04d}'
+    return next_document_number(Voucher.objects, 'voucher_number', 'VOUCHER', period=str(current_year))
 
 
 def _update_budget_from_fund_flow(fund_flow, is_create=True, old_amount=None):
@@ -1037,7 +1039,7 @@ def account_subject_import_template(request):
 
 @login_required
 def account_subject_import(request):
-    """导入会计科目"""
+    """导入会计科目（分块批量写入，大文件转入后台任务）"""
     permission_codes = get_user_permission_codes(request.user)
     if not _permission_granted('financial_management.account.manage', permission_codes):
         messages.error(request, '您没有权限导入会计科目')
@@ -1048,129 +1050,13 @@ def account_subject_import(request):
             messages.error(request, '请选择要导入的文件')
             return redirect('finance_pages:account_subject_management')
         
-        upload_file = request.FILES['file']
-        if not upload_file.name.lower().endswith(('.xlsx', '.xls')):
-            messages.error(request, '请上传Excel文件（.xls或.xlsx格式）')
-            return redirect('finance_pages:account_subject_management')
-        
+        from backend.apps.financial_management.services_import import AccountSubjectImporter
+        from backend.utils.import_utils import ImportFileError, add_import_messages, start_import
         try:
-            from django.db import transaction
-            workbook = load_workbook(upload_file, data_only=True)
-            worksheet = workbook.active
-            
-            # 读取表头
-            headers = [cell.value for cell in worksheet[1]]
-            header_map = {str(h).strip(): i for i, h in enumerate(headers) if h}
-            
-            # 检查必填列
-            required_columns = ['科目编码', '科目名称', '科目类型', '余额方向']
-            missing_columns = [col for col in required_columns if col not in header_map]
-            if missing_columns:
-                messages.error(request, f'缺少必填列：{", ".join(missing_columns)}')
-                return redirect('finance_pages:account_subject_management')
-            
-            success_count = 0
-            error_count = 0
-            errors = []
-            
-            # 读取数据行
-            for row_idx, row in enumerate(worksheet.iter_rows(min_row=2, values_only=True), start=2):
-                # 跳过空行
-                if not row or not any(row):
-                    continue
-                
-                try:
-                    code = str(row[header_map['科目编码']]).strip() if row[header_map['科目编码']] else None
-                    name = str(row[header_map['科目名称']]).strip() if row[header_map['科目名称']] else None
-                    
-                    if not code or not name:
-                        error_count += 1
-                        errors.append(f'第{row_idx}行：科目编码和科目名称不能为空')
-                        continue
-                    
-                    # 检查是否已存在
-                    if AccountSubject.objects.filter(code=code).exists():
-                        error_count += 1
-                        errors.append(f'第{row_idx}行：科目编码 {code} 已存在')
-                        continue
-                    
-                    # 解析其他字段
-                    parent_code = str(row[header_map.get('上级科目编码', -1)]).strip() if header_map.get('上级科目编码', -1) >= 0 and row[header_map.get('上级科目编码', -1)] else None
-                    subject_type = str(row[header_map['科目类型']]).strip() if row[header_map['科目类型']] else None
-                    direction = str(row[header_map['余额方向']]).strip() if row[header_map['余额方向']] else None
-                    is_active_str = str(row[header_map.get('是否启用', -1)]).strip() if header_map.get('是否启用', -1) >= 0 and row[header_map.get('是否启用', -1)] else '是'
-                    description = str(row[header_map.get('备注说明', -1)]).strip() if header_map.get('备注说明', -1) >= 0 and row[header_map.get('备注说明', -1)] else ''
-                    
-                    # 验证科目类型
-                    type_map = {
-                        'asset': 'asset', '资产': 'asset',
-                        'liability': 'liability', '负债': 'liability',
-                        'equity': 'equity', '所有者权益': 'equity',
-                        'revenue': 'revenue', '收入': 'revenue',
-                        'expense': 'expense', '费用': 'expense',
-                        'cost': 'cost', '成本': 'cost',
-                    }
-                    subject_type = type_map.get(subject_type.lower(), subject_type)
-                    if subject_type not in dict(AccountSubject.TYPE_CHOICES):
-                        error_count += 1
-                        errors.append(f'第{row_idx}行：科目类型无效')
-                        continue
-                    
-                    # 验证余额方向
-                    direction_map = {
-                        'debit': 'debit', '借方': 'debit',
-                        'credit': 'credit', '贷方': 'credit',
-                    }
-                    direction = direction_map.get(direction.lower(), direction)
-                    if direction not in dict(AccountSubject.DIRECTION_CHOICES):
-                        error_count += 1
-                        errors.append(f'第{row_idx}行：余额方向无效')
-                        continue
-                    
-                    # 解析是否启用
-                    is_active = is_active_str.lower() in ['是', 'yes', 'true', '1', 'y']
-                    
-                    # 查找上级科目
-                    parent = None
-                    level = 1
-                    if parent_code:
-                        try:
-                            parent = AccountSubject.objects.get(code=parent_code)
-                            level = parent.level + 1
-                        except AccountSubject.DoesNotExist:
-                            error_count += 1
-                            errors.append(f'第{row_idx}行：上级科目编码 {parent_code} 不存在')
-                            continue
-                    
-                    # 创建科目
-                    with transaction.atomic():
-                        AccountSubject.objects.create(
-                            code=code,
-                            name=name,
-                            parent=parent,
-                            subject_type=subject_type,
-                            direction=direction,
-                            level=level,
-                            is_active=is_active,
-                            description=description,
-                            created_by=request.user,
-                        )
-                    success_count += 1
-                    
-                except Exception as e:
-                    error_count += 1
-                    errors.append(f'第{row_idx}行：{str(e)}')
-            
-            if success_count > 0:
-                messages.success(request, f'成功导入 {success_count} 个会计科目')
-            if error_count > 0:
-                error_msg = f'导入失败 {error_count} 个科目'
-                if len(errors) <= 10:
-                    error_msg += '：' + '；'.join(errors)
-                else:
-                    error_msg += f'：前10个错误：' + '；'.join(errors[:10])
-                messages.warning(request, error_msg)
-            
+            job = start_import(request.user, AccountSubjectImporter, request.FILES['file'])
+            add_import_messages(request, job, '个会计科目')
+        except ImportFileError as e:
+            messages.error(request, str(e))
         except Exception as e:
             import logging
             logger = logging.getLogger(__name__)
@@ -1319,17 +1205,7 @@ def budget_create(request):
             # 自动生成预算编号
             if not budget.budget_number:
                 current_year = timezone.now().year
-                max_budget = Budget.objects.filter(
-                    budget_number__startswith=f'BUDGET-{current_year}-'
-                ).aggregate(max_num=Max('budget_number'))['max_num']
-                if max_budget:
-                    try:
-                        seq = int(max_budget.split('-')[-1]) + 1
-                    except (ValueError, IndexError):
-                        seq = 1
-                else:
-                    seq = 1
-                budget.budget_number = f'BUDGET-{current_year}-{seq:04d}'
+                budget.budget_number = next_document_number(Budget.objects, 'budget_number', 'BUDGET', period=str(current_year))
             budget.remaining_amount = budget.budget_amount
             budget.created_by = request.user
             budget.save()
@@ -1482,17 +1358,7 @@ def fund_flow_create(request):
             # 自动生成流水号
             if not fund_flow.flow_number:
                 current_year = timezone.now().year
-                max_flow = FundFlow.objects.filter(
-                    flow_number__startswith=f'FLOW-{current_year}-'
-                ).aggregate(max_num=Max('flow_number'))['max_num']
-                if max_flow:
-                    try:
-                        seq = int(max_flow.split('-')[-1]) + 1
-                    except (ValueError, IndexError):
-                        seq = 1
-                else:
-                    seq = 1
-                fund_flow.flow_number = f'FLOW-{current_year}-{seq:04d}'
+                fund_flow.flow_number = next_document_number(FundFlow.objects, 'flow_number', 'FLOW', period=str(current_year))
             fund_flow.created_by = request.user
             fund_flow.save()
             
@@ -1795,9 +1661,25 @@ def voucher_management(request):
     return render(request, "financial_management/voucher_list.html", context)
 
 
+VOUCHER_EXPORT_TABLE = ExportTable([
+    Column('凭证字号', 'voucher_number', width=18),
+    Column('凭证日期', 'voucher_date', width=12),
+    Column('借方合计', 'total_debit', width=12),
+    Column('贷方合计', 'total_credit', width=12),
+    Column('状态', 'status', width=10),
+    user_column('制单人', 'preparer', width=12),
+    user_column('审核人', 'reviewer', width=12),
+    Column('审核时间', 'reviewed_time', width=18),
+    user_column('过账人', 'posted_by', width=12),
+    Column('过账时间', 'posted_time', width=18),
+    Column('附件数', 'attachment_count', width=10),
+    Column('备注', 'notes', width=30),
+])
+
+
 @login_required
 def voucher_export(request):
-    """导出凭证列表为Excel"""
+    """导出凭证列表为Excel（format=csv 时导出 CSV）"""
     permission_codes = get_user_permission_codes(request.user)
     if not _permission_granted('financial_management.voucher.view', permission_codes):
         messages.error(request, '您没有权限导出凭证')
@@ -1809,8 +1691,8 @@ def voucher_export(request):
     date_from = request.GET.get('date_from', '')
     date_to = request.GET.get('date_to', '')
     
-    # 获取凭证列表
-    vouchers = Voucher.objects.select_related('preparer', 'reviewer', 'posted_by').order_by('-voucher_date', '-voucher_number')
+    # 获取凭证列表（关联查询由导出列定义推导）
+    vouchers = Voucher.objects.order_by('-voucher_date', '-voucher_number')
     
     if search:
         vouchers = vouchers.filter(
@@ -1824,53 +1706,7 @@ def voucher_export(request):
     if date_to:
         vouchers = vouchers.filter(voucher_date__lte=date_to)
     
-    # 创建Excel工作簿
-    workbook = Workbook()
-    worksheet = workbook.active
-    worksheet.title = '凭证列表'
-    
-    # 设置表头
-    headers = ['凭证字号', '凭证日期', '借方合计', '贷方合计', '状态', '制单人', '审核人', '审核时间', '过账人', '过账时间', '附件数', '备注']
-    worksheet.append(headers)
-    
-    # 设置表头样式
-    header_fill = PatternFill(start_color="366092", end_color="366092", fill_type="solid")
-    header_font = Font(bold=True, color="FFFFFF")
-    for cell in worksheet[1]:
-        cell.fill = header_fill
-        cell.font = header_font
-        cell.alignment = Alignment(horizontal="center", vertical="center")
-    
-    # 添加数据
-    status_dict = dict(Voucher.STATUS_CHOICES)
-    for voucher in vouchers:
-        row = [
-            voucher.voucher_number,
-            voucher.voucher_date.strftime('%Y-%m-%d') if voucher.voucher_date else '',
-            float(voucher.total_debit),
-            float(voucher.total_credit),
-            status_dict.get(voucher.status, voucher.status),
-            voucher.preparer.get_full_name() if voucher.preparer else '',
-            voucher.reviewer.get_full_name() if voucher.reviewer else '',
-            voucher.reviewed_time.strftime('%Y-%m-%d %H:%M') if voucher.reviewed_time else '',
-            voucher.posted_by.get_full_name() if voucher.posted_by else '',
-            voucher.posted_time.strftime('%Y-%m-%d %H:%M') if voucher.posted_time else '',
-            voucher.attachment_count,
-            voucher.notes or '',
-        ]
-        worksheet.append(row)
-    
-    # 调整列宽
-    column_widths = [18, 12, 12, 12, 10, 12, 12, 18, 12, 18, 10, 30]
-    for i, width in enumerate(column_widths, 1):
-        worksheet.column_dimensions[worksheet.cell(1, i).column_letter].width = width
-    
-    # 生成响应
-    response = HttpResponse(content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet')
-    filename = timezone.now().strftime('凭证列表_%Y%m%d_%H%M%S.xlsx')
-    response['Content-Disposition'] = f'attachment; filename="{filename}"'
-    workbook.save(response)
-    return response
+    return export_response(vouchers, VOUCHER_EXPORT_TABLE, '凭证列表', file_format=request.GET.get('format'))
 
 
 @login_required
@@ -1947,74 +1783,18 @@ def voucher_batch_post(request):
             return redirect('finance_pages:voucher_management')
         
         try:
-            vouchers = Voucher.objects.filter(id__in=voucher_ids)
-            success_count = 0
-            error_count = 0
-            
-            for voucher in vouchers:
-                # 检查状态
-                if voucher.status != 'approved':
-                    error_count += 1
-                    continue
-                
-                # 检查借贷是否平衡
-                if voucher.total_debit != voucher.total_credit:
-                    error_count += 1
-                    continue
-                
-                # 执行过账
-                try:
-                    from django.db import transaction
-                    with transaction.atomic():
-                        # 更新凭证状态
-                        voucher.status = 'posted'
-                        voucher.posted_by = request.user
-                        voucher.posted_time = timezone.now()
-                        voucher.save()
-                        
-                        # 生成总账记录
-                        entries = voucher.entries.select_related('account_subject').all()
-                        period_year = voucher.voucher_date.year
-                        period_month = voucher.voucher_date.month
-                        
-                        for entry in entries:
-                            # 获取或创建总账记录
-                            ledger, created = Ledger.objects.get_or_create(
-                                account_subject=entry.account_subject,
-                                period_year=period_year,
-                                period_month=period_month,
-                                period_date=voucher.voucher_date,
-                                defaults={
-                                    'opening_balance': Decimal('0.00'),
-                                    'period_debit': Decimal('0.00'),
-                                    'period_credit': Decimal('0.00'),
-                                    'closing_balance': Decimal('0.00'),
-                                }
-                            )
-                            
-                            # 更新总账
-                            ledger.period_debit += entry.debit_amount or Decimal('0.00')
-                            ledger.period_credit += entry.credit_amount or Decimal('0.00')
-                            
-                            # 计算期末余额
-                            if entry.account_subject.direction == 'debit':
-                                ledger.closing_balance = ledger.opening_balance + ledger.period_debit - ledger.period_credit
-                            else:
-                                ledger.closing_balance = ledger.opening_balance + ledger.period_credit - ledger.period_debit
-                            
-                            ledger.save()
-                        
-                        success_count += 1
-                except Exception as e:
-                    import logging
-                    logger = logging.getLogger(__name__)
-                    logger.exception('过账凭证失败: %s', str(e))
-                    error_count += 1
-            
-            if success_count > 0:
-                messages.success(request, f'成功过账 {success_count} 张凭证')
+            report = post_vouchers(voucher_ids, request.user)
+            if report['succeeded'] > 0:
+                messages.success(request, f"成功过账 {report['succeeded']} 张凭证")
+            error_count = report['skipped'] + report['failed']
             if error_count > 0:
-                messages.warning(request, f'{error_count} 张凭证过账失败')
+                errors = [result for result in report['results'] if result['status'] in ('skipped', 'failed')]
+                details = '；'.join(
+                    f"{result['voucher_number'] or result['voucher_id']}：{result['message']}" for result in errors[:10]
+                )
+                if len(errors) > 10:
+                    details += ' 等'
+                messages.warning(request, f'{error_count} 张凭证过账失败（{details}）')
         except Exception as e:
             import logging
             logger = logging.getLogger(__name__)
@@ -2279,9 +2059,30 @@ def budget_execution_analysis(request):
     return render(request, "financial_management/budget_execution_analysis.html", context)
 
 
+BUDGET_EXPORT_TABLE = ExportTable([
+    Column('预算编号', 'budget_number', width=18),
+    Column('预算名称', 'name', width=25),
+    Column('预算年度', 'budget_year', width=10),
+    Column('预算金额', 'budget_amount', width=12),
+    Column('已用金额', 'used_amount', width=12),
+    Column('剩余金额', 'remaining_amount', width=12),
+    Column('所属部门', 'department__name', width=15),
+    Column('预算科目', 'account_subject', width=20,
+           format=lambda subject: f"{subject.code} {subject.name}" if subject else '',
+           needs=('account_subject__code', 'account_subject__name')),
+    Column('状态', 'status', width=10),
+    user_column('审批人', 'approver', width=12),
+    Column('审批时间', 'approved_time', width=18),
+    Column('开始日期', 'start_date', width=12),
+    Column('结束日期', 'end_date', width=12),
+    user_column('创建人', 'created_by', width=12),
+    Column('创建时间', 'created_time', width=18),
+])
+
+
 @login_required
 def budget_export(request):
-    """导出预算列表为Excel"""
+    """导出预算列表为Excel（format=csv 时导出 CSV）"""
     permission_codes = get_user_permission_codes(request.user)
     if not _permission_granted('financial_management.budget.view', permission_codes):
         messages.error(request, '您没有权限导出预算')
@@ -2292,7 +2093,7 @@ def budget_export(request):
     status = request.GET.get('status', '')
     budget_year = request.GET.get('budget_year', '')
     
-    budgets = Budget.objects.select_related('department', 'account_subject', 'approver', 'created_by').order_by('-budget_year', '-created_time')
+    budgets = Budget.objects.order_by('-budget_year', '-created_time')
     
     if search:
         budgets = budgets.filter(
@@ -2305,54 +2106,7 @@ def budget_export(request):
     if budget_year:
         budgets = budgets.filter(budget_year=int(budget_year))
     
-    # 创建Excel工作簿
-    workbook = Workbook()
-    worksheet = workbook.active
-    worksheet.title = '预算列表'
-    
-    headers = ['预算编号', '预算名称', '预算年度', '预算金额', '已用金额', '剩余金额', '所属部门', '预算科目', '状态', '审批人', '审批时间', '开始日期', '结束日期', '创建人', '创建时间']
-    worksheet.append(headers)
-    
-    # 设置表头样式
-    header_fill = PatternFill(start_color="366092", end_color="366092", fill_type="solid")
-    header_font = Font(bold=True, color="FFFFFF")
-    for cell in worksheet[1]:
-        cell.fill = header_fill
-        cell.font = header_font
-        cell.alignment = Alignment(horizontal="center", vertical="center")
-    
-    # 添加数据
-    status_dict = dict(Budget.STATUS_CHOICES)
-    for budget in budgets:
-        row = [
-            budget.budget_number,
-            budget.name,
-            budget.budget_year,
-            float(budget.budget_amount),
-            float(budget.used_amount),
-            float(budget.remaining_amount),
-            budget.department.name if budget.department else '',
-            f"{budget.account_subject.code} {budget.account_subject.name}" if budget.account_subject else '',
-            status_dict.get(budget.status, budget.status),
-            budget.approver.get_full_name() if budget.approver else '',
-            budget.approved_time.strftime('%Y-%m-%d %H:%M') if budget.approved_time else '',
-            budget.start_date.strftime('%Y-%m-%d') if budget.start_date else '',
-            budget.end_date.strftime('%Y-%m-%d') if budget.end_date else '',
-            budget.created_by.get_full_name() if budget.created_by else '',
-            budget.created_time.strftime('%Y-%m-%d %H:%M') if budget.created_time else '',
-        ]
-        worksheet.append(row)
-    
-    # 调整列宽
-    column_widths = [18, 25, 10, 12, 12, 12, 15, 20, 10, 12, 18, 12, 12, 12, 18]
-    for i, width in enumerate(column_widths, 1):
-        worksheet.column_dimensions[worksheet.cell(1, i).column_letter].width = width
-    
-    response = HttpResponse(content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet')
-    filename = timezone.now().strftime('预算列表_%Y%m%d_%H%M%S.xlsx')
-    response['Content-Disposition'] = f'attachment; filename="{filename}"'
-    workbook.save(response)
-    return response
+    return export_response(budgets, BUDGET_EXPORT_TABLE, '预算列表', file_format=request.GET.get('format'))
 
 
 @login_required
@@ -2445,9 +2199,26 @@ def invoice_management(request):
     return render(request, "financial_management/invoice_list.html", context)
 
 
+INVOICE_EXPORT_TABLE = ExportTable([
+    Column('发票号码', 'invoice_number', width=20),
+    Column('发票代码', 'invoice_code', width=15),
+    Column('发票类型', 'invoice_type', width=10),
+    Column('发票日期', 'invoice_date', width=12),
+    Column('客户名称', 'customer_name', width=20),
+    Column('供应商名称', 'supplier_name', width=20),
+    Column('金额', 'amount', width=12, format=lambda value: float(value or 0)),
+    Column('税额', 'tax_amount', width=12, format=lambda value: float(value or 0)),
+    Column('价税合计', 'total_amount', width=12, format=lambda value: float(value or 0)),
+    Column('状态', 'status', width=10),
+    Column('备注', 'notes', width=30),
+    user_column('创建人', 'created_by', width=12),
+    Column('创建时间', 'created_time', width=18),
+])
+
+
 @login_required
 def invoice_export(request):
-    """导出发票列表为Excel"""
+    """导出发票列表为Excel（format=csv 时导出 CSV）"""
     permission_codes = get_user_permission_codes(request.user)
     if not _permission_granted('financial_management.invoice.view', permission_codes):
         messages.error(request, '您没有权限导出发票')
@@ -2460,14 +2231,15 @@ def invoice_export(request):
     date_from = request.GET.get('date_from', '')
     date_to = request.GET.get('date_to', '')
     
-    invoices = Invoice.objects.select_related('project', 'created_by').order_by('-invoice_date', '-invoice_number')
+    invoices = Invoice.objects.order_by('-invoice_date', '-invoice_number')
     
+    # 筛选条件与发票列表页一致
     if search:
         invoices = invoices.filter(
             Q(invoice_number__icontains=search) |
-            Q(seller_name__icontains=search) |
-            Q(buyer_name__icontains=search) |
-            Q(description__icontains=search)
+            Q(invoice_code__icontains=search) |
+            Q(customer_name__icontains=search) |
+            Q(supplier_name__icontains=search)
         )
     if invoice_type:
         invoices = invoices.filter(invoice_type=invoice_type)
@@ -2478,53 +2250,7 @@ def invoice_export(request):
     if date_to:
         invoices = invoices.filter(invoice_date__lte=date_to)
     
-    # 创建Excel工作簿
-    workbook = Workbook()
-    worksheet = workbook.active
-    worksheet.title = '发票列表'
-    
-    headers = ['发票号码', '发票类型', '发票日期', '销售方', '购买方', '金额', '税额', '价税合计', '状态', '关联项目', '备注', '创建人', '创建时间']
-    worksheet.append(headers)
-    
-    # 设置表头样式
-    header_fill = PatternFill(start_color="366092", end_color="366092", fill_type="solid")
-    header_font = Font(bold=True, color="FFFFFF")
-    for cell in worksheet[1]:
-        cell.fill = header_fill
-        cell.font = header_font
-        cell.alignment = Alignment(horizontal="center", vertical="center")
-    
-    # 添加数据
-    type_dict = dict(Invoice.TYPE_CHOICES)
-    status_dict = dict(Invoice.STATUS_CHOICES)
-    for invoice in invoices:
-        row = [
-            invoice.invoice_number,
-            type_dict.get(invoice.invoice_type, invoice.invoice_type),
-            invoice.invoice_date.strftime('%Y-%m-%d') if invoice.invoice_date else '',
-            invoice.seller_name or '',
-            invoice.buyer_name or '',
-            float(invoice.amount) if invoice.amount else 0,
-            float(invoice.tax_amount) if invoice.tax_amount else 0,
-            float(invoice.total_amount) if invoice.total_amount else 0,
-            status_dict.get(invoice.status, invoice.status),
-            invoice.project.project_number if invoice.project else '',
-            invoice.description or '',
-            invoice.created_by.get_full_name() if invoice.created_by else '',
-            invoice.created_time.strftime('%Y-%m-%d %H:%M') if invoice.created_time else '',
-        ]
-        worksheet.append(row)
-    
-    # 调整列宽
-    column_widths = [20, 10, 12, 20, 20, 12, 12, 12, 10, 15, 30, 12, 18]
-    for i, width in enumerate(column_widths, 1):
-        worksheet.column_dimensions[worksheet.cell(1, i).column_letter].width = width
-    
-    response = HttpResponse(content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet')
-    filename = timezone.now().strftime('发票列表_%Y%m%d_%H%M%S.xlsx')
-    response['Content-Disposition'] = f'attachment; filename="{filename}"'
-    workbook.save(response)
-    return response
+    return export_response(invoices, INVOICE_EXPORT_TABLE, '发票列表', file_format=request.GET.get('format'))
 
 
 @login_required
@@ -2664,7 +2390,7 @@ def fund_flow_import_template(request):
 
 @login_required
 def fund_flow_import(request):
-    """导入资金流水"""
+    """导入资金流水（分块批量写入，大文件转入后台任务）"""
     permission_codes = get_user_permission_codes(request.user)
     if not _permission_granted('financial_management.fund_flow.create', permission_codes):
         messages.error(request, '您没有权限导入资金流水')
@@ -2675,158 +2401,13 @@ def fund_flow_import(request):
             messages.error(request, '请选择要导入的文件')
             return redirect('finance_pages:fund_flow_management')
         
-        upload_file = request.FILES['file']
-        if not upload_file.name.lower().endswith(('.xlsx', '.xls')):
-            messages.error(request, '请上传Excel文件（.xls或.xlsx格式）')
-            return redirect('finance_pages:fund_flow_management')
-        
+        from backend.apps.financial_management.services_import import FundFlowImporter
+        from backend.utils.import_utils import ImportFileError, add_import_messages, start_import
         try:
-            from django.db import transaction
-            from datetime import datetime
-            workbook = load_workbook(upload_file, data_only=True)
-            worksheet = workbook.active
-            
-            # 读取表头
-            headers = [cell.value for cell in worksheet[1]]
-            header_map = {str(h).strip(): i for i, h in enumerate(headers) if h}
-            
-            # 检查必填列
-            required_columns = ['发生日期', '流水类型', '金额', '账户名称', '摘要']
-            missing_columns = [col for col in required_columns if col not in header_map]
-            if missing_columns:
-                messages.error(request, f'缺少必填列：{", ".join(missing_columns)}')
-                return redirect('finance_pages:fund_flow_management')
-            
-            success_count = 0
-            error_count = 0
-            errors = []
-            current_year = timezone.now().year
-            
-            # 读取数据行
-            for row_idx, row in enumerate(worksheet.iter_rows(min_row=2, values_only=True), start=2):
-                # 跳过空行
-                if not row or not any(row):
-                    continue
-                
-                try:
-                    # 解析日期
-                    flow_date_str = str(row[header_map['发生日期']]).strip() if row[header_map['发生日期']] else None
-                    if not flow_date_str:
-                        error_count += 1
-                        errors.append(f'第{row_idx}行：发生日期不能为空')
-                        continue
-                    
-                    try:
-                        if isinstance(row[header_map['发生日期']], datetime):
-                            flow_date = row[header_map['发生日期']].date()
-                        else:
-                            flow_date = datetime.strptime(flow_date_str, '%Y-%m-%d').date()
-                    except (ValueError, TypeError):
-                        error_count += 1
-                        errors.append(f'第{row_idx}行：发生日期格式错误，应为YYYY-MM-DD')
-                        continue
-                    
-                    # 解析流水类型
-                    flow_type_str = str(row[header_map['流水类型']]).strip() if row[header_map['流水类型']] else None
-                    type_map = {
-                        'income': 'income', '收入': 'income',
-                        'expense': 'expense', '支出': 'expense',
-                        'transfer': 'transfer', '转账': 'transfer',
-                    }
-                    flow_type = type_map.get(flow_type_str.lower(), flow_type_str)
-                    if flow_type not in dict(FundFlow.TYPE_CHOICES):
-                        error_count += 1
-                        errors.append(f'第{row_idx}行：流水类型无效')
-                        continue
-                    
-                    # 解析金额
-                    amount_str = str(row[header_map['金额']]).strip() if row[header_map['金额']] else None
-                    if not amount_str:
-                        error_count += 1
-                        errors.append(f'第{row_idx}行：金额不能为空')
-                        continue
-                    try:
-                        amount = Decimal(amount_str)
-                        if amount <= 0:
-                            error_count += 1
-                            errors.append(f'第{row_idx}行：金额必须大于0')
-                            continue
-                    except (ValueError, InvalidOperation):
-                        error_count += 1
-                        errors.append(f'第{row_idx}行：金额格式错误')
-                        continue
-                    
-                    # 解析其他字段
-                    account_name = str(row[header_map['账户名称']]).strip() if row[header_map['账户名称']] else None
-                    if not account_name:
-                        error_count += 1
-                        errors.append(f'第{row_idx}行：账户名称不能为空')
-                        continue
-                    
-                    counterparty = str(row[header_map.get('对方单位', -1)]).strip() if header_map.get('对方单位', -1) >= 0 and row[header_map.get('对方单位', -1)] else ''
-                    summary = str(row[header_map['摘要']]).strip() if row[header_map['摘要']] else None
-                    if not summary:
-                        error_count += 1
-                        errors.append(f'第{row_idx}行：摘要不能为空')
-                        continue
-                    
-                    project_number = str(row[header_map.get('关联项目编号', -1)]).strip() if header_map.get('关联项目编号', -1) >= 0 and row[header_map.get('关联项目编号', -1)] else None
-                    
-                    # 查找关联项目
-                    project = None
-                    if project_number:
-                        try:
-                            from backend.apps.production_management.models import Project
-                            project = Project.objects.get(project_number=project_number)
-                        except Project.DoesNotExist:
-                            error_count += 1
-                            errors.append(f'第{row_idx}行：项目编号 {project_number} 不存在')
-                            continue
-                    
-                    # 生成流水号
-                    max_flow = FundFlow.objects.filter(
-                        flow_number__startswith=f'FLOW-{current_year}-'
-                    ).order_by('-flow_number').first()
-                    
-                    if max_flow:
-                        try:
-                            seq = int(max_flow.flow_number.split('-')[-1]) + 1
-                        except (ValueError, IndexError):
-                            seq = 1
-                    else:
-                        seq = 1
-                    
-                    flow_number = f'FLOW-{current_year}-{seq:04d}'
-                    
-                    # 创建资金流水
-                    with transaction.atomic():
-                        FundFlow.objects.create(
-                            flow_number=flow_number,
-                            flow_date=flow_date,
-                            flow_type=flow_type,
-                            amount=amount,
-                            account_name=account_name,
-                            counterparty=counterparty,
-                            summary=summary,
-                            project=project,
-                            created_by=request.user,
-                        )
-                    success_count += 1
-                    
-                except Exception as e:
-                    error_count += 1
-                    errors.append(f'第{row_idx}行：{str(e)}')
-            
-            if success_count > 0:
-                messages.success(request, f'成功导入 {success_count} 条资金流水')
-            if error_count > 0:
-                error_msg = f'导入失败 {error_count} 条记录'
-                if len(errors) <= 10:
-                    error_msg += '：' + '；'.join(errors)
-                else:
-                    error_msg += f'：前10个错误：' + '；'.join(errors[:10])
-                messages.warning(request, error_msg)
-            
+            job = start_import(request.user, FundFlowImporter, request.FILES['file'])
+            add_import_messages(request, job, '条资金流水')
+        except ImportFileError as e:
+            messages.error(request, str(e))
         except Exception as e:
             import logging
             logger = logging.getLogger(__name__)
@@ -3592,55 +3173,11 @@ def voucher_post(request, voucher_id):
         return redirect('finance_pages:voucher_detail', voucher_id=voucher.id)
     
     if request.method == 'POST':
-        from django.db import transaction
-        
-        try:
-            with transaction.atomic():
-                # 更新凭证状态
-                voucher.status = 'posted'
-                voucher.posted_by = request.user
-                voucher.posted_time = timezone.now()
-                voucher.save()
-                
-                # 生成总账记录
-                period_year = voucher.voucher_date.year
-                period_month = voucher.voucher_date.month
-                
-                for entry in voucher.entries.all():
-                    # 获取或创建总账记录
-                    ledger, created = Ledger.objects.get_or_create(
-                        account_subject=entry.account_subject,
-                        period_year=period_year,
-                        period_month=period_month,
-                        period_date=voucher.voucher_date,
-                        defaults={
-                            'opening_balance': Decimal('0.00'),
-                            'period_debit': Decimal('0.00'),
-                            'period_credit': Decimal('0.00'),
-                            'closing_balance': Decimal('0.00'),
-                        }
-                    )
-                    
-                    # 更新总账金额
-                    ledger.period_debit += entry.debit_amount or Decimal('0.00')
-                    ledger.period_credit += entry.credit_amount or Decimal('0.00')
-                    
-                    # 计算期末余额（根据科目余额方向）
-                    if entry.account_subject.direction == 'debit':
-                        # 借方科目：期初余额 + 借方 - 贷方
-                        ledger.closing_balance = ledger.opening_balance + ledger.period_debit - ledger.period_credit
-                    else:
-                        # 贷方科目：期初余额 + 贷方 - 借方
-                        ledger.closing_balance = ledger.opening_balance + ledger.period_credit - ledger.period_debit
-                    
-                    ledger.save()
-                
-                messages.success(request, f'凭证 {voucher.voucher_number} 过账成功，已生成总账记录')
-        except Exception as e:
-            import logging
-            logger = logging.getLogger(__name__)
-            logger.exception('过账失败: %s', str(e))
-            messages.error(request, f'过账失败：{str(e)}')
+        result = post_vouchers([voucher.id], request.user)['results'][0]
+        if result['status'] == 'posted':
+            messages.success(request, f'凭证 {voucher.voucher_number} 过账成功，已生成总账记录')
+        else:
+            messages.error(request, f"过账失败：{result['message']}")
         
         return redirect('finance_pages:voucher_detail', voucher_id=voucher.id)
     
@@ -3675,54 +3212,11 @@ def voucher_unpost(request, voucher_id):
         return redirect('finance_pages:voucher_detail', voucher_id=voucher.id)
     
     if request.method == 'POST':
-        from django.db import transaction
-        
-        try:
-            with transaction.atomic():
-                # 删除总账记录（回滚过账操作）
-                period_year = voucher.voucher_date.year
-                period_month = voucher.voucher_date.month
-                
-                for entry in voucher.entries.all():
-                    try:
-                        ledger = Ledger.objects.get(
-                            account_subject=entry.account_subject,
-                            period_year=period_year,
-                            period_month=period_month,
-                            period_date=voucher.voucher_date,
-                        )
-                        
-                        # 回滚总账金额
-                        ledger.period_debit -= entry.debit_amount or Decimal('0.00')
-                        ledger.period_credit -= entry.credit_amount or Decimal('0.00')
-                        
-                        # 重新计算期末余额
-                        if entry.account_subject.direction == 'debit':
-                            ledger.closing_balance = ledger.opening_balance + ledger.period_debit - ledger.period_credit
-                        else:
-                            ledger.closing_balance = ledger.opening_balance + ledger.period_credit - ledger.period_debit
-                        
-                        # 如果本期借贷都为0，可以删除该总账记录
-                        if ledger.period_debit == Decimal('0.00') and ledger.period_credit == Decimal('0.00'):
-                            ledger.delete()
-                        else:
-                            ledger.save()
-                    except Ledger.DoesNotExist:
-                        # 总账记录不存在，跳过
-                        pass
-                
-                # 更新凭证状态
-                voucher.status = 'approved'
-                voucher.posted_by = None
-                voucher.posted_time = None
-                voucher.save()
-                
-                messages.success(request, f'凭证 {voucher.voucher_number} 反过账成功，已回滚总账记录')
-        except Exception as e:
-            import logging
-            logger = logging.getLogger(__name__)
-            logger.exception('反过账失败: %s', str(e))
-            messages.error(request, f'反过账失败：{str(e)}')
+        result = unpost_vouchers([voucher.id], request.user)['results'][0]
+        if result['status'] == 'unposted':
+            messages.success(request, f'凭证 {voucher.voucher_number} 反过账成功，已回滚总账记录')
+        else:
+            messages.error(request, f"反过账失败：{result['message']}")
         
         return redirect('finance_pages:voucher_detail', voucher_id=voucher.id)
     
@@ -4231,72 +3725,40 @@ def ledger_period_closing(request):
         period_month = today.month
     
     # 计算下一期间
-    if period_month == 12:
-        next_period_year = period_year + 1
-        next_period_month = 1
-    else:
-        next_period_year = period_year
-        next_period_month = period_month + 1
-    
-    # 检查当前期间是否有未过账的凭证
-    unposted_vouchers = Voucher.objects.filter(
-        voucher_date__year=period_year,
-        voucher_date__month=period_month,
-        status__in=['draft', 'submitted', 'approved']
-    ).count()
+    next_period_year, next_period_month = next_period(period_year, period_month)
+    closing_url = f"{reverse('finance_pages:ledger_period_closing')}?period_year={period_year}&period_month={period_month}"
     
     if request.method == 'POST':
-        if unposted_vouchers > 0:
-            messages.error(request, f'当前期间还有 {unposted_vouchers} 张凭证未过账，不能结账')
-            return redirect(f"{reverse('finance_pages:ledger_period_closing')}?period_year={period_year}&period_month={period_month}")
+        action = request.POST.get('action', 'close')
+        if action == 'reopen':
+            if reopen_period(period_year, period_month, request.user):
+                messages.success(request, f'{period_year}年{period_month}月已反结账，补记凭证后请重新结账')
+            else:
+                messages.error(request, f'{period_year}年{period_month}月尚未结账')
+            return redirect(closing_url)
         
-        from django.db import transaction
         try:
-            with transaction.atomic():
-                # 获取当前期间的所有总账记录
-                current_ledgers = Ledger.objects.filter(
-                    period_year=period_year,
-                    period_month=period_month
-                ).select_related('account_subject')
-                
-                success_count = 0
-                for ledger in current_ledgers:
-                    # 获取下一期间的期初余额记录（使用下一期间的第一天）
-                    next_period_date = timezone.datetime(next_period_year, next_period_month, 1).date()
-                    
-                    next_ledger, created = Ledger.objects.get_or_create(
-                        account_subject=ledger.account_subject,
-                        period_year=next_period_year,
-                        period_month=next_period_month,
-                        period_date=next_period_date,
-                        defaults={
-                            'opening_balance': ledger.closing_balance,
-                            'period_debit': Decimal('0.00'),
-                            'period_credit': Decimal('0.00'),
-                            'closing_balance': ledger.closing_balance,
-                        }
-                    )
-                    
-                    if not created:
-                        # 更新期初余额
-                        next_ledger.opening_balance = ledger.closing_balance
-                        # 重新计算期末余额
-                        if ledger.account_subject.direction == 'debit':
-                            next_ledger.closing_balance = next_ledger.opening_balance + next_ledger.period_debit - next_ledger.period_credit
-                        else:
-                            next_ledger.closing_balance = next_ledger.opening_balance + next_ledger.period_credit - next_ledger.period_debit
-                        next_ledger.save()
-                    
-                    success_count += 1
-                
-                messages.success(request, f'成功结账：{period_year}年{period_month}月 → {next_period_year}年{next_period_month}月，共 {success_count} 个科目')
-                return redirect('finance_pages:ledger_management')
+            report = close_period(
+                period_year, period_month, request.user, full=request.POST.get('full') == '1'
+            )
+            messages.success(
+                request,
+                f"成功结账：{period_year}年{period_month}月 → {next_period_year}年{next_period_month}月，"
+                f"共 {report['subjects']} 个科目，结转 {report['carried']} 个，耗时 {report['timings']['total']} 秒",
+            )
+            return redirect('finance_pages:ledger_management')
+        except PeriodClosingError as e:
+            messages.error(request, str(e))
+            return redirect(closing_url)
         except Exception as e:
             import logging
             logger = logging.getLogger(__name__)
             logger.exception('期末结账失败: %s', str(e))
             messages.error(request, f'期末结账失败：{str(e)}')
     
+    # 检查当前期间是否有未过账的凭证
+    unposted_vouchers = unposted_voucher_count(period_year, period_month)
+    
     # 获取当前期间的科目统计
     current_ledgers = Ledger.objects.filter(
         period_year=period_year,
@@ -4317,6 +3779,8 @@ def ledger_period_closing(request):
         'next_period_month': next_period_month,
         'unposted_vouchers': unposted_vouchers,
         'ledger_count': current_ledgers.count(),
+        'closing': LedgerPeriodClosing.objects.filter(period_year=period_year, period_month=period_month).first(),
+        'pending_subject_count': pending_subject_count(period_year, period_month),
         'years': range(today.year - 2, today.year + 2),
         'months': range(1, 13),
     })
@@ -4467,59 +3931,8 @@ def account_balance_sheet(request):
         period_year = today.year
         period_month = today.month
     
-    # 获取所有会计科目及其余额
-    account_subjects = AccountSubject.objects.filter(is_active=True).order_by('code')
-    balance_data = []
-    
-    total_opening_debit = Decimal('0.00')
-    total_opening_credit = Decimal('0.00')
-    total_period_debit = Decimal('0.00')
-    total_period_credit = Decimal('0.00')
-    total_closing_debit = Decimal('0.00')
-    total_closing_credit = Decimal('0.00')
-    
-    for subject in account_subjects:
-        # 获取该科目的总账记录
-        ledger = Ledger.objects.filter(
-            account_subject=subject,
-            period_year=period_year,
-            period_month=period_month
-        ).order_by('-period_date').first()
-        
-        if ledger:
-            opening_balance = ledger.opening_balance
-            period_debit = ledger.period_debit
-            period_credit = ledger.period_credit
-            closing_balance = ledger.closing_balance
-            
-            # 根据余额方向调整显示
-            if subject.direction == 'debit':
-                opening_debit = opening_balance if opening_balance >= 0 else Decimal('0.00')
-                opening_credit = -opening_balance if opening_balance < 0 else Decimal('0.00')
-                closing_debit = closing_balance if closing_balance >= 0 else Decimal('0.00')
-                closing_credit = -closing_balance if closing_balance < 0 else Decimal('0.00')
-            else:
-                opening_debit = -opening_balance if opening_balance < 0 else Decimal('0.00')
-                opening_credit = opening_balance if opening_balance >= 0 else Decimal('0.00')
-                closing_debit = -closing_balance if closing_balance < 0 else Decimal('0.00')
-                closing_credit = closing_balance if closing_balance >= 0 else Decimal('0.00')
-            
-            balance_data.append({
-                'subject': subject,
-                'opening_debit': opening_debit,
-                'opening_credit': opening_credit,
-                'period_debit': period_debit,
-                'period_credit': period_credit,
-                'closing_debit': closing_debit,
-                'closing_credit': closing_credit,
-            })
-            
-            total_opening_debit += opening_debit
-            total_opening_credit += opening_credit
-            total_period_debit += period_debit
-            total_period_credit += period_credit
-            total_closing_debit += closing_debit
-            total_closing_credit += closing_credit
+    # 获取所有会计科目及其余额（单次查询 + 科目树汇总，结果按总账版本缓存）
+    report = trial_balance_data(period_year, period_month)
     
     context = _context(
         "科目余额表",
@@ -4529,15 +3942,15 @@ def account_balance_sheet(request):
         use_financial_nav=True
     )
     context.update({
-        'balance_data': balance_data,
+        'balance_data': report['rows'],
         'period_year': period_year,
         'period_month': period_month,
-        'total_opening_debit': total_opening_debit,
-        'total_opening_credit': total_opening_credit,
-        'total_period_debit': total_period_debit,
-        'total_period_credit': total_period_credit,
-        'total_closing_debit': total_closing_debit,
-        'total_closing_credit': total_closing_credit,
+        'total_opening_debit': report['total_opening_debit'],
+        'total_opening_credit': report['total_opening_credit'],
+        'total_period_debit': report['total_period_debit'],
+        'total_period_credit': report['total_period_credit'],
+        'total_closing_debit': report['total_closing_debit'],
+        'total_closing_credit': report['total_closing_credit'],
         'years': range(today.year - 2, today.year + 2),
         'months': range(1, 13),
     })
@@ -4563,65 +3976,8 @@ def trial_balance(request):
         period_year = today.year
         period_month = today.month
     
-    # 获取所有会计科目及其余额
-    account_subjects = AccountSubject.objects.filter(is_active=True).order_by('code')
-    trial_data = []
-    
-    total_opening_debit = Decimal('0.00')
-    total_opening_credit = Decimal('0.00')
-    total_period_debit = Decimal('0.00')
-    total_period_credit = Decimal('0.00')
-    total_closing_debit = Decimal('0.00')
-    total_closing_credit = Decimal('0.00')
-    
-    for subject in account_subjects:
-        # 获取该科目的总账记录
-        ledger = Ledger.objects.filter(
-            account_subject=subject,
-            period_year=period_year,
-            period_month=period_month
-        ).order_by('-period_date').first()
-        
-        if ledger:
-            opening_balance = ledger.opening_balance
-            period_debit = ledger.period_debit
-            period_credit = ledger.period_credit
-            closing_balance = ledger.closing_balance
-            
-            # 根据余额方向调整显示
-            if subject.direction == 'debit':
-                opening_debit = opening_balance if opening_balance >= 0 else Decimal('0.00')
-                opening_credit = -opening_balance if opening_balance < 0 else Decimal('0.00')
-                closing_debit = closing_balance if closing_balance >= 0 else Decimal('0.00')
-                closing_credit = -closing_balance if closing_balance < 0 else Decimal('0.00')
-            else:
-                opening_debit = -opening_balance if opening_balance < 0 else Decimal('0.00')
-                opening_credit = opening_balance if opening_balance >= 0 else Decimal('0.00')
-                closing_debit = -closing_balance if closing_balance < 0 else Decimal('0.00')
-                closing_credit = closing_balance if closing_balance >= 0 else Decimal('0.00')
-            
-            trial_data.append({
-                'subject': subject,
-                'opening_debit': opening_debit,
-                'opening_credit': opening_credit,
-                'period_debit': period_debit,
-                'period_credit': period_credit,
-                'closing_debit': closing_debit,
-                'closing_credit': closing_credit,
-            })
-            
-            total_opening_debit += opening_debit
-            total_opening_credit += opening_credit
-            total_period_debit += period_debit
-            total_period_credit += period_credit
-            total_closing_debit += closing_debit
-            total_closing_credit += closing_credit
-    
-    # 检查是否平衡
-    opening_balanced = abs(total_opening_debit - total_opening_credit) < Decimal('0.01')
-    period_balanced = abs(total_period_debit - total_period_credit) < Decimal('0.01')
-    closing_balanced = abs(total_closing_debit - total_closing_credit) < Decimal('0.01')
-    is_balanced = opening_balanced and period_balanced and closing_balanced
+    # 获取所有会计科目及其余额（单次查询 + 科目树汇总，结果按总账版本缓存）
+    report = trial_balance_data(period_year, period_month)
     
     context = _context(
         "试算平衡表",
@@ -4631,19 +3987,19 @@ def trial_balance(request):
         use_financial_nav=True
     )
     context.update({
-        'trial_data': trial_data,
+        'trial_data': report['rows'],
         'period_year': period_year,
         'period_month': period_month,
-        'total_opening_debit': total_opening_debit,
-        'total_opening_credit': total_opening_credit,
-        'total_period_debit': total_period_debit,
-        'total_period_credit': total_period_credit,
-        'total_closing_debit': total_closing_debit,
-        'total_closing_credit': total_closing_credit,
-        'opening_balanced': opening_balanced,
-        'period_balanced': period_balanced,
-        'closing_balanced': closing_balanced,
-        'is_balanced': is_balanced,
+        'total_opening_debit': report['total_opening_debit'],
+        'total_opening_credit': report['total_opening_credit'],
+        'total_period_debit': report['total_period_debit'],
+        'total_period_credit': report['total_period_credit'],
+        'total_closing_debit': report['total_closing_debit'],
+        'total_closing_credit': report['total_closing_credit'],
+        'opening_balanced': report['opening_balanced'],
+        'period_balanced': report['period_balanced'],
+        'closing_balanced': report['closing_balanced'],
+        'is_balanced': report['is_balanced'],
         'years': range(today.year - 2, today.year + 2),
         'months': range(1, 13),
     })
@@ -4810,90 +4166,8 @@ def balance_sheet_report(request):
         period_year = today.year
         period_month = today.month
     
-    # 生成资产负债表数据
-    report_data = {
-        'assets': {},
-        'liabilities': {},
-        'equity': {},
-    }
-    
-    # 获取资产类科目余额
-    asset_subjects = AccountSubject.objects.filter(
-        subject_type='asset',
-        is_active=True
-    ).order_by('code')
-    
-    total_assets = Decimal('0.00')
-    for subject in asset_subjects:
-        # 获取该科目的期末余额
-        ledger = Ledger.objects.filter(
-            account_subject=subject,
-            period_year=period_year,
-            period_month=period_month
-        ).order_by('-period_date').first()
-        
-        if ledger:
-            balance = ledger.closing_balance
-            if subject.direction == 'credit':
-                balance = -balance
-            report_data['assets'][subject.code] = {
-                'name': subject.name,
-                'balance': balance,
-            }
-            total_assets += balance
-    
-    # 获取负债类科目余额
-    liability_subjects = AccountSubject.objects.filter(
-        subject_type='liability',
-        is_active=True
-    ).order_by('code')
-    
-    total_liabilities = Decimal('0.00')
-    for subject in liability_subjects:
-        ledger = Ledger.objects.filter(
-            account_subject=subject,
-            period_year=period_year,
-            period_month=period_month
-        ).order_by('-period_date').first()
-        
-        if ledger:
-            balance = ledger.closing_balance
-            if subject.direction == 'debit':
-                balance = -balance
-            report_data['liabilities'][subject.code] = {
-                'name': subject.name,
-                'balance': balance,
-            }
-            total_liabilities += balance
-    
-    # 获取所有者权益类科目余额
-    equity_subjects = AccountSubject.objects.filter(
-        subject_type='equity',
-        is_active=True
-    ).order_by('code')
-    
-    total_equity = Decimal('0.00')
-    for subject in equity_subjects:
-        ledger = Ledger.objects.filter(
-            account_subject=subject,
-            period_year=period_year,
-            period_month=period_month
-        ).order_by('-period_date').first()
-        
-        if ledger:
-            balance = ledger.closing_balance
-            if subject.direction == 'debit':
-                balance = -balance
-            report_data['equity'][subject.code] = {
-                'name': subject.name,
-                'balance': balance,
-            }
-            total_equity += balance
-    
-    report_data['total_assets'] = total_assets
-    report_data['total_liabilities'] = total_liabilities
-    report_data['total_equity'] = total_equity
-    report_data['total_liabilities_equity'] = total_liabilities + total_equity
+    # 生成资产负债表数据（单次查询 + 科目树汇总，结果按总账版本缓存）
+    report_data = balance_sheet_data(period_year, period_month)
     
     # 如果请求生成报表，保存报表记录
     if request.method == 'POST':
@@ -4959,78 +4233,8 @@ def income_statement_report(request):
         period_year = today.year
         period_month = today.month
     
-    # 生成利润表数据
-    report_data = {
-        'revenue': {},
-        'expenses': {},
-        'costs': {},
-    }
-    
-    # 获取收入类科目发生额
-    revenue_subjects = AccountSubject.objects.filter(
-        subject_type='revenue',
-        is_active=True
-    ).order_by('code')
-    
-    total_revenue = Decimal('0.00')
-    for subject in revenue_subjects:
-        ledgers = Ledger.objects.filter(
-            account_subject=subject,
-            period_year=period_year,
-            period_month=period_month
-        )
-        period_credit = sum(l.period_credit for l in ledgers)
-        report_data['revenue'][subject.code] = {
-            'name': subject.name,
-            'amount': period_credit,
-        }
-        total_revenue += period_credit
-    
-    # 获取费用类科目发生额
-    expense_subjects = AccountSubject.objects.filter(
-        subject_type='expense',
-        is_active=True
-    ).order_by('code')
-    
-    total_expenses = Decimal('0.00')
-    for subject in expense_subjects:
-        ledgers = Ledger.objects.filter(
-            account_subject=subject,
-            period_year=period_year,
-            period_month=period_month
-        )
-        period_debit = sum(l.period_debit for l in ledgers)
-        report_data['expenses'][subject.code] = {
-            'name': subject.name,
-            'amount': period_debit,
-        }
-        total_expenses += period_debit
-    
-    # 获取成本类科目发生额
-    cost_subjects = AccountSubject.objects.filter(
-        subject_type='cost',
-        is_active=True
-    ).order_by('code')
-    
-    total_costs = Decimal('0.00')
-    for subject in cost_subjects:
-        ledgers = Ledger.objects.filter(
-            account_subject=subject,
-            period_year=period_year,
-            period_month=period_month
-        )
-        period_debit = sum(l.period_debit for l in ledgers)
-        report_data['costs'][subject.code] = {
-            'name': subject.name,
-            'amount': period_debit,
-        }
-        total_costs += period_debit
-    
-    report_data['total_revenue'] = total_revenue
-    report_data['total_costs'] = total_costs
-    report_data['total_expenses'] = total_expenses
-    report_data['gross_profit'] = total_revenue - total_costs
-    report_data['net_profit'] = total_revenue - total_costs - total_expenses
+    # 生成利润表数据（按科目一次汇总本期发生额，结果按总账版本缓存）
+    report_data = income_statement_data(period_year, period_month)
     
     # 如果请求生成报表，保存报表记录
     if request.method == 'POST':
@@ -5530,23 +4734,7 @@ def receivable_create(request):
             if not receivable.account_number:
                 current_year = timezone.now().year
                 # 查找当前年度最大的序号
-                max_receivable = ReceivableAccount.objects.filter(
-                    account_number__startswith=f'AR-{current_year}-'
-                ).order_by('-account_number').first()
-                
-                if max_receivable:
-                    try:
-                        # 提取序号部分
-                        parts = max_receivable.account_number.split('-')
-                        if len(parts) >= 3:
-                            seq = int(parts[-1]) + 1
-                        else:
-                            seq = 1
-                    except (ValueError, IndexError):
-                        seq = 1
-                else:
-                    seq = 1
-                receivable.account_number = f'AR-{current_year}-{seq:04d}'
+                receivable.account_number = next_document_number(ReceivableAccount.objects, 'account_number', 'AR', period=str(current_year))
             
             # 如果设置了应收日期和账期，自动计算到期日期
             if receivable.receivable_date and receivable.payment_terms and not receivable.due_date:
@@ -5698,19 +4886,7 @@ def receivable_payment(request, receivable_id):
                 from django.db import transaction
                 with transaction.atomic():
                     current_year = timezone.now().year
-                    max_flow = FundFlow.objects.filter(
-                        flow_number__startswith=f'FLOW-{current_year}-'
-                    ).order_by('-flow_number').first()
-                    
-                    if max_flow:
-                        try:
-                            seq = int(max_flow.flow_number.split('-')[-1]) + 1
-                        except (ValueError, IndexError):
-                            seq = 1
-                    else:
-                        seq = 1
-                    
-                    flow_number = f'FLOW-{current_year}-{seq:04d}'
+                    flow_number = next_document_number(FundFlow.objects, 'flow_number', 'FLOW', period=str(current_year))
                     
                     FundFlow.objects.create(
                         flow_number=flow_number,
@@ -6005,23 +5181,7 @@ def payable_create(request):
             if not payable.account_number:
                 current_year = timezone.now().year
                 # 查找当前年度最大的序号
-                max_payable = PayableAccount.objects.filter(
-                    account_number__startswith=f'AP-{current_year}-'
-                ).order_by('-account_number').first()
-                
-                if max_payable:
-                    try:
-                        # 提取序号部分
-                        parts = max_payable.account_number.split('-')
-                        if len(parts) >= 3:
-                            seq = int(parts[-1]) + 1
-                        else:
-                            seq = 1
-                    except (ValueError, IndexError):
-                        seq = 1
-                else:
-                    seq = 1
-                payable.account_number = f'AP-{current_year}-{seq:04d}'
+                payable.account_number = next_document_number(PayableAccount.objects, 'account_number', 'AP', period=str(current_year))
             
             # 如果设置了应付日期和账期，自动计算到期日期
             if payable.payable_date and payable.payment_terms and not payable.due_date:
@@ -6172,19 +5332,7 @@ def payable_payment(request, payable_id):
                 from django.db import transaction
                 with transaction.atomic():
                     current_year = timezone.now().year
-                    max_flow = FundFlow.objects.filter(
-                        flow_number__startswith=f'FLOW-{current_year}-'
-                    ).order_by('-flow_number').first()
-                    
-                    if max_flow:
-                        try:
-                            seq = int(max_flow.flow_number.split('-')[-1]) + 1
-                        except (ValueError, IndexError):
-                            seq = 1
-                    else:
-                        seq = 1
-                    
-                    flow_number = f'FLOW-{current_year}-{seq:04d}'
+                    flow_number = next_document_number(FundFlow.objects, 'flow_number', 'FLOW', period=str(current_year))
                     
                     FundFlow.objects.create(
                         flow_number=flow_number,
@@ -208,21 +208,9 @@ class LitigationCase(models.Model):
     
     def _generate_case_number(self):
         """生成案件编号：LAW-YYYYMMDD-序列号"""
-        from django.db.models import Max
-        today = timezone.now().date()
-        date_str = today.strftime('%Y%m%d')
-        
-        # 获取今天的最大序列号
-        max_number = LitigationCase.objects.filter(
-            case_number__startswith=f'LAW-{date_str}-'
-        ).aggregate(Max('case_number'))['case_number__max']
-        
-        if max_number:
-            sequence = int(max_number.split('-')[-1]) + 1
-        else:
-            sequence = 1
-        
-        return f'LAW-{date_str}-{sequence:04d}'
+        from backend.core.sequence import next_document_number
+        date_str = timezone.now().date().strftime('%Y%m%d')
+        return next_document_number(LitigationCase.objects, 'case_number', 'LAW', period=date_str)
 
 
 class LitigationProcess(models.Model):
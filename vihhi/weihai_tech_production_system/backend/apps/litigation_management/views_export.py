@@ -2,31 +2,26 @@
 诉讼管理模块数据导出视图
 """
 import logging
-from django.http import HttpResponse
+from collections import Counter
 from django.contrib.auth.decorators import login_required
 from django.shortcuts import redirect
 from django.contrib import messages
 from django.db.models import Q, Sum, Count
-from django.utils import timezone
 from decimal import Decimal
-from openpyxl import Workbook
-from openpyxl.styles import Font, Alignment, PatternFill, Border, Side
-from openpyxl.utils import get_column_letter
-from datetime import datetime
 
 from backend.apps.system_management.services import get_user_permission_codes
 from backend.core.views import _permission_granted
 from backend.apps.litigation_management.models import LitigationCase, LitigationExpense
+from backend.utils.export_utils import (
+    Column, ExportTable, export_response, new_workbook, truncate, workbook_response, write_sheet,
+)
 
 logger = logging.getLogger(__name__)
 
 
 def _get_case_export_queryset(request, permission_codes):
-    """获取案件导出数据集"""
-    cases = LitigationCase.objects.select_related(
-        'project', 'client', 'contract', 'registered_by', 
-        'registered_department', 'case_manager'
-    ).all()
+    """获取案件导出数据集（关联查询由导出列定义推导）"""
+    cases = LitigationCase.objects.all()
     
     # 权限过滤
     if not _permission_granted('litigation_management.case.view_all', permission_codes):
@@ -71,9 +66,33 @@ def _get_case_export_queryset(request, permission_codes):
     return cases.order_by('-registration_date', '-created_at')
 
 
+CASE_EXPORT_TABLE = ExportTable([
+    Column('案件编号', 'case_number', width=18),
+    Column('案件名称', 'case_name', width=30),
+    Column('案件类型', 'case_type', width=12),
+    Column('案件性质', 'case_nature', width=10),
+    Column('案件状态', 'status', width=12),
+    Column('优先级', 'priority', width=8),
+    Column('诉讼标的额', 'litigation_amount', width=15),
+    Column('争议金额', 'dispute_amount', width=15),
+    Column('登记日期', 'registration_date', width=12),
+    Column('立案日期', 'filing_date', width=12),
+    Column('开庭日期', 'trial_date', width=12),
+    Column('判决日期', 'judgment_date', width=12),
+    Column('结案日期', 'closing_date', width=12),
+    Column('关联项目', 'project__project_number', width=18),
+    Column('关联客户', 'client__name', width=20),
+    Column('关联合同', 'contract__contract_number', width=18),
+    Column('案件负责人', 'case_manager__username', width=12),
+    Column('登记人', 'registered_by__username', width=12),
+    Column('登记部门', 'registered_department__name', width=15),
+    Column('案件描述', 'description', width=40, format=truncate(100)),  # 限制描述长度
+])
+
+
 @login_required
 def case_list_export(request):
-    """案件列表导出（Excel格式）"""
+    """案件列表导出（Excel格式，format=csv 时导出 CSV）"""
     permission_codes = get_user_permission_codes(request.user)
     
     if not _permission_granted('litigation_management.case.view', permission_codes):
@@ -81,118 +100,9 @@ def case_list_export(request):
         return redirect('litigation_pages:case_list')
     
     try:
-        # 获取数据
         cases = _get_case_export_queryset(request, permission_codes)
-        
-        # 创建Excel工作簿
-        workbook = Workbook()
-        worksheet = workbook.active
-        worksheet.title = "案件列表"
-        
-        # 设置表头
-        headers = [
-            '案件编号', '案件名称', '案件类型', '案件性质', '案件状态', '优先级',
-            '诉讼标的额', '争议金额', '登记日期', '立案日期', '开庭日期', 
-            '判决日期', '结案日期', '关联项目', '关联客户', '关联合同',
-            '案件负责人', '登记人', '登记部门', '案件描述'
-        ]
-        
-        # 设置表头样式
-        header_fill = PatternFill(start_color="366092", end_color="366092", fill_type="solid")
-        header_font = Font(bold=True, color="FFFFFF", size=11)
-        header_alignment = Alignment(horizontal="center", vertical="center")
-        border = Border(
-            left=Side(style='thin'),
-            right=Side(style='thin'),
-            top=Side(style='thin'),
-            bottom=Side(style='thin')
-        )
-        
-        # 写入表头
-        for col_idx, header in enumerate(headers, 1):
-            cell = worksheet.cell(row=1, column=col_idx, value=header)
-            cell.fill = header_fill
-            cell.font = header_font
-            cell.alignment = header_alignment
-            cell.border = border
-        
-        # 写入数据
-        case_type_dict = dict(LitigationCase.CASE_TYPE_CHOICES)
-        case_nature_dict = dict(LitigationCase.CASE_NATURE_CHOICES)
-        status_dict = dict(LitigationCase.STATUS_CHOICES)
-        priority_dict = dict(LitigationCase.PRIORITY_CHOICES)
-        
-        for row_idx, case in enumerate(cases, 2):
-            row = [
-                case.case_number,
-                case.case_name,
-                case_type_dict.get(case.case_type, case.case_type),
-                case_nature_dict.get(case.case_nature, case.case_nature),
-                status_dict.get(case.status, case.status),
-                priority_dict.get(case.priority, case.priority),
-                float(case.litigation_amount) if case.litigation_amount else '',
-                float(case.dispute_amount) if case.dispute_amount else '',
-                case.registration_date.strftime('%Y-%m-%d') if case.registration_date else '',
-                case.filing_date.strftime('%Y-%m-%d') if case.filing_date else '',
-                case.trial_date.strftime('%Y-%m-%d') if case.trial_date else '',
-                case.judgment_date.strftime('%Y-%m-%d') if case.judgment_date else '',
-                case.closing_date.strftime('%Y-%m-%d') if case.closing_date else '',
-                case.project.project_number if case.project else '',
-                case.client.name if case.client else '',
-                case.contract.contract_number if case.contract else '',
-                case.case_manager.username if case.case_manager else '',
-                case.registered_by.username if case.registered_by else '',
-                case.registered_department.name if case.registered_department else '',
-                case.description[:100] if case.description else '',  # 限制描述长度
-            ]
-            
-            for col_idx, value in enumerate(row, 1):
-                cell = worksheet.cell(row=row_idx, column=col_idx, value=value)
-                cell.border = border
-                if col_idx in [7, 8]:  # 金额列右对齐
-                    cell.alignment = Alignment(horizontal="right", vertical="center")
-                else:
-                    cell.alignment = Alignment(horizontal="left", vertical="center", wrap_text=True)
-        
-        # 设置列宽
-        column_widths = {
-            'A': 18,  # 案件编号
-            'B': 30,  # 案件名称
-            'C': 12,  # 案件类型
-            'D': 10,  # 案件性质
-            'E': 12,  # 案件状态
-            'F': 8,   # 优先级
-            'G': 15,  # 诉讼标的额
-            'H': 15,  # 争议金额
-            'I': 12,  # 登记日期
-            'J': 12,  # 立案日期
-            'K': 12,  # 开庭日期
-            'L': 12,  # 判决日期
-            'M': 12,  # 结案日期
-            'N': 18,  # 关联项目
-            'O': 20,  # 关联客户
-            'P': 18,  # 关联合同
-            'Q': 12,  # 案件负责人
-            'R': 12,  # 登记人
-            'S': 15,  # 登记部门
-            'T': 40,  # 案件描述
-        }
-        
-        for col_letter, width in column_widths.items():
-            worksheet.column_dimensions[col_letter].width = width
-        
-        # 设置行高
-        worksheet.row_dimensions[1].height = 25  # 表头行高
-        
-        # 创建响应
-        response = HttpResponse(
-            content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
-        )
-        filename = f'案件列表_{timezone.now().strftime("%Y%m%d_%H%M%S")}.xlsx'
-        response['Content-Disposition'] = f'attachment; filename="{filename}"'
-        
-        workbook.save(response)
-        logger.info(f'用户 {request.user.username} 导出了案件列表，共 {cases.count()} 条记录')
+        response = export_response(cases, CASE_EXPORT_TABLE, '案件列表', file_format=request.GET.get('format'))
+        logger.info(f'用户 {request.user.username} 导出了案件列表')
         return response
         
     except Exception as e:
@@ -202,11 +112,11 @@ def case_list_export(request):
 
 
 def _get_expense_export_queryset(request, permission_codes, case_id=None):
-    """获取费用导出数据集"""
+    """获取费用导出数据集（关联查询由导出列定义推导）"""
     if case_id:
         expenses = LitigationExpense.objects.filter(case_id=case_id)
     else:
-        expenses = LitigationExpense.objects.select_related('case', 'project', 'created_by').all()
+        expenses = LitigationExpense.objects.all()
         
         # 权限过滤
         if not _permission_granted('litigation_management.expense.view', permission_codes):
@@ -236,9 +146,33 @@ def _get_expense_export_queryset(request, permission_codes, case_id=None):
     return expenses.order_by('-expense_date', '-created_at')
 
 
+EXPENSE_EXPORT_TABLE = ExportTable([
+    Column('案件编号', 'case__case_number', width=18),
+    Column('案件名称', 'case__case_name', width=30),
+    Column('费用名称', 'expense_name', width=25),
+    Column('费用类型', 'expense_type', width=12),
+    Column('费用金额', 'amount', width=15),
+    Column('费用日期', 'expense_date', width=12),
+    Column('支付方式', 'payment_method', width=12),
+    Column('支付状态', 'payment_status', width=12),
+    Column('关联项目', 'project__project_number', width=18),
+    Column('报销状态', 'reimbursement_status', width=12),
+    Column('登记人', 'created_by__username', width=12),
+    Column('登记时间', 'created_at', width=18),
+    Column('费用说明', 'description', width=40, format=truncate(100)),
+])
+
+
+def _expense_total_rows(expenses):
+    """合计行：一条聚合查询，没有费用时不输出"""
+    summary = expenses.order_by().aggregate(total=Sum('amount'), count=Count('id'))
+    if summary['count']:
+        yield ['', '', '', '合计', float(summary['total'] or 0)]
+
+
 @login_required
 def expense_list_export(request, case_id=None):
-    """费用明细导出（Excel格式）"""
+    """费用明细导出（Excel格式，format=csv 时导出 CSV）"""
     permission_codes = get_user_permission_codes(request.user)
     
     if not _permission_granted('litigation_management.expense.view', permission_codes):
@@ -248,116 +182,12 @@ def expense_list_export(request, case_id=None):
         return redirect('litigation_pages:case_list')
     
     try:
-        # 获取数据
         expenses = _get_expense_export_queryset(request, permission_codes, case_id)
-        
-        # 创建Excel工作簿
-        workbook = Workbook()
-        worksheet = workbook.active
-        worksheet.title = "费用明细"
-        
-        # 设置表头
-        headers = [
-            '案件编号', '案件名称', '费用名称', '费用类型', '费用金额',
-            '费用日期', '支付方式', '支付状态', '关联项目', '报销状态',
-            '登记人', '登记时间', '费用说明'
-        ]
-        
-        # 设置表头样式
-        header_fill = PatternFill(start_color="366092", end_color="366092", fill_type="solid")
-        header_font = Font(bold=True, color="FFFFFF", size=11)
-        header_alignment = Alignment(horizontal="center", vertical="center")
-        border = Border(
-            left=Side(style='thin'),
-            right=Side(style='thin'),
-            top=Side(style='thin'),
-            bottom=Side(style='thin')
+        response = export_response(
+            expenses, EXPENSE_EXPORT_TABLE, '费用明细',
+            file_format=request.GET.get('format'), extra_rows=_expense_total_rows(expenses),
         )
-        
-        # 写入表头
-        for col_idx, header in enumerate(headers, 1):
-            cell = worksheet.cell(row=1, column=col_idx, value=header)
-            cell.fill = header_fill
-            cell.font = header_font
-            cell.alignment = header_alignment
-            cell.border = border
-        
-        # 写入数据
-        expense_type_dict = dict(LitigationExpense.EXPENSE_TYPE_CHOICES)
-        payment_method_dict = dict(LitigationExpense.PAYMENT_METHOD_CHOICES)
-        payment_status_dict = dict(LitigationExpense.PAYMENT_STATUS_CHOICES)
-        reimbursement_status_dict = dict(LitigationExpense.REIMBURSEMENT_STATUS_CHOICES)
-        
-        total_amount = Decimal('0')
-        for row_idx, expense in enumerate(expenses, 2):
-            if expense.amount:
-                total_amount += expense.amount
-            
-            row = [
-                expense.case.case_number,
-                expense.case.case_name,
-                expense.expense_name,
-                expense_type_dict.get(expense.expense_type, expense.expense_type),
-                float(expense.amount) if expense.amount else '',
-                expense.expense_date.strftime('%Y-%m-%d') if expense.expense_date else '',
-                payment_method_dict.get(expense.payment_method, expense.payment_method) if expense.payment_method else '',
-                payment_status_dict.get(expense.payment_status, expense.payment_status),
-                expense.project.project_number if expense.project else '',
-                reimbursement_status_dict.get(expense.reimbursement_status, expense.reimbursement_status) if expense.reimbursement_status else '',
-                expense.created_by.username if expense.created_by else '',
-                expense.created_at.strftime('%Y-%m-%d %H:%M') if expense.created_at else '',
-                expense.description[:100] if expense.description else '',
-            ]
-            
-            for col_idx, value in enumerate(row, 1):
-                cell = worksheet.cell(row=row_idx, column=col_idx, value=value)
-                cell.border = border
-                if col_idx == 5:  # 金额列右对齐
-                    cell.alignment = Alignment(horizontal="right", vertical="center")
-                else:
-                    cell.alignment = Alignment(horizontal="left", vertical="center", wrap_text=True)
-        
-        # 添加合计行
-        if expenses.exists():
-            total_row = row_idx + 1
-            worksheet.cell(row=total_row, column=4, value='合计').font = Font(bold=True)
-            worksheet.cell(row=total_row, column=5, value=float(total_amount)).font = Font(bold=True)
-            worksheet.cell(row=total_row, column=5).alignment = Alignment(horizontal="right", vertical="center")
-            for col_idx in range(1, len(headers) + 1):
-                worksheet.cell(row=total_row, column=col_idx).border = border
-        
-        # 设置列宽
-        column_widths = {
-            'A': 18,  # 案件编号
-            'B': 30,  # 案件名称
-            'C': 25,  # 费用名称
-            'D': 12,  # 费用类型
-            'E': 15,  # 费用金额
-            'F': 12,  # 费用日期
-            'G': 12,  # 支付方式
-            'H': 12,  # 支付状态
-            'I': 18,  # 关联项目
-            'J': 12,  # 报销状态
-            'K': 12,  # 登记人
-            'L': 18,  # 登记时间
-            'M': 40,  # 费用说明
-        }
-        
-        for col_letter, width in column_widths.items():
-            worksheet.column_dimensions[col_letter].width = width
-        
-        # 设置行高
-        worksheet.row_dimensions[1].height = 25  # 表头行高
-        
-        # 创建响应
-        response = HttpResponse(
-            content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
-        )
-        filename = f'费用明细_{timezone.now().strftime("%Y%m%d_%H%M%S")}.xlsx'
-        response['Content-Disposition'] = f'attachment; filename="{filename}"'
-        
-        workbook.save(response)
-        logger.info(f'用户 {request.user.username} 导出了费用明细，共 {expenses.count()} 条记录')
+        logger.info(f'用户 {request.user.username} 导出了费用明细')
         return response
         
     except Exception as e:
@@ -368,6 +198,49 @@ def expense_list_export(request, case_id=None):
         return redirect('litigation_pages:case_list')
 
 
+def _percentage(count, total):
+    return f"{(count / total * 100):.2f}%" if total > 0 else "0%"
+
+
+def _case_statistics_rows(cases):
+    """案件统计：按类型、状态一次分组查询，总数和两组统计都由它汇总"""
+    by_type, by_status = Counter(), Counter()
+    for stat in cases.order_by().values('case_type', 'status').annotate(count=Count('id')):
+        by_type[stat['case_type']] += stat['count']
+        by_status[stat['status']] += stat['count']
+    total_cases = sum(by_type.values())
+
+    yield ['案件总数', total_cases, '100%']
+    case_type_dict = dict(LitigationCase.CASE_TYPE_CHOICES)
+    yield ['案件类型统计']
+    for case_type, count in by_type.items():
+        yield [case_type_dict.get(case_type, case_type), count, _percentage(count, total_cases)]
+    yield []
+    status_dict = dict(LitigationCase.STATUS_CHOICES)
+    yield ['案件状态统计']
+    for status, count in by_status.items():
+        yield [status_dict.get(status, status), count, _percentage(count, total_cases)]
+
+
+def _expense_statistics_rows(cases):
+    """费用统计：按类型一次聚合，合计行由分组结果累加"""
+    expense_type_dict = dict(LitigationExpense.EXPENSE_TYPE_CHOICES)
+    stats = LitigationExpense.objects.filter(case__in=cases).order_by().values('expense_type').annotate(
+        total_amount=Sum('amount'),
+        count=Count('id')
+    )
+    total_expense_amount, total_count = Decimal('0'), 0
+    for stat in stats:
+        total_amount = stat['total_amount'] or Decimal('0')
+        count = stat['count']
+        total_expense_amount += total_amount
+        total_count += count
+        yield [expense_type_dict.get(stat['expense_type'], stat['expense_type']),
+               float(total_amount), count, float(total_amount / count if count > 0 else Decimal('0'))]
+    if total_count:
+        yield ['合计', float(total_expense_amount), total_count, float(total_expense_amount / total_count)]
+
+
 @login_required
 def statistics_export(request):
     """统计报表导出（Excel格式）"""
@@ -395,137 +268,11 @@ def statistics_export(request):
         if date_to:
             cases = cases.filter(registration_date__lte=date_to)
         
-        # 创建Excel工作簿
-        workbook = Workbook()
-        
-        # 1. 案件统计表
-        worksheet1 = workbook.active
-        worksheet1.title = "案件统计"
-        
-        headers1 = ['统计项', '数量', '占比']
-        header_fill = PatternFill(start_color="366092", end_color="366092", fill_type="solid")
-        header_font = Font(bold=True, color="FFFFFF", size=11)
-        header_alignment = Alignment(horizontal="center", vertical="center")
-        border = Border(
-            left=Side(style='thin'),
-            right=Side(style='thin'),
-            top=Side(style='thin'),
-            bottom=Side(style='thin')
-        )
-        
-        for col_idx, header in enumerate(headers1, 1):
-            cell = worksheet1.cell(row=1, column=col_idx, value=header)
-            cell.fill = header_fill
-            cell.font = header_font
-            cell.alignment = header_alignment
-            cell.border = border
-        
-        # 案件总数
-        total_cases = cases.count()
-        row_idx = 2
-        worksheet1.cell(row=row_idx, column=1, value='案件总数').border = border
-        worksheet1.cell(row=row_idx, column=2, value=total_cases).border = border
-        worksheet1.cell(row=row_idx, column=3, value='100%').border = border
-        row_idx += 1
-        
-        # 按类型统计
-        case_type_dict = dict(LitigationCase.CASE_TYPE_CHOICES)
-        stats_by_type = cases.values('case_type').annotate(count=Count('id'))
-        worksheet1.cell(row=row_idx, column=1, value='案件类型统计').font = Font(bold=True)
-        row_idx += 1
-        for stat in stats_by_type:
-            case_type = stat['case_type']
-            count = stat['count']
-            percentage = f"{(count / total_cases * 100):.2f}%" if total_cases > 0 else "0%"
-            worksheet1.cell(row=row_idx, column=1, value=case_type_dict.get(case_type, case_type)).border = border
-            worksheet1.cell(row=row_idx, column=2, value=count).border = border
-            worksheet1.cell(row=row_idx, column=3, value=percentage).border = border
-            row_idx += 1
-        
-        row_idx += 1
-        
-        # 按状态统计
-        status_dict = dict(LitigationCase.STATUS_CHOICES)
-        stats_by_status = cases.values('status').annotate(count=Count('id'))
-        worksheet1.cell(row=row_idx, column=1, value='案件状态统计').font = Font(bold=True)
-        row_idx += 1
-        for stat in stats_by_status:
-            status = stat['status']
-            count = stat['count']
-            percentage = f"{(count / total_cases * 100):.2f}%" if total_cases > 0 else "0%"
-            worksheet1.cell(row=row_idx, column=1, value=status_dict.get(status, status)).border = border
-            worksheet1.cell(row=row_idx, column=2, value=count).border = border
-            worksheet1.cell(row=row_idx, column=3, value=percentage).border = border
-            row_idx += 1
-        
-        # 设置列宽
-        worksheet1.column_dimensions['A'].width = 25
-        worksheet1.column_dimensions['B'].width = 15
-        worksheet1.column_dimensions['C'].width = 15
-        worksheet1.row_dimensions[1].height = 25
-        
-        # 2. 费用统计表
-        worksheet2 = workbook.create_sheet("费用统计")
-        
-        headers2 = ['费用类型', '费用金额', '费用笔数', '平均金额']
-        for col_idx, header in enumerate(headers2, 1):
-            cell = worksheet2.cell(row=1, column=col_idx, value=header)
-            cell.fill = header_fill
-            cell.font = header_font
-            cell.alignment = header_alignment
-            cell.border = border
-        
-        # 获取费用统计
-        expenses = LitigationExpense.objects.filter(case__in=cases)
-        expense_type_dict = dict(LitigationExpense.EXPENSE_TYPE_CHOICES)
-        stats_by_expense_type = expenses.values('expense_type').annotate(
-            total_amount=Sum('amount'),
-            count=Count('id')
-        )
-        
-        row_idx = 2
-        total_expense_amount = Decimal('0')
-        for stat in stats_by_expense_type:
-            expense_type = stat['expense_type']
-            total_amount = stat['total_amount'] or Decimal('0')
-            count = stat['count']
-            avg_amount = total_amount / count if count > 0 else Decimal('0')
-            total_expense_amount += total_amount
-            
-            worksheet2.cell(row=row_idx, column=1, value=expense_type_dict.get(expense_type, expense_type)).border = border
-            worksheet2.cell(row=row_idx, column=2, value=float(total_amount)).border = border
-            worksheet2.cell(row=row_idx, column=3, value=count).border = border
-            worksheet2.cell(row=row_idx, column=4, value=float(avg_amount)).border = border
-            worksheet2.cell(row=row_idx, column=2).alignment = Alignment(horizontal="right", vertical="center")
-            worksheet2.cell(row=row_idx, column=4).alignment = Alignment(horizontal="right", vertical="center")
-            row_idx += 1
-        
-        # 添加合计行
-        if expenses.exists():
-            worksheet2.cell(row=row_idx, column=1, value='合计').font = Font(bold=True)
-            worksheet2.cell(row=row_idx, column=2, value=float(total_expense_amount)).font = Font(bold=True)
-            worksheet2.cell(row=row_idx, column=3, value=expenses.count()).font = Font(bold=True)
-            worksheet2.cell(row=row_idx, column=4, value=float(total_expense_amount / expenses.count() if expenses.count() > 0 else Decimal('0'))).font = Font(bold=True)
-            for col_idx in range(1, 5):
-                worksheet2.cell(row=row_idx, column=col_idx).border = border
-                if col_idx in [2, 4]:
-                    worksheet2.cell(row=row_idx, column=col_idx).alignment = Alignment(horizontal="right", vertical="center")
-        
-        # 设置列宽
-        worksheet2.column_dimensions['A'].width = 20
-        worksheet2.column_dimensions['B'].width = 18
-        worksheet2.column_dimensions['C'].width = 15
-        worksheet2.column_dimensions['D'].width = 18
-        worksheet2.row_dimensions[1].height = 25
-        
-        # 创建响应
-        response = HttpResponse(
-            content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
-        )
-        filename = f'诉讼统计报表_{timezone.now().strftime("%Y%m%d_%H%M%S")}.xlsx'
-        response['Content-Disposition'] = f'attachment; filename="{filename}"'
-        
-        workbook.save(response)
+        workbook = new_workbook()
+        write_sheet(workbook, '案件统计', ['统计项', '数量', '占比'], _case_statistics_rows(cases), [25, 15, 15])
+        write_sheet(workbook, '费用统计', ['费用类型', '费用金额', '费用笔数', '平均金额'],
+                    _expense_statistics_rows(cases), [20, 18, 15, 18])
+        response = workbook_response(workbook, '诉讼统计报表')
         logger.info(f'用户 {request.user.username} 导出了统计报表')
         return response
         
@@ -533,4 +280,3 @@ def statistics_export(request):
         logger.error(f'导出统计报表失败: {str(e)}', exc_info=True)
         messages.error(request, f'导出失败：{str(e)}')
         return redirect('litigation_pages:case_statistics')
-
@@ -3,6 +3,7 @@ from django.utils import timezone
 from django.db.models import Max
 from datetime import datetime
 from decimal import Decimal
+from backend.core.sequence import next_document_number
 from backend.apps.system_management.models import User, Department
 
 
@@ -492,14 +493,9 @@ class EmployeeMovement(models.Model):
         if not self.movement_number:
             # 生成异动编号
             today = timezone.now().date()
-            prefix = f"MOV{today.strftime('%Y%m%d')}"
-            last_movement = EmployeeMovement.objects.filter(movement_number__startswith=prefix).order_by('-movement_number').first()
-            if last_movement:
-                last_num = int(last_movement.movement_number[-4:])
-                new_num = last_num + 1
-            else:
-                new_num = 1
-            self.movement_number = f"{prefix}{new_num:04d}"
+            self.movement_number = next_document_number(
+                EmployeeMovement.objects, 'movement_number', 'MOV', period=today.strftime('%Y%m%d'), separator='',
+            )
         super().save(*args, **kwargs)
 
 
@@ -626,14 +622,9 @@ class RecruitmentRequirement(models.Model):
         if not self.requirement_number:
             # 生成需求编号
             today = timezone.now().date()
-            prefix = f"REQ{today.strftime('%Y%m%d')}"
-            last_req = RecruitmentRequirement.objects.filter(requirement_number__startswith=prefix).order_by('-requirement_number').first()
-            if last_req:
-                last_num = int(last_req.requirement_number[-4:])
-                new_num = last_num + 1
-            else:
-                new_num = 1
-            self.requirement_number = f"{prefix}{new_num:04d}"
+            self.requirement_number = next_document_number(
+                RecruitmentRequirement.objects, 'requirement_number', 'REQ', period=today.strftime('%Y%m%d'), separator='',
+            )
         super().save(*args, **kwargs)
 
 
@@ -679,14 +670,9 @@ class Resume(models.Model):
         if not self.resume_number:
             # 生成简历编号
             today = timezone.now().date()
-            prefix = f"RES{today.strftime('%Y%m%d')}"
-            last_resume = Resume.objects.filter(resume_number__startswith=prefix).order_by('-resume_number').first()
-            if last_resume:
-                last_num = int(last_resume.resume_number[-4:])
-                new_num = last_num + 1
-            else:
-                new_num = 1
-            self.resume_number = f"{prefix}{new_num:04d}"
+            self.resume_number = next_document_number(
+                Resume.objects, 'resume_number', 'RES', period=today.strftime('%Y%m%d'), separator='',
+            )
         super().save(*args, **kwargs)
 
 
@@ -733,14 +719,9 @@ class Interview(models.Model):
         if not self.interview_number:
             # 生成面试编号
             today = timezone.now().date()
-            prefix = f"INT{today.strftime('%Y%m%d')}"
-            last_interview = Interview.objects.filter(interview_number__startswith=prefix).order_by('-interview_number').first()
-            if last_interview:
-                last_num = int(last_interview.interview_number[-4:])
-                new_num = last_num + 1
-            else:
-                new_num = 1
-            self.interview_number = f"{prefix}{new_num:04d}"
+            self.interview_number = next_document_number(
+                Interview.objects, 'interview_number', 'INT', period=today.strftime('%Y%m%d'), separator='',
+            )
         super().save(*args, **kwargs)
 
 
@@ -846,14 +827,9 @@ class EmployeeActivity(models.Model):
         if not self.activity_number:
             # 生成活动编号
             today = timezone.now().date()
-            prefix = f"ACT{today.strftime('%Y%m%d')}"
-            last_activity = EmployeeActivity.objects.filter(activity_number__startswith=prefix).order_by('-activity_number').first()
-            if last_activity:
-                last_num = int(last_activity.activity_number[-4:])
-                new_num = last_num + 1
-            else:
-                new_num = 1
-            self.activity_number = f"{prefix}{new_num:04d}"
+            self.activity_number = next_document_number(
+                EmployeeActivity.objects, 'activity_number', 'ACT', period=today.strftime('%Y%m%d'), separator='',
+            )
         super().save(*args, **kwargs)
     
     @property
@@ -922,14 +898,9 @@ class EmployeeComplaint(models.Model):
         if not self.complaint_number:
             # 生成投诉编号
             today = timezone.now().date()
-            prefix = f"COM{today.strftime('%Y%m%d')}"
-            last_complaint = EmployeeComplaint.objects.filter(complaint_number__startswith=prefix).order_by('-complaint_number').first()
-            if last_complaint:
-                last_num = int(last_complaint.complaint_number[-4:])
-                new_num = last_num + 1
-            else:
-                new_num = 1
-            self.complaint_number = f"{prefix}{new_num:04d}"
+            self.complaint_number = next_document_number(
+                EmployeeComplaint.objects, 'complaint_number', 'COM', period=today.strftime('%Y%m%d'), separator='',
+            )
         super().save(*args, **kwargs)
 
 
@@ -972,13 +943,8 @@ class EmployeeSuggestion(models.Model):
         if not self.suggestion_number:
             # 生成建议编号
             today = timezone.now().date()
-            prefix = f"SUG{today.strftime('%Y%m%d')}"
-            last_suggestion = EmployeeSuggestion.objects.filter(suggestion_number__startswith=prefix).order_by('-suggestion_number').first()
-            if last_suggestion:
-                last_num = int(last_suggestion.suggestion_number[-4:])
-                new_num = last_num + 1
-            else:
-                new_num = 1
-            self.suggestion_number = f"{prefix}{new_num:04d}"
+            self.suggestion_number = next_document_number(
+                EmployeeSuggestion.objects, 'suggestion_number', 'SUG', period=today.strftime('%Y%m%d'), separator='',
+            )
         super().save(*args, **kwargs)
 
@@ -1,7 +1,7 @@
 from django.contrib.auth.decorators import login_required
 from django.shortcuts import render, get_object_or_404, redirect
 from django.contrib import messages
-from django.db.models import Count, Sum, Q, F, Avg, Max
+from django.db.models import Count, Sum, Q, F, Avg
 from django.core.paginator import Paginator
 from django.urls import reverse, NoReverseMatch
 from django.utils import timezone
@@ -11,6 +11,7 @@ from decimal import Decimal
 from backend.apps.system_management.services import get_user_permission_codes
 from backend.apps.system_management.models import Department
 from backend.core.views import HOME_NAV_STRUCTURE, _permission_granted as core_permission_granted, _build_full_top_nav
+from backend.core.sequence import next_document_number
 from backend.apps.personnel_management.models import (
     Employee, Attendance, Leave, Training, TrainingParticipant,
     Performance, Salary, LaborContract, Position,
@@ -853,17 +854,7 @@ def employee_create(request):
             # 自动生成员工编号
             if not employee.employee_number:
                 current_year = timezone.now().year
-                max_employee = Employee.objects.filter(
-                    employee_number__startswith=f'EMP-{current_year}-'
-                ).aggregate(max_num=Max('employee_number'))['max_num']
-                if max_employee:
-                    try:
-                        seq = int(max_employee.split('-')[-1]) + 1
-                    except (ValueError, IndexError):
-                        seq = 1
-                else:
-                    seq = 1
-                employee.employee_number = f'EMP-{current_year}-{seq:04d}'
+                employee.employee_number = next_document_number(Employee.objects, 'employee_number', 'EMP', period=str(current_year))
             employee.created_by = request.user
             employee.save()
             messages.success(request, f'员工档案 {employee.name} 创建成功！')
@@ -1243,17 +1234,7 @@ def leave_create(request):
             # 自动生成请假单号
             if not leave.leave_number:
                 current_year = timezone.now().year
-                max_leave = Leave.objects.filter(
-                    leave_number__startswith=f'LEAVE-{current_year}-'
-                ).aggregate(max_num=Max('leave_number'))['max_num']
-                if max_leave:
-                    try:
-                        seq = int(max_leave.split('-')[-1]) + 1
-                    except (ValueError, IndexError):
-                        seq = 1
-                else:
-                    seq = 1
-                leave.leave_number = f'LEAVE-{current_year}-{seq:04d}'
+                leave.leave_number = next_document_number(Leave.objects, 'leave_number', 'LEAVE', period=str(current_year))
             leave.status = 'pending'
             leave.save()
             messages.success(request, f'请假申请 {leave.leave_number} 提交成功！')
@@ -1335,17 +1316,7 @@ def training_create(request):
             # 自动生成培训编号
             if not training.training_number:
                 current_year = timezone.now().year
-                max_training = Training.objects.filter(
-                    training_number__startswith=f'TRAIN-{current_year}-'
-                ).aggregate(max_num=Max('training_number'))['max_num']
-                if max_training:
-                    try:
-                        seq = int(max_training.split('-')[-1]) + 1
-                    except (ValueError, IndexError):
-                        seq = 1
-                else:
-                    seq = 1
-                training.training_number = f'TRAIN-{current_year}-{seq:04d}'
+                training.training_number = next_document_number(Training.objects, 'training_number', 'TRAIN', period=str(current_year))
             training.created_by = request.user
             training.save()
             messages.success(request, f'培训记录 {training.title} 创建成功！')
@@ -1540,17 +1511,7 @@ def performance_create(request):
             # 自动生成考核编号
             if not performance.performance_number:
                 current_year = timezone.now().year
-                max_performance = Performance.objects.filter(
-                    performance_number__startswith=f'PERF-{current_year}-'
-                ).aggregate(max_num=Max('performance_number'))['max_num']
-                if max_performance:
-                    try:
-                        seq = int(max_performance.split('-')[-1]) + 1
-                    except (ValueError, IndexError):
-                        seq = 1
-                else:
-                    seq = 1
-                performance.performance_number = f'PERF-{current_year}-{seq:04d}'
+                performance.performance_number = next_document_number(Performance.objects, 'performance_number', 'PERF', period=str(current_year))
             performance.created_by = request.user
             performance.save()
             messages.success(request, f'绩效考核 {performance.performance_number} 创建成功！')
@@ -1623,17 +1584,7 @@ def contract_create(request):
             # 自动生成合同编号
             if not contract.contract_number:
                 current_year = timezone.now().year
-                max_contract = LaborContract.objects.filter(
-                    contract_number__startswith=f'CONTRACT-{current_year}-'
-                ).aggregate(max_num=Max('contract_number'))['max_num']
-                if max_contract:
-                    try:
-                        seq = int(max_contract.split('-')[-1]) + 1
-                    except (ValueError, IndexError):
-                        seq = 1
-                else:
-                    seq = 1
-                contract.contract_number = f'CONTRACT-{current_year}-{seq:04d}'
+                contract.contract_number = next_document_number(LaborContract.objects, 'contract_number', 'CONTRACT', period=str(current_year))
             contract.created_by = request.user
             contract.status = 'active'
             contract.save()
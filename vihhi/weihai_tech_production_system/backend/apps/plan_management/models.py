@@ -2,10 +2,10 @@
 计划管理模块数据模型
 """
 from django.db import models
-from django.db.models import Max, Q
-from django.db import transaction
+from django.db.models import Q
 from django.utils import timezone
 from django.core.validators import MinValueValidator, MaxValueValidator
+from backend.core.sequence import next_document_number
 from backend.apps.system_management.models import User, Department
 
 
@@ -147,27 +147,8 @@ class StrategicGoal(models.Model):
     
     def generate_goal_number(self):
         """生成目标编号：GOAL-{YYYYMMDD}-{序列号}"""
-        prefix = 'GOAL'
         date_str = timezone.now().strftime('%Y%m%d')
-        pattern = f"{prefix}-{date_str}-"
-        
-        # 使用事务和锁确保线程安全
-        with transaction.atomic():
-            # 获取当天最大序列号
-            max_number = StrategicGoal.objects.filter(
-                goal_number__startswith=pattern
-            ).aggregate(max_num=Max('goal_number'))['max_num']
-            
-            if max_number:
-                # 提取序列号并加1
-                try:
-                    seq = int(max_number.split('-')[-1]) + 1
-                except (ValueError, IndexError):
-                    seq = 1
-            else:
-                seq = 1
-            
-            return f"{pattern}{seq:04d}"
+        return next_document_number(StrategicGoal.objects, 'goal_number', 'GOAL', period=date_str)
     
     def calculate_completion_rate(self):
         """计算完成率"""
@@ -592,27 +573,8 @@ class Plan(models.Model):
     
     def generate_plan_number(self):
         """生成计划编号：PLAN-{YYYYMMDD}-{序列号}"""
-        prefix = 'PLAN'
         date_str = timezone.now().strftime('%Y%m%d')
-        pattern = f"{prefix}-{date_str}-"
-        
-        # 使用事务和锁确保线程安全
-        with transaction.atomic():
-            # 获取当天最大序列号
-            max_number = Plan.objects.filter(
-                plan_number__startswith=pattern
-            ).aggregate(max_num=Max('plan_number'))['max_num']
-            
-            if max_number:
-                # 提取序列号并加1
-                try:
-                    seq = int(max_number.split('-')[-1]) + 1
-                except (ValueError, IndexError):
-                    seq = 1
-            else:
-                seq = 1
-            
-            return f"{pattern}{seq:04d}"
+        return next_document_number(Plan.objects, 'plan_number', 'PLAN', period=date_str)
     
     def calculate_duration_days(self):
         """计算计划周期（天）"""
@@ -0,0 +1,21 @@
+# Generated by Django 4.2.7 on 2026-10-16 23:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('production_management', '0031_remove_contract_service_content'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='businesscontract',
+            index=models.Index(fields=['created_time', 'id'], name='business_co_created_d51e08_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='project',
+            index=models.Index(fields=['created_time', 'id'], name='production__created_1debb3_idx'),
+        ),
+    ]
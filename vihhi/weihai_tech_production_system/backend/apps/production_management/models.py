@@ -1,6 +1,7 @@
 from django.db import models
 from django.utils import timezone
 from backend.apps.system_management.models import User
+from backend.core.sequence import next_document_number
 
 
 class ServiceType(models.Model):
@@ -426,6 +427,9 @@ class Project(models.Model):
         verbose_name = '项目'
         verbose_name_plural = verbose_name
         ordering = ['-created_time']
+        indexes = [
+            models.Index(fields=['created_time', 'id']),
+        ]
     
     def __str__(self):
         return f"{self.project_number} - {self.name}"
@@ -674,24 +678,11 @@ class Project(models.Model):
             return self.project_number
         
         import datetime
-        from django.db.models import Max
         current_year = datetime.datetime.now().year
 
-        # 获取当前年份的最大序列号
-        max_number = Project.objects.filter(
-            project_number__startswith=f'VIH-{current_year}-'
-        ).exclude(id=self.id).aggregate(max_num=Max('project_number'))['max_num']
-
-        if max_number:
-            # 提取序列号并加1
-            try:
-                seq = int(max_number.split('-')[-1]) + 1
-            except (ValueError, IndexError):
-                seq = 1
-        else:
-            seq = 1
-
-        self.project_number = f"VIH-{current_year}-{seq:03d}"
+        self.project_number = next_document_number(
+            Project.objects, 'project_number', 'VIH', period=str(current_year), width=3,
+        )
         return self.project_number
 
 class ProjectFlowLog(models.Model):
@@ -1223,21 +1214,10 @@ class ProjectArchive(models.Model):
         if not self.archive_number:
             # 自动生成归档编号
             import datetime
-            from django.db.models import Max
             current_year = datetime.datetime.now().year
-            max_number = ProjectArchive.objects.filter(
-                archive_number__startswith=f'ARCH-{current_year}-'
-            ).aggregate(max_num=Max('archive_number'))['max_num']
-            
-            if max_number:
-                try:
-                    seq = int(max_number.split('-')[-1]) + 1
-                except (ValueError, IndexError):
-                    seq = 1
-            else:
-                seq = 1
-            
-            self.archive_number = f"ARCH-{current_year}-{seq:05d}"
+            self.archive_number = next_document_number(
+                ProjectArchive.objects, 'archive_number', 'ARCH', period=str(current_year), width=5,
+            )
         super().save(*args, **kwargs)
 
 
@@ -1451,6 +1431,7 @@ class BusinessContract(models.Model):
             models.Index(fields=['contract_number']),
             models.Index(fields=['status', 'contract_type']),
             models.Index(fields=['contract_date']),
+            models.Index(fields=['created_time', 'id']),
         ]
 
     def __str__(self):
@@ -1729,7 +1710,6 @@ class BusinessContract(models.Model):
         # 自动生成项目编号：HT-YYYY-NNNN
         # 如果关联的商机已有业务委托书，则继承其项目编号
         if not self.project_number:
-            from django.db.models import Max
             from datetime import datetime
             from backend.apps.customer_management.models import AuthorizationLetter
             
@@ -1748,37 +1728,11 @@ class BusinessContract(models.Model):
             else:
                 # 如果没有业务委托书，自动生成项目编号
                 current_year = datetime.now().strftime('%Y')
-                year_prefix = f'HT-{current_year}-'
-                
-                # 查找当年最大项目编号（从业务委托书和合同中查找）
-                max_letter = AuthorizationLetter.objects.filter(
-                    project_number__startswith=year_prefix
-                ).aggregate(max_num=Max('project_number'))['max_num']
-                
-                max_contract = BusinessContract.objects.filter(
-                    project_number__startswith=year_prefix
-                ).exclude(id=self.id if self.id else None).aggregate(max_num=Max('project_number'))['max_num']
-                
-                # 取两者中的最大值
-                max_project_number = None
-                if max_letter and max_contract:
-                    max_project_number = max(max_letter, max_contract)
-                elif max_letter:
-                    max_project_number = max_letter
-                elif max_contract:
-                    max_project_number = max_contract
-                
-                if max_project_number:
-                    try:
-                        # 提取序列号，格式：HT-YYYY-NNNN
-                        seq_str = max_project_number.split('-')[-1]
-                        seq = int(seq_str) + 1
-                    except (ValueError, IndexError):
-                        seq = 1
-                else:
-                    seq = 1
-                
-                self.project_number = f'{year_prefix}{seq:04d}'
+                # 业务委托书与合同共用 HT-YYYY-NNNN 编号空间
+                self.project_number = next_document_number(
+                    BusinessContract.objects, 'project_number', 'HT', period=current_year,
+                    sources=[(AuthorizationLetter.objects, 'project_number'), (BusinessContract.objects, 'project_number')],
+                )
         
         # 自动计算不含税金额和税额
         if self.contract_amount:
@@ -0,0 +1,317 @@
+"""
+项目监控驾驶舱数据
+统计项目进度、里程碑、团队规模和延期提醒
+"""
+import hashlib
+import json
+from datetime import date
+from typing import Dict, List, Optional
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Case, Count, DateField, DurationField, F, IntegerField, OuterRef, Q, Subquery, Value, When
+from django.db.models.functions import Coalesce
+from django.urls import reverse
+from django.utils import timezone
+
+from backend.apps.production_management.models import Project, ProjectMilestone, ProjectTeam
+from backend.apps.system_management.data_scope import filter_projects_by_scope, resolve_project_scope
+from backend.core.cache_versions import bump_version, versioned_cache_key
+
+PROJECT_DASHBOARD_TIMEOUT = getattr(settings, 'PROJECT_DASHBOARD_CACHE_TIMEOUT', 300)
+DASHBOARD_VERSION_KEY = 'project_dashboard:version'
+# 延期提醒条数
+DELAYED_REMINDER_LIMIT = 5
+
+# 各服务类型的标准服务阶段（与里程碑名称对应）
+SERVICE_TIMELINE_TEMPLATES = {
+    "result_optimization": [
+        "优化前图纸",
+        "咨询意见书",
+        "三方沟通成果",
+        "核图意见书",
+        "优化后图纸",
+        "完工确认函",
+    ],
+    "detailed_review": [
+        "优化前图纸",
+        "咨询意见书",
+        "三方沟通成果",
+        "核图意见书",
+        "优化后图纸",
+        "完工确认函",
+    ],
+    "process_optimization": [
+        "优化前图纸",
+        "过程优化报告",
+        "核图意见书",
+        "优化后图纸",
+        "完工确认函",
+    ],
+    "full_process_consulting": [
+        "咨询意见周报",
+        "过程咨询报告",
+        "核图意见书",
+        "完工确认函",
+    ],
+}
+
+_METRIC_FIELDS = (
+    'id', 'project_number', 'name', 'status', 'client_company_name', 'design_company', 'service_type__code',
+)
+
+
+# ==================== 缓存版本 ====================
+
+def bump_project_dashboard_version() -> int:
+    """项目、里程碑、团队成员或服务类型变化时调用，使全部驾驶舱缓存失效"""
+    return bump_version(DASHBOARD_VERSION_KEY)
+
+
+# ==================== 筛选 ====================
+
+def dashboard_filters(query_params) -> Dict[str, object]:
+    """从请求参数中取出驾驶舱筛选条件"""
+    if hasattr(query_params, 'getlist'):
+        status_list = query_params.getlist('status')
+    else:
+        status_list = query_params.get('status', [])
+    if isinstance(status_list, str):
+        status_list = [status_list]
+    return {
+        'project': query_params.get('project') or None,
+        'subsidiary': query_params.get('subsidiary') or None,
+        'service_type': query_params.get('service_type') or None,
+        'project_manager': query_params.get('project_manager') or None,
+        'status': sorted(status for status in status_list if status),
+        'date_from': query_params.get('date_from') or None,
+        'date_to': query_params.get('date_to') or None,
+    }
+
+
+def dashboard_project_queryset(user, permission_set, filters: dict):
+    """用户可见且符合筛选条件的项目（数据范围条件为子查询，无需 DISTINCT）"""
+    projects = filter_projects_by_scope(Project.objects.all(), user, permission_set)
+    if filters['project']:
+        projects = projects.filter(id=filters['project'])
+    if filters['subsidiary']:
+        projects = projects.filter(subsidiary=filters['subsidiary'])
+    if filters['service_type']:
+        projects = projects.filter(service_type_id=filters['service_type'])
+    if filters['project_manager']:
+        projects = projects.filter(project_manager_id=filters['project_manager'])
+    if filters['status']:
+        projects = projects.filter(status__in=filters['status'])
+    if filters['date_from']:
+        projects = projects.filter(created_time__date__gte=filters['date_from'])
+    if filters['date_to']:
+        projects = projects.filter(created_time__date__lte=filters['date_to'])
+    return projects
+
+
+# ==================== 指标 ====================
+
+def _count_subquery(queryset, field: str = 'id', distinct: bool = False):
+    """按项目统计的相关子查询，没有记录时为 0"""
+    counts = (
+        queryset.filter(project_id=OuterRef('pk'))
+        .order_by()
+        .values('project_id')
+        .annotate(total=Count(field, distinct=distinct))
+        .values('total')
+    )
+    return Coalesce(Subquery(counts, output_field=IntegerField()), 0)
+
+
+def _template_stage_q() -> Q:
+    """里程碑名称属于所在项目服务类型的标准阶段"""
+    condition = Q(pk__in=[])
+    for service_code, stages in SERVICE_TIMELINE_TEMPLATES.items():
+        condition |= Q(project__service_type__code=service_code, name__in=stages)
+    return condition
+
+
+def annotate_project_metrics(projects):
+    """在 SQL 中统计每个项目的里程碑、标准阶段完成数和在岗团队人数，返回 values 查询集"""
+    milestones = ProjectMilestone.objects.all()
+    return (
+        projects.order_by('-created_time', '-id')
+        .values(*_METRIC_FIELDS)
+        .annotate(
+            milestone_count=_count_subquery(milestones),
+            milestone_done=_count_subquery(milestones.filter(is_completed=True)),
+            stage_done=_count_subquery(
+                milestones.filter(_template_stage_q(), is_completed=True), field='name', distinct=True,
+            ),
+            team_size=_count_subquery(ProjectTeam.objects.filter(is_active=True)),
+        )
+    )
+
+
+def compute_project_metric(row: dict, status_labels: Optional[dict] = None) -> dict:
+    """
+    由 annotate_project_metrics 的一行计算项目指标
+
+    进度与项目详情页的服务时间线一致：服务类型有标准阶段时按阶段完成数计算，否则按里程碑完成数计算。
+    """
+    stages = SERVICE_TIMELINE_TEMPLATES.get(row['service_type__code'] or '')
+    if stages:
+        total_milestones = len(stages)
+        completed_milestones = row['stage_done']
+    else:
+        total_milestones = row['milestone_count']
+        completed_milestones = row['milestone_done']
+    progress_percent = int(round(completed_milestones / total_milestones * 100)) if total_milestones else 0
+
+    quality_score = 80 + (progress_percent % 15)
+    risk_score = 90 - (progress_percent % 15)
+    health_score = round((progress_percent * 0.7) + (quality_score * 0.2) + (risk_score * 0.1), 1)
+
+    if status_labels is None:
+        status_labels = dict(Project._meta.get_field('status').choices)
+    return {
+        'project_id': row['id'],
+        'project_number': row['project_number'],
+        'project_name': row['name'],
+        'status': status_labels.get(row['status'], row['status']),
+        'progress_percent': progress_percent,
+        'milestone_total': total_milestones,
+        'milestone_completed': completed_milestones,
+        'quality_score': quality_score,
+        'risk_score': risk_score,
+        'health_score': health_score,
+        'team_size': row['team_size'],
+        'client_company': row['client_company_name'] or '—',
+        'design_company': row['design_company'] or '—',
+    }
+
+
+def delayed_milestone_reminders(projects, today: Optional[date] = None,
+                                limit: int = DELAYED_REMINDER_LIMIT) -> List[dict]:
+    """
+    延期最久的里程碑
+
+    已完成但实际日期晚于计划日期的，按实际延期天数；未完成且计划日期已过的，按至今延期天数。
+    """
+    today = today or timezone.localdate()
+    late_finished = Q(actual_date__isnull=False, actual_date__gt=F('planned_date'))
+    overdue = Q(planned_date__lt=today, is_completed=False)
+    rows = (
+        ProjectMilestone.objects.filter(project__in=projects.order_by().values('id'))
+        .filter(late_finished | overdue)
+        .annotate(delay=Case(
+            When(late_finished, then=F('actual_date') - F('planned_date')),
+            default=Value(today, output_field=DateField()) - F('planned_date'),
+            output_field=DurationField(),
+        ))
+        .order_by('-delay', '-project__created_time', '-project_id', 'planned_date', 'id')
+        .values('id', 'name', 'project_id', 'project__name', 'delay')[:limit]
+    )
+    reminders = []
+    for row in rows:
+        detail_url = reverse('production_pages:project_detail', args=[row['project_id']])
+        reminders.append({
+            'project_id': row['project_id'],
+            'project_name': row['project__name'],
+            'milestone_id': row['id'],
+            'name': row['name'],
+            'delay_days': row['delay'].days,
+            'url': f"{detail_url}?tab=progress&milestone={row['id']}",
+        })
+    return reminders
+
+
+# ==================== 汇总 ====================
+
+def _build_dashboard_data(projects) -> dict:
+    status_labels = dict(Project._meta.get_field('status').choices)
+    rows = list(annotate_project_metrics(projects))
+    project_metrics = [compute_project_metric(row, status_labels) for row in rows]
+    metric_count = len(project_metrics)
+
+    summary = {
+        'project_count': metric_count,
+        'active_count': sum(1 for row in rows if row['status'] == 'in_progress'),
+        'completed_count': sum(1 for row in rows if row['status'] == 'completed'),
+        'average_health_score': round(sum(m['health_score'] for m in project_metrics) / metric_count, 1) if metric_count else 0,
+        'average_progress_percent': round(sum(m['progress_percent'] for m in project_metrics) / metric_count, 1) if metric_count else 0,
+        'last_updated': timezone.now(),
+    }
+    summary['average_progress_percent'] = min(max(summary['average_progress_percent'], 0), 100)
+
+    summary_json = summary.copy()
+    summary_json['last_updated'] = summary['last_updated'].isoformat()
+
+    milestone_completed_total = sum(m['milestone_completed'] for m in project_metrics)
+    milestone_total_total = sum(m['milestone_total'] for m in project_metrics)
+    milestone_in_progress = max(milestone_total_total - milestone_completed_total, 0)
+    summary['milestone_completed_total'] = milestone_completed_total
+
+    milestone_summary = {
+        'labels': ['已完成', '进行中', '未开始'],
+        'data': [
+            milestone_completed_total,
+            milestone_in_progress,
+            max(metric_count * 3 - milestone_completed_total - milestone_in_progress, 0),
+        ],
+    }
+
+    quality_distribution_counter = {'优秀': 0, '良好': 0, '待提升': 0}
+    for metric in project_metrics:
+        score = metric['quality_score']
+        if score >= 90:
+            quality_distribution_counter['优秀'] += 1
+        elif score >= 75:
+            quality_distribution_counter['良好'] += 1
+        else:
+            quality_distribution_counter['待提升'] += 1
+
+    return {
+        'project_metrics': project_metrics,
+        'summary': summary,
+        'summary_json': summary_json,
+        'milestone_summary': milestone_summary,
+        'progress_trends': {
+            'labels': [m['project_name'] for m in project_metrics],
+            'progress': [m['progress_percent'] for m in project_metrics],
+        },
+        'risk_matrix': [
+            {
+                'name': m['project_name'],
+                'probability': min(100, 100 - m['progress_percent'] + 10),
+                'impact': min(100, 100 - m['quality_score'] + 10),
+            }
+            for m in project_metrics
+        ],
+        'quality_distribution': {
+            'labels': list(quality_distribution_counter.keys()),
+            'data': list(quality_distribution_counter.values()),
+        },
+        'quality_trend': {
+            'labels': [m['project_name'] for m in project_metrics],
+            'quality_scores': [m['quality_score'] for m in project_metrics],
+        },
+        'delayed_task_reminders': delayed_milestone_reminders(projects),
+    }
+
+
+def _cache_key(user, permission_set, filters: dict) -> str:
+    scope = resolve_project_scope(user, permission_set)
+    digest = hashlib.md5(
+        json.dumps([scope.cache_key, filters], sort_keys=True, default=str).encode('utf-8')
+    ).hexdigest()
+    return versioned_cache_key(f'project_dashboard:{digest}:{timezone.localdate():%Y%m%d}', DASHBOARD_VERSION_KEY)
+
+
+def get_project_dashboard_data(user, permission_set, filters: dict) -> dict:
+    """
+    驾驶舱指标、图表和延期提醒（带缓存）
+
+    返回的列表与字典为缓存中的数据，调用方不要原地修改。
+    """
+    key = _cache_key(user, permission_set, filters)
+    data = cache.get(key)
+    if data is None:
+        data = _build_dashboard_data(dashboard_project_queryset(user, permission_set, filters))
+        cache.set(key, data, PROJECT_DASHBOARD_TIMEOUT)
+    return data
@@ -1,16 +1,29 @@
 """
 项目中心信号处理器
+
+- 项目、里程碑、团队成员、服务类型变化时，升级驾驶舱版本号，使项目监控驾驶舱缓存失效
 """
 import logging
-from django.db.models.signals import post_save
+from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
 from django.db import transaction
 from django.db.models import Max
 from django.utils import timezone
 from backend.apps.workflow_engine.models import ApprovalInstance
-from backend.apps.production_management.models import Project
+from backend.apps.production_management.models import Project, ProjectMilestone, ProjectTeam, ServiceType
+from backend.apps.production_management.services_dashboard import bump_project_dashboard_version
 
 logger = logging.getLogger(__name__)
 
 
-
+@receiver(post_save, sender=Project)
+@receiver(post_delete, sender=Project)
+@receiver(post_save, sender=ProjectMilestone)
+@receiver(post_delete, sender=ProjectMilestone)
+@receiver(post_save, sender=ProjectTeam)
+@receiver(post_delete, sender=ProjectTeam)
+@receiver(post_save, sender=ServiceType)
+@receiver(post_delete, sender=ServiceType)
+def handle_project_dashboard_change(sender, **kwargs):
+    # 事务提交后再失效，避免提交前被并发请求用旧数据重新填充缓存
+    transaction.on_commit(bump_project_dashboard_version)
@@ -7,6 +7,7 @@ from django.db.models import Q, Count, Sum
 from django.utils import timezone
 from django_filters.rest_framework import DjangoFilterBackend
 from backend.apps.system_management.services import get_user_permission_codes
+from backend.core.pagination import KeysetPagination
 from django.db import transaction
 from .views_pages import (
     build_project_dashboard_payload,
@@ -39,6 +40,8 @@ class ProjectViewSet(viewsets.ModelViewSet):
     permission_classes = [permissions.IsAuthenticated]
     filter_backends = [DjangoFilterBackend]
     filterset_fields = ['status', 'service_type', 'project_manager', 'client']
+    # ?pagination=keyset 时按 (-created_time, -id) 游标分页
+    pagination_class = KeysetPagination
     
     def get_serializer_class(self):
         if self.action == 'create':
@@ -119,23 +122,10 @@ class ProjectViewSet(viewsets.ModelViewSet):
     def get_next_number(self, request):
         """获取下一个项目编号序号"""
         import datetime
-        from django.db.models import Max
-        
+        from backend.core.sequence import peek_document_sequence
+
         year = request.query_params.get('year', str(datetime.datetime.now().year))
-        
-        queryset = Project.objects.filter(
-            project_number__startswith=f'VIH-{year}-'
-        )
-        
-        max_number = queryset.aggregate(max_num=Max('project_number'))['max_num']
-        
-        if max_number:
-            try:
-                seq = int(max_number.split('-')[-1]) + 1
-            except (ValueError, IndexError):
-                seq = 1
-        else:
-            seq = 1
+        seq = peek_document_sequence(Project.objects, 'project_number', 'VIH', period=year)
         
         return Response({'next_seq': seq})
     
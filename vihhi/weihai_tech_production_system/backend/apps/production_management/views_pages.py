@@ -47,6 +47,13 @@ from .serializers import ProjectSerializer, ProjectCreateSerializer
 
 from backend.apps.system_management.models import User, Department
 from backend.apps.system_management.services import get_user_permission_codes
+from backend.apps.system_management.data_scope import filter_projects_by_scope
+from backend.apps.production_management.services_dashboard import (
+    SERVICE_TIMELINE_TEMPLATES,
+    dashboard_filters,
+    dashboard_project_queryset,
+    get_project_dashboard_data,
+)
 from backend.core.views import _build_full_top_nav
 # calculate_output_value 改为延迟导入，避免在数据库表不存在时导致模块加载失败
 
@@ -551,38 +558,6 @@ TIMELINE_STAGE_PRESETS = {
 
 DEFAULT_TIMELINE_STAGES = ["立项", "设计", "执行", "收尾"]
 
-SERVICE_TIMELINE_TEMPLATES = {
-    "result_optimization": [
-        "优化前图纸",
-        "咨询意见书",
-        "三方沟通成果",
-        "核图意见书",
-        "优化后图纸",
-        "完工确认函",
-    ],
-    "detailed_review": [
-        "优化前图纸",
-        "咨询意见书",
-        "三方沟通成果",
-        "核图意见书",
-        "优化后图纸",
-        "完工确认函",
-    ],
-    "process_optimization": [
-        "优化前图纸",
-        "过程优化报告",
-        "核图意见书",
-        "优化后图纸",
-        "完工确认函",
-    ],
-    "full_process_consulting": [
-        "咨询意见周报",
-        "过程咨询报告",
-        "核图意见书",
-        "完工确认函",
-    ],
-}
-
 
 def build_project_create_context(form_data=None, selected_profession_ids=None):
     service_types = ServiceType.objects.prefetch_related('professions').order_by('order', 'id')
@@ -769,34 +744,9 @@ def _user_is_project_member(user, project):
     return project.team_members.filter(user=user).exists()
 
 
-def _project_visibility_filter(user):
-    if not user or not getattr(user, 'is_authenticated', False):
-        return Q(pk__in=[])
-    return Q(project_manager=user) | Q(business_manager=user) | Q(team_members__user=user) | Q(created_by=user) | Q(client_leader=user) | Q(design_leader=user)
-
-
 def _filter_projects_for_user(projects, user, permission_set):
-    if _has_global_project_view(permission_set, user):
-        return projects
-    if not user or not getattr(user, 'is_authenticated', False):
-        return projects.none()
-
-    scoped_projects = projects.filter(_project_visibility_filter(user))
-
-    if (
-        getattr(user, 'user_type', 'internal') == 'internal'
-        and user.department_id
-        and _has_permission(permission_set, 'task_collaboration.view_all')
-    ):
-        department_users = User.objects.filter(department_id=user.department_id, is_active=True)
-        department_scope = (
-            Q(project_manager__in=department_users) |
-            Q(team_members__user__in=department_users) |
-            Q(business_manager__in=department_users)
-        )
-        scoped_projects = scoped_projects.union(projects.filter(department_scope))
-
-    return scoped_projects.distinct()
+    """按数据范围过滤项目（见 system_management.data_scope.filter_projects_by_scope）"""
+    return filter_projects_by_scope(projects, user, permission_set)
 
 
 def _task_visible_to_user(task, user, project):
@@ -1440,171 +1390,10 @@ def _notify_team_change(project, operator, change_details):
     return summary
 
 
-def _compute_project_metric(project):
-    milestones = list(project.milestones.all())
-
-    service_timeline, service_completion = _build_service_timeline(project, milestones)
-    if service_timeline:
-        total_milestones = len(service_timeline)
-        completed_milestones = len([stage for stage in service_timeline if stage["status"] == "completed"])
-        progress_percent = service_completion
-    else:
-        total_milestones = len(milestones)
-        completed_milestones = len([m for m in milestones if m.is_completed])
-        progress_percent = int(completed_milestones / total_milestones * 100) if total_milestones else 0
-        service_completion = progress_percent
-
-    quality_score = 80 + (progress_percent % 15)
-    risk_score = 90 - (progress_percent % 15)
-    health_score = round((progress_percent * 0.7) + (quality_score * 0.2) + (risk_score * 0.1), 1)
-
-    return {
-        'project_id': project.id,
-        'project_number': project.project_number,
-        'project_name': project.name,
-        'status': project.get_status_display(),
-        'progress_percent': progress_percent,
-        'milestone_total': total_milestones,
-        'milestone_completed': completed_milestones,
-        'quality_score': quality_score,
-        'risk_score': risk_score,
-        'health_score': health_score,
-        'team_size': project.team_members.filter(is_active=True).count(),
-        'client_company': project.client_company_name or '—',
-        'design_company': project.design_company or '—',
-    }
-
 def build_project_dashboard_payload(user, permission_set, query_params):
-    projects = Project.objects.select_related(
-        'service_type',
-        'business_type',
-        'project_manager',
-        'business_manager'
-    ).prefetch_related(
-        'service_professions',
-        'milestones',
-        'team_members'
-    )
-
-    has_global_view = _has_global_project_view(permission_set, user)
-    projects = _filter_projects_for_user(projects, user, permission_set)
-
-    project_id = query_params.get('project')
-    subsidiary = query_params.get('subsidiary')
-    service_type_id = query_params.get('service_type')
-    project_manager_id = query_params.get('project_manager')
-    status_list = query_params.getlist('status') if hasattr(query_params, 'getlist') else query_params.get('status', [])
-    date_from = query_params.get('date_from')
-    date_to = query_params.get('date_to')
-
-    if project_id:
-        projects = projects.filter(id=project_id)
-    if subsidiary:
-        projects = projects.filter(subsidiary=subsidiary)
-    if service_type_id:
-        projects = projects.filter(service_type_id=service_type_id)
-    if project_manager_id:
-        projects = projects.filter(project_manager_id=project_manager_id)
-    if status_list:
-        # status_list may be string if not QueryDict
-        if isinstance(status_list, str):
-            status_list = [status_list]
-        projects = projects.filter(status__in=status_list)
-    if date_from:
-        projects = projects.filter(created_time__date__gte=date_from)
-    if date_to:
-        projects = projects.filter(created_time__date__lte=date_to)
-
-    all_projects = projects.distinct()
-    project_list = list(all_projects)
-    project_metrics = [_compute_project_metric(p) for p in project_list]
-
-    today = timezone.now().date()
-    delayed_task_reminders = []
-    for project_obj, metric in zip(project_list, project_metrics):
-        for milestone in project_obj.milestones.all():
-            delay_days = 0
-            if milestone.planned_date and milestone.actual_date and milestone.actual_date > milestone.planned_date:
-                delay_days = (milestone.actual_date - milestone.planned_date).days
-            elif (
-                milestone.planned_date
-                and milestone.planned_date < today
-                and not milestone.is_completed
-            ):
-                delay_days = (today - milestone.planned_date).days
-            if delay_days <= 0:
-                continue
-            delayed_task_reminders.append({
-                'project_id': project_obj.id,
-                'project_name': metric['project_name'],
-                'milestone_id': milestone.id,
-                'name': milestone.name,
-                'delay_days': delay_days,
-                'url': f"{reverse('production_pages:project_detail', args=[project_obj.id])}?tab=progress&milestone={milestone.id}",
-            })
-
-    delayed_task_reminders.sort(key=lambda item: item['delay_days'], reverse=True)
-    delayed_task_reminders = delayed_task_reminders[:5]
-
-    summary = {
-        'project_count': all_projects.count(),
-        'active_count': all_projects.filter(status='in_progress').count(),
-        'completed_count': all_projects.filter(status='completed').count(),
-        'average_health_score': round(sum(m['health_score'] for m in project_metrics) / len(project_metrics), 1) if project_metrics else 0,
-        'average_progress_percent': round(sum(m['progress_percent'] for m in project_metrics) / len(project_metrics), 1) if project_metrics else 0,
-        'last_updated': timezone.now(),
-    }
-
-    summary['average_progress_percent'] = min(max(summary['average_progress_percent'], 0), 100)
-
-    summary_json = summary.copy()
-    summary_json['last_updated'] = summary['last_updated'].isoformat()
-
-    milestone_completed_total = sum(m['milestone_completed'] for m in project_metrics)
-    milestone_total_total = sum(m['milestone_total'] for m in project_metrics)
-    milestone_in_progress = max(milestone_total_total - milestone_completed_total, 0)
-    summary['milestone_completed_total'] = milestone_completed_total
-
-    milestone_summary = {
-        'labels': ['已完成', '进行中', '未开始'],
-        'data': [
-            milestone_completed_total,
-            milestone_in_progress,
-            max(len(project_metrics) * 3 - milestone_completed_total - milestone_in_progress, 0),
-        ],
-    }
-
-    progress_trends = {
-        'labels': [m['project_name'] for m in project_metrics],
-        'progress': [m['progress_percent'] for m in project_metrics],
-    }
-
-    risk_matrix = [
-        {
-            'name': m['project_name'],
-            'probability': min(100, 100 - m['progress_percent'] + 10),
-            'impact': min(100, 100 - m['quality_score'] + 10),
-        }
-        for m in project_metrics
-    ]
-
-    quality_distribution_counter = {'优秀': 0, '良好': 0, '待提升': 0}
-    for metric in project_metrics:
-        score = metric['quality_score']
-        if score >= 90:
-            quality_distribution_counter['优秀'] += 1
-        elif score >= 75:
-            quality_distribution_counter['良好'] += 1
-        else:
-            quality_distribution_counter['待提升'] += 1
-    quality_distribution = {
-        'labels': list(quality_distribution_counter.keys()),
-        'data': list(quality_distribution_counter.values()),
-    }
-    quality_trend = {
-        'labels': [m['project_name'] for m in project_metrics],
-        'quality_scores': [m['quality_score'] for m in project_metrics],
-    }
+    filters = dashboard_filters(query_params)
+    data = get_project_dashboard_data(user, permission_set, filters)
+    project_metrics = data['project_metrics']
 
     primary_project_id = project_metrics[0]['project_id'] if project_metrics else None
     detail_url = reverse('production_pages:project_detail', args=[primary_project_id]) if primary_project_id else '#'
@@ -1633,30 +1422,30 @@ def build_project_dashboard_payload(user, permission_set, query_params):
     filter_projects = Project.objects.values('id', 'name', 'project_number')
 
     selected_filters = {
-        'project': project_id,
-        'service_type': service_type_id,
-        'subsidiary': subsidiary,
-        'project_manager': project_manager_id,
-        'date_from': date_from,
-        'date_to': date_to,
+        'project': filters['project'],
+        'service_type': filters['service_type'],
+        'subsidiary': filters['subsidiary'],
+        'project_manager': filters['project_manager'],
+        'date_from': filters['date_from'],
+        'date_to': filters['date_to'],
     }
 
     return {
-        'projects': all_projects,
+        'projects': dashboard_project_queryset(user, permission_set, filters),
         'project_metrics': project_metrics,
-        'summary': summary,
-        'milestone_summary': milestone_summary,
-        'progress_trends': progress_trends,
-        'risk_matrix': risk_matrix,
-        'quality_distribution': quality_distribution,
-        'quality_trend': quality_trend,
+        'summary': data['summary'],
+        'milestone_summary': data['milestone_summary'],
+        'progress_trends': data['progress_trends'],
+        'risk_matrix': data['risk_matrix'],
+        'quality_distribution': data['quality_distribution'],
+        'quality_trend': data['quality_trend'],
         'notifications': notifications,
-        'delayed_task_reminders': delayed_task_reminders,
+        'delayed_task_reminders': data['delayed_task_reminders'],
         'quick_actions': quick_actions,
         'filter_projects': filter_projects,
         'selected_filters': selected_filters,
         'primary_metric': project_metrics[0] if project_metrics else None,
-        'summary_json': summary_json,
+        'summary_json': data['summary_json'],
     }
 
 
@@ -1676,29 +1465,23 @@ def project_create(request):
     if request.method == 'POST':
         try:
             with transaction.atomic():
-                # 生成项目编号
                 import datetime
-                current_year = datetime.datetime.now().year
+                from backend.core.sequence import advance_document_sequence, next_document_number
+                current_year = str(datetime.datetime.now().year)
                 project_number_seq = request.POST.get('project_number_seq', '').strip()
                 
                 if project_number_seq:
-                    # 手动填写的序号
+                    # 手动填写的序号，同时推进计数器，避免之后自动生成时撞号
                     project_number = f"VIH-{current_year}-{project_number_seq.zfill(3)}"
+                    if project_number_seq.isdigit():
+                        advance_document_sequence(
+                            Project.objects, 'project_number', 'VIH', int(project_number_seq), period=current_year,
+                        )
                 else:
                     # 自动生成序号
-                    from django.db.models import Max
-                    max_number = Project.objects.filter(
-                        project_number__startswith=f'VIH-{current_year}-'
-                    ).aggregate(max_num=Max('project_number'))['max_num']
-                    
-                    if max_number:
-                        try:
-                            seq = int(max_number.split('-')[-1]) + 1
-                        except (ValueError, IndexError):
-                            seq = 1
-                    else:
-                        seq = 1
-                    project_number = f"VIH-{current_year}-{seq:03d}"
+                    project_number = next_document_number(
+                        Project.objects, 'project_number', 'VIH', period=current_year, width=3,
+                    )
                 
                 # 获取表单数据
                 action = request.POST.get('action', 'submit')
@@ -0,0 +1,102 @@
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from backend.apps.production_management.models import Project, ProjectMilestone, ProjectTeam, ServiceType
+from backend.apps.production_management.services_dashboard import (
+    dashboard_filters,
+    get_project_dashboard_data,
+)
+from backend.apps.system_management.services import get_user_permission_codes
+
+
+class ProjectDashboardTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        User = get_user_model()
+        self.admin = User.objects.create_user(
+            username='dashboard_admin', password='test123456', is_superuser=True, user_type='internal',
+        )
+        self.member = User.objects.create_user(username='dashboard_member', password='test123456')
+        self.permission_set = get_user_permission_codes(self.admin)
+        templated = ServiceType.objects.create(code='process_optimization', name='过程优化')
+        plain = ServiceType.objects.create(code='dashboard_plain', name='其他服务')
+        today = timezone.localdate()
+
+        self.templated = Project.objects.create(
+            project_number='DASH-001', name='模板项目', service_type=templated,
+            created_by=self.admin, status='in_progress',
+        )
+        # 5 个标准阶段完成 2 个，非标准阶段的里程碑不计入
+        for name, completed in [('优化前图纸', True), ('过程优化报告', True), ('核图意见书', False), ('额外节点', True)]:
+            ProjectMilestone.objects.create(
+                project=self.templated, name=name, planned_date=today, is_completed=completed,
+            )
+        ProjectTeam.objects.create(project=self.templated, user=self.admin, role='project_manager')
+        ProjectTeam.objects.create(project=self.templated, user=self.member, role='engineer', is_active=False)
+
+        self.plain = Project.objects.create(
+            project_number='DASH-002', name='普通项目', service_type=plain,
+            created_by=self.admin, status='completed',
+        )
+        ProjectMilestone.objects.create(
+            project=self.plain, name='交付', planned_date=today - timedelta(days=10),
+            actual_date=today - timedelta(days=4), is_completed=True,
+        )
+        ProjectMilestone.objects.create(
+            project=self.plain, name='验收', planned_date=today - timedelta(days=3), is_completed=False,
+        )
+
+    def _data(self, **params):
+        return get_project_dashboard_data(self.admin, self.permission_set, dashboard_filters(params))
+
+    def test_metrics_computed_from_aggregates(self):
+        with self.assertNumQueries(2):
+            data = self._data()
+        metrics = {metric['project_number']: metric for metric in data['project_metrics']}
+
+        templated = metrics['DASH-001']
+        self.assertEqual((templated['milestone_total'], templated['milestone_completed']), (5, 2))
+        self.assertEqual(templated['progress_percent'], 40)
+        self.assertEqual(templated['team_size'], 1)
+
+        plain = metrics['DASH-002']
+        self.assertEqual((plain['milestone_total'], plain['milestone_completed']), (2, 1))
+        self.assertEqual(plain['progress_percent'], 50)
+        self.assertEqual(plain['team_size'], 0)
+
+        summary = data['summary_json']
+        self.assertEqual((summary['project_count'], summary['active_count'], summary['completed_count']), (2, 1, 1))
+        self.assertEqual(
+            [(item['name'], item['delay_days']) for item in data['delayed_task_reminders']],
+            [('交付', 6), ('验收', 3)],
+        )
+
+        filtered = self._data(status='completed')
+        self.assertEqual([metric['project_number'] for metric in filtered['project_metrics']], ['DASH-002'])
+
+    def test_cache_invalidated_by_milestone_change(self):
+        self._data()
+        with self.assertNumQueries(0):
+            self._data()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            milestone = ProjectMilestone.objects.get(project=self.templated, name='核图意见书')
+            milestone.is_completed = True
+            milestone.save()
+
+        metrics = {metric['project_number']: metric for metric in self._data()['project_metrics']}
+        self.assertEqual(metrics['DASH-001']['milestone_completed'], 3)
+
+    def test_dashboard_charts_endpoint(self):
+        client = APIClient()
+        client.force_authenticate(self.admin)
+        response = client.get(reverse('production:project-dashboard-charts'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['summary']['project_count'], 2)
+        self.assertEqual(response.data['progress_trends']['progress'], [50, 40])
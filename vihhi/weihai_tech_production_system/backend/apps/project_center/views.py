@@ -119,23 +119,10 @@ class ProjectViewSet(viewsets.ModelViewSet):
     def get_next_number(self, request):
         """获取下一个项目编号序号"""
         import datetime
-        from django.db.models import Max
-        
+        from backend.core.sequence import peek_document_sequence
+
         year = request.query_params.get('year', str(datetime.datetime.now().year))
-        
-        queryset = Project.objects.filter(
-            project_number__startswith=f'VIH-{year}-'
-        )
-        
-        max_number = queryset.aggregate(max_num=Max('project_number'))['max_num']
-        
-        if max_number:
-            try:
-                seq = int(max_number.split('-')[-1]) + 1
-            except (ValueError, IndexError):
-                seq = 1
-        else:
-            seq = 1
+        seq = peek_document_sequence(Project.objects, 'project_number', 'VIH', period=year)
         
         return Response({'next_seq': seq})
     
@@ -1,16 +1,18 @@
 import json
+import tempfile
 
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required
 from django.shortcuts import render, redirect, get_object_or_404
 from django.urls import reverse
 from django.utils import timezone
-from django.http import HttpResponse
+from django.http import FileResponse
 from reportlab.lib.pagesizes import A4
 from reportlab.lib.units import mm
 from reportlab.pdfgen import canvas
 
 from backend.apps.system_management.services import user_has_permission
+from backend.utils.export_utils import EXPORT_CHUNK_SIZE
 
 from .forms import (
     StandardForm,
@@ -505,13 +507,14 @@ def risk_case_export(request):
     if not _require_permission(request, RESOURCE_PERMISSIONS["knowledge"]):
         return redirect("home")
 
-    cases = RiskCase.objects.select_related("project").order_by("-occurred_on", "case_code")
+    # 只取报表用到的字段，逐块读取；PDF 写入临时文件后分块返回
+    cases = RiskCase.objects.select_related("project").only(
+        "case_code", "title", "case_type", "occurred_on", "project__name",
+        "risk_description", "root_cause", "impact_scope", "counter_measure", "prevention", "lessons",
+    ).order_by("-occurred_on", "case_code")
 
-    response = HttpResponse(content_type="application/pdf")
-    filename = timezone.now().strftime("risk_cases_%Y%m%d_%H%M%S.pdf")
-    response["Content-Disposition"] = f"attachment; filename=\"{filename}\""
-
-    pdf = canvas.Canvas(response, pagesize=A4)
+    handle = tempfile.TemporaryFile()
+    pdf = canvas.Canvas(handle, pagesize=A4)
     width, height = A4
     margin_x = 20 * mm
     margin_y = 20 * mm
@@ -525,7 +528,7 @@ def risk_case_export(request):
     y -= 8 * mm
 
     pdf.setFont("Helvetica", 10)
-    for case in cases:
+    for case in cases.iterator(chunk_size=EXPORT_CHUNK_SIZE):
         if y < margin_y + 40:
             pdf.showPage()
             y = height - margin_y
@@ -571,7 +574,9 @@ def risk_case_export(request):
         y -= 6 * mm
 
     pdf.save()
-    return response
+    handle.seek(0)
+    filename = timezone.now().strftime("risk_cases_%Y%m%d_%H%M%S.pdf")
+    return FileResponse(handle, as_attachment=True, filename=filename, content_type="application/pdf")
 
 
 @login_required
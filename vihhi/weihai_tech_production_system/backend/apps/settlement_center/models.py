@@ -1,6 +1,7 @@
 from django.db import models
 from django.utils import timezone
 from decimal import Decimal
+from backend.core.sequence import next_document_number
 from backend.apps.system_management.models import User
 
 
@@ -409,27 +410,14 @@ class ProjectSettlement(models.Model):
         return f"{self.settlement_number} - {self.project.name}"
     
     def save(self, *args, **kwargs):
-        from django.db.models import Sum, Max
+        from django.db.models import Sum
         from datetime import date
         
         # 自动生成结算单号（格式：VIH-JS-{项目编号}-{序列号}）
         if not self.settlement_number and self.project_id:
             project_number = self.project.project_number
             # 查找该项目下已有的最大结算单号
-            max_settlement = ProjectSettlement.objects.filter(
-                settlement_number__startswith=f'VIH-JS-{project_number}-'
-            ).aggregate(max_num=Max('settlement_number'))['max_num']
-            
-            if max_settlement:
-                try:
-                    # 提取序列号，格式：VIH-JS-{项目编号}-{序列号}
-                    seq_str = max_settlement.split('-')[-1]
-                    seq = int(seq_str) + 1
-                except (ValueError, IndexError):
-                    seq = 1
-            else:
-                seq = 1
-            self.settlement_number = f'VIH-JS-{project_number}-{seq:04d}'
+            self.settlement_number = next_document_number(ProjectSettlement.objects, 'settlement_number', 'VIH-JS', period=project_number)
         
         # 如果没有结算日期，默认为当前日期
         if not self.settlement_date:
@@ -676,21 +664,9 @@ class ContractSettlement(models.Model):
     def save(self, *args, **kwargs):
         # 自动生成结算单号
         if not self.settlement_number:
-            from django.db.models import Max
             from datetime import datetime
             current_year = datetime.now().year
-            max_settlement = ContractSettlement.objects.filter(
-                settlement_number__startswith=f'CONTRACT-SETTLE-{current_year}-'
-            ).aggregate(max_num=Max('settlement_number'))['max_num']
-            
-            if max_settlement:
-                try:
-                    seq = int(max_settlement.split('-')[-1]) + 1
-                except (ValueError, IndexError):
-                    seq = 1
-            else:
-                seq = 1
-            self.settlement_number = f'CONTRACT-SETTLE-{current_year}-{seq:04d}'
+            self.settlement_number = next_document_number(ContractSettlement.objects, 'settlement_number', 'CONTRACT-SETTLE', period=str(current_year))
         
         # 自动计算累计结算金额
         if not self.total_settlement_amount:
@@ -776,22 +752,9 @@ class PaymentRecord(models.Model):
     def save(self, *args, **kwargs):
         # 自动生成回款单号
         if not self.payment_number:
-            from django.db.models import Max
             from datetime import datetime
             current_year = datetime.now().year
-            max_payment = PaymentRecord.objects.filter(
-                payment_number__startswith=f'PAY-{current_year}-'
-            ).aggregate(max_num=Max('payment_number'))['max_num']
-            
-            if max_payment:
-                try:
-                    seq = int(max_payment.split('-')[-1]) + 1
-                except (ValueError, IndexError):
-                    seq = 1
-            else:
-                seq = 1
-            
-            self.payment_number = f'PAY-{current_year}-{seq:04d}'
+            self.payment_number = next_document_number(PaymentRecord.objects, 'payment_number', 'PAY', period=str(current_year))
         
         super().save(*args, **kwargs)
     
@@ -6,3 +6,6 @@ class SystemManagementConfig(AppConfig):
     name = 'backend.apps.system_management'
     verbose_name = '系统管理'
 
+    def ready(self):
+        """应用启动时注册信号处理器"""
+        import backend.apps.system_management.signals  # noqa
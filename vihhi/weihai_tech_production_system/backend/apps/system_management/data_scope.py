@@ -0,0 +1,236 @@
+"""
+数据范围（Data Scope）引擎
+解析用户可见的客户 / 项目 / 合同 / 商机范围并应用到查询集
+"""
+from typing import FrozenSet, Iterable, Optional, Tuple
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Q
+
+from backend.apps.permission_management.utils import normalize_permission_code
+from backend.core.cache_versions import bump_version, versioned_cache_key
+
+SCOPE_ALL = 'all'
+SCOPE_DEPARTMENT = 'department'
+SCOPE_SELF = 'self'
+SCOPE_NONE = 'none'
+
+DEPARTMENT_MEMBERS_VERSION_KEY = 'data_scope:department_members:version'
+DEPARTMENT_MEMBERS_TIMEOUT = getattr(settings, 'DATA_SCOPE_DEPARTMENT_TIMEOUT', 60 * 60)
+
+
+class DataScope:
+    """已解析的数据范围"""
+
+    __slots__ = ('level', 'user_ids')
+
+    def __init__(self, level: str, user_ids: Iterable[int] = ()):
+        self.level = level
+        self.user_ids: FrozenSet[int] = frozenset(user_ids)
+
+    @property
+    def is_all(self) -> bool:
+        return self.level == SCOPE_ALL
+
+    @property
+    def is_none(self) -> bool:
+        return self.level == SCOPE_NONE
+
+    @property
+    def cache_key(self) -> str:
+        """用于按范围缓存统计结果的键"""
+        if self.level in (SCOPE_ALL, SCOPE_NONE):
+            return self.level
+        return f"{self.level}:{','.join(str(uid) for uid in sorted(self.user_ids))}"
+
+    def __repr__(self):
+        return f'<DataScope {self.level} users={len(self.user_ids)}>'
+
+
+# ==================== 部门成员映射 ====================
+
+def bump_department_members_version() -> None:
+    """用户的部门或启用状态变化时调用"""
+    bump_version(DEPARTMENT_MEMBERS_VERSION_KEY)
+
+
+def get_department_user_ids(department_id) -> FrozenSet[int]:
+    """返回部门激活成员的用户ID集合（共享缓存）"""
+    if not department_id:
+        return frozenset()
+    key = versioned_cache_key(f'data_scope:department_members:d{department_id}', DEPARTMENT_MEMBERS_VERSION_KEY)
+    user_ids = cache.get(key)
+    if user_ids is None:
+        from backend.apps.system_management.models import User
+        user_ids = list(
+            User.objects.filter(department_id=department_id, is_active=True).values_list('id', flat=True)
+        )
+        cache.set(key, user_ids, DEPARTMENT_MEMBERS_TIMEOUT)
+    return frozenset(user_ids)
+
+
+# ==================== 范围解析 ====================
+
+def _granted(permission_set, code) -> bool:
+    if '__all__' in permission_set:
+        return True
+    return normalize_permission_code(code) in permission_set
+
+
+def _department_scope(user) -> DataScope:
+    user_ids = get_department_user_ids(user.department_id)
+    if not user_ids:
+        return DataScope(SCOPE_SELF, [user.pk])
+    return DataScope(SCOPE_DEPARTMENT, user_ids)
+
+
+def _memoized(user, name, resolver) -> DataScope:
+    cache_attr = '_data_scope_cache'
+    scopes = getattr(user, cache_attr, None)
+    if scopes is None:
+        scopes = {}
+        setattr(user, cache_attr, scopes)
+    if name not in scopes:
+        scopes[name] = resolver()
+    return scopes[name]
+
+
+def resolve_client_scope(user, permission_set) -> DataScope:
+    """
+    解析客户数据范围
+
+    权限级别（从高到低）：
+    1. view_all: 查看全部客户（总经理）
+    2. view_department: 查看本部门客户（部门经理），无部门时降级为本人
+    3. view_assigned: 查看本人负责的客户（商务经理）
+    4. view: 自动根据角色选择级别（部门负责人为本部门，其余为本人）
+    """
+    if not user or not getattr(user, 'is_authenticated', False):
+        return DataScope(SCOPE_NONE)
+    if getattr(user, 'is_superuser', False):
+        return DataScope(SCOPE_ALL)
+
+    def resolve():
+        if _granted(permission_set, 'customer_management.client.view_all'):
+            return DataScope(SCOPE_ALL)
+        if _granted(permission_set, 'customer_management.client.view_department'):
+            return _department_scope(user)
+        if _granted(permission_set, 'customer_management.client.view_assigned'):
+            return DataScope(SCOPE_SELF, [user.pk])
+        if _granted(permission_set, 'customer_management.client.view'):
+            # 总经理角色的权限集合为 __all__，已在上方返回
+            if user.department_id and _is_department_leader(user):
+                return _department_scope(user)
+            return DataScope(SCOPE_SELF, [user.pk])
+        return DataScope(SCOPE_NONE)
+
+    return _memoized(user, 'client', resolve)
+
+
+def resolve_opportunity_scope(user, permission_set) -> DataScope:
+    """解析商机数据范围：没有 view_all 时只能看本人负责的商机"""
+    if not user or not getattr(user, 'is_authenticated', False):
+        return DataScope(SCOPE_NONE)
+
+    def resolve():
+        if _granted(permission_set, 'customer_management.opportunity.view_all'):
+            return DataScope(SCOPE_ALL)
+        return DataScope(SCOPE_SELF, [user.pk])
+
+    return _memoized(user, 'opportunity', resolve)
+
+
+def resolve_project_scope(user, permission_set) -> DataScope:
+    """
+    解析项目数据范围
+
+    - 内部用户且有 production_management.view_all：全部
+    - 内部用户且有 task_collaboration.view_all 并有部门：本部门
+    - 其余：本人参与的项目
+    """
+    if not user or not getattr(user, 'is_authenticated', False):
+        return DataScope(SCOPE_NONE)
+
+    def resolve():
+        is_internal = getattr(user, 'user_type', 'internal') == 'internal'
+        if is_internal and _granted(permission_set, 'production_management.view_all'):
+            return DataScope(SCOPE_ALL)
+        if is_internal and user.department_id and _granted(permission_set, 'task_collaboration.view_all'):
+            return _department_scope(user)
+        return DataScope(SCOPE_SELF, [user.pk])
+
+    return _memoized(user, 'project', resolve)
+
+
+def _is_department_leader(user) -> bool:
+    department = getattr(user, 'department', None)
+    return bool(department and department.leader_id == user.pk)
+
+
+# ==================== 范围应用 ====================
+
+# 各模型的“归属人”字段：数据范围内的用户出现在任一字段即可见
+CLIENT_SCOPE_FIELDS: Tuple[str, ...] = ('responsible_user_id', 'created_by_id')
+OPPORTUNITY_SCOPE_FIELDS: Tuple[str, ...] = ('business_manager_id',)
+CONTRACT_SCOPE_FIELDS: Tuple[str, ...] = ('created_by_id', 'business_manager_id', 'client__responsible_user_id')
+# 项目：本人可见字段 与 部门范围可见字段不同（沿用原有规则）
+PROJECT_SELF_SCOPE_FIELDS: Tuple[str, ...] = (
+    'project_manager_id', 'business_manager_id', 'created_by_id', 'client_leader_id', 'design_leader_id',
+)
+PROJECT_DEPARTMENT_SCOPE_FIELDS: Tuple[str, ...] = ('project_manager_id', 'business_manager_id')
+
+
+def scope_q(scope: DataScope, fields: Iterable[str], user_ids: Optional[Iterable[int]] = None) -> Q:
+    """将数据范围转换为 Q 条件"""
+    user_ids = sorted(scope.user_ids if user_ids is None else user_ids)
+    condition = Q()
+    for field in fields:
+        condition |= Q(**{f'{field}__in': user_ids})
+    return condition
+
+
+def apply_scope(queryset, scope: DataScope, fields: Iterable[str]):
+    """按数据范围过滤查询集"""
+    if scope.is_all:
+        return queryset
+    if scope.is_none:
+        return queryset.none()
+    return queryset.filter(scope_q(scope, fields))
+
+
+def filter_clients_by_scope(clients, user, permission_set):
+    return apply_scope(clients, resolve_client_scope(user, permission_set), CLIENT_SCOPE_FIELDS)
+
+
+def filter_opportunities_by_scope(opportunities, user, permission_set):
+    return apply_scope(opportunities, resolve_opportunity_scope(user, permission_set), OPPORTUNITY_SCOPE_FIELDS)
+
+
+def filter_contracts_by_scope(contracts, user, permission_set):
+    """合同沿用客户数据范围（创建人、商务经理或客户负责人在范围内）"""
+    return apply_scope(contracts, resolve_client_scope(user, permission_set), CONTRACT_SCOPE_FIELDS)
+
+
+def filter_projects_by_scope(projects, user, permission_set):
+    """
+    按数据范围过滤项目
+
+    团队成员条件使用 ``id IN (SELECT project_id ...)`` 子查询，避免 JOIN 后再 DISTINCT。
+    """
+    from backend.apps.production_management.models import ProjectTeam
+
+    scope = resolve_project_scope(user, permission_set)
+    if scope.is_all:
+        return projects
+    if scope.is_none:
+        return projects.none()
+
+    member_project_ids = ProjectTeam.objects.filter(user_id=user.pk).values('project_id')
+    condition = scope_q(scope, PROJECT_SELF_SCOPE_FIELDS, [user.pk]) | Q(id__in=member_project_ids)
+    if scope.level == SCOPE_DEPARTMENT:
+        department_member_project_ids = ProjectTeam.objects.filter(
+            user_id__in=sorted(scope.user_ids)
+        ).values('project_id')
+        condition |= scope_q(scope, PROJECT_DEPARTMENT_SCOPE_FIELDS) | Q(id__in=department_member_project_ids)
+    return projects.filter(condition)
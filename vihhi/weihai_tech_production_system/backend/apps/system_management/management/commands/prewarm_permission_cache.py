@@ -0,0 +1,56 @@
+"""
+预热权限快照缓存的管理命令
+
+用法：
+    python manage.py prewarm_permission_cache               # 预热所有激活用户
+    python manage.py prewarm_permission_cache --user 1 2    # 仅预热指定用户
+    python manage.py prewarm_permission_cache --bump        # 先升级版本号（强制全部重算）
+    python manage.py prewarm_permission_cache --stats       # 仅查看命中统计
+"""
+import time
+
+from django.core.management.base import BaseCommand
+
+from backend.apps.system_management.services import (
+    bump_permission_version,
+    get_permission_cache_stats,
+    prewarm_permission_snapshots,
+    reset_permission_cache_stats,
+)
+from backend.core.cache_versions import is_shared_cache
+
+
+class Command(BaseCommand):
+    help = '预热用户权限快照缓存，并输出命中统计'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', type=int, nargs='+', dest='user_ids', help='仅预热指定用户ID')
+        parser.add_argument('--chunk-size', type=int, default=500, help='每批处理的用户数量（默认500）')
+        parser.add_argument('--bump', action='store_true', help='预热前升级权限版本号，使旧快照全部失效')
+        parser.add_argument('--stats', action='store_true', help='仅输出命中统计，不预热')
+        parser.add_argument('--reset-stats', action='store_true', help='清零命中统计')
+
+    def handle(self, *args, **options):
+        if not is_shared_cache():
+            # 进程内缓存只对本命令进程可见，预热和统计对 Web worker 都没有意义
+            self.stdout.write(self.style.WARNING('当前为进程内缓存，权限快照无法跨进程共享，请配置 REDIS_URL'))
+
+        if options['reset_stats']:
+            reset_permission_cache_stats()
+            self.stdout.write(self.style.SUCCESS('✓ 命中统计已清零'))
+
+        if not options['stats']:
+            if options['bump']:
+                version = bump_permission_version()
+                self.stdout.write(self.style.WARNING(f'权限版本号已升级为 {version}'))
+
+            started = time.monotonic()
+            written = prewarm_permission_snapshots(options['user_ids'], chunk_size=options['chunk_size'])
+            elapsed = time.monotonic() - started
+            self.stdout.write(self.style.SUCCESS(f'✓ 已预热 {written} 个用户的权限快照，耗时 {elapsed:.2f}s'))
+
+        stats = get_permission_cache_stats()
+        self.stdout.write(
+            f"版本号：{stats['version']}  命中：{stats['hits']}  未命中：{stats['misses']}  "
+            f"命中率：{stats['hit_rate']:.2%}"
+        )
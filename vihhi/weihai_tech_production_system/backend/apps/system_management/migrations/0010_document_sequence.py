@@ -0,0 +1,29 @@
+# Generated by Django 4.2.7 on 2026-10-17 00:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('system_management', '0009_merge_20251208_1445'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DocumentSequence',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=150, verbose_name='序列名称')),
+                ('period', models.CharField(blank=True, default='', help_text='年份、日期或上级单据编号，为空表示不分期间', max_length=50, verbose_name='期间')),
+                ('last_value', models.BigIntegerField(default=0, verbose_name='当前值')),
+                ('updated_time', models.DateTimeField(auto_now=True, verbose_name='更新时间')),
+            ],
+            options={
+                'verbose_name': '单据编号计数器',
+                'verbose_name_plural': '单据编号计数器',
+                'db_table': 'system_document_sequence',
+                'unique_together': {('name', 'period')},
+            },
+        ),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 4.2.7 on 2026-10-17 02:10
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('system_management', '0010_document_sequence'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ExportJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('export_type', models.CharField(help_text='如 customer', max_length=50, verbose_name='导出类型')),
+                ('file_format', models.CharField(choices=[('xlsx', 'Excel'), ('csv', 'CSV')], default='xlsx', max_length=10, verbose_name='文件格式')),
+                ('params', models.JSONField(blank=True, default=dict, verbose_name='导出参数')),
+                ('status', models.CharField(choices=[('pending', '排队中'), ('running', '导出中'), ('succeeded', '已完成'), ('failed', '失败')], default='pending', max_length=20, verbose_name='状态')),
+                ('total_count', models.IntegerField(default=0, verbose_name='总行数')),
+                ('processed_count', models.IntegerField(default=0, verbose_name='已导出行数')),
+                ('file', models.FileField(blank=True, upload_to='exports/%Y/%m/', verbose_name='导出文件')),
+                ('file_name', models.CharField(blank=True, max_length=200, verbose_name='下载文件名')),
+                ('error_message', models.TextField(blank=True, verbose_name='错误信息')),
+                ('created_time', models.DateTimeField(default=django.utils.timezone.now, verbose_name='创建时间')),
+                ('started_time', models.DateTimeField(blank=True, null=True, verbose_name='开始时间')),
+                ('finished_time', models.DateTimeField(blank=True, null=True, verbose_name='完成时间')),
+                ('created_by', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='export_jobs', to=settings.AUTH_USER_MODEL, verbose_name='创建人')),
+            ],
+            options={
+                'verbose_name': '导出任务',
+                'verbose_name_plural': '导出任务',
+                'db_table': 'system_export_job',
+                'ordering': ['-created_time'],
+                'indexes': [models.Index(fields=['created_by', 'created_time'], name='system_expo_created_78af1d_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,45 @@
+# Generated by Django 4.2.7 on 2026-10-17 09:20
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('system_management', '0011_export_job'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ImportJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('import_type', models.CharField(help_text='如 fund_flow', max_length=50, verbose_name='导入类型')),
+                ('importer', models.CharField(help_text='导入器类的完整路径', max_length=200, verbose_name='导入器')),
+                ('source_file', models.FileField(upload_to='imports/%Y/%m/', verbose_name='导入文件')),
+                ('source_name', models.CharField(blank=True, max_length=200, verbose_name='原文件名')),
+                ('status', models.CharField(choices=[('pending', '排队中'), ('running', '导入中'), ('succeeded', '已完成'), ('failed', '失败')], default='pending', max_length=20, verbose_name='状态')),
+                ('total_count', models.IntegerField(default=0, help_text='读取工作表尺寸得到的估计值', verbose_name='总行数')),
+                ('processed_count', models.IntegerField(default=0, verbose_name='已处理行数')),
+                ('success_count', models.IntegerField(default=0, verbose_name='成功行数')),
+                ('failed_count', models.IntegerField(default=0, verbose_name='失败行数')),
+                ('errors', models.JSONField(blank=True, default=list, help_text='前若干条行级错误', verbose_name='错误摘要')),
+                ('error_file', models.FileField(blank=True, upload_to='imports/errors/%Y/%m/', verbose_name='错误报告')),
+                ('error_message', models.TextField(blank=True, verbose_name='错误信息')),
+                ('created_time', models.DateTimeField(default=django.utils.timezone.now, verbose_name='创建时间')),
+                ('started_time', models.DateTimeField(blank=True, null=True, verbose_name='开始时间')),
+                ('finished_time', models.DateTimeField(blank=True, null=True, verbose_name='完成时间')),
+                ('created_by', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='import_jobs', to=settings.AUTH_USER_MODEL, verbose_name='创建人')),
+            ],
+            options={
+                'verbose_name': '导入任务',
+                'verbose_name_plural': '导入任务',
+                'db_table': 'system_import_job',
+                'ordering': ['-created_time'],
+                'indexes': [models.Index(fields=['created_by', 'created_time'], name='system_impo_created_f57f4d_idx')],
+            },
+        ),
+    ]
@@ -205,3 +205,151 @@ class OurCompany(models.Model):
     
     def __str__(self):
         return self.company_name
+
+
+class DocumentSequence(models.Model):
+    """
+    单据编号计数器
+
+    每个编号空间（名称 + 期间，如 “合同编号 / 2025”）一行，
+    由 backend.core.sequence 在行锁下递增，取号为 O(1) 且并发安全。
+    """
+    name = models.CharField(max_length=150, verbose_name='序列名称')
+    period = models.CharField(max_length=50, blank=True, default='', verbose_name='期间', help_text='年份、日期或上级单据编号，为空表示不分期间')
+    last_value = models.BigIntegerField(default=0, verbose_name='当前值')
+    updated_time = models.DateTimeField(auto_now=True, verbose_name='更新时间')
+
+    class Meta:
+        db_table = 'system_document_sequence'
+        verbose_name = '单据编号计数器'
+        verbose_name_plural = verbose_name
+        unique_together = [('name', 'period')]
+
+    def __str__(self):
+        return f"{self.name}[{self.period}] = {self.last_value}"
+
+
+class ExportJob(models.Model):
+    """
+    后台导出任务
+
+    大批量导出在 Celery 任务中流式写入文件（MEDIA_ROOT/exports/），
+    页面轮询任务进度，完成后下载文件。
+    """
+    STATUS_CHOICES = [
+        ('pending', '排队中'),
+        ('running', '导出中'),
+        ('succeeded', '已完成'),
+        ('failed', '失败'),
+    ]
+    FORMAT_CHOICES = [
+        ('xlsx', 'Excel'),
+        ('csv', 'CSV'),
+    ]
+
+    export_type = models.CharField(max_length=50, verbose_name='导出类型', help_text='如 customer')
+    file_format = models.CharField(max_length=10, choices=FORMAT_CHOICES, default='xlsx', verbose_name='文件格式')
+    params = models.JSONField(default=dict, blank=True, verbose_name='导出参数')
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending', verbose_name='状态')
+    total_count = models.IntegerField(default=0, verbose_name='总行数')
+    processed_count = models.IntegerField(default=0, verbose_name='已导出行数')
+    file = models.FileField(upload_to='exports/%Y/%m/', blank=True, verbose_name='导出文件')
+    file_name = models.CharField(max_length=200, blank=True, verbose_name='下载文件名')
+    error_message = models.TextField(blank=True, verbose_name='错误信息')
+    created_by = models.ForeignKey(
+        'User',
+        on_delete=models.CASCADE,
+        related_name='export_jobs',
+        verbose_name='创建人'
+    )
+    created_time = models.DateTimeField(default=timezone.now, verbose_name='创建时间')
+    started_time = models.DateTimeField(null=True, blank=True, verbose_name='开始时间')
+    finished_time = models.DateTimeField(null=True, blank=True, verbose_name='完成时间')
+
+    class Meta:
+        db_table = 'system_export_job'
+        verbose_name = '导出任务'
+        verbose_name_plural = verbose_name
+        ordering = ['-created_time']
+        indexes = [
+            models.Index(fields=['created_by', 'created_time']),
+        ]
+
+    def __str__(self):
+        return f"{self.export_type}#{self.pk} {self.get_status_display()}"
+
+    @property
+    def progress(self):
+        """导出进度（0-100）"""
+        if self.status == 'succeeded':
+            return 100
+        if not self.total_count:
+            return 0
+        return min(99, int(self.processed_count * 100 / self.total_count))
+
+    @property
+    def is_finished(self):
+        return self.status in ('succeeded', 'failed')
+
+
+class ImportJob(models.Model):
+    """
+    批量导入任务
+
+    上传的文件保存在 MEDIA_ROOT/imports/，由导入引擎（backend.utils.import_utils）分块读取、
+    批量写入；小文件在请求内同步执行，大文件投递 Celery 任务后页面轮询进度。
+    出错的行汇总为错误报告文件供下载。
+    """
+    STATUS_CHOICES = [
+        ('pending', '排队中'),
+        ('running', '导入中'),
+        ('succeeded', '已完成'),
+        ('failed', '失败'),
+    ]
+
+    import_type = models.CharField(max_length=50, verbose_name='导入类型', help_text='如 fund_flow')
+    importer = models.CharField(max_length=200, verbose_name='导入器', help_text='导入器类的完整路径')
+    source_file = models.FileField(upload_to='imports/%Y/%m/', verbose_name='导入文件')
+    source_name = models.CharField(max_length=200, blank=True, verbose_name='原文件名')
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending', verbose_name='状态')
+    total_count = models.IntegerField(default=0, verbose_name='总行数', help_text='读取工作表尺寸得到的估计值')
+    processed_count = models.IntegerField(default=0, verbose_name='已处理行数')
+    success_count = models.IntegerField(default=0, verbose_name='成功行数')
+    failed_count = models.IntegerField(default=0, verbose_name='失败行数')
+    errors = models.JSONField(default=list, blank=True, verbose_name='错误摘要', help_text='前若干条行级错误')
+    error_file = models.FileField(upload_to='imports/errors/%Y/%m/', blank=True, verbose_name='错误报告')
+    error_message = models.TextField(blank=True, verbose_name='错误信息')
+    created_by = models.ForeignKey(
+        'User',
+        on_delete=models.CASCADE,
+        related_name='import_jobs',
+        verbose_name='创建人'
+    )
+    created_time = models.DateTimeField(default=timezone.now, verbose_name='创建时间')
+    started_time = models.DateTimeField(null=True, blank=True, verbose_name='开始时间')
+    finished_time = models.DateTimeField(null=True, blank=True, verbose_name='完成时间')
+
+    class Meta:
+        db_table = 'system_import_job'
+        verbose_name = '导入任务'
+        verbose_name_plural = verbose_name
+        ordering = ['-created_time']
+        indexes = [
+            models.Index(fields=['created_by', 'created_time']),
+        ]
+
+    def __str__(self):
+        return f"{self.import_type}#{self.pk} {self.get_status_display()}"
+
+    @property
+    def progress(self):
+        """导入进度（0-100）"""
+        if self.is_finished:
+            return 100
+        if not self.total_count:
+            return 0
+        return min(99, int(self.processed_count * 100 / self.total_count))
+
+    @property
+    def is_finished(self):
+        return self.status in ('succeeded', 'failed')
@@ -1,9 +1,102 @@
 
-from typing import Set
+import logging
+from typing import Iterable, Optional, Set
 
+from django.conf import settings
+from django.core.cache import cache
 from django.db.models import Prefetch
 
 from backend.apps.permission_management.models import PermissionItem
+from backend.core.cache_versions import bump_version, cache_timeout, get_version
+
+logger = logging.getLogger(__name__)
+
+# 权限快照缓存（跨请求、跨 worker 共享；配置 REDIS_URL 时走 Redis，否则为进程内 locmem）
+# 版本号也存放在缓存中：进程内缓存下各 worker 的版本号互不相通，权限回收无法及时传递到其他 worker，
+# 因此只有共享缓存才使用长有效期，进程内缓存使用很短的有效期（见 snapshot_timeout）
+PERMISSION_VERSION_KEY = 'permission_snapshot:version'
+PERMISSION_STATS_KEYS = {
+    'hits': 'permission_snapshot:stats:hits',
+    'misses': 'permission_snapshot:stats:misses',
+}
+PERMISSION_SNAPSHOT_TIMEOUT = getattr(settings, 'PERMISSION_SNAPSHOT_TIMEOUT', 60 * 60)
+PERMISSION_SNAPSHOT_LOCAL_TIMEOUT = getattr(settings, 'PERMISSION_SNAPSHOT_LOCAL_TIMEOUT', 5)
+
+
+def snapshot_timeout() -> int:
+    """
+    权限快照有效期
+
+    共享缓存下版本号变化对所有 worker 立即可见，使用 PERMISSION_SNAPSHOT_TIMEOUT；
+    进程内缓存下其他 worker 只能等快照过期，使用 PERMISSION_SNAPSHOT_LOCAL_TIMEOUT（0 表示不缓存）。
+    多 worker 部署应配置 REDIS_URL。
+    """
+    return cache_timeout(PERMISSION_SNAPSHOT_TIMEOUT, PERMISSION_SNAPSHOT_LOCAL_TIMEOUT)
+
+
+def get_permission_version() -> int:
+    """返回当前角色/权限版本号，版本号变化即令所有快照失效"""
+    return get_version(PERMISSION_VERSION_KEY)
+
+
+def bump_permission_version() -> int:
+    """角色、权限点或角色-权限关系变化时调用，使全部权限快照失效"""
+    return bump_version(PERMISSION_VERSION_KEY)
+
+
+def _snapshot_key(user_id, version: int) -> str:
+    return f'permission_snapshot:v{version}:u{user_id}'
+
+
+def invalidate_user_permission_snapshot(user_id) -> None:
+    """单个用户的角色变化时，仅删除该用户的快照"""
+    cache.delete(_snapshot_key(user_id, get_permission_version()))
+
+
+def _record_stat(name: str) -> None:
+    key = PERMISSION_STATS_KEYS[name]
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.add(key, 0, None)
+        try:
+            cache.incr(key)
+        except ValueError:
+            pass
+
+
+def get_permission_cache_stats() -> dict:
+    """返回权限快照缓存命中统计"""
+    hits = cache.get(PERMISSION_STATS_KEYS['hits'], 0)
+    misses = cache.get(PERMISSION_STATS_KEYS['misses'], 0)
+    total = hits + misses
+    return {
+        'version': get_permission_version(),
+        'hits': hits,
+        'misses': misses,
+        'hit_rate': round(hits / total, 4) if total else 0.0,
+    }
+
+
+def reset_permission_cache_stats() -> None:
+    cache.delete_many(list(PERMISSION_STATS_KEYS.values()))
+
+
+def _compute_permission_codes(roles: Iterable) -> Set[str]:
+    """根据角色（需已预取 custom_permissions）计算权限代码集合"""
+    roles = list(roles)
+    # 检查是否有 system_admin 或 general_manager 角色（这些角色拥有全部权限）
+    role_codes = {role.code for role in roles}
+    if 'system_admin' in role_codes or 'general_manager' in role_codes:
+        return {'__all__'}
+    # 收集所有角色的权限代码
+    return {perm.code for role in roles for perm in role.custom_permissions.all()}
+
+
+def _active_roles_queryset(user):
+    return user.roles.filter(is_active=True).prefetch_related(
+        Prefetch('custom_permissions', queryset=PermissionItem.objects.filter(is_active=True).only('code'))
+    )
 
 
 def get_user_permission_codes(user) -> Set[str]:
@@ -20,24 +113,69 @@ def get_user_permission_codes(user) -> Set[str]:
     if hasattr(user, cache_attr):
         return getattr(user, cache_attr)
 
-    # 获取用户的所有激活角色及其权限
-    roles_qs = user.roles.filter(is_active=True).prefetch_related(
-        Prefetch('custom_permissions', queryset=PermissionItem.objects.filter(is_active=True).only('code'))
-    )
+    timeout = snapshot_timeout()
+    if timeout <= 0:
+        permission_codes = _compute_permission_codes(_active_roles_queryset(user))
+        setattr(user, cache_attr, permission_codes)
+        return permission_codes
 
-    # 检查是否有 system_admin 或 general_manager 角色（这些角色拥有全部权限）
-    role_codes = {role.code for role in roles_qs}
-    if 'system_admin' in role_codes or 'general_manager' in role_codes:
-        permission_codes = {'__all__'}
+    # 共享的权限快照（按用户和权限版本号缓存）
+    snapshot_key = _snapshot_key(user.pk, get_permission_version())
+    snapshot = cache.get(snapshot_key)
+    if snapshot is not None:
+        _record_stat('hits')
+        permission_codes = set(snapshot)
     else:
-        # 收集所有角色的权限代码
-        permission_codes = {perm.code for role in roles_qs for perm in role.custom_permissions.all()}
+        _record_stat('misses')
+        # 获取用户的所有激活角色及其权限
+        permission_codes = _compute_permission_codes(_active_roles_queryset(user))
+        cache.set(snapshot_key, sorted(permission_codes), timeout)
 
     # 缓存权限代码到用户对象
     setattr(user, cache_attr, permission_codes)
     return permission_codes
 
 
+def prewarm_permission_snapshots(user_ids: Optional[Iterable[int]] = None, chunk_size: int = 500) -> int:
+    """
+    预热权限快照缓存
+
+    按批次预取用户的角色和权限，一次性写入缓存，返回写入的快照数量。
+    """
+    from backend.apps.system_management.models import Role, User
+
+    timeout = snapshot_timeout()
+    if timeout <= 0:
+        return 0
+
+    version = get_permission_version()
+    users = User.objects.filter(is_active=True, is_superuser=False).only('id')
+    if user_ids is not None:
+        users = users.filter(id__in=list(user_ids))
+    users = users.order_by('id').prefetch_related(
+        Prefetch(
+            'roles',
+            queryset=Role.objects.filter(is_active=True).only('id', 'code').prefetch_related(
+                Prefetch('custom_permissions', queryset=PermissionItem.objects.filter(is_active=True).only('code'))
+            ),
+        )
+    )
+
+    written = 0
+    batch = {}
+    for user in users.iterator(chunk_size=chunk_size):
+        batch[_snapshot_key(user.pk, version)] = sorted(_compute_permission_codes(user.roles.all()))
+        if len(batch) >= chunk_size:
+            cache.set_many(batch, timeout)
+            written += len(batch)
+            batch = {}
+    if batch:
+        cache.set_many(batch, timeout)
+        written += len(batch)
+    logger.info('权限快照预热完成：版本 %s，共 %s 个用户', version, written)
+    return written
+
+
 def user_has_permission(user, *permission_codes: str) -> bool:
     """Check whether the user has any of the specified permission codes."""
     codes = get_user_permission_codes(user)
@@ -0,0 +1,68 @@
+"""
+系统管理信号处理器
+
+- 角色、业务权限点及其关联关系变化时，使权限快照缓存失效
+- 用户部门或启用状态变化时，使数据范围的部门成员映射失效
+"""
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from backend.apps.permission_management.models import PermissionItem
+from backend.apps.system_management.data_scope import bump_department_members_version
+from backend.apps.system_management.models import Role, User
+from backend.apps.system_management.services import (
+    bump_permission_version,
+    invalidate_user_permission_snapshot,
+)
+
+M2M_CHANGE_ACTIONS = {'post_add', 'post_remove', 'post_clear'}
+
+
+@receiver(post_save, sender=Role)
+@receiver(post_delete, sender=Role)
+@receiver(post_save, sender=PermissionItem)
+@receiver(post_delete, sender=PermissionItem)
+def handle_permission_definition_change(sender, **kwargs):
+    """角色或权限点变化：整体升级版本号"""
+    bump_permission_version()
+
+
+@receiver(m2m_changed, sender=Role.custom_permissions.through)
+def handle_role_permissions_change(sender, action, **kwargs):
+    """角色-权限关系变化：整体升级版本号"""
+    if action in M2M_CHANGE_ACTIONS:
+        bump_permission_version()
+
+
+@receiver(m2m_changed, sender=User.roles.through)
+def handle_user_roles_change(sender, instance, action, reverse, pk_set, **kwargs):
+    """用户-角色关系变化：仅失效受影响用户的快照"""
+    if action not in M2M_CHANGE_ACTIONS:
+        return
+    if not reverse:
+        # user.roles.add(...)
+        invalidate_user_permission_snapshot(instance.pk)
+    elif pk_set:
+        # role.users.add(...)
+        for user_id in pk_set:
+            invalidate_user_permission_snapshot(user_id)
+    else:
+        # role.users.clear() 无法得知受影响用户
+        bump_permission_version()
+
+
+# 只更新这些字段时不影响部门成员映射（如登录时更新 last_login）
+DEPARTMENT_IRRELEVANT_FIELDS = {'last_login', 'updated_time', 'notification_preferences', 'profile_completed'}
+
+
+@receiver(post_save, sender=User)
+def handle_user_saved(sender, instance, created, update_fields=None, **kwargs):
+    """用户新增、调岗或启停用：使部门成员映射失效"""
+    if update_fields and set(update_fields) <= DEPARTMENT_IRRELEVANT_FIELDS:
+        return
+    bump_department_members_version()
+
+
+@receiver(post_delete, sender=User)
+def handle_user_deleted(sender, instance, **kwargs):
+    bump_department_members_version()
@@ -0,0 +1,31 @@
+# ==================== 系统管理模块Celery任务 ====================
+
+from celery import shared_task
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task
+def run_import_job(job_id):
+    """
+    后台任务：执行批量导入任务（ImportJob），页面轮询进度，完成后可下载错误报告
+
+    由 backend.utils.import_utils.start_import 对大文件投递；小文件在请求内同步执行，不经过这里。
+    """
+    from backend.apps.system_management.models import ImportJob
+    from backend.utils.import_utils import execute_import_job
+
+    try:
+        job = ImportJob.objects.select_related('created_by').get(pk=job_id)
+    except ImportJob.DoesNotExist:
+        logger.error(f'导入任务 {job_id} 不存在')
+        return {'success': False, 'job_id': job_id, 'error': 'not found'}
+    job = execute_import_job(job)
+    return {
+        'success': job.status == 'succeeded',
+        'job_id': job_id,
+        'imported': job.success_count,
+        'failed': job.failed_count,
+        'error': job.error_message,
+    }
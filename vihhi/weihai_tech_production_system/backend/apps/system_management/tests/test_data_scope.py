@@ -0,0 +1,72 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+
+from backend.apps.customer_management.models import Client, ClientType
+from backend.apps.system_management.data_scope import (
+    SCOPE_ALL,
+    SCOPE_DEPARTMENT,
+    SCOPE_NONE,
+    SCOPE_SELF,
+    filter_clients_by_scope,
+    resolve_client_scope,
+)
+from backend.apps.system_management.models import Department
+
+
+class ClientDataScopeTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.User = get_user_model()
+        self.department = Department.objects.create(name="商务部", code="business")
+        self.other_department = Department.objects.create(name="技术部", code="tech")
+        self.manager = self.User.objects.create_user(username="manager", password="pwd123456", department=self.department)
+        self.colleague = self.User.objects.create_user(username="colleague", password="pwd123456", department=self.department)
+        self.outsider = self.User.objects.create_user(username="outsider", password="pwd123456", department=self.other_department)
+        self.department.leader = self.manager
+        self.department.save()
+
+        client_type = ClientType.objects.create(code="developer", name="开发商")
+        self.own_client = Client.objects.create(name="本人客户", client_type=client_type, created_by=self.manager)
+        self.colleague_client = Client.objects.create(
+            name="同事客户", client_type=client_type, created_by=self.outsider, responsible_user=self.colleague
+        )
+        self.outsider_client = Client.objects.create(name="外部客户", client_type=client_type, created_by=self.outsider)
+
+    def _fresh(self, user):
+        return self.User.objects.get(pk=user.pk)
+
+    def _visible(self, user, permission_set):
+        return set(filter_clients_by_scope(Client.objects.all(), user, permission_set).values_list("name", flat=True))
+
+    def test_view_all_scope(self):
+        scope = resolve_client_scope(self._fresh(self.colleague), {"customer_management.client.view_all"})
+        self.assertEqual(scope.level, SCOPE_ALL)
+
+    def test_department_scope_covers_members(self):
+        user = self._fresh(self.colleague)
+        scope = resolve_client_scope(user, {"customer_management.client.view_department"})
+        self.assertEqual(scope.level, SCOPE_DEPARTMENT)
+        self.assertEqual(scope.user_ids, {self.manager.pk, self.colleague.pk})
+        self.assertEqual(self._visible(user, {"customer_management.client.view_department"}), {"本人客户", "同事客户"})
+
+    def test_generic_view_uses_department_for_leader(self):
+        self.assertEqual(
+            self._visible(self._fresh(self.manager), {"customer_management.client.view"}), {"本人客户", "同事客户"}
+        )
+        scope = resolve_client_scope(self._fresh(self.colleague), {"customer_management.client.view"})
+        self.assertEqual(scope.level, SCOPE_SELF)
+
+    def test_assigned_scope_and_no_permission(self):
+        self.assertEqual(
+            self._visible(self._fresh(self.outsider), {"customer_management.client.view_assigned"}),
+            {"同事客户", "外部客户"},
+        )
+        self.assertEqual(resolve_client_scope(self._fresh(self.outsider), set()).level, SCOPE_NONE)
+
+    def test_department_members_refresh_after_transfer(self):
+        permission_set = {"customer_management.client.view_department"}
+        self.assertNotIn(self.outsider.pk, resolve_client_scope(self._fresh(self.manager), permission_set).user_ids)
+        self.outsider.department = self.department
+        self.outsider.save()
+        self.assertIn(self.outsider.pk, resolve_client_scope(self._fresh(self.manager), permission_set).user_ids)
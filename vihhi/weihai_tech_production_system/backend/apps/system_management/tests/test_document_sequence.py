@@ -0,0 +1,46 @@
+from django.test import TestCase
+
+from backend.apps.system_management.models import Department, DocumentSequence
+from backend.core.sequence import (
+    advance_document_sequence,
+    next_document_number,
+    peek_document_sequence,
+    reserve_document_numbers,
+)
+
+
+class DocumentSequenceTests(TestCase):
+    """用部门编码字段验证编号服务（任意字符字段均可作为编号空间）"""
+
+    def setUp(self):
+        for code in ("DEPT-2025-0007", "DEPT-2025-0012", "DEPT-2025-X", "DEPT-2024-0099"):
+            Department.objects.create(name=code, code=code)
+
+    def test_counter_is_seeded_from_existing_numbers_once(self):
+        self.assertEqual(next_document_number(Department.objects, "code", "DEPT", period="2025"), "DEPT-2025-0013")
+
+        # 之后取号不再扫描业务表
+        with self.assertNumQueries(4):
+            number = next_document_number(Department.objects, "code", "DEPT", period="2025")
+        self.assertEqual(number, "DEPT-2025-0014")
+        self.assertEqual(next_document_number(Department.objects, "code", "DEPT", period="2026"), "DEPT-2026-0001")
+        self.assertEqual(DocumentSequence.objects.get(period="2025").last_value, 14)
+
+    def test_reserve_returns_consecutive_numbers(self):
+        numbers = reserve_document_numbers(Department.objects, "code", "DEPT", 3, period="2024", width=3)
+        self.assertEqual(numbers, ["DEPT-2024-100", "DEPT-2024-101", "DEPT-2024-102"])
+        self.assertEqual(next_document_number(Department.objects, "code", "DEPT", period="2024"), "DEPT-2024-0103")
+
+    def test_peek_does_not_consume_and_advance_skips_manual_numbers(self):
+        self.assertEqual(peek_document_sequence(Department.objects, "code", "DEPT", period="2025"), 13)
+        self.assertFalse(DocumentSequence.objects.exists())
+
+        advance_document_sequence(Department.objects, "code", "DEPT", 20, period="2025")
+        advance_document_sequence(Department.objects, "code", "DEPT", 5, period="2025")
+        self.assertEqual(peek_document_sequence(Department.objects, "code", "DEPT", period="2025"), 21)
+        self.assertEqual(next_document_number(Department.objects, "code", "DEPT", period="2025"), "DEPT-2025-0021")
+
+    def test_numbers_without_separator(self):
+        Department.objects.create(name="MOV", code="MOV202501010009")
+        number = next_document_number(Department.objects, "code", "MOV", period="20250101", separator="")
+        self.assertEqual(number, "MOV202501010010")
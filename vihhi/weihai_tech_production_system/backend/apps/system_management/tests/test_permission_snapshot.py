@@ -0,0 +1,77 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+
+from backend.apps.permission_management.models import PermissionItem
+from backend.apps.system_management.models import Role
+from backend.apps.system_management import services
+from backend.apps.system_management.services import (
+    get_permission_cache_stats,
+    get_user_permission_codes,
+    prewarm_permission_snapshots,
+)
+from backend.core.cache_versions import is_shared_cache
+
+
+class PermissionSnapshotCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.User = get_user_model()
+        self.user = self.User.objects.create_user(username="13800001111", password="pwd123456")
+        self.view_perm = PermissionItem.objects.create(
+            module="客户管理", action="view", code="customer_management.client.view", name="查看客户"
+        )
+        self.edit_perm = PermissionItem.objects.create(
+            module="客户管理", action="edit", code="customer_management.client.edit", name="编辑客户"
+        )
+        self.role = Role.objects.create(name="商务经理", code="business_team")
+        self.role.custom_permissions.add(self.view_perm)
+        self.user.roles.add(self.role)
+
+    def _fresh_user(self):
+        # 模拟新请求：重新加载用户对象，丢弃请求内缓存
+        return self.User.objects.get(pk=self.user.pk)
+
+    def test_snapshot_is_shared_across_requests(self):
+        self.assertEqual(get_user_permission_codes(self._fresh_user()), {"customer_management.client.view"})
+        user = self._fresh_user()
+        with self.assertNumQueries(0):
+            codes = get_user_permission_codes(user)
+        self.assertEqual(codes, {"customer_management.client.view"})
+        stats = get_permission_cache_stats()
+        self.assertEqual(stats["hits"], 1)
+        self.assertEqual(stats["misses"], 1)
+
+    def test_role_permission_change_invalidates_snapshot(self):
+        get_user_permission_codes(self._fresh_user())
+        self.role.custom_permissions.add(self.edit_perm)
+        self.assertIn("customer_management.client.edit", get_user_permission_codes(self._fresh_user()))
+
+    def test_user_role_change_invalidates_snapshot(self):
+        get_user_permission_codes(self._fresh_user())
+        self.user.roles.remove(self.role)
+        self.assertEqual(get_user_permission_codes(self._fresh_user()), set())
+
+    def test_prewarm_writes_snapshots(self):
+        self.assertEqual(prewarm_permission_snapshots(), 1)
+        user = self._fresh_user()
+        with self.assertNumQueries(0):
+            codes = get_user_permission_codes(user)
+        self.assertEqual(codes, {"customer_management.client.view"})
+
+    @override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+    def test_process_local_cache_uses_short_timeout(self):
+        self.assertFalse(is_shared_cache())
+        self.assertEqual(services.snapshot_timeout(), services.PERMISSION_SNAPSHOT_LOCAL_TIMEOUT)
+        with mock.patch.object(services, 'PERMISSION_SNAPSHOT_LOCAL_TIMEOUT', 0):
+            # 不跨请求缓存：每次都重新计算，权限回收立即生效
+            get_user_permission_codes(self._fresh_user())
+            self.assertEqual(get_permission_cache_stats()["misses"], 0)
+            self.assertEqual(prewarm_permission_snapshots(), 0)
+
+    @override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.redis.RedisCache'}})
+    def test_shared_cache_uses_long_timeout(self):
+        self.assertTrue(is_shared_cache())
+        self.assertEqual(services.snapshot_timeout(), services.PERMISSION_SNAPSHOT_TIMEOUT)
@@ -10,5 +10,9 @@ urlpatterns = [
     path("logs/", views_pages.operation_logs, name="operation_logs"),
     path("dictionary/", views_pages.data_dictionary, name="data_dictionary"),
     path("permissions/matrix/", views_pages.permission_matrix, name="permission_matrix"),
+    path("exports/<int:job_id>/", views_pages.export_job_status, name="export_job_status"),
+    path("exports/<int:job_id>/download/", views_pages.export_job_download, name="export_job_download"),
+    path("imports/<int:job_id>/", views_pages.import_job_status, name="import_job_status"),
+    path("imports/<int:job_id>/errors/", views_pages.import_job_error_report, name="import_job_error_report"),
 ]
 
@@ -1,12 +1,13 @@
 from django.contrib import messages
 from django.contrib.auth import logout
 from django.contrib.auth.decorators import login_required, permission_required
-from django.shortcuts import render, redirect
+from django.http import FileResponse, Http404, JsonResponse
+from django.shortcuts import get_object_or_404, render, redirect
 from django.urls import reverse
 
 from collections import defaultdict, OrderedDict
 
-from backend.apps.system_management.models import Department, Role, User
+from backend.apps.system_management.models import Department, ExportJob, ImportJob, Role, User
 from backend.apps.permission_management.models import PermissionItem
 from backend.apps.system_management.serializers import (
     AccountProfileSerializer,
@@ -14,6 +15,7 @@ from backend.apps.system_management.serializers import (
     AccountPasswordChangeSerializer,
 )
 from backend.apps.system_management.services import get_user_permission_codes
+from backend.apps.system_management.services_export_jobs import CONTENT_TYPES, export_job_payload
 from backend.apps.system_management.forms import POSITION_CHOICES
 
 
@@ -270,3 +272,50 @@ def permission_matrix(request):
         "role_total": roles.count(),
     }
     return render(request, "system_management/permission_matrix.html", context)
+
+
+@login_required
+def export_job_status(request, job_id):
+    """导出任务进度（页面轮询）"""
+    job = get_object_or_404(ExportJob, pk=job_id, created_by=request.user)
+    download_url = reverse("system_pages:export_job_download", args=[job.pk])
+    return JsonResponse({"success": True, "job": export_job_payload(job, download_url)})
+
+
+@login_required
+def export_job_download(request, job_id):
+    """下载已完成的导出文件"""
+    job = get_object_or_404(ExportJob, pk=job_id, created_by=request.user)
+    if job.status != "succeeded" or not job.file:
+        raise Http404("导出文件尚未生成")
+    return FileResponse(
+        job.file.open("rb"),
+        as_attachment=True,
+        filename=job.file_name,
+        content_type=CONTENT_TYPES.get(job.file_format),
+    )
+
+
+@login_required
+def import_job_status(request, job_id):
+    """导入任务进度（页面轮询）"""
+    from backend.utils.import_utils import import_job_payload
+
+    job = get_object_or_404(ImportJob, pk=job_id, created_by=request.user)
+    return JsonResponse({"success": True, "job": import_job_payload(job)})
+
+
+@login_required
+def import_job_error_report(request, job_id):
+    """下载导入错误报告"""
+    from backend.utils.import_utils import ERROR_REPORT_CONTENT_TYPE
+
+    job = get_object_or_404(ImportJob, pk=job_id, created_by=request.user)
+    if not job.error_file:
+        raise Http404("该导入任务没有错误报告")
+    return FileResponse(
+        job.error_file.open("rb"),
+        as_attachment=True,
+        filename=job.error_file.name.rsplit("/", 1)[-1],
+        content_type=ERROR_REPORT_CONTENT_TYPE,
+    )
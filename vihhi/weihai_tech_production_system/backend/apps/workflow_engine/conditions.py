@@ -0,0 +1,210 @@
+"""
+审批节点条件表达式
+
+ApprovalNode.condition_expression 为 JSON，条件不满足的节点在流转时跳过。格式：
+
+- 比较：{"field": "litigation_amount", "operator": ">=", "value": 500000}
+  field 可用 ``.`` 或 ``__`` 访问关联对象，如 "client.grade.code"；
+  只能读取数据字段，方法仅允许 get_<字段>_display，不允许以 ``_`` 开头的名称；
+  operator 支持 == != > >= < <= in not_in contains startswith isnull
+  （也可写作 eq ne gt gte lt lte）
+- 组合：{"all": [条件, ...]}、{"any": [条件, ...]}、{"not": 条件}
+- 列表等价于 all：[条件, ...]
+"""
+import json
+import operator
+import re
+from datetime import date, datetime
+from decimal import Decimal, InvalidOperation
+from functools import lru_cache
+from typing import Any, Callable, Optional
+
+Predicate = Callable[[Any], bool]
+
+_MISSING = object()
+
+# 条件中唯一允许调用的方法：选项字段的显示值
+_DISPLAY_METHOD = re.compile(r'^get_\w+_display$')
+
+_OPERATOR_ALIASES = {
+    '==': 'eq', '=': 'eq', '!=': 'ne', '<>': 'ne',
+    '>': 'gt', '>=': 'gte', '<': 'lt', '<=': 'lte',
+}
+
+_COMPARATORS = {
+    'eq': operator.eq,
+    'ne': operator.ne,
+    'gt': operator.gt,
+    'gte': operator.ge,
+    'lt': operator.lt,
+    'lte': operator.le,
+}
+
+
+class ConditionError(ValueError):
+    """条件表达式格式错误"""
+
+
+def _always(obj) -> bool:
+    return True
+
+
+def _getter(field: str) -> Callable[[Any], Any]:
+    path = [part for part in field.replace('__', '.').split('.') if part]
+    if not path:
+        raise ConditionError('条件缺少字段名')
+    for part in path:
+        if part.startswith('_'):
+            raise ConditionError(f'不允许访问私有属性：{field}')
+    last = len(path) - 1
+
+    def get(obj):
+        value = obj
+        for index, part in enumerate(path):
+            if isinstance(value, dict):
+                value = value.get(part, _MISSING)
+            else:
+                value = getattr(value, part, _MISSING)
+            if value is _MISSING or value is None:
+                return None
+            if callable(value):
+                # 只调用 get_xxx_display，其他方法（如 delete、save）一律拒绝
+                if index != last or not _DISPLAY_METHOD.match(part):
+                    raise ConditionError(f'条件字段不能引用方法：{field}')
+                value = value()
+        return value
+    return get
+
+
+def _coercer(value) -> Callable[[Any], Any]:
+    """
+    按实际值的类型转换表达式中的常量
+
+    JSON 中的数字与 DecimalField、日期字符串与 DateField 比较时需要转换，
+    转换结果在编译期预先算好，求值时只按类型取用。
+    """
+    as_decimal = None
+    if isinstance(value, (int, float, str)) and not isinstance(value, bool):
+        try:
+            as_decimal = Decimal(str(value))
+        except (InvalidOperation, ValueError):
+            as_decimal = None
+    as_date = as_datetime = None
+    if isinstance(value, str):
+        try:
+            as_datetime = datetime.fromisoformat(value)
+            as_date = as_datetime.date()
+        except ValueError:
+            pass
+
+    def coerce(actual):
+        if isinstance(actual, bool):
+            return value
+        if isinstance(actual, (Decimal, int, float)) and as_decimal is not None:
+            return as_decimal
+        if isinstance(actual, datetime) and as_datetime is not None:
+            return as_datetime
+        if isinstance(actual, date) and as_date is not None:
+            return as_date
+        if isinstance(actual, str) and not isinstance(value, str):
+            return str(value)
+        return value
+    return coerce
+
+
+def _compile_comparison(node: dict) -> Predicate:
+    get = _getter(str(node.get('field', '')))
+    op = str(node.get('operator') or node.get('op') or 'eq').strip()
+    op = _OPERATOR_ALIASES.get(op, op)
+    value = node.get('value')
+
+    if op == 'isnull':
+        expected = bool(value) if value is not None else True
+        return lambda obj: (get(obj) is None) == expected
+
+    if op in ('in', 'not_in'):
+        if not isinstance(value, (list, tuple)):
+            raise ConditionError(f'{op} 的值必须是列表')
+        raw = frozenset(str(item) for item in value)
+        negate = op == 'not_in'
+
+        def member(obj):
+            actual = get(obj)
+            found = actual is not None and str(actual) in raw
+            return found != negate
+        return member
+
+    if op in ('contains', 'startswith'):
+        text = str(value)
+        if op == 'contains':
+            return lambda obj: text in str(get(obj) or '')
+        return lambda obj: str(get(obj) or '').startswith(text)
+
+    compare = _COMPARATORS.get(op)
+    if compare is None:
+        raise ConditionError(f'不支持的运算符：{op}')
+    coerce = _coercer(value)
+
+    def comparison(obj):
+        actual = get(obj)
+        if actual is None:
+            # 空值只参与相等 / 不等判断
+            return compare(actual, value) if op in ('eq', 'ne') else False
+        try:
+            return compare(actual, coerce(actual))
+        except TypeError:
+            return False
+    return comparison
+
+
+def _compile(node) -> Predicate:
+    if isinstance(node, list):
+        node = {'all': node}
+    if not isinstance(node, dict):
+        raise ConditionError('条件必须是 JSON 对象或数组')
+
+    if 'all' in node or 'any' in node:
+        key = 'all' if 'all' in node else 'any'
+        children = node[key]
+        if not isinstance(children, list):
+            raise ConditionError(f'{key} 的值必须是条件列表')
+        predicates = tuple(_compile(child) for child in children)
+        if key == 'all':
+            return lambda obj: all(predicate(obj) for predicate in predicates)
+        return lambda obj: any(predicate(obj) for predicate in predicates)
+
+    if 'not' in node:
+        inner = _compile(node['not'])
+        return lambda obj: not inner(obj)
+
+    return _compile_comparison(node)
+
+
+@lru_cache(maxsize=1024)
+def _compile_text(expression: Optional[str]):
+    """编译表达式文本；格式错误时返回错误信息（同样缓存，避免无效表达式每次求值都重新编译）"""
+    if not expression or not expression.strip():
+        return _always
+    try:
+        tree = json.loads(expression)
+    except (TypeError, ValueError) as exc:
+        return f'条件表达式不是合法的 JSON：{exc}'
+    if not tree:
+        return _always
+    try:
+        return _compile(tree)
+    except ConditionError as exc:
+        return str(exc)
+
+
+def compile_condition(expression: Optional[str]) -> Predicate:
+    """把条件表达式文本编译为谓词函数（按文本缓存）；空表达式恒为真"""
+    compiled = _compile_text(expression)
+    if isinstance(compiled, str):
+        raise ConditionError(compiled)
+    return compiled
+
+
+def evaluate_condition(expression: Optional[str], obj) -> bool:
+    """对业务对象求值条件表达式"""
+    return compile_condition(expression)(obj)
@@ -0,0 +1,60 @@
+import json
+import time
+from decimal import Decimal
+from types import SimpleNamespace
+
+from django.core.management.base import BaseCommand, CommandError
+
+from backend.apps.workflow_engine.conditions import ConditionError, compile_condition
+
+# 典型的合同审批路由条件：金额超过 50 万，或重要客户且非框架合同
+SAMPLE_EXPRESSION = json.dumps({
+    'any': [
+        {'field': 'contract_amount', 'operator': '>=', 'value': 500000},
+        {'all': [
+            {'field': 'client.grade.code', 'operator': 'in', 'value': ['A', 'VIP']},
+            {'not': {'field': 'contract_type', 'operator': '==', 'value': 'framework'}},
+        ]},
+    ]
+})
+
+
+class Command(BaseCommand):
+    help = '测量审批节点条件表达式的编译与单次求值耗时（微秒）'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=100000, help='求值次数，默认100000')
+        parser.add_argument('--expression', default=SAMPLE_EXPRESSION, help='条件表达式（JSON），默认为示例合同路由条件')
+
+    def handle(self, *args, **options):
+        iterations = max(1, options['iterations'])
+        expression = options['expression']
+        # 模拟业务对象：两个对象分别走命中 / 未命中分支
+        objects = [
+            SimpleNamespace(contract_amount=Decimal('320000.00'), contract_type='standard',
+                            client=SimpleNamespace(grade=SimpleNamespace(code='A'))),
+            SimpleNamespace(contract_amount=Decimal('80000.00'), contract_type='framework',
+                            client=SimpleNamespace(grade=SimpleNamespace(code='B'))),
+        ]
+
+        compile_condition.cache_clear()
+        try:
+            started = time.perf_counter()
+            predicate = compile_condition(expression)
+            compile_us = (time.perf_counter() - started) * 1e6
+        except ConditionError as exc:
+            raise CommandError(str(exc))
+
+        started = time.perf_counter()
+        compile_condition(expression)
+        cached_us = (time.perf_counter() - started) * 1e6
+
+        started = time.perf_counter()
+        for index in range(iterations):
+            predicate(objects[index & 1])
+        eval_us = (time.perf_counter() - started) * 1e6 / iterations
+
+        self.stdout.write(f'编译：{compile_us:.1f} µs（首次），{cached_us:.2f} µs（缓存命中）')
+        self.stdout.write(self.style.SUCCESS(
+            f'求值：{eval_us:.2f} µs/次（{iterations} 次，结果 {[predicate(obj) for obj in objects]}）'
+        ))
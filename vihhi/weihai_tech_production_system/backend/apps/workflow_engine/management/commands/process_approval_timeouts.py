@@ -0,0 +1,40 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from backend.apps.workflow_engine.services_timeout import process_approval_timeouts
+
+
+class Command(BaseCommand):
+    help = '处理已超时的待审批记录（按流程超时处理方式自动通过、自动驳回、提醒或升级）'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=None,
+            help='每批领取的记录数（默认取 APPROVAL_TIMEOUT_BATCH_SIZE）',
+        )
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            help='常驻运行，每隔 --interval 秒扫描一次（无 Celery beat 时使用，可在多个节点同时运行）',
+        )
+        parser.add_argument(
+            '--interval',
+            type=int,
+            default=60,
+            help='常驻运行时的扫描间隔（秒），默认60',
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            result = process_approval_timeouts(batch_size=options.get('batch_size'))
+            self.stdout.write(
+                f'处理 {result["processed"]} 条：自动通过 {result["auto_approved"]}，自动驳回 {result["auto_rejected"]}，'
+                f'提醒 {result["notified"]}，升级 {result["escalated"]}，跳过 {result["skipped"]}，'
+                f'失败 {result["failed"]}（{result["batches"]} 批，{result["elapsed"]}s）'
+            )
+            if not options.get('loop'):
+                break
+            time.sleep(options['interval'])
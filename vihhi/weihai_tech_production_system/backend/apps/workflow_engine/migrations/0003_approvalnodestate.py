@@ -0,0 +1,37 @@
+# Generated by Django 4.2.7 on 2026-10-17 03:05
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('workflow_engine', '0002_alter_approvalinstance_content_type_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ApprovalNodeState',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('approval_mode', models.CharField(choices=[('single', '单人审批'), ('any', '任意一人通过'), ('all', '全部通过'), ('majority', '多数通过')], default='single', max_length=20, verbose_name='审批模式')),
+                ('approver_ids', models.JSONField(blank=True, default=list, help_text='进入节点时解析的审批人', verbose_name='审批人ID')),
+                ('expected_count', models.IntegerField(default=0, verbose_name='应审人数')),
+                ('approved_count', models.IntegerField(default=0, verbose_name='通过人数')),
+                ('rejected_count', models.IntegerField(default=0, verbose_name='驳回人数')),
+                ('is_completed', models.BooleanField(default=False, verbose_name='是否完成')),
+                ('created_time', models.DateTimeField(default=django.utils.timezone.now, verbose_name='创建时间')),
+                ('updated_time', models.DateTimeField(auto_now=True, verbose_name='更新时间')),
+                ('instance', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='node_states', to='workflow_engine.approvalinstance', verbose_name='审批实例')),
+                ('node', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='instance_states', to='workflow_engine.approvalnode', verbose_name='审批节点')),
+            ],
+            options={
+                'verbose_name': '审批节点状态',
+                'verbose_name_plural': '审批节点状态',
+                'db_table': 'workflow_approval_node_state',
+                'unique_together': {('instance', 'node')},
+            },
+        ),
+    ]
@@ -0,0 +1,58 @@
+# Generated by Django 4.2.7 on 2026-10-17 03:40
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+def populate_inbox(apps, schema_editor):
+    """按审批中实例当前节点上的待审批记录初始化收件箱"""
+    ApprovalRecord = apps.get_model('workflow_engine', 'ApprovalRecord')
+    ApprovalInbox = apps.get_model('workflow_engine', 'ApprovalInbox')
+
+    entries = {}
+    records = (
+        ApprovalRecord.objects.filter(
+            result='pending',
+            instance__status='pending',
+            instance__current_node_id=models.F('node_id'),
+        )
+        .order_by('created_time')
+        .values_list('approver_id', 'instance_id', 'node_id', 'created_time')
+        .iterator(chunk_size=2000)
+    )
+    for approver_id, instance_id, node_id, created_time in records:
+        entries.setdefault((approver_id, instance_id), ApprovalInbox(
+            user_id=approver_id, instance_id=instance_id, node_id=node_id, created_time=created_time,
+        ))
+    ApprovalInbox.objects.bulk_create(entries.values(), batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('workflow_engine', '0003_approvalnodestate'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ApprovalInbox',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_time', models.DateTimeField(default=django.utils.timezone.now, verbose_name='到达时间')),
+                ('instance', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='inbox_entries', to='workflow_engine.approvalinstance', verbose_name='审批实例')),
+                ('node', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='inbox_entries', to='workflow_engine.approvalnode', verbose_name='审批节点')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='approval_inbox', to=settings.AUTH_USER_MODEL, verbose_name='审批人')),
+            ],
+            options={
+                'verbose_name': '待审批收件箱',
+                'verbose_name_plural': '待审批收件箱',
+                'db_table': 'workflow_approval_inbox',
+                'indexes': [models.Index(fields=['user', '-created_time'], include=('instance',), name='wf_inbox_user_time_idx')],
+                'unique_together': {('user', 'instance')},
+            },
+        ),
+        migrations.RunPython(populate_inbox, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 4.2.7 on 2026-10-17 04:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('workflow_engine', '0004_approvalinbox'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='approvalrecord',
+            name='due_time',
+            field=models.DateTimeField(blank=True, help_text='待审批记录按节点/流程超时配置计算，超时处理后清空', null=True, verbose_name='超时时间'),
+        ),
+        migrations.AddIndex(
+            model_name='approvalrecord',
+            index=models.Index(condition=models.Q(('due_time__isnull', False), ('result', 'pending')), fields=['due_time'], name='wf_record_pending_due_idx'),
+        ),
+    ]
@@ -194,13 +194,76 @@ class ApprovalRecord(models.Model):
     # 时间信息
     approval_time = models.DateTimeField(default=timezone.now, verbose_name='审批时间')
     created_time = models.DateTimeField(default=timezone.now, verbose_name='创建时间')
+    due_time = models.DateTimeField(null=True, blank=True, verbose_name='超时时间', help_text='待审批记录按节点/流程超时配置计算，超时处理后清空')
     
     class Meta:
         db_table = 'workflow_approval_record'
         verbose_name = '审批记录'
         verbose_name_plural = verbose_name
         ordering = ['-approval_time']
+        indexes = [
+            # 超时扫描只涉及待审批且设置了超时时间的记录
+            models.Index(
+                fields=['due_time'],
+                condition=models.Q(result='pending', due_time__isnull=False),
+                name='wf_record_pending_due_idx',
+            ),
+        ]
     
     def __str__(self):
         return f"{self.instance.instance_number} - {self.approver.username} - {self.get_result_display()}"
 
+
+class ApprovalNodeState(models.Model):
+    """
+    审批节点状态（每个审批实例的每个节点一行）
+
+    进入节点时一次性解析审批人并记录应审人数，审批时原子地累加通过 / 驳回计数，
+    判断节点是否完成不再重新查询审批人和审批记录。
+    """
+    instance = models.ForeignKey(ApprovalInstance, on_delete=models.CASCADE, related_name='node_states', verbose_name='审批实例')
+    node = models.ForeignKey(ApprovalNode, on_delete=models.CASCADE, related_name='instance_states', verbose_name='审批节点')
+    approval_mode = models.CharField(max_length=20, choices=ApprovalNode.APPROVAL_MODE_CHOICES, default='single', verbose_name='审批模式')
+    approver_ids = models.JSONField(default=list, blank=True, verbose_name='审批人ID', help_text='进入节点时解析的审批人')
+    expected_count = models.IntegerField(default=0, verbose_name='应审人数')
+    approved_count = models.IntegerField(default=0, verbose_name='通过人数')
+    rejected_count = models.IntegerField(default=0, verbose_name='驳回人数')
+    is_completed = models.BooleanField(default=False, verbose_name='是否完成')
+    created_time = models.DateTimeField(default=timezone.now, verbose_name='创建时间')
+    updated_time = models.DateTimeField(auto_now=True, verbose_name='更新时间')
+
+    class Meta:
+        db_table = 'workflow_approval_node_state'
+        verbose_name = '审批节点状态'
+        verbose_name_plural = verbose_name
+        unique_together = [['instance', 'node']]
+
+    def __str__(self):
+        return f"{self.instance_id}/{self.node_id}: {self.approved_count}/{self.expected_count}"
+
+
+class ApprovalInbox(models.Model):
+    """
+    待审批收件箱（读模型）
+
+    每个（审批人，审批实例）一行，只包含审批中实例当前节点上待该用户审批的事项，
+    由审批引擎在创建待审批记录、审批、转交、撤回时维护。
+    “我的待审批”数量和列表直接读本表，不再对审批记录做 JOIN + DISTINCT。
+    """
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='approval_inbox', verbose_name='审批人')
+    instance = models.ForeignKey(ApprovalInstance, on_delete=models.CASCADE, related_name='inbox_entries', verbose_name='审批实例')
+    node = models.ForeignKey(ApprovalNode, on_delete=models.CASCADE, related_name='inbox_entries', verbose_name='审批节点')
+    created_time = models.DateTimeField(default=timezone.now, verbose_name='到达时间')
+
+    class Meta:
+        db_table = 'workflow_approval_inbox'
+        verbose_name = '待审批收件箱'
+        verbose_name_plural = verbose_name
+        unique_together = [['user', 'instance']]
+        indexes = [
+            # 覆盖索引：按用户计数、按到达时间倒序列出实例均可只扫描索引
+            models.Index(fields=['user', '-created_time'], include=['instance'], name='wf_inbox_user_time_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.user_id} <- {self.instance_id}"
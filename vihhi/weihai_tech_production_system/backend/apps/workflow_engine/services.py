@@ -2,25 +2,50 @@
 审批流程引擎服务
 """
 import logging
+from datetime import datetime, timedelta
 from typing import Optional, List, Dict
 from django.utils import timezone
 from django.contrib.contenttypes.models import ContentType
-from django.db import transaction
-from backend.apps.workflow_engine.models import WorkflowTemplate, ApprovalNode, ApprovalInstance, ApprovalRecord
+from django.db import connection, transaction
+from backend.apps.workflow_engine.conditions import ConditionError, evaluate_condition
+from backend.apps.workflow_engine.models import (
+    WorkflowTemplate, ApprovalNode, ApprovalInstance, ApprovalRecord, ApprovalNodeState, ApprovalInbox,
+)
 from backend.apps.system_management.models import User
+from backend.core.dashboard import invalidate_user_dashboards
+from backend.core.sequence import next_document_number
 
 logger = logging.getLogger(__name__)
 
+# 多人审批节点批量写入待审批记录的批大小
+RECORD_BATCH_SIZE = 500
+
+# 累加节点审批计数并判断节点是否完成（节点已完成时不再更新，返回空）
+_RECORD_RESULT_SQL = """
+UPDATE {table} SET
+    approved_count = approved_count + %s,
+    rejected_count = rejected_count + %s,
+    is_completed = CASE approval_mode
+        WHEN 'all' THEN approved_count + %s >= expected_count
+        WHEN 'majority' THEN (approved_count + %s) * 2 > expected_count
+        ELSE approved_count + %s >= 1
+    END,
+    updated_time = %s
+WHERE instance_id = %s AND node_id = %s AND NOT is_completed
+RETURNING is_completed
+"""
+
 
 class ApprovalEngine:
     """审批流程引擎"""
     
     @staticmethod
     def generate_instance_number(workflow: WorkflowTemplate) -> str:
-        """生成审批实例编号"""
-        from django.db.models import Count
-        count = ApprovalInstance.objects.filter(workflow=workflow).count()
-        return f"{workflow.code}-{timezone.now().strftime('%Y%m%d')}-{count + 1:04d}"
+        """生成审批实例编号：{流程编码}-{YYYYMMDD}-{当日序号}"""
+        return next_document_number(
+            ApprovalInstance.objects, 'instance_number', workflow.code,
+            period=timezone.localdate().strftime('%Y%m%d'),
+        )
     
     @staticmethod
     def start_approval(
@@ -54,10 +79,12 @@ class ApprovalEngine:
                 status='pending'
             )
             
-            # 获取第一个节点
+            # 获取第一个节点（条件不满足的节点跳过）
             first_node = workflow.nodes.filter(node_type='start').first()
             if not first_node:
-                first_node = workflow.nodes.order_by('sequence').first()
+                first_node = ApprovalEngine._next_applicable_node(
+                    workflow.nodes.order_by('sequence'), instance, content_object
+                )
             
             if first_node:
                 instance.current_node = first_node
@@ -71,36 +98,68 @@ class ApprovalEngine:
     
     @staticmethod
     def _create_pending_records(instance: ApprovalInstance, node: ApprovalNode):
-        """为节点创建待审批记录"""
+        """
+        为节点创建待审批记录
+        
+        审批人只在进入节点时解析一次，连同应审人数记录到节点状态上；
+        多人审批的待审批记录批量写入。
+        """
         approvers = ApprovalEngine._get_approvers(node, instance)
         
+        # 如果是单人审批模式，只创建第一个审批人的记录
+        if node.approval_mode == 'single':
+            approvers = approvers[:1]
+        
+        ApprovalNodeState.objects.update_or_create(
+            instance=instance,
+            node=node,
+            defaults={
+                'approval_mode': node.approval_mode,
+                'approver_ids': [approver.pk for approver in approvers],
+                'expected_count': len(approvers),
+                'approved_count': 0,
+                'rejected_count': 0,
+                'is_completed': False,
+            },
+        )
+        
         if not approvers:
             logger.warning(f'节点 {node.name} 没有找到审批人')
             return
         
-        # 如果是单人审批模式，只创建第一个审批人的记录
-        if node.approval_mode == 'single':
-            approver = approvers[0]
-            ApprovalRecord.objects.create(
-                instance=instance,
-                node=node,
-                approver=approver,
-                result='pending'
-            )
-            # 发送审批通知
-            ApprovalEngine._send_approval_notification(instance, approver, node)
-        else:
-            # 其他模式（any, all, majority），为所有审批人创建记录
-            for approver in approvers:
-                ApprovalRecord.objects.create(
+        now = timezone.now()
+        due_time = ApprovalEngine._due_time(node, now)
+        ApprovalRecord.objects.bulk_create(
+            [
+                ApprovalRecord(
                     instance=instance,
                     node=node,
                     approver=approver,
-                    result='pending'
+                    result='pending',
+                    approval_time=now,
+                    created_time=now,
+                    due_time=due_time
                 )
-                
-                # 发送审批通知
-                ApprovalEngine._send_approval_notification(instance, approver, node)
+                for approver in approvers
+            ],
+            batch_size=RECORD_BATCH_SIZE
+        )
+        ApprovalInbox.objects.bulk_create(
+            [ApprovalInbox(user=approver, instance=instance, node=node, created_time=now) for approver in approvers],
+            batch_size=RECORD_BATCH_SIZE,
+            ignore_conflicts=True
+        )
+        ApprovalEngine._invalidate_dashboards([approver.id for approver in approvers])
+        
+        # 发送审批通知
+        for approver in approvers:
+            ApprovalEngine._send_approval_notification(instance, approver, node)
+    
+    @staticmethod
+    def _due_time(node: ApprovalNode, start) -> Optional[datetime]:
+        """待审批记录的超时时间：节点超时配置优先，其次为流程默认超时；均未配置时不超时"""
+        hours = node.timeout_hours or node.workflow.timeout_hours
+        return start + timedelta(hours=hours) if hours else None
     
     @staticmethod
     def _get_approvers(node: ApprovalNode, instance: ApprovalInstance) -> List[User]:
@@ -140,6 +199,9 @@ class ApprovalEngine:
         """
         执行审批操作
         
+        审批人在当前节点有待审批记录时直接更新该记录，否则新建一条审批记录；
+        通过 / 驳回计数累加到节点状态上，节点是否完成由一条 UPDATE ... RETURNING 判断。
+        
         Args:
             instance: 审批实例
             approver: 审批人
@@ -159,22 +221,48 @@ class ApprovalEngine:
             return False
         
         with transaction.atomic():
-            # 创建审批记录
-            record = ApprovalRecord.objects.create(
+            node = instance.current_node
+            now = timezone.now()
+            
+            # 更新审批人的待审批记录（同一审批人不会重复计数）
+            record = ApprovalRecord.objects.select_for_update().filter(
                 instance=instance,
-                node=instance.current_node,
+                node=node,
                 approver=approver,
-                result=result,
-                comment=comment,
-                transferred_to=transferred_to,
-                approval_time=timezone.now()
-            )
+                result='pending'
+            ).order_by('id').first()
+            if record:
+                record.result = result
+                record.comment = comment
+                record.transferred_to = transferred_to
+                record.approval_time = now
+                record.save(update_fields=['result', 'comment', 'transferred_to', 'approval_time'])
+            else:
+                if result == 'approved' and ApprovalRecord.objects.filter(
+                    instance=instance, node=node, approver=approver, result='approved'
+                ).exists():
+                    logger.warning(f'审批人已审批过当前节点: {instance.instance_number}, 审批人: {approver.username}')
+                    return False
+                record = ApprovalRecord.objects.create(
+                    instance=instance,
+                    node=node,
+                    approver=approver,
+                    result=result,
+                    comment=comment,
+                    transferred_to=transferred_to,
+                    approval_time=now
+                )
+            # 已处理的事项移出审批人的收件箱
+            ApprovalInbox.objects.filter(user=approver, instance=instance).delete()
+            ApprovalEngine._invalidate_dashboards([approver.id])
             
             # 处理审批结果
             if result == 'rejected':
                 # 驳回，流程结束
+                ApprovalEngine._record_node_result(instance, node, rejected=1)
+                ApprovalEngine._clear_inbox(instance)
                 instance.status = 'rejected'
-                instance.completed_time = timezone.now()
+                instance.completed_time = now
                 instance.final_comment = comment
                 instance.current_node = None
                 instance.save()
@@ -186,20 +274,26 @@ class ApprovalEngine:
                 # 创建新的审批记录给转交人
                 ApprovalRecord.objects.create(
                     instance=instance,
-                    node=instance.current_node,
+                    node=node,
                     approver=transferred_to,
                     result='pending',
                     comment=f'由 {approver.username} 转交',
-                    approval_time=timezone.now()
+                    approval_time=now,
+                    due_time=ApprovalEngine._due_time(node, now)
                 )
+                ApprovalInbox.objects.get_or_create(
+                    user=transferred_to, instance=instance, defaults={'node': node, 'created_time': now}
+                )
+                ApprovalEngine._invalidate_dashboards([transferred_to.id])
                 logger.info(f'审批已转交: {instance.instance_number}, 转交给: {transferred_to.username}')
                 return True
             
             elif result == 'approved':
                 # 检查是否所有审批人都已审批
-                if ApprovalEngine._check_node_completed(instance, instance.current_node):
-                    # 节点完成，进入下一个节点
-                    next_node = ApprovalEngine._get_next_node(instance.current_node)
+                if ApprovalEngine._record_node_result(instance, node, approved=1):
+                    # 节点完成：其余审批人的事项移出收件箱，进入下一个节点
+                    ApprovalEngine._clear_inbox(instance)
+                    next_node = ApprovalEngine._get_next_node(node, instance)
                     if next_node:
                         instance.current_node = next_node
                         instance.save()
@@ -208,7 +302,7 @@ class ApprovalEngine:
                     else:
                         # 流程完成
                         instance.status = 'approved'
-                        instance.completed_time = timezone.now()
+                        instance.completed_time = now
                         instance.final_comment = comment
                         instance.current_node = None
                         instance.save()
@@ -218,59 +312,86 @@ class ApprovalEngine:
             return False
     
     @staticmethod
-    def _check_node_completed(instance: ApprovalInstance, node: ApprovalNode) -> bool:
-        """检查节点是否已完成"""
-        pending_records = ApprovalRecord.objects.filter(
+    def _record_node_result(instance: ApprovalInstance, node: ApprovalNode, approved: int = 0, rejected: int = 0) -> bool:
+        """
+        累加节点的通过 / 驳回计数，返回节点是否因此完成
+        
+        计数与完成判断在同一条 UPDATE 中完成，行锁保证并发审批时只有一人推进节点；
+        节点已完成时不再累加，返回 False。
+        """
+        sql = _RECORD_RESULT_SQL.format(table=connection.ops.quote_name(ApprovalNodeState._meta.db_table))
+        with connection.cursor() as cursor:
+            cursor.execute(sql, [approved, rejected, approved, approved, approved, timezone.now(), instance.pk, node.pk])
+            row = cursor.fetchone()
+            if row is None and not ApprovalNodeState.objects.filter(instance=instance, node=node).exists():
+                # 引擎升级前创建的审批实例没有节点状态：按已有审批记录（含本次）补建后重新判断
+                ApprovalEngine._ensure_node_state(instance, node)
+                cursor.execute(sql, [0, 0, 0, 0, 0, timezone.now(), instance.pk, node.pk])
+                row = cursor.fetchone()
+        return bool(row and row[0])
+    
+    @staticmethod
+    def _ensure_node_state(instance: ApprovalInstance, node: ApprovalNode) -> ApprovalNodeState:
+        """按节点审批人和已有审批记录补建节点状态"""
+        approvers = ApprovalEngine._get_approvers(node, instance)
+        if node.approval_mode == 'single':
+            approvers = approvers[:1]
+        records = ApprovalRecord.objects.filter(instance=instance, node=node)
+        state, _ = ApprovalNodeState.objects.get_or_create(
             instance=instance,
             node=node,
-            result='pending'
+            defaults={
+                'approval_mode': node.approval_mode,
+                'approver_ids': [user.pk for user in approvers],
+                'expected_count': len(approvers),
+                'approved_count': records.filter(result='approved').count(),
+                'rejected_count': records.filter(result='rejected').count(),
+            },
         )
-        
-        if node.approval_mode == 'single':
-            # 单人审批，只要有一个通过即可
-            return ApprovalRecord.objects.filter(
-                instance=instance,
-                node=node,
-                result='approved'
-            ).exists()
-        elif node.approval_mode == 'any':
-            # 任意一人通过
-            return ApprovalRecord.objects.filter(
-                instance=instance,
-                node=node,
-                result='approved'
-            ).exists()
-        elif node.approval_mode == 'all':
-            # 全部通过
-            approvers = ApprovalEngine._get_approvers(node, instance)
-            approved_count = ApprovalRecord.objects.filter(
-                instance=instance,
-                node=node,
-                result='approved'
-            ).count()
-            return approved_count >= len(approvers)
-        elif node.approval_mode == 'majority':
-            # 多数通过
-            approvers = ApprovalEngine._get_approvers(node, instance)
-            approved_count = ApprovalRecord.objects.filter(
-                instance=instance,
-                node=node,
-                result='approved'
-            ).count()
-            return approved_count > len(approvers) / 2
-        
-        return False
+        return state
     
     @staticmethod
-    def _get_next_node(current_node: ApprovalNode) -> Optional[ApprovalNode]:
-        """获取下一个节点"""
-        # 简单实现：按顺序获取下一个节点
-        next_node = ApprovalNode.objects.filter(
-            workflow=current_node.workflow,
+    def _check_node_completed(instance: ApprovalInstance, node: ApprovalNode) -> bool:
+        """检查节点是否已完成（只读，不累加计数）"""
+        return ApprovalNodeState.objects.filter(instance=instance, node=node, is_completed=True).exists()
+    
+    @staticmethod
+    def _get_next_node(current_node: ApprovalNode, instance: Optional[ApprovalInstance] = None) -> Optional[ApprovalNode]:
+        """获取下一个节点：按顺序取后续节点，跳过条件表达式不满足的节点"""
+        candidates = ApprovalNode.objects.filter(
+            workflow_id=current_node.workflow_id,
             sequence__gt=current_node.sequence
-        ).order_by('sequence').first()
+        ).order_by('sequence')
+        return ApprovalEngine._next_applicable_node(candidates, instance)
+    
+    @staticmethod
+    def _next_applicable_node(candidates, instance: Optional[ApprovalInstance], content_object=None) -> Optional[ApprovalNode]:
+        """
+        返回 candidates 中第一个适用的节点
         
-        return next_node
+        条件表达式按文本编译缓存，业务对象只在遇到带条件的节点时加载一次；
+        表达式无效或对象无法加载时不跳过该节点（宁可多审一步）。
+        """
+        loaded = content_object is not None
+        for node in candidates:
+            if not node.condition_expression or not node.condition_expression.strip():
+                return node
+            if not loaded and instance is not None:
+                try:
+                    content_object = instance.content_type.get_object_for_this_type(id=instance.object_id)
+                except Exception as e:
+                    logger.warning(f'加载审批关联对象失败，不按条件跳过节点: {instance.instance_number}, {str(e)}')
+                loaded = True
+            if content_object is None:
+                return node
+            try:
+                if evaluate_condition(node.condition_expression, content_object):
+                    return node
+            except ConditionError as e:
+                logger.warning(f'节点 {node.name} 条件表达式无效，不跳过该节点: {str(e)}')
+                return node
+            logger.info(f'条件不满足，跳过节点: {node.name}')
+        return None
     
     @staticmethod
     def withdraw(instance: ApprovalInstance, user: User) -> bool:
@@ -282,6 +403,7 @@ class ApprovalEngine:
             return False
         
         with transaction.atomic():
+            ApprovalEngine._clear_inbox(instance)
             instance.status = 'withdrawn'
             instance.completed_time = timezone.now()
             instance.save()
@@ -299,14 +421,29 @@ class ApprovalEngine:
             logger.info(f'审批已撤回: {instance.instance_number}')
             return True
     
+    @staticmethod
+    def _clear_inbox(instance: ApprovalInstance):
+        """清除实例在所有审批人收件箱中的事项"""
+        entries = ApprovalInbox.objects.filter(instance=instance)
+        ApprovalEngine._invalidate_dashboards(list(entries.values_list('user_id', flat=True)))
+        entries.delete()
+    
+    @staticmethod
+    def _invalidate_dashboards(user_ids: List[int]):
+        """收件箱变化后（事务提交时）使这些用户的首页缓存失效；收件箱不挂信号，以保留批量删除"""
+        transaction.on_commit(lambda: invalidate_user_dashboards(user_ids))
+    
     @staticmethod
     def get_pending_approvals(user: User) -> List[ApprovalInstance]:
-        """获取用户的待审批列表"""
+        """获取用户的待审批列表（读收件箱，按到达时间倒序）"""
         return ApprovalInstance.objects.filter(
-            status='pending',
-            records__approver=user,
-            records__result='pending'
-        ).distinct()
+            inbox_entries__user=user
+        ).order_by('-inbox_entries__created_time')
+    
+    @staticmethod
+    def count_pending_approvals(user: User) -> int:
+        """获取用户的待审批数量（只扫描收件箱索引）"""
+        return ApprovalInbox.objects.filter(user=user).count()
     
     @staticmethod
     def get_my_applications(user: User) -> List[ApprovalInstance]:
@@ -314,8 +451,8 @@ class ApprovalEngine:
         return ApprovalInstance.objects.filter(applicant=user).order_by('-created_time')
     
     @staticmethod
-    def _send_approval_notification(instance: ApprovalInstance, approver: User, node: ApprovalNode):
-        """发送审批通知"""
+    def _send_approval_notification(instance: ApprovalInstance, approver: User, node: ApprovalNode, title_prefix: str = '待审批'):
+        """发送审批通知（超时提醒等场景可指定标题前缀）"""
         try:
             from django.urls import reverse
             from backend.apps.project_center.models import ProjectTeamNotification
@@ -325,7 +462,7 @@ class ApprovalEngine:
             obj_name = str(content_obj)[:50]
             
             # 生成通知标题和内容
-            title = f"待审批：{instance.workflow.name}"
+            title = f"{title_prefix}：{instance.workflow.name}"
             message = f"您有一个待审批事项：{obj_name}\n审批节点：{node.name}\n申请人：{instance.applicant.username}\n申请时间：{instance.apply_time.strftime('%Y-%m-%d %H:%M') if instance.apply_time else ''}"
             
             # 生成跳转链接（跳转到前端审批详情页，而不是后台管理系统）
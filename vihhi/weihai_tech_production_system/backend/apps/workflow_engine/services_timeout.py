@@ -0,0 +1,128 @@
+"""
+审批超时处理
+
+待审批记录在创建时按节点超时（ApprovalNode.timeout_hours，优先）或流程默认超时
+（WorkflowTemplate.timeout_hours）写入 due_time，本模块定期扫描已超时的记录，
+按流程的超时处理方式（timeout_action）执行：
+
+- auto_approve：以原审批人身份自动通过
+- auto_reject：以原审批人身份自动驳回
+- notify：向审批人发送超时提醒
+- escalate：转交给审批人的部门负责人（没有部门负责人时仅提醒）
+
+按批处理，每批一个事务，用 ``SELECT ... FOR UPDATE SKIP LOCKED`` 领取记录，
+多个节点同时运行（Celery beat + 管理命令循环）也不会重复处理；单条记录处理失败只回滚该条。
+处理后的记录清空 due_time，不会被再次扫描。
+"""
+import logging
+import time
+from typing import Optional
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from backend.apps.workflow_engine.models import ApprovalRecord
+from backend.apps.workflow_engine.services import ApprovalEngine
+
+logger = logging.getLogger(__name__)
+
+TIMEOUT_BATCH_SIZE = getattr(settings, 'APPROVAL_TIMEOUT_BATCH_SIZE', 200)
+
+OUTCOMES = ('auto_approved', 'auto_rejected', 'notified', 'escalated', 'skipped')
+
+
+class TimeoutActionError(Exception):
+    """超时处理未能生效（审批引擎拒绝了自动审批 / 转交）"""
+
+
+def _decide(record: ApprovalRecord, result: str, comment: str, transferred_to=None):
+    """以原审批人身份处理待审批记录，审批引擎未记录结果时抛出 TimeoutActionError"""
+    if ApprovalEngine.approve(record.instance, record.approver, result, comment=comment, transferred_to=transferred_to):
+        return
+    # 节点还在等待其他审批人时，通过操作同样返回 False：以审批记录是否已更新为准
+    if not ApprovalRecord.objects.filter(pk=record.pk, result=result).exists():
+        raise TimeoutActionError(f'审批引擎未记录{result}结果')
+
+
+def _apply_timeout(record: ApprovalRecord) -> str:
+    """处理一条超时的待审批记录，返回处理结果（OUTCOMES 之一）"""
+    instance = record.instance
+    # 同一批中前面的记录可能已推进或结束该实例
+    instance.refresh_from_db(fields=['status', 'current_node'])
+    if instance.status != 'pending' or instance.current_node_id != record.node_id:
+        # 实例已结束或已离开该节点，记录已过时
+        return 'skipped'
+
+    action = instance.workflow.timeout_action
+    if action == 'auto_approve':
+        _decide(record, 'approved', '审批超时，系统自动通过')
+        return 'auto_approved'
+    if action == 'auto_reject':
+        _decide(record, 'rejected', '审批超时，系统自动驳回')
+        return 'auto_rejected'
+    if action == 'escalate':
+        department = record.approver.department
+        leader = department.leader if department else None
+        if leader and leader.pk != record.approver_id:
+            _decide(record, 'transferred', '审批超时，系统升级给部门负责人', transferred_to=leader)
+            return 'escalated'
+
+    ApprovalEngine._send_approval_notification(instance, record.approver, record.node, title_prefix='审批超时')
+    return 'notified'
+
+
+def process_approval_timeouts(batch_size: Optional[int] = None, max_batches: Optional[int] = None, now=None) -> dict:
+    """
+    处理全部已超时的待审批记录
+
+    返回本次运行的统计：
+    {
+        'processed': int, 'auto_approved': int, 'auto_rejected': int, 'notified': int,
+        'escalated': int, 'skipped': int, 'failed': int, 'batches': int, 'elapsed': 秒,
+    }
+    """
+    started = time.monotonic()
+    now = now or timezone.now()
+    batch_size = batch_size or TIMEOUT_BATCH_SIZE
+    stats = {outcome: 0 for outcome in OUTCOMES}
+    stats.update({'processed': 0, 'failed': 0, 'batches': 0})
+    failed_ids = []
+
+    while max_batches is None or stats['batches'] < max_batches:
+        with transaction.atomic():
+            records = list(
+                ApprovalRecord.objects.select_for_update(skip_locked=True, of=('self',))
+                .select_related('instance__workflow', 'node', 'approver__department__leader')
+                .filter(result='pending', due_time__lte=now)
+                .exclude(id__in=failed_ids)
+                .order_by('due_time', 'id')[:batch_size]
+            )
+            if not records:
+                break
+            stats['batches'] += 1
+
+            for record in records:
+                try:
+                    with transaction.atomic():
+                        outcome = _apply_timeout(record)
+                        ApprovalRecord.objects.filter(pk=record.pk).update(due_time=None)
+                    stats[outcome] += 1
+                    stats['processed'] += 1
+                except TimeoutActionError as exc:
+                    logger.warning('处理审批超时失败: 记录 %s, %s', record.pk, exc)
+                    failed_ids.append(record.pk)
+                    stats['failed'] += 1
+                except Exception as exc:
+                    logger.exception('处理审批超时失败: 记录 %s, %s', record.pk, exc)
+                    failed_ids.append(record.pk)
+                    stats['failed'] += 1
+
+    stats['elapsed'] = round(time.monotonic() - started, 3)
+    if stats['batches']:
+        logger.info(
+            '审批超时处理：%s 条（自动通过 %s，自动驳回 %s，提醒 %s，升级 %s，跳过 %s），失败 %s，%s 批，耗时 %.3fs',
+            stats['processed'], stats['auto_approved'], stats['auto_rejected'], stats['notified'],
+            stats['escalated'], stats['skipped'], stats['failed'], stats['batches'], stats['elapsed'],
+        )
+    return stats
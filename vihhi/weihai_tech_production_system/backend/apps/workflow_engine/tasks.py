@@ -0,0 +1,23 @@
+# ==================== 审批流程引擎Celery定时任务 ====================
+
+from celery import shared_task
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task
+def process_approval_timeouts():
+    """
+    定时任务：处理已超时的待审批记录（自动通过 / 自动驳回 / 提醒 / 升级）
+    
+    执行时间：每5分钟（需要在Celery Beat中配置），多个 worker 同时执行不会重复处理
+    """
+    try:
+        from .services_timeout import process_approval_timeouts as process
+        
+        result = process()
+        return {'success': True, **result}
+    except Exception as e:
+        logger.error(f'审批超时处理任务执行失败: {str(e)}', exc_info=True)
+        return {'success': False, 'error': str(e)}
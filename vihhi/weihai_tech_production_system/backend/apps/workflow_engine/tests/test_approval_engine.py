@@ -0,0 +1,232 @@
+import json
+from datetime import date, timedelta
+from decimal import Decimal
+from types import SimpleNamespace
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+
+from backend.apps.system_management.models import Department
+from backend.apps.workflow_engine import conditions
+from backend.apps.workflow_engine.conditions import ConditionError, compile_condition
+from backend.apps.workflow_engine.models import (
+    ApprovalInbox, ApprovalNode, ApprovalNodeState, ApprovalRecord, WorkflowTemplate,
+)
+from backend.apps.workflow_engine.services import ApprovalEngine
+from backend.apps.workflow_engine.services_timeout import process_approval_timeouts
+
+
+class ApprovalEngineCounterTests(TestCase):
+    def setUp(self):
+        User = get_user_model()
+        self.applicant = User.objects.create_user(username="applicant", password="pwd123456")
+        self.department = Department.objects.create(name="审核部", code="AUDIT")
+        self.approvers = [
+            User.objects.create_user(username=f"approver{index}", password="pwd123456", department=self.department)
+            for index in range(3)
+        ]
+        self.workflow = WorkflowTemplate.objects.create(
+            name="测试流程", code="TEST", status="active", created_by=self.applicant
+        )
+        self.first = ApprovalNode.objects.create(
+            workflow=self.workflow, name="会签", sequence=1,
+            approver_type="department", approval_mode="all",
+        )
+        self.first.approver_departments.add(self.department)
+        self.second = ApprovalNode.objects.create(
+            workflow=self.workflow, name="复核", sequence=2,
+            approver_type="department", approval_mode="majority",
+        )
+        self.second.approver_departments.add(self.department)
+
+    def _start(self):
+        # 业务对象任选一个模型实例即可
+        return ApprovalEngine.start_approval(self.workflow, self.department, self.applicant, "请审批")
+
+    def test_approvers_are_resolved_once_and_counted_atomically(self):
+        instance = self._start()
+        state = ApprovalNodeState.objects.get(instance=instance, node=self.first)
+        self.assertEqual(state.expected_count, 3)
+        self.assertEqual(sorted(state.approver_ids), sorted(user.pk for user in self.approvers))
+        self.assertEqual(ApprovalRecord.objects.filter(instance=instance, result="pending").count(), 3)
+
+        self.assertFalse(ApprovalEngine.approve(instance, self.approvers[0], "approved"))
+        # 同一审批人重复审批不计数
+        self.assertFalse(ApprovalEngine.approve(instance, self.approvers[0], "approved"))
+        # 未完成节点的审批不再解析审批人、不再统计审批记录
+        with self.assertNumQueries(6):
+            self.assertFalse(ApprovalEngine.approve(instance, self.approvers[1], "approved"))
+        self.assertEqual(instance.current_node, self.first)
+
+        self.assertTrue(ApprovalEngine.approve(instance, self.approvers[2], "approved"))
+        self.assertEqual(instance.current_node, self.second)
+        state.refresh_from_db()
+        self.assertEqual((state.approved_count, state.is_completed), (3, True))
+        self.assertEqual(ApprovalRecord.objects.filter(instance=instance, node=self.first).count(), 3)
+
+        # 多数通过：3 人中 2 人通过即完成
+        ApprovalEngine.approve(instance, self.approvers[0], "approved")
+        ApprovalEngine.approve(instance, self.approvers[1], "approved")
+        self.assertEqual((instance.status, instance.current_node), ("approved", None))
+
+    def test_instances_without_node_state_are_backfilled(self):
+        instance = self._start()
+        ApprovalEngine.approve(instance, self.approvers[0], "approved")
+        ApprovalEngine.approve(instance, self.approvers[1], "approved")
+        ApprovalNodeState.objects.all().delete()
+
+        self.assertTrue(ApprovalEngine.approve(instance, self.approvers[2], "approved"))
+        state = ApprovalNodeState.objects.get(instance=instance, node=self.first)
+        self.assertEqual((state.expected_count, state.approved_count, state.is_completed), (3, 3, True))
+        self.assertEqual(instance.current_node, self.second)
+
+    def test_inbox_follows_approve_transfer_and_withdraw(self):
+        instance = self._start()
+        first, second, third = self.approvers
+        self.assertEqual(ApprovalEngine.count_pending_approvals(first), 1)
+        self.assertEqual(list(ApprovalEngine.get_pending_approvals(first)), [instance])
+
+        ApprovalEngine.approve(instance, first, "approved")
+        self.assertEqual(ApprovalEngine.count_pending_approvals(first), 0)
+
+        ApprovalEngine.approve(instance, second, "transferred", transferred_to=self.applicant)
+        self.assertEqual(ApprovalEngine.count_pending_approvals(second), 0)
+        self.assertEqual(ApprovalEngine.count_pending_approvals(self.applicant), 1)
+
+        ApprovalEngine.approve(instance, self.applicant, "approved")
+        ApprovalEngine.approve(instance, third, "approved")
+        # 进入下一节点后，收件箱只含新节点的事项
+        self.assertEqual(instance.current_node, self.second)
+        self.assertEqual(set(ApprovalInbox.objects.values_list("node_id", flat=True)), {self.second.pk})
+        self.assertEqual(ApprovalEngine.count_pending_approvals(first), 1)
+        self.assertEqual(ApprovalEngine.count_pending_approvals(self.applicant), 0)
+
+        ApprovalEngine.withdraw(instance, self.applicant)
+        self.assertFalse(ApprovalInbox.objects.exists())
+
+
+class ApprovalTimeoutTests(TestCase):
+    def setUp(self):
+        User = get_user_model()
+        self.applicant = User.objects.create_user(username="applicant", password="pwd123456")
+        self.leader = User.objects.create_user(username="leader", password="pwd123456")
+        self.department = Department.objects.create(name="审核部", code="AUDIT", leader=self.leader)
+        self.approver = User.objects.create_user(username="approver", password="pwd123456", department=self.department)
+        self.workflow = WorkflowTemplate.objects.create(
+            name="超时流程", code="TIMEOUT", status="active", created_by=self.applicant,
+            timeout_hours=24, timeout_action="auto_approve",
+        )
+        self.node = ApprovalNode.objects.create(
+            workflow=self.workflow, name="审批", sequence=1, approver_type="user", timeout_hours=2,
+        )
+        self.node.approver_users.add(self.approver)
+
+    def _start(self):
+        return ApprovalEngine.start_approval(self.workflow, self.department, self.applicant)
+
+    def test_expired_records_are_processed_once(self):
+        instance = self._start()
+        record = ApprovalRecord.objects.get(instance=instance, result="pending")
+        # 节点超时配置优先于流程默认超时
+        self.assertAlmostEqual((record.due_time - record.created_time).total_seconds(), 2 * 3600, delta=1)
+
+        self.assertEqual(process_approval_timeouts(now=record.due_time - timedelta(minutes=1))["processed"], 0)
+        stats = process_approval_timeouts(now=record.due_time + timedelta(minutes=1))
+
+        self.assertEqual((stats["processed"], stats["auto_approved"], stats["failed"]), (1, 1, 0))
+        instance.refresh_from_db()
+        self.assertEqual(instance.status, "approved")
+        self.assertEqual(process_approval_timeouts(now=record.due_time + timedelta(days=1))["processed"], 0)
+
+    def test_rejected_auto_approval_is_counted_as_failed(self):
+        instance = self._start()
+        record = ApprovalRecord.objects.get(instance=instance, result="pending")
+
+        with mock.patch.object(ApprovalEngine, "approve", return_value=False):
+            stats = process_approval_timeouts(now=record.due_time + timedelta(minutes=1))
+
+        self.assertEqual((stats["processed"], stats["auto_approved"], stats["failed"]), (0, 0, 1))
+        record.refresh_from_db()
+        # 未生效的记录保留超时时间，下次运行重新处理
+        self.assertIsNotNone(record.due_time)
+
+    def test_escalate_transfers_to_department_leader(self):
+        WorkflowTemplate.objects.filter(pk=self.workflow.pk).update(timeout_action="escalate")
+        instance = self._start()
+        record = ApprovalRecord.objects.get(instance=instance, result="pending")
+
+        # 只处理一批：模拟时间下转交后的新记录同样已超时
+        stats = process_approval_timeouts(now=record.due_time + timedelta(seconds=1), max_batches=1)
+
+        self.assertEqual(stats["escalated"], 1)
+        self.assertEqual(ApprovalEngine.count_pending_approvals(self.leader), 1)
+        transferred = ApprovalRecord.objects.get(instance=instance, approver=self.leader, result="pending")
+        self.assertIsNotNone(transferred.due_time)
+
+
+class ConditionRoutingTests(TestCase):
+    def test_compiled_conditions(self):
+        contract = SimpleNamespace(
+            contract_amount=Decimal("600000.00"), signed_date=date(2025, 3, 1),
+            client=SimpleNamespace(grade=SimpleNamespace(code="A")), remark=None,
+        )
+        expression = json.dumps({"all": [
+            {"field": "contract_amount", "operator": ">=", "value": 500000},
+            {"field": "client.grade.code", "operator": "in", "value": ["A", "VIP"]},
+            {"field": "signed_date", "operator": "<", "value": "2025-06-30"},
+            {"not": {"field": "remark", "operator": "isnull", "value": False}},
+        ]})
+        self.assertTrue(compile_condition(expression)(contract))
+        self.assertIs(compile_condition(expression), compile_condition(expression))
+
+        contract.contract_amount = Decimal("499999.99")
+        self.assertFalse(compile_condition(expression)(contract))
+        self.assertTrue(compile_condition("")(contract))
+        with self.assertRaises(ConditionError):
+            compile_condition('{"field": "contract_amount", "operator": "~", "value": 1}')
+
+    def test_conditions_do_not_call_methods(self):
+        contract = mock.Mock(status="draft")
+        contract.get_status_display.return_value = "草稿"
+        self.assertTrue(compile_condition('{"field": "get_status_display", "value": "草稿"}')(contract))
+
+        with self.assertRaises(ConditionError):
+            compile_condition('{"field": "delete", "operator": "isnull"}')(contract)
+        contract.delete.assert_not_called()
+        with self.assertRaises(ConditionError):
+            compile_condition('{"field": "client._state.db", "value": "default"}')
+        # 编译失败同样缓存，无效表达式不会每次求值都重新编译
+        with mock.patch.object(conditions, "_compile", wraps=conditions._compile) as compile_tree:
+            for _ in range(2):
+                with self.assertRaises(ConditionError):
+                    compile_condition('{"field": "amount", "operator": "between", "value": 1}')
+        self.assertEqual(compile_tree.call_count, 1)
+
+    def test_nodes_with_unmet_conditions_are_skipped(self):
+        User = get_user_model()
+        applicant = User.objects.create_user(username="applicant", password="pwd123456")
+        approver = User.objects.create_user(username="approver", password="pwd123456")
+        department = Department.objects.create(name="审核部", code="AUDIT")
+        workflow = WorkflowTemplate.objects.create(name="条件流程", code="COND", status="active", created_by=applicant)
+        nodes = [
+            ApprovalNode.objects.create(
+                workflow=workflow, name=name, sequence=sequence, approver_type="user",
+                node_type="condition" if condition else "approval", condition_expression=condition,
+            )
+            for sequence, name, condition in (
+                (1, "仅法务部", '{"field": "code", "operator": "==", "value": "LEGAL"}'),
+                (2, "经理审批", ""),
+                (3, "仅法务部复核", '{"field": "code", "operator": "==", "value": "LEGAL"}'),
+                (4, "审核部复核", '{"field": "code", "operator": "startswith", "value": "AUD"}'),
+            )
+        ]
+        for node in nodes:
+            node.approver_users.add(approver)
+
+        instance = ApprovalEngine.start_approval(workflow, department, applicant)
+        self.assertEqual(instance.current_node, nodes[1])
+        ApprovalEngine.approve(instance, approver, "approved")
+        self.assertEqual(instance.current_node, nodes[3])
+        ApprovalEngine.approve(instance, approver, "approved")
+        self.assertEqual(instance.status, "approved")
@@ -22,3 +22,8 @@ def _patched_register_converter(converter, type_name):
 django.urls.converters.register_converter = _patched_register_converter
 
 
+
+# Celery 应用随 Django 一起加载，shared_task 任务注册到该应用
+from .celery import app as celery_app  # noqa: E402
+
+__all__ = ('celery_app',)
@@ -0,0 +1,15 @@
+"""
+Celery 应用
+
+启动 worker：   celery -A backend.config worker -l info
+启动定时任务：  celery -A backend.config beat -l info（定时任务见 settings.CELERY_BEAT_SCHEDULE）
+"""
+import os
+
+from celery import Celery
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'backend.config.settings')
+
+app = Celery('backend')
+app.config_from_object('django.conf:settings', namespace='CELERY')
+app.autodiscover_tasks()
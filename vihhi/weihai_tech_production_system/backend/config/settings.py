@@ -1,5 +1,6 @@
 import os
 from pathlib import Path
+from celery.schedules import crontab
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -60,6 +61,8 @@ INSTALLED_APPS = [
     'backend.apps.plan_management.apps.PlanManagementConfig',
     # API接口管理模块
     'backend.apps.api_management.apps.ApiManagementConfig',
+    # 核心模块（首页 / 仪表盘缓存失效信号）
+    'backend.core.apps.CoreConfig',
 ]
 
 MIDDLEWARE = [
@@ -232,12 +235,116 @@ else:
         }
     }
 
+# 权限快照缓存有效期（秒），角色/权限变化时通过版本号主动失效
+# 版本号保存在缓存中，只有共享缓存（配置 REDIS_URL）才能让所有 worker 同时失效；
+# 使用进程内缓存（locmem）时其他 worker 感知不到版本号变化，改用下面的短有效期
+PERMISSION_SNAPSHOT_TIMEOUT = int(os.getenv('PERMISSION_SNAPSHOT_TIMEOUT', '3600'))
+# 进程内缓存下的权限快照有效期（秒），即权限回收在其他 worker 上的最长延迟；0 表示不跨请求缓存
+PERMISSION_SNAPSHOT_LOCAL_TIMEOUT = int(os.getenv('PERMISSION_SNAPSHOT_LOCAL_TIMEOUT', '5'))
+
+# 客户自动移入公海：无拜访天数阈值、每批更新的客户数（每批一个短事务）
+PUBLIC_SEA_INACTIVITY_DAYS = int(os.getenv('PUBLIC_SEA_INACTIVITY_DAYS', '90'))
+PUBLIC_SEA_BATCH_SIZE = int(os.getenv('PUBLIC_SEA_BATCH_SIZE', '2000'))
+
+# 总账报表（科目余额表/试算平衡表/资产负债表/利润表）缓存有效期（秒），总账或科目变化时通过版本号主动失效；
+# 版本号只有在共享缓存（REDIS_URL）下才对所有 worker 可见，进程内缓存下改用 LOCAL 有效期（0 表示不缓存）
+LEDGER_REPORT_CACHE_TIMEOUT = int(os.getenv('LEDGER_REPORT_CACHE_TIMEOUT', '3600'))
+LEDGER_REPORT_LOCAL_CACHE_TIMEOUT = int(os.getenv('LEDGER_REPORT_LOCAL_CACHE_TIMEOUT', '5'))
+
+# 凭证批量过账：每块凭证数（每块一个事务、一条总账 upsert）
+VOUCHER_POSTING_CHUNK_SIZE = int(os.getenv('VOUCHER_POSTING_CHUNK_SIZE', '500'))
+
+# 后台导出任务：EAGER（True/1）时在当前请求内同步执行（调试用），每次从数据库读取的行数
+EXPORT_JOB_EAGER = os.getenv('EXPORT_JOB_EAGER', 'False').lower() in ('true', '1')
+EXPORT_JOB_CHUNK_SIZE = int(os.getenv('EXPORT_JOB_CHUNK_SIZE', '2000'))
+
+# 批量导入：每块处理的行数（一次预取关联对象、一次 bulk_create）；不超过 SYNC_MAX_BYTES 的文件在请求内同步导入，
+# 更大的文件转入后台任务（EAGER 为 True/1 时一律同步执行）
+IMPORT_CHUNK_SIZE = int(os.getenv('IMPORT_CHUNK_SIZE', '500'))
+IMPORT_SYNC_MAX_BYTES = int(os.getenv('IMPORT_SYNC_MAX_BYTES', str(512 * 1024)))
+IMPORT_JOB_EAGER = os.getenv('IMPORT_JOB_EAGER', 'False').lower() in ('true', '1')
+
+# 审批超时处理：每批领取的超时待审批记录数（每批一个事务，SKIP LOCKED 领取）
+APPROVAL_TIMEOUT_BATCH_SIZE = int(os.getenv('APPROVAL_TIMEOUT_BATCH_SIZE', '200'))
+
+# 归档任务队列（交付推送、项目自动归档）：EAGER（True/1）时事务提交后在当前请求内处理，否则投递 Celery（未配置时在后台线程处理），
+# 每批领取的任务数、最多执行次数（之后标记为失败）、处理中任务的锁定超时（秒，超时后可被重新领取）
+ARCHIVE_TASK_EAGER = os.getenv('ARCHIVE_TASK_EAGER', 'False').lower() in ('true', '1')
+ARCHIVE_TASK_BATCH_SIZE = int(os.getenv('ARCHIVE_TASK_BATCH_SIZE', '50'))
+ARCHIVE_TASK_MAX_ATTEMPTS = int(os.getenv('ARCHIVE_TASK_MAX_ATTEMPTS', '5'))
+ARCHIVE_TASK_LOCK_TIMEOUT = int(os.getenv('ARCHIVE_TASK_LOCK_TIMEOUT', '600'))
+
+# 项目监控驾驶舱缓存有效期（秒），项目、里程碑、团队成员变化时通过版本号主动失效
+PROJECT_DASHBOARD_CACHE_TIMEOUT = int(os.getenv('PROJECT_DASHBOARD_CACHE_TIMEOUT', '300'))
+
+# 首页 / 仪表盘数据缓存：新鲜期（秒，过后返回旧数据并后台刷新）、旧数据最多返回多久（秒，超过后在请求内重建）、
+# 最长保留时间（秒）
+DASHBOARD_FRESH_SECONDS = int(os.getenv('DASHBOARD_FRESH_SECONDS', '60'))
+DASHBOARD_MAX_STALE_SECONDS = int(os.getenv('DASHBOARD_MAX_STALE_SECONDS', '300'))
+DASHBOARD_CACHE_TIMEOUT = int(os.getenv('DASHBOARD_CACHE_TIMEOUT', '3600'))
+
+# 外部 API（启信宝等）：每个外部系统的 HTTP 连接池大小；启信宝未单独设置有效期的接口的响应缓存时间（秒）
+EXTERNAL_API_POOL_SIZE = int(os.getenv('EXTERNAL_API_POOL_SIZE', '10'))
+QIXINBAO_CACHE_TIMEOUT = int(os.getenv('QIXINBAO_CACHE_TIMEOUT', '86400'))
+
+# 被执行记录批量同步：并发线程数、每秒最多调用启信宝次数、每批客户数（每批一个事务和检查点）、检查点文件目录（默认系统临时目录）
+RECORD_SYNC_WORKERS = int(os.getenv('RECORD_SYNC_WORKERS', '8'))
+RECORD_SYNC_RATE_LIMIT = float(os.getenv('RECORD_SYNC_RATE_LIMIT', '10'))
+RECORD_SYNC_BATCH_SIZE = int(os.getenv('RECORD_SYNC_BATCH_SIZE', '200'))
+RECORD_SYNC_CHECKPOINT_DIR = os.getenv('RECORD_SYNC_CHECKPOINT_DIR', '')
+
+# 高德地图：逆地理编码结果缓存时间（秒）；地理编码缓存表中解析失败的地址多少天后重新查询
+AMAP_REGEOCODE_CACHE_TIMEOUT = int(os.getenv('AMAP_REGEOCODE_CACHE_TIMEOUT', str(30 * 24 * 3600)))
+GEOCODE_NEGATIVE_CACHE_DAYS = int(os.getenv('GEOCODE_NEGATIVE_CACHE_DAYS', '7'))
+
+# OCR 进程池（合同/发票识别）：工作进程数（0 表示在当前进程内识别）、排队任务上限（0 表示工作进程数的 4 倍）、
+# 排队等待超时（秒）、单个文件识别超时（秒）、PDF 渲染分辨率、识别结果按文件哈希缓存的时间（秒）
+OCR_POOL_WORKERS = int(os.getenv('OCR_POOL_WORKERS', '2'))
+OCR_POOL_MAX_PENDING = int(os.getenv('OCR_POOL_MAX_PENDING', '0'))
+OCR_POOL_QUEUE_TIMEOUT = int(os.getenv('OCR_POOL_QUEUE_TIMEOUT', '30'))
+OCR_TIMEOUT = int(os.getenv('OCR_TIMEOUT', '300'))
+OCR_PDF_DPI = int(os.getenv('OCR_PDF_DPI', '300'))
+OCR_CACHE_TIMEOUT = int(os.getenv('OCR_CACHE_TIMEOUT', str(7 * 24 * 3600)))
+
+# 合同识别（DeepSeek）：EAGER（True/1）时在上传请求内识别（调试用），
+# 发送给接口的合同文本上限（字，超过时只保留开头、落款和包含字段的段落）、接口超时（秒）
+CONTRACT_RECOGNITION_EAGER = os.getenv('CONTRACT_RECOGNITION_EAGER', 'False').lower() in ('true', '1')
+CONTRACT_RECOGNITION_MAX_CHARS = int(os.getenv('CONTRACT_RECOGNITION_MAX_CHARS', '8000'))
+CONTRACT_RECOGNITION_TIMEOUT = int(os.getenv('CONTRACT_RECOGNITION_TIMEOUT', '120'))
+
 # Internationalization
 LANGUAGE_CODE = 'zh-hans'
 TIME_ZONE = 'Asia/Shanghai'
 USE_I18N = True
 USE_TZ = True
 
+# Celery：消息队列地址（默认与缓存共用 REDIS_URL）。未配置时后台任务在 Web 进程的后台线程中执行，定时任务不会运行，
+# 需另行运行对应的管理命令（如 process_archive_tasks --loop、process_approval_timeouts）。
+# 启动 worker：celery -A backend.config worker -l info；启动定时任务：celery -A backend.config beat -l info
+CELERY_BROKER_URL = os.getenv('CELERY_BROKER_URL', REDIS_URL)
+CELERY_TIMEZONE = TIME_ZONE
+CELERY_TASK_IGNORE_RESULT = True
+# 不在 tasks.py 中定义的任务模块
+CELERY_IMPORTS = ('backend.core.dashboard',)
+CELERY_BEAT_SCHEDULE = {
+    'process-archive-tasks': {
+        'task': 'backend.apps.archive_management.tasks.process_archive_tasks',
+        'schedule': 60.0,
+    },
+    'process-approval-timeouts': {
+        'task': 'backend.apps.workflow_engine.tasks.process_approval_timeouts',
+        'schedule': 300.0,
+    },
+    'auto-move-clients-to-public-sea': {
+        'task': 'backend.apps.customer_management.tasks.auto_move_clients_to_public_sea',
+        'schedule': crontab(hour=2, minute=0),
+    },
+    'reconcile-client-stats-snapshots': {
+        'task': 'backend.apps.customer_management.tasks.reconcile_client_stats_snapshots',
+        'schedule': crontab(hour=3, minute=0),
+    },
+}
+
 # Static files (CSS, JavaScript, Images)
 STATIC_URL = '/static/'
 STATIC_ROOT = BASE_DIR / 'staticfiles'
@@ -9,9 +9,12 @@ from django.utils.html import format_html
 from django.urls import reverse
 from django.contrib import messages
 from django.utils import timezone
+from django.core.exceptions import FieldDoesNotExist
 from django.db.models import QuerySet
-from django.http import HttpResponse
-import csv
+from django.utils.html import strip_tags
+from functools import partial
+
+from backend.utils.export_utils import Column, ExportTable, csv_response
 
 
 class BaseAdminMixin:
@@ -292,6 +295,14 @@ class LinkAdminMixin(BaseAdminMixin):
         return reverse(f'admin:{app_label}_{model_name}_{view_name}', args=args, kwargs=kwargs)
 
 
+def _admin_cell(method, obj):
+    """调用 Admin 列方法，HTML 结果只保留文本"""
+    value = method(obj)
+    if hasattr(value, '__html__'):
+        value = strip_tags(str(value))
+    return '' if value is None else str(value)
+
+
 class ExportMixin(BaseAdminMixin):
     """
     数据导出混入，提供CSV导出功能
@@ -310,56 +321,32 @@ class ExportMixin(BaseAdminMixin):
             return [f for f in self.list_display if not callable(getattr(self, f, None))]
         return []
     
-    def export_as_csv(self, request, queryset):
-        """导出为CSV"""
+    def get_export_table(self):
+        """按导出字段生成导出列：Admin 方法取 short_description 作表头，模型字段取 verbose_name"""
         meta = self.model._meta
-        field_names = self.get_export_fields()
-        
-        response = HttpResponse(content_type='text/csv; charset=utf-8-sig')
-        filename_prefix = self.export_filename_prefix or meta.verbose_name
-        response['Content-Disposition'] = f'attachment; filename="{filename_prefix}_{timezone.now().strftime("%Y%m%d_%H%M%S")}.csv"'
-        
-        writer = csv.writer(response)
-        
-        # 写入表头
-        headers = []
-        for field_name in field_names:
-            if hasattr(self, field_name):
-                # 如果是方法，使用short_description
+        columns = []
+        for field_name in self.get_export_fields():
+            if field_name == '__str__':
+                columns.append(Column(str(meta.verbose_name), value=str))
+            elif hasattr(self, field_name):
                 method = getattr(self, field_name)
-                if hasattr(method, 'short_description'):
-                    headers.append(method.short_description)
-                else:
-                    headers.append(field_name)
+                header = getattr(method, 'short_description', field_name)
+                columns.append(Column(str(header), value=partial(_admin_cell, method)))
             else:
-                # 尝试获取字段的verbose_name
                 try:
-                    field = meta.get_field(field_name)
-                    headers.append(field.verbose_name or field_name)
-                except:
-                    headers.append(field_name)
-        writer.writerow(headers)
-        
-        # 写入数据
-        for obj in queryset:
-            row = []
-            for field_name in field_names:
-                if hasattr(self, field_name):
-                    # 如果是方法，调用它
-                    method = getattr(self, field_name)
-                    value = method(obj)
-                    # 如果是HTML，提取文本
-                    if hasattr(value, '__html__'):
-                        from django.utils.html import strip_tags
-                        value = strip_tags(str(value))
-                    row.append(str(value) if value is not None else '')
-                else:
-                    # 直接获取字段值
-                    value = getattr(obj, field_name, '')
-                    row.append(str(value) if value is not None else '')
-            writer.writerow(row)
-        
-        return response
+                    header = meta.get_field(field_name).verbose_name or field_name
+                except FieldDoesNotExist:
+                    header = field_name
+                columns.append(Column(str(header), field_name))
+        return ExportTable(columns)
+    
+    def export_as_csv(self, request, queryset):
+        """导出为CSV（流式输出，外键按导出字段和 list_select_related 预取）"""
+        if isinstance(self.list_select_related, (list, tuple)) and self.list_select_related:
+            queryset = queryset.select_related(*self.list_select_related)
+        table = self.get_export_table()
+        filename_prefix = self.export_filename_prefix or self.model._meta.verbose_name
+        return csv_response(str(filename_prefix), table.headers, table.rows(queryset))
     
     export_as_csv.short_description = '导出选中项为CSV'
     
@@ -0,0 +1,11 @@
+from django.apps import AppConfig
+
+
+class CoreConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'backend.core'
+    verbose_name = '核心'
+
+    def ready(self):
+        """应用启动时注册信号处理器"""
+        import backend.core.signals  # noqa  首页 / 仪表盘缓存失效
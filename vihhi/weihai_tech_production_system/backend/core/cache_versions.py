@@ -0,0 +1,59 @@
+"""按版本号失效的缓存：版本号计数器和带版本号的缓存键"""
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+# 不在进程间共享数据的缓存后端
+PROCESS_LOCAL_CACHE_BACKENDS = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+
+
+def is_shared_cache() -> bool:
+    """默认缓存是否在各 worker 之间共享（Redis、Memcached、数据库等）"""
+    backend = settings.CACHES.get('default', {}).get('BACKEND', '')
+    return backend not in PROCESS_LOCAL_CACHE_BACKENDS
+
+
+def cache_timeout(timeout: int, local_timeout: int) -> int:
+    """
+    按缓存后端选择按版本号失效的缓存的有效期
+
+    版本号同样存放在缓存中，共享缓存下版本号升级对所有 worker 立即可见，使用 timeout；
+    进程内缓存下其他 worker 感知不到版本号变化，只能等缓存过期，使用很短的 local_timeout（0 表示不缓存）。
+    """
+    return timeout if is_shared_cache() else local_timeout
+
+
+def _initial_version() -> int:
+    # 以当前纳秒时间戳作为初始值：版本号被清空或淘汰后重新初始化，也不会与残留的旧缓存键重复
+    return time.time_ns()
+
+
+def get_version(key: str) -> int:
+    """读取版本号，不存在时初始化"""
+    version = cache.get(key)
+    if version is None:
+        initial = _initial_version()
+        cache.add(key, initial, None)
+        version = cache.get(key, initial)
+    return version
+
+
+def bump_version(key: str) -> int:
+    """升级版本号，使以该版本号构造的缓存键全部失效"""
+    try:
+        return cache.incr(key)
+    except ValueError:
+        # 版本号不存在（缓存被清空或已淘汰），重新初始化
+        version = _initial_version()
+        cache.set(key, version, None)
+        return version
+
+
+def versioned_cache_key(prefix: str, *version_keys: str) -> str:
+    """在缓存键后加上各版本号，任一版本号升级后旧键自然失效"""
+    versions = '.'.join(str(get_version(key)) for key in version_keys)
+    return f'{prefix}:v{versions}'
@@ -0,0 +1,281 @@
+"""
+首页 / 仪表盘数据聚合
+收集并缓存首页、仪表盘统计和待办的数据
+"""
+import copy
+import logging
+import time
+from typing import Iterable, Optional
+
+from celery import shared_task
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Q
+from django.urls import NoReverseMatch, reverse
+from django.utils import timezone
+
+from backend.core.cache_versions import bump_version, get_version
+from backend.core.task_dispatch import dispatch_task
+
+logger = logging.getLogger(__name__)
+
+# 缓存数据在此时间内视为新鲜，之后返回旧数据并后台刷新
+DASHBOARD_FRESH_SECONDS = getattr(settings, 'DASHBOARD_FRESH_SECONDS', 60)
+# 缓存最长保留时间（旧数据最多可被返回这么久）
+DASHBOARD_CACHE_TIMEOUT = getattr(settings, 'DASHBOARD_CACHE_TIMEOUT', 3600)
+# 旧数据最多返回这么久（秒），后台刷新一直没有完成（如有消息队列但没有 worker）时在请求内重建
+DASHBOARD_MAX_STALE_SECONDS = getattr(settings, 'DASHBOARD_MAX_STALE_SECONDS', 300)
+# 后台刷新互斥锁的有效期（秒）
+DASHBOARD_REFRESH_LOCK_TIMEOUT = 60
+
+ACTIVE_PROJECT_STATUSES = ('in_progress', 'planning')
+PENDING_DELIVERY_STATUSES = ('pending_approval', 'approving')
+GLOBAL_VERSION_KEY = 'home_dashboard:version:global'
+
+
+def _user_version_key(user_id) -> str:
+    return f'home_dashboard:version:user:{user_id}'
+
+
+def _data_key(user_id) -> str:
+    return f'home_dashboard:user:{user_id}'
+
+
+def _refresh_lock_key(user_id) -> str:
+    return f'home_dashboard:refreshing:{user_id}'
+
+
+def invalidate_user_dashboards(user_ids: Iterable[Optional[int]]) -> None:
+    """这些用户的任务、审批、事务等数据变化时调用，下次访问首页时重新计算"""
+    for user_id in {user_id for user_id in user_ids if user_id}:
+        bump_version(_user_version_key(user_id))
+
+
+def invalidate_global_dashboard() -> None:
+    """全局计数（项目、交付）变化时调用，各用户的缓存在下次访问时后台刷新"""
+    bump_version(GLOBAL_VERSION_KEY)
+
+
+# ==================== 组件 ====================
+
+def serialize_home_task(task) -> dict:
+    """序列化任务对象为首页显示格式"""
+    try:
+        project = getattr(task, 'project', None)
+        project_number = getattr(project, 'project_number', '') if project else ''
+        project_name = getattr(project, 'name', '关联项目') if project else '关联项目'
+
+        # 根据任务类型设置跳转URL
+        url = '#'
+        if project:
+            try:
+                task_type = getattr(task, 'task_type', None)
+                if task_type == 'project_complete_info':
+                    # 完善项目信息 -> 跳转到项目信息完善页面
+                    url = reverse('production_pages:project_complete', args=[project.id])
+                elif task_type == 'configure_team':
+                    # 配置项目团队 -> 跳转到团队配置页面
+                    url = reverse('production_pages:project_team', args=[project.id])
+                else:
+                    # 其他任务 -> 跳转到项目详情页面
+                    url = reverse('production_pages:project_detail', args=[project.id])
+            except (NoReverseMatch, AttributeError):
+                url = '#'
+
+        return {
+            'id': getattr(task, 'id', None),
+            'title': getattr(task, 'title', ''),
+            'project_name': project_name,
+            'project_number': project_number,
+            'status': getattr(task, 'status', 'pending'),
+            'status_label': getattr(task, 'get_status_display', lambda: '')() if hasattr(task, 'get_status_display') else '',
+            'due_time': getattr(task, 'due_time', None),
+            'completed_time': getattr(task, 'completed_time', None),
+            'description': getattr(task, 'description', ''),
+            'url': url,
+        }
+    except Exception as e:
+        logger.warning(f'序列化任务失败: {e}', exc_info=True)
+        # 返回一个基本的任务信息
+        return {
+            'id': getattr(task, 'id', None),
+            'title': getattr(task, 'title', '未知任务'),
+            'project_name': '未知项目',
+            'project_number': '',
+            'status': 'pending',
+            'status_label': '',
+            'due_time': None,
+            'completed_time': None,
+            'description': '',
+            'url': '#',
+        }
+
+
+def _task_widgets(user) -> dict:
+    from backend.apps.production_management.models import ProjectTask
+
+    now = timezone.now()
+    user_tasks = ProjectTask.objects.filter(Q(assigned_to=user) | Q(created_by=user))
+    open_tasks = user_tasks.exclude(status='completed')
+    counts = open_tasks.aggregate(
+        personal=Count('id'),
+        due_today=Count('id', filter=Q(due_time__date=timezone.localdate())),
+        overdue=Count('id', filter=Q(due_time__lt=now)),
+    )
+    board_tasks = user_tasks.select_related('project')
+    return {
+        'pending_counts': counts,
+        'task_board': {
+            'pending': [serialize_home_task(task) for task in board_tasks.filter(status='pending')[:10]],
+            'in_progress': [serialize_home_task(task) for task in board_tasks.filter(status='in_progress')[:10]],
+            'completed': [
+                serialize_home_task(task)
+                for task in board_tasks.filter(status='completed').order_by('-completed_time')[:10]
+            ],
+        },
+    }
+
+
+def _project_widgets(user) -> dict:
+    from backend.apps.production_management.models import Project
+
+    month_start = timezone.localtime().replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+    return Project.objects.aggregate(
+        active=Count('id', filter=Q(status__in=ACTIVE_PROJECT_STATUSES)),
+        my_active=Count('id', filter=Q(status__in=ACTIVE_PROJECT_STATUSES, project_manager=user)),
+        completed_this_month=Count('id', filter=Q(status='completed', updated_time__gte=month_start)),
+    )
+
+
+def _approval_widgets(user) -> dict:
+    from backend.apps.workflow_engine.models import ApprovalInstance
+    from backend.apps.workflow_engine.services import ApprovalEngine
+
+    pending = ApprovalEngine.get_pending_approvals(user).select_related('workflow')[:5]
+    return {
+        'approval_stats': {
+            'my_pending': ApprovalEngine.count_pending_approvals(user),
+            'my_submitted': ApprovalInstance.objects.filter(applicant=user).count(),
+        },
+        'approval_todos': [
+            {
+                'id': approval.id,
+                'instance_number': approval.instance_number,
+                'workflow_name': approval.workflow.name if approval.workflow else '审批流程',
+                'apply_time': approval.apply_time,
+            }
+            for approval in pending
+        ],
+    }
+
+
+def _affair_widgets(user) -> dict:
+    from backend.apps.administrative_management.models import AdministrativeAffair
+
+    affairs = AdministrativeAffair.objects.filter(status='pending', responsible_user=user)
+    return {
+        'pending_affairs': affairs.count(),
+        'affair_todos': [
+            {
+                'id': affair.id,
+                'title': affair.title,
+                'content': affair.content,
+                'priority': affair.priority,
+                'created_time': affair.created_time,
+            }
+            for affair in affairs.only('id', 'title', 'content', 'priority', 'created_time')[:3]
+        ],
+    }
+
+
+def _delivery_widgets(user) -> dict:
+    from backend.apps.delivery_customer.models import DeliveryRecord
+
+    return {
+        'delivery_stats': {
+            'pending': DeliveryRecord.objects.filter(status__in=PENDING_DELIVERY_STATUSES).count(),
+        },
+    }
+
+
+EMPTY_DASHBOARD = {
+    'pending_counts': {'personal': 0, 'due_today': 0, 'overdue': 0},
+    'task_board': {'pending': [], 'in_progress': [], 'completed': []},
+    'projects': {'active': 0, 'my_active': 0, 'completed_this_month': 0},
+    'approval_stats': {'my_pending': 0, 'my_submitted': 0},
+    'approval_todos': [],
+    'pending_affairs': 0,
+    'affair_todos': [],
+    'delivery_stats': {'pending': 0},
+}
+
+
+def collect_user_dashboard(user) -> dict:
+    """一次收集首页全部组件的数据；某个组件出错时该组件取默认值，不影响其它组件"""
+    data = copy.deepcopy(EMPTY_DASHBOARD)
+    widgets = (
+        ('任务', _task_widgets),
+        ('项目', lambda u: {'projects': _project_widgets(u)}),
+        ('审批', _approval_widgets),
+        ('行政事务', _affair_widgets),
+        ('交付', _delivery_widgets),
+    )
+    for label, collect in widgets:
+        try:
+            data.update(collect(user))
+        except Exception as exc:
+            logger.exception('获取首页%s数据失败: %s', label, exc)
+    return data
+
+
+# ==================== 缓存 ====================
+
+def _build_and_store(user) -> dict:
+    # 先取版本号再计算：计算期间数据变化时版本号已升级，下次读取会识别为失效
+    user_version = get_version(_user_version_key(user.pk))
+    global_version = get_version(GLOBAL_VERSION_KEY)
+    data = collect_user_dashboard(user)
+    cache.set(_data_key(user.pk), {
+        'data': data,
+        'built_at': time.time(),
+        'user_version': user_version,
+        'global_version': global_version,
+    }, DASHBOARD_CACHE_TIMEOUT)
+    return data
+
+
+def _schedule_refresh(user_id) -> None:
+    if not cache.add(_refresh_lock_key(user_id), 1, DASHBOARD_REFRESH_LOCK_TIMEOUT):
+        return
+    dispatch_task(refresh_user_dashboard, user_id)
+
+
+def get_user_dashboard(user) -> dict:
+    """
+    首页 / 仪表盘数据（共享缓存，stale-while-revalidate）
+
+    返回的字典为缓存中的数据，调用方不要原地修改。
+    """
+    entry = cache.get(_data_key(user.pk))
+    if entry is None or entry['user_version'] != get_version(_user_version_key(user.pk)):
+        return _build_and_store(user)
+    age = time.time() - entry['built_at']
+    if age >= DASHBOARD_MAX_STALE_SECONDS:
+        return _build_and_store(user)
+    is_fresh = entry['global_version'] == get_version(GLOBAL_VERSION_KEY) and age < DASHBOARD_FRESH_SECONDS
+    if not is_fresh:
+        _schedule_refresh(user.pk)
+    return entry['data']
+
+
+@shared_task
+def refresh_user_dashboard(user_id):
+    """后台刷新用户的首页数据缓存"""
+    from backend.apps.system_management.models import User
+
+    try:
+        user = User.objects.filter(pk=user_id, is_active=True).first()
+        if user is not None:
+            _build_and_store(user)
+    finally:
+        cache.delete(_refresh_lock_key(user_id))
@@ -0,0 +1,301 @@
+"""
+通用分页
+
+列表默认使用 Django ``Paginator`` / DRF ``PageNumberPagination``（页码分页），
+每次翻页都要对过滤后的查询集执行 ``COUNT(*)``，并用 ``OFFSET`` 跳过前面的行，页码越大越慢。
+
+请求带 ``?pagination=keyset`` 时切换为游标分页：
+- 按 ``(-created_time, -id)`` 排序，游标记录上一页边界行的 (created_time, id)，
+  下一页条件为 ``(created_time, id) < 边界``，任意深度的翻页代价与第一页相同
+- 总数改为近似值：无过滤条件时读 ``pg_class.reltuples``，有过滤条件时取执行计划的行数估计
+"""
+import base64
+import json
+import math
+from collections import OrderedDict
+from datetime import datetime
+from typing import Optional, Tuple
+
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import Q
+from django.http import QueryDict
+from django.utils.functional import cached_property
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+PAGINATION_PARAM = 'pagination'
+KEYSET_MODE = 'keyset'
+CURSOR_PARAM = 'cursor'
+PAGE_PARAM = 'page'
+
+DIRECTION_NEXT = 'n'
+DIRECTION_PREVIOUS = 'p'
+
+
+class InvalidCursor(ValueError):
+    """游标无法解析"""
+
+
+def is_keyset_request(request) -> bool:
+    params = getattr(request, 'query_params', None) or request.GET
+    return params.get(PAGINATION_PARAM) == KEYSET_MODE
+
+
+# ==================== 游标编码 ====================
+
+def encode_cursor(created_time: datetime, pk, direction: str, number: int) -> str:
+    payload = {'t': created_time.isoformat(), 'i': pk, 'd': direction, 'n': number}
+    raw = json.dumps(payload, separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_cursor(value: str) -> Tuple[datetime, int, str, int]:
+    """解析游标，返回 (created_time, id, 方向, 页序号)"""
+    try:
+        raw = base64.urlsafe_b64decode(value + '=' * (-len(value) % 4))
+        payload = json.loads(raw.decode('utf-8'))
+        direction = payload['d']
+        if direction not in (DIRECTION_NEXT, DIRECTION_PREVIOUS):
+            raise ValueError(direction)
+        return (
+            datetime.fromisoformat(payload['t']),
+            int(payload['i']),
+            direction,
+            max(int(payload.get('n', 1)), 1),
+        )
+    except (TypeError, ValueError, KeyError, UnicodeDecodeError) as exc:
+        raise InvalidCursor(str(exc)) from exc
+
+
+# ==================== 近似总数 ====================
+
+def estimate_count(queryset) -> int:
+    """
+    返回查询集的近似总数
+
+    - PostgreSQL 且无过滤条件：读取 ``pg_class.reltuples``（表统计信息，O(1)）
+    - PostgreSQL 且有过滤条件：取 ``EXPLAIN`` 顶层节点的行数估计
+    - 其他数据库或统计信息不可用：回退为精确 ``count()``
+    """
+    connection = connections[queryset.db]
+    if connection.vendor != 'postgresql':
+        return queryset.count()
+
+    query = queryset.query
+    if not query.where and not query.distinct:
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass',
+                [queryset.model._meta.db_table],
+            )
+            row = cursor.fetchone()
+        # 从未 ANALYZE 过的表 reltuples 为 -1（PG14+）或 0
+        if row and row[0] > 0:
+            return int(row[0])
+
+    try:
+        plan = json.loads(queryset.order_by().explain(format='json'))
+        rows = int(plan[0]['Plan']['Plan Rows'])
+    except (ValueError, KeyError, IndexError, TypeError):
+        return queryset.count()
+    return rows
+
+
+# ==================== 游标分页 ====================
+
+class KeysetPage:
+    """
+    游标分页的一页
+
+    与 ``django.core.paginator.Page`` 保持模板常用的接口（迭代、has_next、number、paginator 等），
+    页码相关的链接改为 ``next_query`` / ``previous_query``（已携带其余查询参数）。
+    """
+
+    is_keyset = True
+
+    def __init__(self, object_list, paginator, number, has_next, has_previous, query_params=None):
+        self.object_list = object_list
+        self.paginator = paginator
+        self.number = number
+        self._has_next = has_next
+        self._has_previous = has_previous
+        self._query_params = query_params
+
+    def __repr__(self):
+        return f'<KeysetPage {self.number}>'
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def has_next(self) -> bool:
+        return self._has_next
+
+    def has_previous(self) -> bool:
+        return self._has_previous
+
+    def has_other_pages(self) -> bool:
+        return self._has_next or self._has_previous
+
+    def _boundary_cursor(self, obj, direction: str, number: int) -> str:
+        return encode_cursor(getattr(obj, self.paginator.time_field), obj.pk, direction, number)
+
+    @property
+    def next_cursor(self) -> Optional[str]:
+        if not self._has_next or not self.object_list:
+            return None
+        return self._boundary_cursor(self.object_list[-1], DIRECTION_NEXT, self.number + 1)
+
+    @property
+    def previous_cursor(self) -> Optional[str]:
+        if not self._has_previous or not self.object_list:
+            return None
+        return self._boundary_cursor(self.object_list[0], DIRECTION_PREVIOUS, max(self.number - 1, 1))
+
+    def _query(self, cursor: Optional[str]) -> str:
+        params = self._query_params.copy() if self._query_params is not None else QueryDict(mutable=True)
+        params.pop(PAGE_PARAM, None)
+        params.pop(CURSOR_PARAM, None)
+        params[PAGINATION_PARAM] = KEYSET_MODE
+        if cursor:
+            params[CURSOR_PARAM] = cursor
+        return params.urlencode()
+
+    @property
+    def first_query(self) -> str:
+        return self._query(None)
+
+    @property
+    def next_query(self) -> str:
+        return self._query(self.next_cursor)
+
+    @property
+    def previous_query(self) -> str:
+        # 回到第 1 页时不带游标，保证“首页”链接与直接访问一致
+        if self.number <= 2:
+            return self.first_query
+        return self._query(self.previous_cursor)
+
+
+class KeysetPaginator:
+    """
+    按 ``(-created_time, -id)`` 的游标分页器
+
+    查询集原有的排序会被替换；每页只取 ``per_page + 1`` 行判断是否还有下一页，
+    总数（``count``）为近似值且只在访问时计算。
+    """
+
+    def __init__(self, queryset, per_page, time_field: str = 'created_time'):
+        self.time_field = time_field
+        self.per_page = int(per_page)
+        self.queryset = queryset
+
+    @cached_property
+    def count(self) -> int:
+        return estimate_count(self.queryset)
+
+    @property
+    def num_pages(self) -> int:
+        return max(math.ceil(self.count / self.per_page), 1) if self.per_page else 1
+
+    @property
+    def page_range(self):
+        return range(1, self.num_pages + 1)
+
+    def _seek(self, created_time, pk, direction):
+        field = self.time_field
+        if direction == DIRECTION_NEXT:
+            # created_time <= t 让 (created_time, id) 索引可以直接定位起点
+            condition = Q(**{f'{field}__lte': created_time}) & (
+                Q(**{f'{field}__lt': created_time}) | Q(pk__lt=pk)
+            )
+            return self.queryset.filter(condition).order_by(f'-{field}', '-pk')
+        condition = Q(**{f'{field}__gte': created_time}) & (
+            Q(**{f'{field}__gt': created_time}) | Q(pk__gt=pk)
+        )
+        return self.queryset.filter(condition).order_by(field, 'pk')
+
+    def page(self, cursor: Optional[str] = None, query_params=None) -> KeysetPage:
+        """返回游标对应的一页；游标非法时抛出 InvalidCursor"""
+        limit = self.per_page + 1
+        if not cursor:
+            rows = list(self.queryset.order_by(f'-{self.time_field}', '-pk')[:limit])
+            return KeysetPage(rows[:self.per_page], self, 1, len(rows) > self.per_page, False, query_params)
+
+        created_time, pk, direction, number = decode_cursor(cursor)
+        rows = list(self._seek(created_time, pk, direction)[:limit])
+        has_more = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+        if direction == DIRECTION_NEXT:
+            return KeysetPage(rows, self, number, has_more, True, query_params)
+        rows.reverse()
+        return KeysetPage(rows, self, number, True, has_more, query_params)
+
+    def get_page(self, cursor: Optional[str] = None, query_params=None) -> KeysetPage:
+        """与 Paginator.get_page 一致：游标非法时返回第一页"""
+        try:
+            return self.page(cursor, query_params)
+        except InvalidCursor:
+            return self.page(None, query_params)
+
+
+def paginate_queryset(request, queryset, per_page):
+    """
+    页面视图分页入口
+
+    ``?pagination=keyset`` 时返回 KeysetPage，否则保持原有的 ``Paginator.get_page``。
+    """
+    if is_keyset_request(request):
+        return KeysetPaginator(queryset, per_page).get_page(request.GET.get(CURSOR_PARAM), request.GET)
+    return Paginator(queryset, per_page).get_page(request.GET.get(PAGE_PARAM, 1))
+
+
+class KeysetPagination(PageNumberPagination):
+    """
+    DRF 分页类：默认页码分页，``?pagination=keyset`` 时改用游标分页
+
+    游标模式响应结构与页码分页一致（count / next / previous / results），count 为近似值。
+    """
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.keyset_page = None
+        if not is_keyset_request(request):
+            return super().paginate_queryset(queryset, request, view)
+
+        page_size = self.get_page_size(request)
+        if not page_size:
+            return None
+        self.request = request
+        self.display_page_controls = False
+        try:
+            self.keyset_page = KeysetPaginator(queryset, page_size).page(
+                request.query_params.get(CURSOR_PARAM), request.query_params
+            )
+        except InvalidCursor:
+            raise NotFound('无效的分页游标')
+        return list(self.keyset_page)
+
+    def _keyset_link(self, cursor: Optional[str]) -> Optional[str]:
+        if not cursor:
+            return None
+        url = remove_query_param(self.request.build_absolute_uri(), self.page_query_param)
+        return replace_query_param(url, CURSOR_PARAM, cursor)
+
+    def get_paginated_response(self, data):
+        if getattr(self, 'keyset_page', None) is None:
+            return super().get_paginated_response(data)
+        page = self.keyset_page
+        return Response(OrderedDict([
+            ('count', page.paginator.count),
+            ('next', self._keyset_link(page.next_cursor)),
+            ('previous', self._keyset_link(page.previous_cursor)),
+            ('results', data),
+        ]))
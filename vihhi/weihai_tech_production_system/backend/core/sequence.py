@@ -0,0 +1,161 @@
+"""
+单据编号序列服务
+为各模块生成、预留连续的单据编号
+"""
+from typing import Callable, Iterable, List, Optional, Sequence, Tuple
+
+from django.db import transaction
+from django.utils import timezone
+
+Source = Tuple[object, str]
+
+
+def _sequence_model():
+    from backend.apps.system_management.models import DocumentSequence
+    return DocumentSequence
+
+
+# ==================== 计数器 ====================
+
+def reserve_values(name: str, period: str = '', count: int = 1, seed: Optional[Callable[[], int]] = None) -> range:
+    """
+    预留 count 个连续序号并返回 range
+
+    seed 只在计数器不存在时调用一次，返回已有数据中的最大序号。
+    调用方处于事务中时，计数器行锁会持有到事务结束，同一编号空间的并发取号依次进行。
+    """
+    if count < 1:
+        raise ValueError('count 必须大于 0')
+    DocumentSequence = _sequence_model()
+    with transaction.atomic():
+        counter = DocumentSequence.objects.select_for_update().filter(name=name, period=period).first()
+        if counter is None:
+            DocumentSequence.objects.get_or_create(
+                name=name, period=period, defaults={'last_value': seed() if seed else 0}
+            )
+            counter = DocumentSequence.objects.select_for_update().get(name=name, period=period)
+        start = counter.last_value + 1
+        counter.last_value += count
+        DocumentSequence.objects.filter(pk=counter.pk).update(
+            last_value=counter.last_value, updated_time=timezone.now()
+        )
+    return range(start, start + count)
+
+
+def next_value(name: str, period: str = '', seed: Optional[Callable[[], int]] = None) -> int:
+    """取下一个序号"""
+    return reserve_values(name, period, 1, seed)[0]
+
+
+def peek_value(name: str, period: str = '', seed: Optional[Callable[[], int]] = None) -> int:
+    """预览下一个序号（不占用，不加锁）"""
+    current = _sequence_model().objects.filter(name=name, period=period).values_list('last_value', flat=True).first()
+    if current is None:
+        current = seed() if seed else 0
+    return current + 1
+
+
+def advance_to(name: str, period: str, value: int, seed: Optional[Callable[[], int]] = None) -> None:
+    """确保计数器不小于 value（手工指定编号后调用）"""
+    DocumentSequence = _sequence_model()
+    with transaction.atomic():
+        if not DocumentSequence.objects.filter(name=name, period=period).exists():
+            DocumentSequence.objects.get_or_create(
+                name=name, period=period, defaults={'last_value': max(value, seed() if seed else 0)}
+            )
+        DocumentSequence.objects.filter(name=name, period=period, last_value__lt=value).update(
+            last_value=value, updated_time=timezone.now()
+        )
+
+
+# ==================== 单据编号 ====================
+
+def number_prefix(prefix: str, period: str = '', separator: str = '-') -> str:
+    """编号中序号之前的部分，如 ('VOUCHER', '2025') -> 'VOUCHER-2025-'"""
+    return separator.join(part for part in (prefix, period) if part) + separator
+
+
+def sequence_name(queryset, field: str, prefix: str) -> str:
+    """编号空间名称：模型 + 字段 + 前缀"""
+    return f'{queryset.model._meta.label_lower}.{field}:{prefix}'
+
+
+def max_existing_sequence(full_prefix: str, sources: Iterable[Source]) -> int:
+    """已有编号中 full_prefix 之后的最大数字序号（仅在计数器初始化时调用）"""
+    max_seq = 0
+    for queryset, field in sources:
+        values = queryset.filter(**{f'{field}__startswith': full_prefix}).values_list(field, flat=True)
+        for value in values.iterator():
+            suffix = (value or '')[len(full_prefix):]
+            if suffix.isdigit():
+                max_seq = max(max_seq, int(suffix))
+    return max_seq
+
+
+def _number_args(queryset, field, prefix, period, separator, sources):
+    full_prefix = number_prefix(prefix, period, separator)
+    sources = list(sources) if sources else [(queryset, field)]
+    # 多个模型共用编号空间时，以第一个来源命名，各调用处传入相同顺序的 sources
+    name = sequence_name(sources[0][0], sources[0][1], prefix)
+    return name, full_prefix, (lambda: max_existing_sequence(full_prefix, sources))
+
+
+def next_document_number(
+    queryset,
+    field: str,
+    prefix: str,
+    period: str = '',
+    width: int = 4,
+    separator: str = '-',
+    sources: Optional[Sequence[Source]] = None,
+) -> str:
+    """
+    生成下一个单据编号：``{prefix}{sep}{period}{sep}{序号}``
+
+    queryset / field 指定编号所在的模型字段（用于命名编号空间和首次初始化），
+    sources 可指定多个共用同一编号空间的 (queryset, field)。
+    """
+    name, full_prefix, seed = _number_args(queryset, field, prefix, period, separator, sources)
+    return f'{full_prefix}{next_value(name, period, seed):0{width}d}'
+
+
+def reserve_document_numbers(
+    queryset,
+    field: str,
+    prefix: str,
+    count: int,
+    period: str = '',
+    width: int = 4,
+    separator: str = '-',
+    sources: Optional[Sequence[Source]] = None,
+) -> List[str]:
+    """批量预留 count 个连续单据编号（批量导入时一次取号）"""
+    name, full_prefix, seed = _number_args(queryset, field, prefix, period, separator, sources)
+    return [f'{full_prefix}{value:0{width}d}' for value in reserve_values(name, period, count, seed)]
+
+
+def peek_document_sequence(
+    queryset,
+    field: str,
+    prefix: str,
+    period: str = '',
+    separator: str = '-',
+    sources: Optional[Sequence[Source]] = None,
+) -> int:
+    """预览下一个单据序号（不占用）"""
+    name, _, seed = _number_args(queryset, field, prefix, period, separator, sources)
+    return peek_value(name, period, seed)
+
+
+def advance_document_sequence(
+    queryset,
+    field: str,
+    prefix: str,
+    value: int,
+    period: str = '',
+    separator: str = '-',
+    sources: Optional[Sequence[Source]] = None,
+) -> None:
+    """手工指定序号后推进计数器"""
+    name, _, seed = _number_args(queryset, field, prefix, period, separator, sources)
+    advance_to(name, period, value, seed)
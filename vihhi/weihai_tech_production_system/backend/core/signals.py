@@ -0,0 +1,50 @@
+"""
+首页 / 仪表盘缓存失效信号（在 CoreConfig.ready 中注册）
+
+- 任务、行政事务、审批申请变化时，使相关用户的首页缓存失效（审批收件箱由 ApprovalEngine 主动失效）
+- 项目、交付记录变化时，升级全局版本号；项目负责人的缓存同时失效
+"""
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from backend.apps.administrative_management.models import AdministrativeAffair
+from backend.apps.delivery_customer.models import DeliveryRecord
+from backend.apps.production_management.models import Project, ProjectTask
+from backend.apps.workflow_engine.models import ApprovalInstance
+from backend.core.dashboard import invalidate_global_dashboard, invalidate_user_dashboards
+
+
+def _invalidate_users_on_commit(*user_ids):
+    transaction.on_commit(lambda: invalidate_user_dashboards(user_ids))
+
+
+@receiver(post_save, sender=ProjectTask)
+@receiver(post_delete, sender=ProjectTask)
+def handle_project_task_change(sender, instance, **kwargs):
+    _invalidate_users_on_commit(instance.assigned_to_id, instance.created_by_id)
+
+
+@receiver(post_save, sender=AdministrativeAffair)
+@receiver(post_delete, sender=AdministrativeAffair)
+def handle_affair_change(sender, instance, **kwargs):
+    _invalidate_users_on_commit(instance.responsible_user_id)
+
+
+@receiver(post_save, sender=ApprovalInstance)
+def handle_approval_instance_created(sender, instance, created, **kwargs):
+    if created:
+        _invalidate_users_on_commit(instance.applicant_id)
+
+
+@receiver(post_save, sender=Project)
+@receiver(post_delete, sender=Project)
+def handle_project_change(sender, instance, **kwargs):
+    transaction.on_commit(invalidate_global_dashboard)
+    _invalidate_users_on_commit(instance.project_manager_id)
+
+
+@receiver(post_save, sender=DeliveryRecord)
+@receiver(post_delete, sender=DeliveryRecord)
+def handle_delivery_record_change(sender, **kwargs):
+    transaction.on_commit(invalidate_global_dashboard)
@@ -0,0 +1,48 @@
+"""Celery 任务投递：配置了消息队列时交给 worker，否则在当前进程的后台线程中执行"""
+import logging
+import threading
+
+from django.conf import settings
+from django.db import close_old_connections, connections
+
+logger = logging.getLogger(__name__)
+
+
+def broker_configured() -> bool:
+    """是否配置了 Celery 消息队列（CELERY_BROKER_URL，默认取 REDIS_URL）"""
+    return bool(getattr(settings, 'CELERY_BROKER_URL', ''))
+
+
+def run_in_background(task, *args) -> threading.Thread:
+    """在当前进程的后台线程中执行任务，不阻塞当前请求；线程结束时关闭自己的数据库连接"""
+    def target():
+        close_old_connections()
+        try:
+            task.apply(args=args)
+        except Exception:
+            logger.exception('后台任务 %s 执行失败', task.name)
+        finally:
+            connections.close_all()
+
+    thread = threading.Thread(target=target, name=f'task:{task.name}', daemon=True)
+    thread.start()
+    return thread
+
+
+def dispatch_task(task, *args, eager: bool = False) -> None:
+    """
+    投递 Celery 任务 task(*args)
+
+    eager 为真时在当前线程同步执行；没有配置消息队列或投递失败时在后台线程中执行。
+    后台线程随 Web 进程退出而中断，需要可靠执行的任务应配置消息队列并运行 Celery worker。
+    """
+    if eager:
+        task.apply(args=args)
+        return
+    if broker_configured():
+        try:
+            task.delay(*args)
+            return
+        except Exception as exc:
+            logger.warning('任务 %s 投递失败，改为在后台线程执行: %s', task.name, exc)
+    run_in_background(task, *args)
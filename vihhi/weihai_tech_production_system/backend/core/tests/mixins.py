@@ -0,0 +1,17 @@
+"""测试公用的 TestCase 混入类"""
+import shutil
+import tempfile
+
+from django.test import override_settings
+
+
+class TempMediaRootMixin:
+    """每个测试使用独立的临时 MEDIA_ROOT，测试结束后删除"""
+
+    def setUp(self):
+        super().setUp()
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        override = override_settings(MEDIA_ROOT=self.media_root)
+        override.enable()
+        self.addCleanup(override.disable)
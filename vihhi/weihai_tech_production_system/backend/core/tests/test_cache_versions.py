@@ -0,0 +1,25 @@
+from django.core.cache import cache
+from django.test import SimpleTestCase
+
+from backend.core.cache_versions import bump_version, get_version, versioned_cache_key
+
+
+class CacheVersionTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_bump_invalidates_versioned_keys(self):
+        key = versioned_cache_key("report:2025-3", "version:a", "version:b")
+        self.assertEqual(key, versioned_cache_key("report:2025-3", "version:a", "version:b"))
+        self.assertEqual(bump_version("version:b"), get_version("version:b"))
+        self.assertNotEqual(key, versioned_cache_key("report:2025-3", "version:a", "version:b"))
+
+    def test_evicted_version_does_not_reuse_old_keys(self):
+        old_key = versioned_cache_key("report", "version:a")
+        cache.set(old_key, "stale")
+        # 版本号被淘汰后重新初始化，不会回到旧值
+        cache.delete("version:a")
+        self.assertNotEqual(versioned_cache_key("report", "version:a"), old_key)
+        cache.delete("version:a")
+        bump_version("version:a")
+        self.assertNotEqual(versioned_cache_key("report", "version:a"), old_key)
@@ -0,0 +1,81 @@
+from datetime import timedelta
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from backend.apps.production_management.models import Project, ProjectTask
+from backend.core import dashboard
+
+
+class HomeDashboardCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        User = get_user_model()
+        self.user = User.objects.create_user(username='home_user', password='test123456')
+        self.project = Project.objects.create(
+            project_number='HOME-001', name='首页项目', created_by=self.user,
+            project_manager=self.user, status='in_progress',
+        )
+        now = timezone.now()
+        for title, status, due_time in [
+            ('今日到期', 'pending', now + timedelta(minutes=5)),
+            ('已逾期', 'in_progress', now - timedelta(days=2)),
+            ('已完成', 'completed', now - timedelta(days=2)),
+        ]:
+            ProjectTask.objects.create(
+                project=self.project, title=title, task_type='project_complete_info',
+                status=status, due_time=due_time, assigned_to=self.user,
+            )
+
+    def _create_task(self, title):
+        with self.captureOnCommitCallbacks(execute=True):
+            ProjectTask.objects.create(
+                project=self.project, title=title, task_type='configure_team', assigned_to=self.user,
+            )
+
+    def test_widgets_collected_and_served_from_cache(self):
+        data = dashboard.get_user_dashboard(self.user)
+        self.assertEqual(data['pending_counts']['personal'], 2)
+        self.assertEqual(data['pending_counts']['overdue'], 1)
+        self.assertEqual(data['projects']['active'], 1)
+        self.assertEqual(data['projects']['my_active'], 1)
+        self.assertEqual([task['title'] for task in data['task_board']['completed']], ['已完成'])
+
+        with self.assertNumQueries(0):
+            dashboard.get_user_dashboard(self.user)
+
+        # 用户自己的任务变化：版本号失效，同步重建
+        self._create_task('新任务')
+        self.assertEqual(dashboard.get_user_dashboard(self.user)['pending_counts']['personal'], 3)
+
+    def test_stale_entry_served_while_refreshing(self):
+        dashboard.get_user_dashboard(self.user)
+        ProjectTask.objects.filter(title='今日到期').update(status='completed')
+
+        with mock.patch.object(dashboard, 'DASHBOARD_FRESH_SECONDS', 0), \
+                mock.patch.object(dashboard, 'dispatch_task') as dispatch:
+            stale = dashboard.get_user_dashboard(self.user)
+            dashboard.get_user_dashboard(self.user)
+        # queryset.update 不触发信号：先返回旧数据，只投递一次刷新任务
+        self.assertEqual(stale['pending_counts']['personal'], 2)
+        dispatch.assert_called_once_with(dashboard.refresh_user_dashboard, self.user.pk)
+
+        dashboard.refresh_user_dashboard.apply(args=[self.user.pk])
+        self.assertEqual(dashboard.get_user_dashboard(self.user)['pending_counts']['personal'], 1)
+
+        # 刷新一直没有完成时，超过最长旧数据时间的缓存在请求内重建
+        ProjectTask.objects.filter(title='已逾期').update(status='completed')
+        with mock.patch.object(dashboard, 'DASHBOARD_MAX_STALE_SECONDS', 0), \
+                mock.patch.object(dashboard, 'dispatch_task') as dispatch:
+            self.assertEqual(dashboard.get_user_dashboard(self.user)['pending_counts']['personal'], 0)
+        dispatch.assert_not_called()
+
+    def test_dashboard_stats_endpoint(self):
+        self.client.force_login(self.user)
+        response = self.client.get(reverse('dashboard_stats'))
+        self.assertEqual(response.json()['active_projects'], 1)
+        self.assertTrue(response.json()['success'])
@@ -0,0 +1,39 @@
+from unittest import mock
+
+from django.test import SimpleTestCase, override_settings
+
+from backend.core import task_dispatch
+
+
+class DispatchTaskTests(SimpleTestCase):
+    def setUp(self):
+        self.task = mock.Mock(name="task")
+        self.task.name = "tests.task"
+        patcher = mock.patch.object(task_dispatch, "run_in_background")
+        self.run_in_background = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    @override_settings(CELERY_BROKER_URL="")
+    def test_without_broker_runs_in_background_thread(self):
+        task_dispatch.dispatch_task(self.task, 1)
+        self.task.delay.assert_not_called()
+        self.task.apply.assert_not_called()
+        self.run_in_background.assert_called_once_with(self.task, 1)
+
+    @override_settings(CELERY_BROKER_URL="redis://broker:6379/0")
+    def test_failed_dispatch_falls_back_to_background_thread(self):
+        self.task.delay.side_effect = ConnectionError("broker down")
+        task_dispatch.dispatch_task(self.task, 1)
+        self.task.apply.assert_not_called()
+        self.run_in_background.assert_called_once_with(self.task, 1)
+
+        self.run_in_background.reset_mock()
+        self.task.delay.side_effect = None
+        task_dispatch.dispatch_task(self.task, 2)
+        self.task.delay.assert_called_with(2)
+        self.run_in_background.assert_not_called()
+
+    def test_eager_runs_in_current_thread(self):
+        task_dispatch.dispatch_task(self.task, 1, eager=True)
+        self.task.apply.assert_called_once_with(args=(1,))
+        self.run_in_background.assert_not_called()
@@ -6,12 +6,12 @@ from django.views.decorators.csrf import csrf_exempt
 from django.contrib.auth import login, logout, authenticate
 from django.contrib import messages
 from django.db.models import Sum, Q
-from django.utils import timezone
 from django.urls import reverse, NoReverseMatch
 
 # 注意：Project, ProjectTask 等模型改为延迟导入，避免在数据库表不存在时导致模块加载失败
 # from backend.apps.project_center.models import Project, ProjectMilestone, ProjectTeamNotification, ProjectTask
 from backend.apps.system_management.services import get_user_permission_codes
+from backend.core.dashboard import get_user_dashboard
 
 
 def _permission_granted(required_code, user_permissions: set) -> bool:
@@ -109,71 +109,12 @@ def _build_full_top_nav(permission_set, user=None):
     return nav
 
 
-def _serialize_task_for_home(task):
-    """序列化任务对象为首页显示格式"""
-    try:
-        project = getattr(task, 'project', None)
-        project_number = getattr(project, 'project_number', '') if project else ''
-        project_name = getattr(project, 'name', '关联项目') if project else '关联项目'
-        
-        # 根据任务类型设置跳转URL
-        url = '#'
-        if project:
-            try:
-                task_type = getattr(task, 'task_type', None)
-                if task_type == 'project_complete_info':
-                    # 完善项目信息 -> 跳转到项目信息完善页面
-                    url = reverse('production_pages:project_complete', args=[project.id])
-                elif task_type == 'configure_team':
-                    # 配置项目团队 -> 跳转到团队配置页面
-                    url = reverse('production_pages:project_team', args=[project.id])
-                else:
-                    # 其他任务 -> 跳转到项目详情页面
-                    url = reverse('production_pages:project_detail', args=[project.id])
-            except (NoReverseMatch, AttributeError):
-                url = '#'
-        
-        return {
-            'id': getattr(task, 'id', None),
-            'title': getattr(task, 'title', ''),
-            'project_name': project_name,
-            'project_number': project_number,
-            'status': getattr(task, 'status', 'pending'),
-            'status_label': getattr(task, 'get_status_display', lambda: '')() if hasattr(task, 'get_status_display') else '',
-            'due_time': getattr(task, 'due_time', None),
-            'completed_time': getattr(task, 'completed_time', None),
-            'description': getattr(task, 'description', ''),
-            'url': url,
-        }
-    except Exception as e:
-        import logging
-        logger = logging.getLogger(__name__)
-        logger.warning(f'序列化任务失败: {e}', exc_info=True)
-        # 返回一个基本的任务信息
-        return {
-            'id': getattr(task, 'id', None),
-            'title': getattr(task, 'title', '未知任务'),
-            'project_name': '未知项目',
-            'project_number': '',
-            'status': 'pending',
-            'status_label': '',
-            'due_time': None,
-            'completed_time': None,
-            'description': '',
-            'url': '#',
-        }
-
-
 def home(request):
     """系统首页 - Django工作台页面"""
     import logging
     logger = logging.getLogger(__name__)
     
     try:
-        from django.contrib.auth.decorators import login_required
-        from django.db.models import Count, Q, Sum
-        from datetime import timedelta
-        
         # 如果未登录，重定向到登录页
         if not request.user.is_authenticated:
             return redirect('login')
@@ -194,97 +135,28 @@ def home(request):
             logger.warning(f'构建导航菜单失败: {e}', exc_info=True)
             centers_navigation = []
         
-        # 初始化统计数据
-        pending_counts = {'personal': 0, 'due_today': 0, 'overdue': 0}
-        approval_stats = {'my_pending': 0, 'my_submitted': 0}
-        delivery_stats = {'pending': 0}
-        stats_cards = []
-        task_board = {'pending': [], 'in_progress': [], 'completed': []}
-        
-        # 获取待办任务统计
-        try:
-            today = timezone.now().date()
-            from backend.apps.project_center.models import ProjectTask
-            user_tasks = ProjectTask.objects.filter(
-                Q(assigned_to=user) | Q(created_by=user)
-            ).exclude(status='completed')
-            
-            pending_counts['personal'] = user_tasks.count()
-            pending_counts['due_today'] = user_tasks.filter(due_time__date=today).count()
-            pending_counts['overdue'] = user_tasks.filter(due_time__lt=timezone.now()).exclude(status='completed').count()
-            
-            # 构建任务看板
-            pending_tasks = user_tasks.filter(status='pending')[:10]
-            in_progress_tasks = user_tasks.filter(status='in_progress')[:10]
-            completed_tasks = ProjectTask.objects.filter(
-                Q(assigned_to=user) | Q(created_by=user),
-                status='completed'
-            ).order_by('-completed_time')[:10]
-            
-            task_board['pending'] = [_serialize_task_for_home(task) for task in pending_tasks]
-            task_board['in_progress'] = [_serialize_task_for_home(task) for task in in_progress_tasks]
-            task_board['completed'] = [_serialize_task_for_home(task) for task in completed_tasks]
-        except Exception as e:
-            logger.exception('获取任务统计失败: %s', str(e))
-        
-        # 获取审批统计
-        try:
-            from backend.apps.workflow_engine.models import ApprovalInstance
-            
-            approval_stats['my_pending'] = ApprovalInstance.objects.filter(
-                status='pending',
-                records__approver=user,
-                records__result='pending'
-            ).distinct().count()
-            
-            approval_stats['my_submitted'] = ApprovalInstance.objects.filter(
-                applicant=user
-            ).count()
-        except Exception as e:
-            logger.exception('获取审批统计失败: %s', str(e))
-        
-        # 获取交付统计
-        try:
-            from backend.apps.delivery_customer.models import DeliveryReport
-            
-            delivery_stats['pending'] = DeliveryReport.objects.filter(
-                status='pending'
-            ).count()
-        except Exception as e:
-            logger.exception('获取交付统计失败: %s', str(e))
+        # 首页组件数据（任务、审批、交付、项目计数），见 backend.core.dashboard
+        dashboard = get_user_dashboard(user)
+        pending_counts = dashboard['pending_counts']
+        approval_stats = dashboard['approval_stats']
+        delivery_stats = dashboard['delivery_stats']
+        task_board = dashboard['task_board']
         
         # 构建统计卡片
+        stats_cards = []
         try:
-            # 进行中项目数
-            try:
-                from backend.apps.project_center.models import Project
-                active_projects = Project.objects.filter(
-                    status__in=['in_progress', 'planning']
-                ).count()
-                stats_cards.append({
-                    'label': '进行中项目',
-                    'value': active_projects,
-                    'url': reverse('production_pages:project_list'),
-                    'variant': 'info'
-                })
-            except Exception:
-                pass
-            
-            # 本月完成项目数
-            try:
-                this_month = timezone.now().replace(day=1)
-                completed_projects = Project.objects.filter(
-                    status='completed',
-                    updated_time__gte=this_month
-                ).count()
-                stats_cards.append({
-                    'label': '本月完成',
-                    'value': completed_projects,
-                    'url': reverse('production_pages:project_list'),
-                    'variant': 'success'
-                })
-            except Exception:
-                pass
+            stats_cards.append({
+                'label': '进行中项目',
+                'value': dashboard['projects']['active'],
+                'url': reverse('production_pages:project_list'),
+                'variant': 'info'
+            })
+            stats_cards.append({
+                'label': '本月完成',
+                'value': dashboard['projects']['completed_this_month'],
+                'url': reverse('production_pages:project_list'),
+                'variant': 'success'
+            })
             
             # 待审批任务
             if approval_stats['my_pending'] > 0:
@@ -296,21 +168,13 @@ def home(request):
                 })
             
             # 待处理事项
-            try:
-                from backend.apps.administrative_management.models import AdministrativeAffair
-                pending_affairs = AdministrativeAffair.objects.filter(
-                    status='pending',
-                    responsible_user=user
-                ).count()
-                if pending_affairs > 0:
-                    stats_cards.append({
-                        'label': '待处理事项',
-                        'value': pending_affairs,
-                        'url': reverse('admin_pages:affair_list'),
-                        'variant': 'warning'
-                    })
-            except Exception:
-                pass
+            if dashboard['pending_affairs'] > 0:
+                stats_cards.append({
+                    'label': '待处理事项',
+                    'value': dashboard['pending_affairs'],
+                    'url': reverse('admin_pages:affair_list'),
+                    'variant': 'warning'
+                })
         except Exception as e:
             logger.exception('构建统计卡片失败: %s', str(e))
         
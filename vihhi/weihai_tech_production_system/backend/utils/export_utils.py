@@ -0,0 +1,271 @@
+"""
+流式导出框架
+按声明的列逐块读取查询集，流式写出 xlsx / CSV
+"""
+import csv
+import tempfile
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Callable, Iterable, Iterator, List, Optional, Sequence
+
+from django.conf import settings
+from django.core.exceptions import FieldDoesNotExist
+from django.http import FileResponse, StreamingHttpResponse
+from django.utils import timezone
+from django.utils.http import content_disposition_header
+
+EXPORT_CHUNK_SIZE = getattr(settings, 'EXPORT_JOB_CHUNK_SIZE', 2000)
+
+XLSX_CONTENT_TYPE = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+CSV_CONTENT_TYPE = 'text/csv; charset=utf-8'
+
+HEADER_FILL_COLOR = '366092'
+
+
+# ==================== 列定义 ====================
+
+def format_value(value):
+    """导出单元格的默认格式：日期 YYYY-MM-DD，时间按本地时区到分钟，金额转浮点数，None 为空"""
+    if value is None:
+        return ''
+    if isinstance(value, datetime):
+        if timezone.is_aware(value):
+            value = timezone.localtime(value)
+        return value.strftime('%Y-%m-%d %H:%M')
+    if isinstance(value, date):
+        return value.strftime('%Y-%m-%d')
+    if isinstance(value, Decimal):
+        return float(value)
+    return value
+
+
+def truncate(length: int) -> Callable:
+    """截断长文本（如描述只导出前 100 个字）"""
+    return lambda value: (value or '')[:length]
+
+
+def full_name(user) -> str:
+    return user.get_full_name() if user else ''
+
+
+class Column:
+    """
+    一列导出数据
+
+    source：ORM 路径（``a__b__c``），沿外键取值；最后一段有 choices 时取显示值（display=False 保留编码）。
+    format：对取到的值再加工；value：不按路径取值时，用 value(obj) 计算（此时 ExportTable 不再使用 only()）。
+    needs：format 还需要加载的关联字段路径（配合 only()）。
+    """
+
+    def __init__(self, header: str, source: Optional[str] = None, *, width: Optional[int] = None,
+                 format: Optional[Callable] = None, value: Optional[Callable] = None,
+                 display: bool = True, needs: Sequence[str] = ()):
+        if not source and value is None:
+            raise ValueError(f'导出列 {header} 需要 source 或 value')
+        self.header = header
+        self.source = source
+        self.width = width
+        self.format = format
+        self.value = value
+        self.display = display
+        self.needs = tuple(needs)
+        self.choices = None
+
+    def extract(self, obj):
+        if self.value is not None:
+            return self.value(obj)
+        value = obj
+        for part in self.source.split('__'):
+            value = getattr(value, part, None)
+            if value is None:
+                break
+        if self.choices is not None and value is not None:
+            value = self.choices.get(value, value)
+        if self.format is not None:
+            return self.format(value)
+        return format_value(value)
+
+
+def user_column(header: str, source: str, width: Optional[int] = None) -> Column:
+    """用户姓名列：只加载姓和名两个字段"""
+    return Column(header, source, width=width, format=full_name,
+                  needs=(f'{source}__first_name', f'{source}__last_name'))
+
+
+class ExportTable:
+    """一组导出列：生成表头、推导查询优化、逐块产出数据行"""
+
+    def __init__(self, columns: Sequence[Column], chunk_size: Optional[int] = None):
+        self.columns = list(columns)
+        self.chunk_size = chunk_size or EXPORT_CHUNK_SIZE
+
+    @property
+    def headers(self) -> List[str]:
+        return [column.header for column in self.columns]
+
+    @property
+    def widths(self) -> List[Optional[int]]:
+        return [column.width for column in self.columns]
+
+    def optimize(self, queryset):
+        """按列的 ORM 路径加上 select_related 与 only()，并解析 choices 显示值"""
+        relations, fields = set(), set()
+        for column in self.columns:
+            if not column.source:
+                continue
+            model, prefix = queryset.model, []
+            parts = column.source.split('__')
+            for index, part in enumerate(parts):
+                try:
+                    field = model._meta.get_field(part)
+                except FieldDoesNotExist:
+                    # 属性或方法（如 property），加载整条记录
+                    fields = None if index == 0 else fields
+                    break
+                prefix.append(part)
+                if field.is_relation and (field.many_to_one or field.one_to_one):
+                    relations.add('__'.join(prefix))
+                    model = field.related_model
+                    if index == len(parts) - 1 and fields is not None:
+                        fields.add('__'.join(prefix))
+                    continue
+                if index == len(parts) - 1:
+                    if column.display and field.choices:
+                        column.choices = dict(field.flatchoices)
+                    if fields is not None:
+                        fields.add('__'.join(prefix))
+                break
+            if fields is not None:
+                fields.update(column.needs)
+
+        queryset = queryset.select_related(*sorted(relations)) if relations else queryset
+        if fields and all(column.source for column in self.columns):
+            # only() 中的关联字段必须同时出现在 select_related 中
+            queryset = queryset.only(*sorted(fields))
+        return queryset
+
+    def rows(self, queryset) -> Iterator[list]:
+        for obj in self.optimize(queryset).iterator(chunk_size=self.chunk_size):
+            yield [column.extract(obj) for column in self.columns]
+
+
+# ==================== 写入 ====================
+
+def write_sheet(workbook, title: str, headers: Sequence[str], rows: Iterable[Sequence],
+                column_widths: Optional[Sequence[Optional[int]]] = None, on_row=None) -> int:
+    """在 write-only 工作簿中追加一个工作表（表头加粗着色），返回数据行数"""
+    from openpyxl.cell import WriteOnlyCell
+    from openpyxl.styles import Alignment, Font, PatternFill
+    from openpyxl.utils import get_column_letter
+
+    sheet = workbook.create_sheet(title=title)
+    for index, width in enumerate(column_widths or [], 1):
+        if width:
+            sheet.column_dimensions[get_column_letter(index)].width = width
+
+    header_cells = []
+    for header in headers:
+        cell = WriteOnlyCell(sheet, value=header)
+        cell.font = Font(bold=True, color='FFFFFF')
+        cell.fill = PatternFill(start_color=HEADER_FILL_COLOR, end_color=HEADER_FILL_COLOR, fill_type='solid')
+        cell.alignment = Alignment(horizontal='center', vertical='center')
+        header_cells.append(cell)
+    sheet.append(header_cells)
+
+    count = 0
+    for row in rows:
+        sheet.append(list(row))
+        count += 1
+        if on_row:
+            on_row(count)
+    return count
+
+
+def new_workbook():
+    from openpyxl import Workbook
+
+    return Workbook(write_only=True)
+
+
+def write_xlsx(target, sheet_title: str, headers: Sequence[str], rows: Iterable[Sequence],
+               column_widths: Optional[Sequence[Optional[int]]] = None, on_row=None) -> int:
+    """写入单工作表 xlsx（target 为路径或二进制文件对象），返回数据行数"""
+    workbook = new_workbook()
+    count = write_sheet(workbook, sheet_title, headers, rows, column_widths, on_row)
+    workbook.save(target)
+    return count
+
+
+def write_csv(path: str, headers: Sequence[str], rows: Iterable[Sequence], on_row=None) -> int:
+    """写入 CSV（UTF-8 BOM，Excel 可直接打开），返回数据行数"""
+    count = 0
+    with open(path, 'w', newline='', encoding='utf-8-sig') as handle:
+        writer = csv.writer(handle)
+        writer.writerow(headers)
+        for row in rows:
+            writer.writerow(row)
+            count += 1
+            if on_row:
+                on_row(count)
+    return count
+
+
+# ==================== 响应 ====================
+
+def _file_name(stem: str, extension: str) -> str:
+    return f"{stem}_{timezone.localtime():%Y%m%d_%H%M%S}.{extension}"
+
+
+def workbook_response(workbook, file_stem: str) -> FileResponse:
+    """把 write-only 工作簿存入临时文件后分块返回（临时文件在响应结束后自动删除）"""
+    handle = tempfile.TemporaryFile()
+    workbook.save(handle)
+    handle.seek(0)
+    return FileResponse(handle, as_attachment=True, filename=_file_name(file_stem, 'xlsx'),
+                        content_type=XLSX_CONTENT_TYPE)
+
+
+def xlsx_response(file_stem: str, sheet_title: str, headers: Sequence[str], rows: Iterable[Sequence],
+                  column_widths: Optional[Sequence[Optional[int]]] = None) -> FileResponse:
+    workbook = new_workbook()
+    write_sheet(workbook, sheet_title, headers, rows, column_widths)
+    return workbook_response(workbook, file_stem)
+
+
+class _Echo:
+    """csv.writer 的伪文件：writerow 直接返回该行文本"""
+
+    def write(self, value):
+        return value
+
+
+def csv_response(file_stem: str, headers: Sequence[str], rows: Iterable[Sequence]) -> StreamingHttpResponse:
+    """边查询边输出的 CSV 响应"""
+    writer = csv.writer(_Echo())
+
+    def stream():
+        # BOM 让 Excel 按 UTF-8 打开
+        yield '\ufeff'
+        yield writer.writerow(headers)
+        for row in rows:
+            yield writer.writerow(row)
+
+    response = StreamingHttpResponse(stream(), content_type=CSV_CONTENT_TYPE)
+    response['Content-Disposition'] = content_disposition_header(True, _file_name(file_stem, 'csv'))
+    return response
+
+
+def export_response(queryset, table: ExportTable, file_stem: str, sheet_title: Optional[str] = None,
+                    file_format: Optional[str] = 'xlsx', extra_rows: Iterable[Sequence] = ()):
+    """
+    导出查询集：file_format 为 csv 时返回流式 CSV，否则返回 xlsx
+
+    extra_rows 在数据行之后写出（如合计行），可以是惰性迭代器。
+    """
+    def rows():
+        yield from table.rows(queryset)
+        yield from extra_rows
+
+    if file_format == 'csv':
+        return csv_response(file_stem, table.headers, rows())
+    return xlsx_response(file_stem, sheet_title or file_stem, table.headers, rows(), table.widths)
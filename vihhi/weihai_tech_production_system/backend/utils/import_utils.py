@@ -0,0 +1,458 @@
+"""
+批量导入引擎
+分块读取、校验并批量写入导入文件，生成错误报告
+"""
+import codecs
+import csv
+import io
+import logging
+import os
+import tempfile
+from datetime import date, datetime
+from decimal import Decimal, InvalidOperation
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from django.conf import settings
+from django.contrib import messages
+from django.core.files import File
+from django.db import transaction
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from backend.apps.system_management.models import ImportJob
+from backend.core.task_dispatch import dispatch_task
+
+logger = logging.getLogger(__name__)
+
+IMPORT_JOB_EAGER = getattr(settings, 'IMPORT_JOB_EAGER', False)
+IMPORT_CHUNK_SIZE = getattr(settings, 'IMPORT_CHUNK_SIZE', 500)
+IMPORT_SYNC_MAX_BYTES = getattr(settings, 'IMPORT_SYNC_MAX_BYTES', 512 * 1024)
+SUPPORTED_EXTENSIONS = ('.xlsx', '.xlsm', '.csv')
+# 任务上保存的错误摘要条数（完整错误见错误报告文件）
+ERROR_SUMMARY_LIMIT = 100
+
+CSV_ENCODINGS = ('utf-8-sig', 'gb18030')
+CSV_SNIFF_BYTES = 64 * 1024
+ERROR_REPORT_CONTENT_TYPE = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+
+
+class ImportFileError(Exception):
+    """文件级错误（格式不支持、缺少必填列等），整个导入失败"""
+
+
+class RowError(Exception):
+    """行级错误，该行记为失败，其余行继续导入"""
+
+
+class ImportRow:
+    """一行数据：number 为 Excel 行号，values 为按字段名取值的原始单元格"""
+    __slots__ = ('number', 'cells', 'values')
+
+    def __init__(self, number: int, cells: Sequence, values: Dict[str, object]):
+        self.number = number
+        self.cells = cells
+        self.values = values
+
+    def raw(self, field: str):
+        return self.values.get(field)
+
+    def get(self, field: str) -> str:
+        """去掉首尾空白的字符串值，空单元格返回 ''"""
+        value = self.values.get(field)
+        if value is None:
+            return ''
+        if isinstance(value, float) and value.is_integer():
+            # Excel 把纯数字的编码 / 手机号存成浮点数
+            value = int(value)
+        return str(value).strip()
+
+    def require(self, field: str, label: str) -> str:
+        value = self.get(field)
+        if not value:
+            raise RowError(f'{label}不能为空')
+        return value
+
+    def date(self, field: str, label: str) -> Optional[date]:
+        """日期单元格或 YYYY-MM-DD 文本，空值返回 None"""
+        value = self.values.get(field)
+        if isinstance(value, datetime):
+            return value.date()
+        if isinstance(value, date):
+            return value
+        text = self.get(field)
+        if not text:
+            return None
+        try:
+            return datetime.strptime(text, '%Y-%m-%d').date()
+        except ValueError:
+            raise RowError(f'{label}格式错误，应为YYYY-MM-DD')
+
+    def decimal(self, field: str, label: str) -> Optional[Decimal]:
+        """数字单元格或数字文本，空值返回 None"""
+        text = self.get(field)
+        if not text:
+            return None
+        try:
+            return Decimal(text)
+        except InvalidOperation:
+            raise RowError(f'{label}格式错误')
+
+
+class BaseImporter:
+    """
+    导入器基类
+
+    fields：字段名 -> 可接受的表头（第一个作为缺列提示）；required_fields：文件中必须存在的列。
+    导入流程：prepare() → 每块 [parse() 逐行 → resolve() → build() 逐行 → save_chunk()] → finish()
+    """
+    import_type = ''
+    label = '记录'
+    model = None
+    fields: Dict[str, Sequence[str]] = {}
+    required_fields: Sequence[str] = ()
+    chunk_size: Optional[int] = None
+
+    def __init__(self, user):
+        self.user = user
+
+    # ---------- 钩子 ----------
+
+    def prepare(self) -> None:
+        """导入开始前调用一次，加载字典表等小数据"""
+
+    def parse(self, row: ImportRow):
+        """解析校验一行（不查询数据库），返回中间数据；行级错误抛出 RowError"""
+        raise NotImplementedError
+
+    def resolve(self, parsed: List[Tuple[ImportRow, object]]) -> None:
+        """每块调用一次：按本块的全部行批量预取关联对象（每种关联一条 IN 查询）"""
+
+    def build(self, row: ImportRow, data):
+        """用预取的关联对象构造模型实例（不保存）；行级错误抛出 RowError"""
+        raise NotImplementedError
+
+    def assign_numbers(self, instances: List) -> None:
+        """保存前为本块实例批量预留编号"""
+
+    def save_chunk(self, items: List[Tuple[ImportRow, object]]) -> List[Tuple[ImportRow, str]]:
+        """
+        保存一块实例，返回失败的 (row, 错误信息)
+
+        默认整块 bulk_create；失败时逐行在保存点内重试，定位出错的行。
+        """
+        instances = [instance for _, instance in items]
+        self.assign_numbers(instances)
+        try:
+            with transaction.atomic():
+                self.model.objects.bulk_create(instances)
+            return []
+        except Exception as exc:
+            logger.info('%s 导入整块写入失败，改为逐行保存: %s', self.label, exc)
+        failures = []
+        for row, instance in items:
+            instance.pk = None
+            try:
+                with transaction.atomic():
+                    self.model.objects.bulk_create([instance])
+            except Exception as exc:
+                failures.append((row, str(exc)))
+        return failures
+
+    def finish(self, success_count: int) -> None:
+        """导入结束后调用一次（批量写入不触发信号，需要时在这里统一处理）"""
+
+
+class ImportResult:
+    def __init__(self):
+        self.headers: List[str] = []
+        self.success = 0
+        self.failed = 0
+        # (行号, 原始单元格, 错误信息)
+        self.errors: List[Tuple[int, Sequence, str]] = []
+
+    @property
+    def total(self):
+        return self.success + self.failed
+
+
+# ==================== 读取 ====================
+
+def _cell_text(value) -> str:
+    return str(value).strip() if value is not None else ''
+
+
+def _csv_encoding(handle) -> str:
+    sample = handle.read(CSV_SNIFF_BYTES)
+    handle.seek(0)
+    for encoding in CSV_ENCODINGS:
+        try:
+            # 增量解码容忍样本末尾被截断的多字节字符
+            codecs.getincrementaldecoder(encoding)().decode(sample, final=False)
+            return encoding
+        except UnicodeDecodeError:
+            continue
+    raise ImportFileError('文件编码无法识别，请使用 UTF-8 或 GBK 编码的 CSV，或标准 Excel 文件')
+
+
+def open_rows(handle, file_name: str) -> Tuple[List[str], Iterator[Sequence], int, callable]:
+    """
+    打开文件，返回 (表头, 数据行迭代器, 估计行数, 关闭函数)
+
+    xlsx 使用 read_only 模式按行读取；估计行数来自工作表尺寸，可能包含末尾空行。
+    """
+    extension = os.path.splitext(file_name.lower())[1]
+    if extension not in SUPPORTED_EXTENSIONS:
+        raise ImportFileError('仅支持 Excel（.xlsx）或 CSV 文件，.xls 文件请另存为 .xlsx 后上传')
+
+    if extension == '.csv':
+        text = io.TextIOWrapper(handle, encoding=_csv_encoding(handle), newline='')
+        reader = csv.reader(text)
+        headers = [_cell_text(value) for value in next(reader, [])]
+        return headers, reader, 0, text.detach
+
+    from openpyxl import load_workbook
+
+    try:
+        workbook = load_workbook(handle, read_only=True, data_only=True)
+    except Exception as exc:
+        raise ImportFileError(f'Excel 文件解析失败：{exc}')
+    sheet = workbook.active
+    rows = sheet.iter_rows(values_only=True)
+    headers = [_cell_text(value) for value in next(rows, ())]
+    return headers, rows, max((sheet.max_row or 1) - 1, 0), workbook.close
+
+
+def map_headers(importer: BaseImporter, headers: Sequence[str]) -> Dict[str, int]:
+    """字段名 -> 列序号；缺少必填列时抛出 ImportFileError"""
+    positions = {header: index for index, header in enumerate(headers) if header}
+    columns = {}
+    for field, aliases in importer.fields.items():
+        for alias in aliases:
+            if alias in positions:
+                columns[field] = positions[alias]
+                break
+    missing = [importer.fields[field][0] for field in importer.required_fields if field not in columns]
+    if missing:
+        raise ImportFileError(f'缺少必填列：{", ".join(missing)}')
+    return columns
+
+
+def _chunks(rows: Iterable[Sequence], columns: Dict[str, int], size: int) -> Iterator[List[ImportRow]]:
+    chunk = []
+    for number, cells in enumerate(rows, start=2):
+        if not cells or not any(_cell_text(value) for value in cells):
+            continue
+        values = {field: cells[index] if index < len(cells) else None for field, index in columns.items()}
+        chunk.append(ImportRow(number, cells, values))
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+# ==================== 执行 ====================
+
+def _process_chunk(importer: BaseImporter, rows: List[ImportRow], result: ImportResult) -> None:
+    def fail(row, message):
+        result.failed += 1
+        result.errors.append((row.number, row.cells, message))
+
+    parsed = []
+    for row in rows:
+        try:
+            parsed.append((row, importer.parse(row)))
+        except RowError as exc:
+            fail(row, str(exc))
+        except (ValueError, TypeError, ArithmeticError) as exc:
+            fail(row, f'数据格式错误：{exc}')
+    if not parsed:
+        return
+
+    importer.resolve(parsed)
+    items = []
+    for row, data in parsed:
+        try:
+            items.append((row, importer.build(row, data)))
+        except RowError as exc:
+            fail(row, str(exc))
+    if not items:
+        return
+
+    failures = importer.save_chunk(items)
+    for row, message in failures:
+        fail(row, message)
+    result.success += len(items) - len(failures)
+
+
+def run_import(importer: BaseImporter, handle, file_name: str, on_chunk=None) -> ImportResult:
+    """
+    把文件导入数据库，返回 ImportResult
+
+    on_chunk(result, total) 在每块处理完后调用（用于更新进度）。文件级错误抛出 ImportFileError。
+    """
+    headers, rows, total, close = open_rows(handle, file_name)
+    result = ImportResult()
+    result.headers = headers
+    try:
+        columns = map_headers(importer, headers)
+        importer.prepare()
+        for chunk in _chunks(rows, columns, importer.chunk_size or IMPORT_CHUNK_SIZE):
+            _process_chunk(importer, chunk, result)
+            if on_chunk:
+                on_chunk(result, total)
+        importer.finish(result.success)
+    finally:
+        close()
+    return result
+
+
+def write_error_report(result: ImportResult, path: str) -> None:
+    """错误报告：行号 + 原始数据 + 错误原因，流式写入 write-only 工作簿"""
+    from openpyxl import Workbook
+    from openpyxl.cell import WriteOnlyCell
+    from openpyxl.styles import Font
+
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet(title='导入错误')
+    header_cells = []
+    for header in ['行号', *result.headers, '错误原因']:
+        cell = WriteOnlyCell(sheet, value=header)
+        cell.font = Font(bold=True)
+        header_cells.append(cell)
+    sheet.append(header_cells)
+    width = len(result.headers)
+    for number, cells, message in sorted(result.errors, key=lambda error: error[0]):
+        cells = list(cells)[:width]
+        sheet.append([number, *cells, *([None] * (width - len(cells))), message])
+    workbook.save(path)
+
+
+# ==================== 导入任务 ====================
+
+def importer_path(importer_class) -> str:
+    return f'{importer_class.__module__}.{importer_class.__qualname__}'
+
+
+def start_import(user, importer_class, upload) -> ImportJob:
+    """
+    保存上传文件并创建导入任务
+
+    小文件（不超过 IMPORT_SYNC_MAX_BYTES）或 IMPORT_JOB_EAGER 时在当前请求内执行，返回时任务已结束；
+    大文件在事务提交后投递 Celery 任务（未配置消息队列时在后台线程执行）。扩展名不支持时抛出 ImportFileError，不创建任务。
+    """
+    if os.path.splitext(upload.name.lower())[1] not in SUPPORTED_EXTENSIONS:
+        raise ImportFileError('仅支持 Excel（.xlsx）或 CSV 文件，.xls 文件请另存为 .xlsx 后上传')
+    job = ImportJob.objects.create(
+        import_type=importer_class.import_type,
+        importer=importer_path(importer_class),
+        source_file=upload,
+        source_name=os.path.basename(upload.name)[:200],
+        created_by=user,
+    )
+    if IMPORT_JOB_EAGER or upload.size <= IMPORT_SYNC_MAX_BYTES:
+        execute_import_job(job)
+    else:
+        transaction.on_commit(lambda: dispatch_import_job(job.pk))
+    return job
+
+
+def dispatch_import_job(job_id: int) -> None:
+    from backend.apps.system_management.tasks import run_import_job
+
+    dispatch_task(run_import_job, job_id)
+
+
+def execute_import_job(job: ImportJob) -> ImportJob:
+    """执行导入任务并记录结果；文件级错误或异常时任务标记为失败"""
+    started = timezone.now()
+    ImportJob.objects.filter(pk=job.pk).update(status='running', started_time=started)
+    job.status, job.started_time = 'running', started
+
+    def on_chunk(result, total):
+        ImportJob.objects.filter(pk=job.pk).update(
+            total_count=max(total, result.total), processed_count=result.total,
+            success_count=result.success, failed_count=result.failed,
+        )
+
+    try:
+        importer = import_string(job.importer)(job.created_by)
+        with job.source_file.open('rb') as handle:
+            result = run_import(importer, handle, job.source_name, on_chunk=on_chunk)
+        if result.errors:
+            _save_error_report(job, result)
+        job.total_count = job.processed_count = result.total
+        job.success_count, job.failed_count = result.success, result.failed
+        job.errors = [
+            {'row': number, 'message': message}
+            for number, _, message in sorted(result.errors, key=lambda error: error[0])[:ERROR_SUMMARY_LIMIT]
+        ]
+        job.status = 'succeeded'
+    except ImportFileError as exc:
+        job.status, job.error_message = 'failed', str(exc)
+    except Exception as exc:
+        logger.exception('导入任务 %s 失败', job.pk)
+        job.status, job.error_message = 'failed', str(exc)
+    job.finished_time = timezone.now()
+    job.save(update_fields=[
+        'status', 'total_count', 'processed_count', 'success_count', 'failed_count',
+        'errors', 'error_file', 'error_message', 'finished_time',
+    ])
+    logger.info('导入任务 %s（%s）结束：%s，成功 %s 行，失败 %s 行，耗时 %.1fs', job.pk, job.import_type,
+                job.status, job.success_count, job.failed_count,
+                (job.finished_time - job.started_time).total_seconds())
+    return job
+
+
+def _save_error_report(job: ImportJob, result: ImportResult) -> None:
+    handle, path = tempfile.mkstemp(suffix='.xlsx')
+    os.close(handle)
+    try:
+        write_error_report(result, path)
+        stem = os.path.splitext(job.source_name)[0] or job.import_type
+        with open(path, 'rb') as stream:
+            job.error_file.save(f'{stem}_错误报告_{job.pk}.xlsx', File(stream), save=False)
+    finally:
+        os.remove(path)
+
+
+def import_job_payload(job: ImportJob) -> dict:
+    """进度轮询接口的返回数据"""
+    return {
+        'id': job.pk,
+        'import_type': job.import_type,
+        'status': job.status,
+        'status_display': job.get_status_display(),
+        'total': job.total_count,
+        'processed': job.processed_count,
+        'success': job.success_count,
+        'failed': job.failed_count,
+        'progress': job.progress,
+        'finished': job.is_finished,
+        'errors': job.errors,
+        'error_report_url': error_report_url(job),
+        'error': job.error_message,
+    }
+
+
+def error_report_url(job: ImportJob) -> str:
+    return reverse('system_pages:import_job_error_report', args=[job.pk]) if job.error_file else ''
+
+
+def add_import_messages(request, job: ImportJob, noun: str = '条记录') -> None:
+    """把导入任务的结果写入页面提示（前 10 条错误 + 错误报告下载地址）"""
+    if not job.is_finished:
+        status_url = reverse('system_pages:import_job_status', args=[job.pk])
+        messages.info(request, f'文件较大，已转入后台导入（任务编号 {job.pk}），可在 {status_url} 查看进度')
+        return
+    if job.status == 'failed':
+        messages.error(request, f'导入失败：{job.error_message}')
+        return
+    if job.success_count:
+        messages.success(request, f'成功导入 {job.success_count} {noun}')
+    if job.failed_count:
+        details = '；'.join(f"第{error['row']}行：{error['message']}" for error in job.errors[:10])
+        prefix = '前10个错误：' if job.failed_count > 10 else ''
+        report = f'（完整错误报告：{error_report_url(job)}）' if job.error_file else ''
+        messages.warning(request, f'导入失败 {job.failed_count} 行：{prefix}{details}{report}')
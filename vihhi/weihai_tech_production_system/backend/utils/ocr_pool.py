@@ -0,0 +1,268 @@
+"""
+共享 OCR 进程池
+为合同识别、发票识别提供 OCR 文字识别
+"""
+import hashlib
+import importlib.util
+import logging
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from typing import Iterable, List, Optional
+
+from django.conf import settings
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+PDF_EXTENSIONS = ('.pdf',)
+CACHE_KEY_PREFIX = 'ocr:v1'
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+class OCRError(Exception):
+    """OCR 识别失败"""
+
+
+class OCRBusyError(OCRError):
+    """OCR 队列已满"""
+
+
+def available_engine() -> Optional[str]:
+    """已安装的 OCR 引擎（只检查是否可导入，不加载模型）：优先 PaddleOCR（中文识别效果好），其次 Tesseract"""
+    if importlib.util.find_spec('paddleocr'):
+        return 'paddle'
+    if importlib.util.find_spec('pytesseract'):
+        return 'tesseract'
+    return None
+
+
+# ==================== 进程内引擎（池中每个进程各一份） ====================
+
+_engine = None
+_engine_name = None
+_engine_lock = threading.Lock()
+
+
+def _load_engine(engine_name: str):
+    if engine_name == 'paddle':
+        from paddleocr import PaddleOCR
+        return PaddleOCR(use_angle_cls=True, lang='ch')
+    return 'tesseract'
+
+
+def _get_engine(engine_name: str):
+    global _engine, _engine_name
+    if _engine is None or _engine_name != engine_name:
+        _engine = _load_engine(engine_name)
+        _engine_name = engine_name
+        logger.info('已加载OCR引擎: %s', engine_name)
+    return _engine
+
+
+def _init_worker(engine_name: str):
+    """进程池初始化：预先加载模型"""
+    _get_engine(engine_name)
+
+
+def _ping():
+    return True
+
+
+def _image_text(engine, image) -> str:
+    """识别一张 PIL 图片，返回按行拼接的文本"""
+    if engine == 'tesseract':
+        import pytesseract
+        return pytesseract.image_to_string(image, lang='chi_sim+eng')
+
+    import numpy
+    # PaddleOCR 接收 BGR 数组
+    array = numpy.asarray(image.convert('RGB'))[:, :, ::-1]
+    result = engine.ocr(array, cls=True)
+    if not result or not result[0]:
+        return ''
+    return '\n'.join(line[1][0] for line in result[0] if line and len(line) > 1)
+
+
+def _ocr_image(engine_name: str, image) -> str:
+    with _engine_lock:
+        # PaddleOCR 实例不是线程安全的；池进程内只有一个线程，加锁只影响进程内模式
+        return _image_text(_get_engine(engine_name), image)
+
+
+def _ocr_pdf_page(engine_name: str, path: str, page: int, dpi: int) -> str:
+    """在工作进程内渲染并识别 PDF 的一页（只把路径传给子进程，不传整页图片）"""
+    from pdf2image import convert_from_path
+
+    images = convert_from_path(path, dpi=dpi, first_page=page, last_page=page)
+    return _ocr_image(engine_name, images[0]) if images else ''
+
+
+def _pdf_page_count(path: str) -> int:
+    from pdf2image import pdfinfo_from_path
+
+    return int(pdfinfo_from_path(path)['Pages'])
+
+
+# ==================== 进程池 ====================
+
+def file_digest(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as handle:
+        for chunk in iter(lambda: handle.read(HASH_CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _image_digest(image) -> str:
+    digest = hashlib.sha256(f'{image.mode}:{image.size}'.encode())
+    digest.update(image.tobytes())
+    return digest.hexdigest()
+
+
+class OCRPool:
+    """OCR 进程池：模型常驻、队列有界、结果按内容哈希缓存"""
+
+    def __init__(self, workers: int = 0, max_pending: Optional[int] = None, dpi: int = 300,
+                 queue_timeout: float = 30, timeout: float = 300, engine: Optional[str] = None,
+                 use_cache: bool = True):
+        self.engine = engine if engine is not None else available_engine()
+        self.workers = workers if workers > 0 and not multiprocessing.current_process().daemon else 0
+        self.max_pending = max_pending or max(self.workers, 1) * 4
+        self.dpi = dpi
+        self.queue_timeout = queue_timeout
+        self.timeout = timeout
+        self.use_cache = use_cache
+        self._slots = threading.BoundedSemaphore(self.max_pending)
+        self._executor = None
+        self._lock = threading.Lock()
+
+    @property
+    def available(self) -> bool:
+        return self.engine is not None
+
+    def _get_executor(self) -> Optional[ProcessPoolExecutor]:
+        if not self.workers:
+            return None
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers, mp_context=multiprocessing.get_context('spawn'),
+                    initializer=_init_worker, initargs=(self.engine,),
+                )
+            return self._executor
+
+    def warm_up(self):
+        """启动全部工作进程并加载模型（首次识别不再等待模型加载）"""
+        executor = self._get_executor()
+        if executor is None:
+            if self.available:
+                _get_engine(self.engine)
+            return
+        wait([executor.submit(_ping) for _ in range(self.workers)], timeout=self.timeout)
+
+    def shutdown(self):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=True, cancel_futures=True)
+                self._executor = None
+
+    def _run(self, calls: List[tuple]) -> List[str]:
+        """执行一组 (函数, 参数...) 调用，按顺序返回结果；进程池模式下并行执行"""
+        if not self.available:
+            raise OCRError('OCR引擎未安装，请安装PaddleOCR或Tesseract OCR')
+        executor = self._get_executor()
+        if executor is None:
+            return [func(*args) for func, *args in calls]
+
+        futures = []
+        try:
+            for func, *args in calls:
+                if not self._slots.acquire(timeout=self.queue_timeout):
+                    raise OCRBusyError('OCR识别队列已满，请稍后重试')
+                try:
+                    future = executor.submit(func, *args)
+                except BaseException:
+                    self._slots.release()
+                    raise
+                future.add_done_callback(lambda _: self._slots.release())
+                futures.append(future)
+            return [future.result(timeout=self.timeout) for future in futures]
+        except BrokenProcessPool as exc:
+            # 工作进程异常退出（如内存不足被杀），丢弃进程池，下次调用重建
+            with self._lock:
+                if self._executor is executor:
+                    self._executor = None
+            raise OCRError(f'OCR工作进程异常退出: {exc}') from exc
+        finally:
+            for future in futures:
+                future.cancel()
+
+    def recognize_images(self, images: Iterable) -> List[str]:
+        """识别内存中的 PIL 图片，每张图片一段文本（按图片内容缓存）"""
+        images = list(images)
+        keys = [f'{CACHE_KEY_PREFIX}:{self.engine}:image:{_image_digest(image)}' for image in images]
+        cached = cache.get_many(keys) if self.use_cache else {}
+        missing = [index for index, key in enumerate(keys) if key not in cached]
+        if missing:
+            texts = self._run([(_ocr_image, self.engine, images[index]) for index in missing])
+            fresh = {keys[index]: text for index, text in zip(missing, texts)}
+            if self.use_cache:
+                cache.set_many(fresh, self.cache_timeout)
+            cached.update(fresh)
+        return [cached[key] for key in keys]
+
+    def recognize_file(self, path: str, max_pages: Optional[int] = None) -> List[str]:
+        """识别图片或 PDF 文件，每页一段文本；max_pages 只识别前几页（如发票只看第一页）"""
+        key = f'{CACHE_KEY_PREFIX}:{self.engine}:{self.dpi}:{max_pages or 0}:{file_digest(path)}'
+        pages = cache.get(key) if self.use_cache else None
+        if pages is not None:
+            return pages
+
+        if path.lower().endswith(PDF_EXTENSIONS):
+            count = _pdf_page_count(path)
+            if max_pages:
+                count = min(count, max_pages)
+            pages = self._run([(_ocr_pdf_page, self.engine, path, page, self.dpi) for page in range(1, count + 1)])
+        else:
+            from PIL import Image
+
+            with Image.open(path) as image:
+                image.load()
+                pages = self._run([(_ocr_image, self.engine, image)])
+        if self.use_cache:
+            cache.set(key, pages, self.cache_timeout)
+        return pages
+
+    def recognize_text(self, path: str, max_pages: Optional[int] = None) -> Optional[str]:
+        """识别文件并按页拼接文本；引擎不可用或没有识别出文字时返回 None"""
+        if not self.available:
+            logger.warning('OCR引擎未安装，无法使用OCR功能')
+            return None
+        text = '\n\n'.join(page for page in self.recognize_file(path, max_pages) if page)
+        return text or None
+
+    @property
+    def cache_timeout(self) -> int:
+        return getattr(settings, 'OCR_CACHE_TIMEOUT', 7 * 24 * 3600)
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_ocr_pool() -> OCRPool:
+    """获取当前进程的 OCR 进程池（单例，首次使用时创建）"""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = OCRPool(
+                    workers=getattr(settings, 'OCR_POOL_WORKERS', 2),
+                    max_pending=getattr(settings, 'OCR_POOL_MAX_PENDING', 0) or None,
+                    dpi=getattr(settings, 'OCR_PDF_DPI', 300),
+                    queue_timeout=getattr(settings, 'OCR_POOL_QUEUE_TIMEOUT', 30),
+                    timeout=getattr(settings, 'OCR_TIMEOUT', 300),
+                )
+    return _pool